@@ -0,0 +1,142 @@
+"""
+벤치마크: 내용 주소 기반 저장소 (blob_store.py) - 같은 파일을 여러 방에 공유할 때
+- upload: 첫 업로드 (/api/files/upload)
+- re-upload: 같은 내용을 다른 방에서 다시 업로드 (본문은 전송하지만 디스크에 새로 쓰지 않음)
+- sha256 share: 세션 생성 시 sha256을 보내고 서버가 고른 구간의 증명 값으로 본문 없이 등록 (/uploads/{id}/claim)
+- same name: 같은 이름, 다른 내용 업로드 (기존에는 먼저 올린 파일을 덮어씀)
+
+방 --rooms개에 공유한 뒤 업로드 디렉토리의 실제 디스크 사용량과 참조 해제 후 파일이 남는지 확인합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/blob_dedup.py --size 256 --rooms 5
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "LOG_LEVEL": "WARNING"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(600):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+def disk_usage(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.stat(os.path.join(root, name)).st_blocks * 512
+    return total
+
+
+def upload(client: httpx.Client, name: str, source: str, room_id: str) -> tuple:
+    start = time.perf_counter()
+    with open(source, "rb") as f:
+        r = client.post("/api/files/upload", params={"room_id": room_id},
+                        files={"file": (name, f, "application/octet-stream")})
+    r.raise_for_status()
+    return time.perf_counter() - start, r.json()
+
+
+def share(client: httpx.Client, name: str, source: str, digest: str, room_id: str) -> tuple:
+    """세션 생성 시 sha256을 보내고 서버가 고른 구간으로 소유 증명"""
+    start = time.perf_counter()
+    r = client.post("/api/files/uploads", json={"filename": name, "size": os.path.getsize(source),
+                                                "sha256": digest, "room_id": room_id})
+    r.raise_for_status()
+    session = r.json()
+    dedup = session["dedup"]
+    with open(source, "rb") as f:
+        f.seek(dedup["offset"])
+        span = f.read(dedup["length"])
+    r = client.post(f"/api/files/uploads/{session['upload_id']}/claim",
+                    json={"proof": hashlib.sha256(bytes.fromhex(dedup["nonce"]) + span).hexdigest()})
+    r.raise_for_status()
+    return time.perf_counter() - start, r.json()
+
+
+def make_source(path: str, size: int) -> str:
+    sha256 = hashlib.sha256()
+    with open(path, "wb") as f:
+        for _ in range(size // MB):
+            block = os.urandom(MB)
+            f.write(block)
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=256, help="MB")
+    parser.add_argument("--rooms", type=int, default=5)
+    parser.add_argument("--port", type=int, default=7942)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    source = os.path.join(workdir, "source.bin")
+    other = os.path.join(workdir, "other.bin")
+    digest = make_source(source, args.size * MB)
+    make_source(other, args.size * MB)
+    uploads = os.path.join(workdir, "uploads")
+
+    proc = start_server(args.port, workdir)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=600) as client:
+            print(f"{args.size}MB 파일을 방 {args.rooms}개에 공유")
+            elapsed, r = upload(client, "shared.bin", source, "room-0")
+            print(f"  [      upload] {elapsed * 1000:8.1f}ms, deduplicated={r['deduplicated']}")
+
+            for i in range(1, args.rooms):
+                if i % 2:
+                    elapsed, r = upload(client, "shared.bin", source, f"room-{i}")
+                    label = "re-upload"
+                else:
+                    elapsed, r = share(client, "shared.bin", source, digest, f"room-{i}")
+                    label = "sha256 share"
+                ok = "OK" if r["hash"] == digest else "해시 불일치"
+                print(f"  [{label:>12}] {elapsed * 1000:8.1f}ms, deduplicated={r['deduplicated']}, "
+                      f"참조 방 {len(r['rooms'])}개, {ok}")
+
+            used = disk_usage(uploads)
+            print(f"디스크 사용량: {used / MB:.0f}MB (이름 기준 저장이면 방마다 덮어써 {args.size}MB지만 "
+                  f"다른 이름이면 {args.size * args.rooms}MB)")
+
+            _, r = upload(client, "shared.bin", other, "room-0")
+            # 서버 작업 디렉토리 기준 blob 경로 (메타데이터 응답에는 경로가 없음)
+            blob = os.path.join(uploads, "blobs", digest[:2], digest[2:4], digest)
+            kept = os.path.exists(blob)
+            print(f"같은 이름, 다른 내용 업로드: 새 file_id {r['file_id']}, 먼저 올린 파일 유지={kept}")
+
+            for i in range(args.rooms):
+                r = client.delete(f"/api/files/delete/{digest[:16]}", params={"room_id": f"room-{i}"}).json()
+            print(f"방 {args.rooms}개 모두 참조 해제 후 파일 남음={os.path.exists(blob)} ({r['message']})")
+            stats = client.get("/api/stats").json()["blob_store"]
+            print(f"blob_store: {stats}")
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
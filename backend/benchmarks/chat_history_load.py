@@ -0,0 +1,176 @@
+"""
+벤치마크: 채팅 기록 저장 - 메시지별 INSERT vs 일괄 기록, 입장 재생 (링 버퍼 vs DB)
+- per-message: chat_message마다 run_db로 INSERT 한 트랜잭션 (단순 구현)
+- batched: ChatHistory.append (CHAT_FLUSH_INTERVAL 동안 모아 executemany 한 트랜잭션)
+--rooms개 방에 초당 --rate건씩 --seconds 동안 메시지를 보내며 처리량, DB 트랜잭션 수,
+이벤트 루프 지연(1ms 주기 프로브)을 비교합니다. 이어서 기록이 --history건 쌓인 방에 입장할 때의
+최근 메시지 재생 시간(버퍼 적중 vs DB 조회)과 커서 페이지 조회의 쿼리 계획을 확인합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/chat_history_load.py --rooms 50 --rate 2000
+"""
+
+import argparse
+import asyncio
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_NAME"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from chat_history import ChatHistory, _insert_messages  # noqa: E402
+from database import DATABASE_NAME, get_db, run_db  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+
+PROBE_INTERVAL = 0.001
+
+
+def reset():
+    with get_db() as conn:
+        run_migrations(conn)
+        conn.execute("DELETE FROM chat_messages")
+
+
+def message(i: int) -> dict:
+    return {'userId': str(i % 97), 'username': f'user{i % 97}', 'content': f'message {i} ' + 'x' * 60,
+            'timestamp': '2026-01-01T00:00:00Z'}
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def send_load(mode: str, rooms: int, rate: int, seconds: float) -> dict:
+    reset()
+    history = ChatHistory()
+    transactions = 0
+    inflight = set()
+
+    async def insert_one(room_id: str, i: int):
+        nonlocal transactions
+        m = message(i)
+        await run_db(_insert_messages, [(room_id, i, m['userId'], m['username'], m['content'], m['timestamp'])])
+        transactions += 1
+
+    lags, stop = [], asyncio.Event()
+    prober = asyncio.ensure_future(probe(lags, stop))
+    total = int(rate * seconds)
+    start = time.perf_counter()
+    for i in range(total):
+        # 초당 rate건이 되도록 1ms 단위로 나눠 보냄
+        target = start + i / rate
+        delay = target - time.perf_counter()
+        if delay > 0.001:
+            await asyncio.sleep(delay)
+        room_id = f"room-{i % rooms}"
+        if mode == "batched":
+            history.append(room_id, message(i))
+        else:
+            task = asyncio.ensure_future(insert_one(room_id, i))
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+    if mode == "batched":
+        await history.flush()
+        transactions = history.flushes
+    else:
+        await asyncio.gather(*inflight)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await prober
+
+    with get_db() as conn:
+        stored = conn.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0]
+    lags.sort()
+    return {
+        "stored": stored,
+        "elapsed": elapsed,
+        "throughput": stored / elapsed,
+        "transactions": transactions,
+        "lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000,
+        "lag_max_ms": lags[-1] * 1000,
+    }
+
+
+async def replay_load(history_rows: int, joins: int) -> dict:
+    reset()
+    room_id = "busy-room"
+    rows = [(room_id, ts, '1', 'user1', f'old {ts}', None) for ts in range(1, history_rows + 1)]
+    await run_db(_insert_messages, rows)
+
+    history = ChatHistory()
+    first = time.perf_counter()
+    await history.recent(room_id)  # 방 활성화 - DB에서 한 번 채움
+    first = time.perf_counter() - first
+
+    buffered = []
+    for _ in range(joins):
+        start = time.perf_counter()
+        await history.recent(room_id)
+        buffered.append(time.perf_counter() - start)
+
+    from_db = []
+    for _ in range(joins):
+        start = time.perf_counter()
+        await history.recent(room_id, from_store=True)
+        from_db.append(time.perf_counter() - start)
+
+    page = await history.history(room_id, before=history_rows // 2, limit=50)
+    return {
+        "first_ms": first * 1000,
+        "buffer_us": statistics.median(buffered) * 1e6,
+        "db_us": statistics.median(from_db) * 1e6,
+        "db_loads": history.replay_loads,
+        "page": (page["messages"][0]["ts"], page["messages"][-1]["ts"], page["nextCursor"]),
+    }
+
+
+def query_plan() -> list:
+    conn = sqlite3.connect(DATABASE_NAME)
+    plans = []
+    for clause, params in (("", ()), ("AND ts < ?", (1000,))):
+        rows = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT room_id, ts, user_id, username, content, client_timestamp "
+            f"FROM chat_messages WHERE room_id = ? {clause} ORDER BY ts DESC LIMIT ?",
+            ("busy-room", *params, 50),
+        ).fetchall()
+        plans.append(" | ".join(row[-1] for row in rows))
+    conn.close()
+    return plans
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=50)
+    parser.add_argument("--rate", type=int, default=2000, help="초당 메시지 수 (모든 방 합계)")
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--history", type=int, default=200000, help="재생 측정용 방의 기록 건수")
+    parser.add_argument("--joins", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"방 {args.rooms}개, 초당 {args.rate}건 x {args.seconds:.0f}초")
+    for mode in ("per-message", "batched"):
+        r = asyncio.run(send_load(mode, args.rooms, args.rate, args.seconds))
+        print(f"[{mode:>11}] 기록 {r['stored']}건 / {r['elapsed']:.2f}초 ({r['throughput']:.0f}건/초), "
+              f"트랜잭션 {r['transactions']}회, 루프 지연 p99 {r['lag_p99_ms']:.1f}ms / 최대 {r['lag_max_ms']:.1f}ms")
+
+    r = asyncio.run(replay_load(args.history, args.joins))
+    print(f"입장 재생 (기록 {args.history}건 방, 최근 50건): 첫 입장(버퍼 채움) {r['first_ms']:.2f}ms, "
+          f"이후 버퍼 {r['buffer_us']:.0f}us vs DB {r['db_us']:.0f}us (중앙값), DB 조회 {r['db_loads']}회")
+    print(f"커서 페이지 (before={args.history // 2}): ts {r['page'][0]}..{r['page'][1]}, nextCursor {r['page'][2]}")
+
+    plans = query_plan()
+    for plan in plans:
+        print(f"쿼리 계획: {plan}")
+    if any("USING INDEX idx_chat_messages_room_ts" not in plan or "TEMP B-TREE" in plan for plan in plans):
+        print("인덱스를 사용하지 않음")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
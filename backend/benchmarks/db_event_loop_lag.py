@@ -0,0 +1,117 @@
+"""
+벤치마크: 동시 방 참가 시 이벤트 루프 지연 측정
+- sync: 코루틴 안에서 get_db()로 직접 UPDATE (기존 방식)
+- async: run_db()로 DB 스레드에서 UPDATE
+다른 쓰기 작업이 주기적으로 쓰기 락을 잡고 있는 상황(느린 fsync, 락 경합)을 함께 재현합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/db_event_loop_lag.py --joins 500 --window 0.5 --writer-hold-ms 20
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["DATABASE_NAME"] = os.path.join(tempfile.mkdtemp(), "bench.db")
+
+from database import get_db, run_db  # noqa: E402
+
+PROBE_INTERVAL = 0.001  # 1ms마다 루프가 제때 깨어나는지 확인
+
+
+def setup(rooms: int):
+    with get_db() as conn:
+        conn.execute("CREATE TABLE IF NOT EXISTS meetings (id INTEGER PRIMARY KEY, status TEXT)")
+        conn.execute("DELETE FROM meetings")
+        conn.executemany("INSERT INTO meetings (id, status) VALUES (?, 'inactive')", [(i,) for i in range(rooms)])
+
+
+def update_status(conn, room_id: int):
+    conn.execute("UPDATE meetings SET status = 'active' WHERE id = ?", (room_id,))
+
+
+async def join_sync(room_id: int, delay: float):
+    await asyncio.sleep(delay)
+    with get_db() as conn:
+        update_status(conn, room_id)
+
+
+async def join_async(room_id: int, delay: float):
+    await asyncio.sleep(delay)
+    await run_db(update_status, room_id)
+
+
+def contending_writer(hold: float, stop: threading.Event):
+    """쓰기 락을 hold초 동안 잡았다 놓기를 반복"""
+    while not stop.is_set():
+        with get_db() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("UPDATE meetings SET status = status WHERE id = 0")
+            time.sleep(hold)
+        time.sleep(hold)
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    """예정 시각보다 얼마나 늦게 깨어나는지 기록"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+async def run(mode: str, joins: int, window: float, writer_hold: float) -> dict:
+    join = join_sync if mode == "sync" else join_async
+    lags = []
+    stop = asyncio.Event()
+    writer_stop = threading.Event()
+    writer = threading.Thread(target=contending_writer, args=(writer_hold, writer_stop))
+    if writer_hold > 0:
+        writer.start()
+    probe_task = asyncio.create_task(probe(lags, stop))
+    await asyncio.sleep(0.01)
+
+    start = time.perf_counter()
+    # 참가 요청이 window초 동안 고르게 도착
+    await asyncio.gather(*(join(i % 50, window * i / joins) for i in range(joins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await probe_task
+    writer_stop.set()
+    if writer.is_alive():
+        writer.join()
+    lags.sort()
+    return {
+        "mode": mode,
+        "elapsed_ms": elapsed * 1000,
+        "samples": len(lags),
+        "p50_lag_ms": statistics.median(lags) * 1000,
+        "p99_lag_ms": lags[int(len(lags) * 0.99) - 1] * 1000,
+        "max_lag_ms": lags[-1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--joins", type=int, default=500)
+    parser.add_argument("--window", type=float, default=0.5, help="참가 요청이 도착하는 시간 (초)")
+    parser.add_argument("--writer-hold-ms", type=float, default=20, help="경합 쓰기가 락을 잡는 시간, 0이면 비활성")
+    args = parser.parse_args()
+
+    setup(50)
+    for mode in ("sync", "async"):
+        result = asyncio.run(run(mode, args.joins, args.window, args.writer_hold_ms / 1000))
+        print(
+            f"[{result['mode']:>5}] joins={args.joins} 총 {result['elapsed_ms']:.1f}ms | "
+            f"루프 지연 p50={result['p50_lag_ms']:.2f}ms p99={result['p99_lag_ms']:.2f}ms "
+            f"max={result['max_lag_ms']:.2f}ms (probe {result['samples']}회)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+스트레스 테스트: 방 10,000개에서 대량 연결 해제
+- legacy: 연결 해제마다 room_participants 전체를 훑는 기존 안전장치 방식
+- indexed: RoomMembership 역인덱스(sid -> rooms)로 참가 중인 방만 처리
+무작위 참가/퇴장을 섞은 뒤 전원 연결 해제하고, 양방향 인덱스 일관성을 검사합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/disconnect_stress.py --rooms 10000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from room_state import RoomMembership  # noqa: E402
+
+
+def legacy_disconnect(room_participants: dict, sid: str):
+    """기존 disconnect의 안전장치 루프와 동일한 전체 스캔"""
+    for room_id, participants in list(room_participants.items()):
+        if sid in participants:
+            participants.discard(sid)
+            if not participants:
+                del room_participants[room_id]
+
+
+def indexed_disconnect(membership: RoomMembership, sid: str):
+    for room_id in membership.rooms_of(sid):
+        membership.leave(sid, room_id)
+
+
+def build(rooms: int, per_room: int, seed: int):
+    rng = random.Random(seed)
+    membership = RoomMembership()
+    legacy = {}
+    sids = []
+    for r in range(rooms):
+        room_id = str(r)
+        for _ in range(per_room):
+            sid = f"sid-{len(sids)}"
+            sids.append(sid)
+            membership.join(sid, room_id, {"username": sid})
+            legacy.setdefault(room_id, set()).add(sid)
+            # 일부 사용자는 여러 방에 동시 참가
+            if rng.random() < 0.1:
+                other = str(rng.randrange(rooms))
+                membership.join(sid, other, {"username": sid})
+                legacy.setdefault(other, set()).add(sid)
+    # 무작위 퇴장을 섞어 인덱스가 어긋나지 않는지 확인
+    for sid in rng.sample(sids, len(sids) // 10):
+        for room_id in membership.rooms_of(sid)[:1]:
+            membership.leave(sid, room_id)
+            legacy[room_id].discard(sid)
+            if not legacy[room_id]:
+                del legacy[room_id]
+    membership.check_invariants()
+    return membership, legacy, sids
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rooms", type=int, default=10_000)
+    parser.add_argument("--per-room", type=int, default=3)
+    parser.add_argument("--legacy-sample", type=int, default=500, help="legacy 방식은 이 수만큼만 측정 후 환산")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    membership, legacy, sids = build(args.rooms, args.per_room, args.seed)
+    order = list(sids)
+    random.Random(args.seed).shuffle(order)
+    print(f"방 {len(membership.rooms)}개, 연결 {len(sids)}개")
+
+    start = time.perf_counter()
+    for sid in order[:args.legacy_sample]:
+        legacy_disconnect(legacy, sid)
+    legacy_per = (time.perf_counter() - start) / args.legacy_sample
+
+    start = time.perf_counter()
+    for i, sid in enumerate(order):
+        indexed_disconnect(membership, sid)
+        if i % 5000 == 0:
+            membership.check_invariants()
+    indexed_per = (time.perf_counter() - start) / len(order)
+
+    membership.check_invariants()
+    assert not membership.rooms and not membership.sid_rooms and not membership.rosters, "해제 후 상태가 남아 있음"
+
+    print(f"[  legacy] 연결 해제당 {legacy_per * 1e6:.1f}us → 전원 해제 환산 {legacy_per * len(order):.1f}s")
+    print(f"[ indexed] 연결 해제당 {indexed_per * 1e6:.1f}us → 전원 해제 {indexed_per * len(order):.3f}s")
+    print("[OK] 인덱스 일관성 유지, 모든 방 정리됨")
+
+
+if __name__ == "__main__":
+    main()
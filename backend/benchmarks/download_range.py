@@ -0,0 +1,132 @@
+"""
+벤치마크: 파일 다운로드 Range / 조건부 GET (/api/files/download)
+- 이어 받기: --drop-at 지점에서 끊긴 뒤 처음부터 다시 받기 vs Range로 나머지만 받기
+- 재검증: 이미 받은 파일을 다시 요청할 때 전체 전송 vs If-None-Match → 304
+- 탐색: 동영상 탐색처럼 임의 위치에서 --seek-size씩 --seeks번 읽기 (Range 206)
+- 여러 범위: 한 요청에 범위 여러 개 (multipart/byteranges)
+
+전송 바이트, 걸린 시간, 받은 내용이 원본과 같은지 비교합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/download_range.py --size 256
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "LOG_LEVEL": "WARNING"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(600):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+def download(client: httpx.Client, url: str, headers: dict = None, limit: int = None) -> tuple:
+    """(상태 코드, 받은 바이트, 응답 헤더) - limit만큼 받으면 연결을 끊음"""
+    body = bytearray()
+    with client.stream("GET", url, headers=headers or {}) as r:
+        for chunk in r.iter_bytes():
+            body += chunk
+            if limit is not None and len(body) >= limit:
+                del body[limit:]
+                break
+        return r.status_code, bytes(body), r.headers
+
+
+def report(name: str, elapsed: float, sent: int, ok: bool):
+    print(f"  [{name:>22}] {elapsed * 1000:8.1f}ms, 전송 {sent / MB:8.2f}MB, {'OK' if ok else '불일치'}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=256, help="MB")
+    parser.add_argument("--drop-at", type=float, default=0.7)
+    parser.add_argument("--seeks", type=int, default=50)
+    parser.add_argument("--seek-size", type=int, default=1, help="MB")
+    parser.add_argument("--port", type=int, default=7943)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    data = os.urandom(args.size * MB)
+    digest = hashlib.sha256(data).hexdigest()
+    proc = start_server(args.port, workdir)
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{args.port}", timeout=600) as client:
+            r = client.post("/api/files/upload", files={"file": ("video.bin", data, "application/octet-stream")})
+            url = f"/api/files/download/{r.json()['file_id']}"
+            drop = int(len(data) * args.drop_at)
+            print(f"{args.size}MB, {args.drop_at:.0%} 지점에서 끊김")
+
+            print("이어 받기")
+            start = time.perf_counter()
+            _, first, _ = download(client, url, limit=drop)
+            _, again, _ = download(client, url)
+            report("처음부터 다시", time.perf_counter() - start, len(first) + len(again), again == data)
+
+            start = time.perf_counter()
+            _, first, headers = download(client, url, limit=drop)
+            status, rest, _ = download(client, url, {"Range": f"bytes={len(first)}-",
+                                                     "If-Range": headers["etag"]})
+            report(f"Range ({status})", time.perf_counter() - start, len(first) + len(rest), first + rest == data)
+
+            print("재검증")
+            start = time.perf_counter()
+            _, body, headers = download(client, url)
+            report("전체 다시 받기", time.perf_counter() - start, len(body), body == data)
+            start = time.perf_counter()
+            status, body, _ = download(client, url, {"If-None-Match": headers["etag"]})
+            report(f"If-None-Match ({status})", time.perf_counter() - start, len(body),
+                   headers["etag"] == f'"{digest}"')
+
+            print(f"탐색 ({args.seek_size}MB x {args.seeks}회)")
+            rng = random.Random(0)
+            seek = args.seek_size * MB
+            offsets = [rng.randrange(0, len(data) - seek) for _ in range(args.seeks)]
+            start = time.perf_counter()
+            sent, ok = 0, True
+            for offset in offsets:
+                status, body, _ = download(client, url, {"Range": f"bytes={offset}-{offset + seek - 1}"})
+                sent += len(body)
+                ok = ok and status == 206 and body == data[offset:offset + seek]
+            elapsed = time.perf_counter() - start
+            report("Range 206", elapsed, sent, ok)
+            print(f"  탐색 1회 평균 {elapsed / args.seeks * 1000:.1f}ms (전체 받기 없이)")
+
+            spans = sorted(offsets[:8])
+            spec = ",".join(f"{o}-{o + 1023}" for o in spans)
+            start = time.perf_counter()
+            status, body, headers = download(client, url, {"Range": f"bytes={spec}"})
+            ok = status == 206 and headers["content-type"].startswith("multipart/byteranges") and all(
+                data[o:o + 1024] in body for o in spans)
+            report(f"여러 범위 8개 ({status})", time.perf_counter() - start, len(body), ok)
+
+            print(f"downloads: {client.get('/api/stats').json()['downloads']}")
+    finally:
+        proc.terminate()
+        proc.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+벤치마크: 파일 메타데이터 색인 (file_index.FileIndex)
+- dict: 기존 프로세스 메모리 file_metadata 조회 (재시작하면 사라짐, 기준선)
+- cold: 캐시 없이 SQLite 기본 키 조회 (cache_size=0)
+- LRU: 같은 --hot개 파일을 반복 조회 (/metadata, /download 폴링)
+- 등록 처리량과 --files건이 만료되었을 때 정리(sweep) 시간
+
+임시 디렉토리에 DB와 blob 저장소를 만들어 측정합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/file_index_lookup.py --files 20000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+WORKDIR = tempfile.mkdtemp()
+os.environ["DATABASE_NAME"] = os.path.join(WORKDIR, "bench.db")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blob_store import BlobStore  # noqa: E402
+from database import get_db, shutdown_db  # noqa: E402
+from file_index import FileIndex  # noqa: E402
+from migrations import run_migrations  # noqa: E402
+
+
+async def run(files: int, lookups: int, hot: int):
+    blobs = BlobStore(Path(WORKDIR) / "blobs")
+    digests = [hashlib.sha256(str(i).encode()).hexdigest() for i in range(files)]
+    for digest in digests:
+        path = blobs.path_for(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.touch()
+
+    index = FileIndex(blobs, ttl=3600)
+    start = time.perf_counter()
+    for i, digest in enumerate(digests):
+        await index.register(digest, f"file{i}.bin", 1024, f"room-{i % 100}")
+    elapsed = time.perf_counter() - start
+    print(f"등록: {files}건 {elapsed:.2f}초 ({files / elapsed:.0f}건/s)")
+
+    file_ids = [d[:16] for d in digests]
+    metadata = {file_id: {"hash": d} for file_id, d in zip(file_ids, digests)}
+    start = time.perf_counter()
+    for i in range(lookups):
+        metadata.get(file_ids[i % hot])
+    print(f"  [  dict] {(time.perf_counter() - start) / lookups * 1e6:7.2f}us/조회")
+
+    cold = FileIndex(blobs, ttl=3600, cache_size=0)
+    start = time.perf_counter()
+    for i in range(lookups):
+        await cold.get(file_ids[(i * 7919) % files])
+    print(f"  [  cold] {(time.perf_counter() - start) / lookups * 1e6:7.2f}us/조회 (SQLite 기본 키)")
+
+    lru = FileIndex(blobs, ttl=3600)
+    start = time.perf_counter()
+    for i in range(lookups):
+        await lru.get(file_ids[i % hot])
+    stats = lru.stats()
+    print(f"  [   LRU] {(time.perf_counter() - start) / lookups * 1e6:7.2f}us/조회 "
+          f"(hot {hot}개, 적중률 {stats['hit_rate']:.1%})")
+
+    start = time.perf_counter()
+    room = await lru.room_files("room-7")
+    print(f"방 목록: {len(room)}건 {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    start = time.perf_counter()
+    await index.sweep(now=time.time() + 7200)
+    elapsed = time.perf_counter() - start
+    print(f"만료 정리: {index.stats()['expired']}건 (blob {index.stats()['blobs_removed']}개 삭제) {elapsed:.2f}초")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=20000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    parser.add_argument("--hot", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        with get_db() as conn:
+            run_migrations(conn)
+        asyncio.run(run(args.files, args.lookups, args.hot))
+    finally:
+        shutdown_db()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
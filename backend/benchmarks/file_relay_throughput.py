@@ -0,0 +1,192 @@
+"""
+벤치마크: 서버 경유 파일 중계 처리량 (MB/s)
+- legacy: file_chunk {roomId, chunkIndex, data} dict, 16KB 청크, 청크마다 10ms 대기 (기존 FileTransfer.tsx)
+- binary: file_chunk_bin (transferId, chunkIndex, bytes), 협상된 청크 크기 + 크레딧 기반 흐름 제어
+
+서버(main:combined_app)를 임시 디렉토리에서 띄우고, 수신자는 별도 프로세스로 실행합니다.
+처리량은 송신 시작부터 모든 수신자가 마지막 바이트를 받을 때까지로 측정합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/file_relay_throughput.py --size-mb 1024 --receivers 5
+(legacy는 고정 대기 때문에 느리므로 --legacy-mb 크기로 측정)
+"""
+
+import argparse
+import asyncio
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOM_ID = "bench-relay"
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+def receiver_main(url: str, name: str, ready, results):
+    async def run():
+        client = socketio.AsyncClient()
+        state = {"bytes": 0, "transfer": None}
+        done = asyncio.Event()
+
+        @client.on("file_transfer_start")
+        async def on_start(data):
+            state["transfer"] = data.get("transferId")
+            state["bytes"] = 0
+
+        @client.on("file_chunk")
+        async def on_chunk(data):
+            state["bytes"] += len(data["data"])
+
+        @client.on("file_chunk_bin")
+        async def on_chunk_bin(transfer_id, chunk_index, payload):
+            state["bytes"] += len(payload)
+            await client.emit("file_chunk_ack", (transfer_id, chunk_index))
+
+        @client.on("file_transfer_end")
+        async def on_end(data):
+            done.set()
+
+        await client.connect(url, transports=["websocket"])
+        await client.emit("join_room", {"roomId": ROOM_ID, "userInfo": {"username": name}})
+        await client.emit("file_receiver", {"roomId": ROOM_ID, "ready": True})
+        await asyncio.sleep(0.2)
+        ready.put(name)
+        while True:
+            await done.wait()
+            done.clear()
+            results.put((name, state["bytes"]))
+
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+
+
+async def send(url: str, mode: str, size: int, chunk_size: int, sleep: float):
+    client = socketio.AsyncClient()
+    credit = {"acked": -1}
+    wake = asyncio.Event()
+
+    @client.on("file_credit")
+    async def on_credit(transfer_id, acked_index):
+        credit["acked"] = max(credit["acked"], acked_index)
+        wake.set()
+
+    await client.connect(url, transports=["websocket"])
+    await client.emit("join_room", {"roomId": ROOM_ID, "userInfo": {"username": "sender"}})
+    await asyncio.sleep(0.2)
+
+    payload_cache = {}
+
+    def chunk(length):
+        if length not in payload_cache:
+            payload_cache[length] = os.urandom(length)
+        return payload_cache[length]
+
+    if mode == "binary":
+        negotiated = await client.call("file_transfer_start", {
+            "roomId": ROOM_ID, "fileName": "bench.bin", "fileSize": size,
+            "binary": True, "chunkSize": chunk_size,
+        })
+        transfer_id = negotiated["transferId"]
+        chunk_size, total, window = negotiated["chunkSize"], negotiated["totalChunks"], negotiated["window"]
+        for i in range(total):
+            while i - credit["acked"] > window:
+                wake.clear()
+                await wake.wait()
+            length = min(chunk_size, size - i * chunk_size)
+            await client.emit("file_chunk_bin", (transfer_id, i, chunk(length)))
+        await client.emit("file_transfer_end", {"roomId": ROOM_ID, "transferId": transfer_id})
+    else:
+        total = -(-size // chunk_size)
+        await client.emit("file_transfer_start", {
+            "roomId": ROOM_ID, "fileName": "bench.bin", "fileSize": size, "totalChunks": total,
+        })
+        for i in range(total):
+            length = min(chunk_size, size - i * chunk_size)
+            await client.emit("file_chunk", {"roomId": ROOM_ID, "chunkIndex": i, "data": chunk(length)})
+            if sleep:
+                await asyncio.sleep(sleep)
+        await client.emit("file_transfer_end", {"roomId": ROOM_ID})
+
+    return client
+
+
+async def run_mode(url, mode, size, chunk_size, sleep, receivers, results):
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    client = await send(url, mode, size, chunk_size, sleep)
+    # 송신자 이벤트 루프가 계속 돌아야 대기 중인 패킷이 전송됨
+    received = [await loop.run_in_executor(None, results.get, True, max(600, size / 1e6)) for _ in range(receivers)]
+    elapsed = time.perf_counter() - start
+    await client.disconnect()
+
+    for name, count in received:
+        assert count == size, f"{name}: {count}/{size} bytes 수신"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=int, default=1024, help="binary 모드 전송 크기")
+    parser.add_argument("--legacy-mb", type=int, default=32, help="legacy 모드 전송 크기 (고정 대기로 느림)")
+    parser.add_argument("--receivers", type=int, default=5)
+    parser.add_argument("--chunk-kb", type=int, default=256, help="binary 모드 요청 청크 크기")
+    parser.add_argument("--port", type=int, default=7797)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as workdir:
+        server = start_server(args.port, workdir)
+        ctx = mp.get_context("spawn")
+        ready, results = ctx.Queue(), ctx.Queue()
+        procs = [ctx.Process(target=receiver_main, args=(url, f"r{i}", ready, results), daemon=True)
+                 for i in range(args.receivers)]
+        try:
+            for proc in procs:
+                proc.start()
+            for _ in procs:
+                ready.get(timeout=30)
+
+            legacy_size = args.legacy_mb * 1024 * 1024
+            elapsed = asyncio.run(run_mode(url, "legacy", legacy_size, 16 * 1024, 0.01, args.receivers, results))
+            print(f"[ legacy] {args.legacy_mb}MB → 수신자 {args.receivers}명: {elapsed:.2f}s, "
+                  f"{args.legacy_mb / elapsed:.2f} MB/s (수신자당)")
+
+            size = args.size_mb * 1024 * 1024
+            elapsed = asyncio.run(run_mode(url, "binary", size, args.chunk_kb * 1024, 0, args.receivers, results))
+            print(f"[ binary] {args.size_mb}MB → 수신자 {args.receivers}명: {elapsed:.2f}s, "
+                  f"{args.size_mb / elapsed:.2f} MB/s (수신자당), 총 중계 {args.size_mb * args.receivers / elapsed:.2f} MB/s")
+
+            stats = httpx.get(f"{url}/api/stats").json()["file_relay"]
+            print(f"[  stats] 청크 {stats['chunks']}개, 크레딧 {stats['credits']}회, "
+                  f"청크 {stats['max_chunk'] // 1024}KB, 윈도우 {stats['window']}")
+        finally:
+            for proc in procs:
+                proc.terminate()
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+벤치마크: 20명이 동시에 입장하는 풀 메시에서 ICE 후보 묶음 전송 효과
+- baseline: 후보마다 webrtc_ice_candidate, 서버 묶음 끔 (ICE_BATCH_WINDOW=0)
+- batched: 클라이언트가 5ms 동안 모아 webrtc_ice_candidates 전송 + 서버 쌍별 묶음 (기본 설정)
+
+각 쌍은 sid가 작은 쪽이 offer를 보내고, 양쪽 모두 SDP 전송 직후부터 후보를 수집합니다.
+수집 시점은 실제 브라우저와 비슷하게 host 3개(즉시), srflx 2개(20~40ms), relay 1개(60~120ms)로 흉내 냅니다.
+한 쌍의 연결 준비 시간 = 동시 입장 시작부터 양쪽이 상대 SDP와 후보 6개를 모두 받을 때까지.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/ice_batching_mesh.py --peers 20
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOM_ID = "bench-mesh"
+GATHER_SCHEDULE = [(0.0, 0.002)] * 3 + [(0.020, 0.040)] * 2 + [(0.060, 0.120)]  # (최소, 최대) 지연
+CANDIDATES_PER_PEER = len(GATHER_SCHEDULE)
+CLIENT_BATCH_MS = 5
+
+MODES = {
+    "baseline": {"env": {"ICE_BATCH_WINDOW": "0"}, "batch": False},
+    "batched": {"env": {}, "batch": True},
+}
+
+
+def start_server(port: int, workdir: str, extra_env: dict) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, **extra_env}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+class Peer:
+    """시그널링만 흉내 내는 메시 참가자"""
+
+    def __init__(self, name: str, batch: bool, rng: random.Random, counters: dict, start_ref: dict):
+        self.name = name
+        self.batch = batch
+        self.rng = rng
+        self.counters = counters
+        self.start_ref = start_ref
+        self.client = socketio.AsyncClient()
+        self.sid = None
+        self.remote = {}  # peer sid -> {"sdp": bool, "candidates": int}
+        self.done = {}  # peer sid -> 완료 시각
+        self.pending = {}  # 대상 sid -> 모아 둔 후보
+        self.tasks = []
+        self.all_done = asyncio.Event()
+        self.expected = 0
+
+        self.client.on("current_participants", self.on_participants)
+        self.client.on("user_joined", self.on_user_joined)
+        self.client.on("webrtc_offer", self.on_offer)
+        self.client.on("webrtc_answer", self.on_answer)
+        self.client.on("webrtc_ice_candidate", self.on_candidate)
+        self.client.on("webrtc_ice_candidates", self.on_candidates)
+
+    async def connect(self, url: str):
+        await self.client.connect(url, transports=["websocket"])
+        self.sid = self.client.get_sid()
+
+    async def join(self):
+        await self.client.emit("join_room", {
+            "roomId": ROOM_ID, "userInfo": {"username": self.name}, "iceBatch": self.batch,
+        })
+
+    def state(self, peer):
+        return self.remote.setdefault(peer, {"sdp": False, "candidates": 0})
+
+    async def meet(self, peer):
+        # sid가 작은 쪽이 offer 전송
+        if peer != self.sid and self.sid < peer and "offered" not in self.state(peer):
+            self.state(peer)["offered"] = True
+            await self.client.emit("webrtc_offer", {"to": peer, "offer": {"type": "offer", "sdp": "v=0"}})
+            self.gather(peer)
+
+    async def on_participants(self, participants):
+        for participant in participants:
+            await self.meet(participant["userId"])
+
+    async def on_user_joined(self, data):
+        await self.meet(data["userId"])
+
+    async def on_offer(self, data):
+        peer = data["from"]
+        self.counters["events"] += 1
+        self.state(peer)["sdp"] = True
+        await self.client.emit("webrtc_answer", {"to": peer, "answer": {"type": "answer", "sdp": "v=0"}})
+        self.gather(peer)
+        self.check(peer)
+
+    async def on_answer(self, data):
+        peer = data["from"]
+        self.counters["events"] += 1
+        self.state(peer)["sdp"] = True
+        self.check(peer)
+
+    async def on_candidate(self, data):
+        self.counters["events"] += 1
+        self.counters["ice_events"] += 1
+        self.state(data["from"])["candidates"] += 1
+        self.check(data["from"])
+
+    async def on_candidates(self, data):
+        self.counters["events"] += 1
+        self.counters["ice_events"] += 1
+        self.state(data["from"])["candidates"] += len(data["candidates"])
+        self.check(data["from"])
+
+    def check(self, peer):
+        state = self.state(peer)
+        if peer not in self.done and state["sdp"] and state["candidates"] >= CANDIDATES_PER_PEER:
+            self.done[peer] = time.perf_counter() - self.start_ref["t"]
+            if len(self.done) >= self.expected:
+                self.all_done.set()
+
+    def gather(self, peer):
+        for i, (low, high) in enumerate(GATHER_SCHEDULE):
+            delay = self.rng.uniform(low, high)
+            self.tasks.append(asyncio.ensure_future(self.emit_candidate(peer, i, delay)))
+
+    async def emit_candidate(self, peer, index, delay):
+        await asyncio.sleep(delay)
+        candidate = {"candidate": f"candidate:{index} 1 udp 2122260223 10.0.0.{index} 5{index:04d} typ host",
+                     "sdpMid": "0", "sdpMLineIndex": 0}
+        self.counters["sent_candidates"] += 1
+        if not self.batch:
+            self.counters["sent_events"] += 1
+            await self.client.emit("webrtc_ice_candidate", {"to": peer, "candidate": candidate})
+            return
+
+        pending = self.pending.get(peer)
+        if pending is not None:
+            pending.append(candidate)
+            return
+        self.pending[peer] = [candidate]
+        await asyncio.sleep(CLIENT_BATCH_MS / 1000)
+        candidates = self.pending.pop(peer)
+        self.counters["sent_events"] += 1
+        await self.client.emit("webrtc_ice_candidates", {"to": peer, "candidates": candidates})
+
+
+async def run_mesh(url: str, peers: int, batch: bool, seed: int) -> dict:
+    rng = random.Random(seed)
+    counters = {"events": 0, "ice_events": 0, "sent_events": 0, "sent_candidates": 0}
+    start_ref = {"t": 0.0}
+    mesh = [Peer(f"p{i}", batch, rng, counters, start_ref) for i in range(peers)]
+    for peer in mesh:
+        peer.expected = peers - 1
+        await peer.connect(url)
+
+    start_ref["t"] = time.perf_counter()
+    await asyncio.gather(*(peer.join() for peer in mesh))
+    await asyncio.wait_for(asyncio.gather(*(peer.all_done.wait() for peer in mesh)), timeout=60)
+    mesh_ready = time.perf_counter() - start_ref["t"]
+
+    setup_times = sorted(t for peer in mesh for t in peer.done.values())
+    for peer in mesh:
+        await peer.client.disconnect()
+    return {
+        "mesh_ready": mesh_ready,
+        "p50": statistics.median(setup_times),
+        "p95": setup_times[int(len(setup_times) * 0.95) - 1],
+        **counters,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--peers", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--port", type=int, default=7795)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    print(f"풀 메시 {args.peers}명 동시 입장, 쌍 {args.peers * (args.peers - 1) // 2}개, 쌍당 후보 {CANDIDATES_PER_PEER}개 x 2")
+    for name, mode in MODES.items():
+        with tempfile.TemporaryDirectory() as workdir:
+            server = start_server(args.port, workdir, mode["env"])
+            try:
+                results = [asyncio.run(run_mesh(url, args.peers, mode["batch"], seed)) for seed in range(args.runs)]
+                stats = httpx.get(f"{url}/api/stats").json()["ice_batching"]
+            finally:
+                server.terminate()
+                server.wait()
+
+        best = min(results, key=lambda r: r["mesh_ready"])
+        avg = {key: statistics.mean(r[key] for r in results) for key in ("mesh_ready", "p50", "p95")}
+        print(f"[{name:>8}] 송신 ICE 이벤트 {best['sent_events']}개 (후보 {best['sent_candidates']}개), "
+              f"수신 ICE 이벤트 {best['ice_events']}개, 전체 수신 이벤트 {best['events']}개")
+        print(f"           연결 준비 p50 {avg['p50'] * 1000:.0f}ms / p95 {avg['p95'] * 1000:.0f}ms, "
+              f"메시 완성 {avg['mesh_ready'] * 1000:.0f}ms (평균 {args.runs}회), 서버 평균 묶음 {stats['avg_batch']}")
+
+
+if __name__ == "__main__":
+    main()
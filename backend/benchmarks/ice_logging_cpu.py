@@ -0,0 +1,138 @@
+"""
+벤치마크: trickle ICE 중계 시 서버 CPU 사용량 - 로깅 설정별 비교
+- verbose: SOCKETIO_LOGGER=1, ENGINEIO_LOGGER=1, 모든 ICE 후보 기록 (기존 print + logger=True 수준)
+- default: 라이브러리 상세 로그 끔, webrtc_ice_candidate는 100건 중 1건만 기록
+
+서버(main:combined_app)를 임시 디렉토리에서 띄우고 stdout은 파이프로 읽어 버립니다 (journald 등과 동일).
+--pairs 쌍의 클라이언트가 서로에게 --candidates개씩 ICE 후보를 보내고,
+그동안 서버 프로세스가 쓴 CPU 시간(/proc/<pid>/stat의 utime+stime)을 측정합니다. (Linux 전용)
+
+실행 방법 (backend 디렉토리에서): python benchmarks/ice_logging_cpu.py --pairs 20 --candidates 500
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+CONFIGS = {
+    "verbose": {"SOCKETIO_LOGGER": "1", "ENGINEIO_LOGGER": "1", "LOG_SAMPLE_EVERY": ""},
+    "default": {},
+}
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+
+
+def start_server(port: int, workdir: str, extra_env: dict):
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, **extra_env}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+    )
+    lines = [0]
+
+    def drain():
+        for _ in proc.stdout:
+            lines[0] += 1
+
+    threading.Thread(target=drain, daemon=True).start()
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc, lines
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+async def trickle(url: str, pairs: int, candidates: int) -> float:
+    received = {"count": 0}
+    done = asyncio.Event()
+    expected = pairs * 2 * candidates
+
+    clients = []
+    for _ in range(pairs * 2):
+        client = socketio.AsyncClient()
+
+        @client.on("webrtc_ice_candidate")
+        async def on_candidate(data):
+            received["count"] += 1
+            if received["count"] >= expected:
+                done.set()
+
+        await client.connect(url, transports=["websocket"])
+        clients.append(client)
+
+    candidate = {
+        "candidate": "candidate:842163049 1 udp 1677729535 203.0.113.7 54321 typ srflx raddr 10.0.0.2 rport 54321",
+        "sdpMid": "0",
+        "sdpMLineIndex": 0,
+    }
+
+    async def send_all(sender, target):
+        for _ in range(candidates):
+            await sender.emit("webrtc_ice_candidate", {"to": target.get_sid(), "candidate": candidate})
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        send_all(clients[i], clients[i ^ 1]) for i in range(len(clients))
+    ))
+    await asyncio.wait_for(done.wait(), timeout=120)
+    elapsed = time.perf_counter() - start
+
+    for client in clients:
+        await client.disconnect()
+    return elapsed
+
+
+def run(name: str, args) -> dict:
+    url = f"http://127.0.0.1:{args.port}"
+    with tempfile.TemporaryDirectory() as workdir:
+        proc, lines = start_server(args.port, workdir, CONFIGS[name])
+        try:
+            time.sleep(0.5)
+            before_lines = lines[0]
+            before = cpu_seconds(proc.pid)
+            elapsed = asyncio.run(trickle(url, args.pairs, args.candidates))
+            time.sleep(0.5)  # 로그 리스너가 남은 레코드를 쓰는 시간 포함
+            cpu = cpu_seconds(proc.pid) - before
+            return {"cpu": cpu, "elapsed": elapsed, "lines": lines[0] - before_lines}
+        finally:
+            proc.terminate()
+            proc.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pairs", type=int, default=20)
+    parser.add_argument("--candidates", type=int, default=500, help="클라이언트당 보내는 ICE 후보 수")
+    parser.add_argument("--port", type=int, default=7796)
+    args = parser.parse_args()
+
+    total = args.pairs * 2 * args.candidates
+    results = {name: run(name, args) for name in CONFIGS}
+    for name, r in results.items():
+        print(f"[{name:>7}] ICE {total}건: 서버 CPU {r['cpu']:.2f}s ({r['cpu'] / total * 1e6:.0f}us/건), "
+              f"경과 {r['elapsed']:.2f}s, 로그 {r['lines']}줄")
+    saved = results["verbose"]["cpu"] - results["default"]["cpu"]
+    print(f"절감: 서버 CPU {saved:.2f}s ({saved / results['verbose']['cpu'] * 100:.0f}%)")
+
+
+if __name__ == "__main__":
+    main()
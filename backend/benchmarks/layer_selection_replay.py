@@ -0,0 +1,123 @@
+"""
+벤치마크: 수신자 대역폭 변화에 따른 화질 레이어 선택 (layer_selection.LayerSelector)
+- baseline: 모든 상대를 원본(f) 레이어로 수신 (레이어 선택 이전 동작)
+- selected: media_stats 보고(2초 주기)마다 LayerSelector가 고른 레이어로 수신
+
+합성 시나리오: 큰 화면 1명(720px) + 썸네일 5명(180px)을 보는 수신자의 하향 대역폭이
+6Mbps → 1.2Mbps(30초) → 3Mbps(60초) → 0.6Mbps 순간 하락(90초, 6초간) → 6Mbps(100초)로 변합니다.
+수요가 대역폭을 넘으면 넘는 만큼 손실로 보고 (received = min(수요, 대역폭)),
+--estimate none이면 브라우저 추정값 없이 손실률만으로 추정합니다.
+
+기록된 보고 재생: --trace stats.jsonl (한 줄에 media_stats 페이로드 하나 + 초 단위 "t")
+
+실행 방법 (backend 디렉토리에서): python benchmarks/layer_selection_replay.py
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from layer_selection import AUDIO_BITRATE, LAYER_PARAMS, LAYER_RIDS, LayerSelector  # noqa: E402
+
+REPORT_INTERVAL = 2.0
+DURATION = 120.0
+VIEWPORTS = {"speaker": 720, **{f"thumb{i}": 180 for i in range(5)}}
+CAPACITY = [(0, 6_000_000), (30, 1_200_000), (60, 3_000_000), (90, 600_000), (96, 3_000_000), (100, 6_000_000)]
+
+
+def capacity_at(t: float) -> float:
+    current = CAPACITY[0][1]
+    for start, bps in CAPACITY:
+        if t >= start:
+            current = bps
+    return current
+
+
+def demand(layers: dict) -> float:
+    return sum(LAYER_PARAMS[rid]["maxBitrate"] + AUDIO_BITRATE for rid in layers.values())
+
+
+def simulate(policy: str, estimate: str, seed: int) -> dict:
+    rng = random.Random(seed)
+    selector = LayerSelector()
+    layers = {sender: LAYER_RIDS[0] for sender in VIEWPORTS}
+    received = loss = None
+    totals = {"overloaded": 0, "loss": 0.0, "delivered": 0.0, "capacity": 0.0, "switches": 0, "reports": 0}
+    speaker_time = {rid: 0 for rid in LAYER_RIDS}
+
+    t = 0.0
+    while t < DURATION:
+        capacity = capacity_at(t)
+        if policy == "selected":
+            bandwidth = capacity * rng.uniform(0.9, 1.1) if estimate == "browser" else None
+            changes = selector.report("receiver", VIEWPORTS, bandwidth=bandwidth, received=received, loss=loss, now=t)
+            totals["switches"] += len(changes)
+            layers.update(changes)
+
+        # 다음 보고까지 2초 동안 수신한 결과
+        wanted = demand(layers)
+        delivered = min(wanted, capacity)
+        received = delivered
+        loss = 1 - delivered / wanted if wanted else 0.0
+        totals["reports"] += 1
+        totals["overloaded"] += wanted > capacity
+        totals["loss"] += loss
+        totals["delivered"] += delivered
+        totals["capacity"] += capacity
+        speaker_time[layers["speaker"]] += 1
+        t += REPORT_INTERVAL
+
+    reports = totals["reports"]
+    return {
+        "overloaded_pct": 100 * totals["overloaded"] / reports,
+        "avg_loss_pct": 100 * totals["loss"] / reports,
+        "utilization_pct": 100 * totals["delivered"] / totals["capacity"],
+        "switches_per_min": totals["switches"] / (DURATION / 60),
+        "speaker": {rid: round(100 * n / reports) for rid, n in speaker_time.items()},
+    }
+
+
+def replay(path: str):
+    """기록된 media_stats를 순서대로 넣고 레이어 변경 시점 출력"""
+    selector = LayerSelector()
+    with open(path) as f:
+        for line in f:
+            if not line.strip():
+                continue
+            report = json.loads(line)
+            receiver = report.get("receiver", "receiver")
+            changes = selector.report(receiver, report.get("viewports") or {}, bandwidth=report.get("bandwidth"),
+                                      received=report.get("received"), loss=report.get("loss"), now=report["t"])
+            if changes:
+                print(f"t={report['t']:7.1f}s {receiver} 추정 {selector.estimate(receiver) / 1000:.0f}kbps → {changes}")
+    print(json.dumps(selector.stats(), ensure_ascii=False))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trace", help="기록된 media_stats JSON lines 파일")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.trace:
+        replay(args.trace)
+        return
+
+    print(f"수신 {len(VIEWPORTS)}명 (720px 1 + 180px {len(VIEWPORTS) - 1}), {DURATION:.0f}초, 보고 주기 {REPORT_INTERVAL}초")
+    for name, policy, estimate in [("baseline", "baseline", "browser"),
+                                   ("selected", "selected", "browser"),
+                                   ("loss-only", "selected", "none")]:
+        results = [simulate(policy, estimate, seed) for seed in range(args.runs)]
+        avg = {key: sum(r[key] for r in results) / len(results)
+               for key in ("overloaded_pct", "avg_loss_pct", "utilization_pct", "switches_per_min")}
+        print(f"[{name:>9}] 과부하 구간 {avg['overloaded_pct']:.0f}%, 평균 손실 {avg['avg_loss_pct']:.1f}%, "
+              f"대역폭 사용 {avg['utilization_pct']:.0f}%, 레이어 변경 {avg['switches_per_min']:.1f}회/분, "
+              f"발표자 레이어 {results[0]['speaker']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+인덱스 회귀 검사: 100만 행 meetings 테이블에서 EXPLAIN QUERY PLAN으로 인덱스 사용 확인
+- GET /api/rooms 쿼리: covering index 사용, meetings 전체 스캔 없음
+- GET /api/meetings/user/list 쿼리: host_id 인덱스 사용, 임시 정렬(TEMP B-TREE) 없음
+인덱스를 타지 않으면 종료 코드 1로 실패합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/meetings_query_plan.py --rows 1000000
+"""
+
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from migrations import run_migrations  # noqa: E402
+
+# main.py의 쿼리와 동일하게 유지
+ROOM_LIST_QUERY = """
+    SELECT m.id, m.title, m.host_id, m.password, m.created_at, m.media_mode, u.username as host_name
+    FROM meetings m
+    JOIN users u ON m.host_id = u.id
+    WHERE m.status = 'active'
+"""
+USER_MEETINGS_QUERY = "SELECT * FROM meetings WHERE host_id = ? ORDER BY created_at DESC LIMIT 10"
+
+
+def populate(conn: sqlite3.Connection, rows: int, users: int, active: int):
+    conn.executemany(
+        "INSERT INTO users (email, username, password, personal_code) VALUES (?, ?, 'x', ?)",
+        [(f"u{i}@example.com", f"user{i}", f"P-{i:06d}") for i in range(users)],
+    )
+    active_ids = set(random.sample(range(rows), active))
+    conn.executemany(
+        "INSERT INTO meetings (room_code, title, host_id, status, created_at) "
+        "VALUES (?, ?, ?, ?, datetime('now', ?))",
+        (
+            (f"R{i:08d}", f"room {i}", i % users + 1,
+             "active" if i in active_ids else "inactive", f"-{rows - i} seconds")
+            for i in range(rows)
+        ),
+    )
+    conn.commit()
+
+
+def plan(conn: sqlite3.Connection, sql: str, params: tuple = ()) -> list:
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def timed(conn: sqlite3.Connection, sql: str, params: tuple = (), repeat: int = 20) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--active", type=int, default=200)
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(os.path.join(tempfile.mkdtemp(), "plan.db"))
+    run_migrations(conn)
+    print(f"{args.rows}행 생성 중...")
+    populate(conn, args.rows, args.users, args.active)
+    conn.execute("ANALYZE")
+
+    failures = []
+
+    room_plan = plan(conn, ROOM_LIST_QUERY)
+    print("[/api/rooms]", room_plan, f"{timed(conn, ROOM_LIST_QUERY):.2f}ms")
+    if not any("COVERING INDEX idx_meetings_status_listing" in step for step in room_plan):
+        failures.append("room list: covering index 미사용")
+    if any(step.startswith("SCAN m") for step in room_plan):
+        failures.append("room list: meetings 전체 스캔")
+
+    user_plan = plan(conn, USER_MEETINGS_QUERY, (1,))
+    print("[/api/meetings/user/list]", user_plan, f"{timed(conn, USER_MEETINGS_QUERY, (1,)):.2f}ms")
+    if not any("idx_meetings_host_created" in step for step in user_plan):
+        failures.append("user meetings: host_id 인덱스 미사용")
+    if any("TEMP B-TREE" in step for step in user_plan):
+        failures.append("user meetings: 별도 정렬 단계 발생")
+
+    if failures:
+        print("[FAIL]", "; ".join(failures))
+        sys.exit(1)
+    print("[OK] 모든 쿼리가 인덱스를 사용합니다")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+벤치마크: /metrics 계측 비용 (metrics.py)
+- 기록 한 번의 비용: Counter.inc, Histogram.observe, Histogram.time() 블록
+- Socket.IO 핸들러 래퍼: 속도 제한 + 처리 시간 기록을 거친 호출 vs 핸들러 직접 호출
+- HTTP: 같은 FastAPI 앱에 MetricsMiddleware 유무로 요청 처리량 비교 (ASGI 직접 호출, 네트워크 제외)
+- 수집(render) 비용: 라벨 조합 --series개가 있을 때 /metrics 본문 생성 시간
+
+실행 방법 (backend 디렉토리에서): python benchmarks/metrics_overhead.py
+"""
+
+import argparse
+import asyncio
+import functools
+import os
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import FAST_BUCKETS, MetricsMiddleware, Registry  # noqa: E402
+from rate_limit import RateLimiter  # noqa: E402
+
+
+def per_call(n: int) -> dict:
+    registry = Registry()
+    counter = registry.counter("c", "c", ("event", "outcome"))
+    histogram = registry.histogram("h", "h", ("event",), FAST_BUCKETS)
+    results = {}
+
+    start = time.perf_counter()
+    for _ in range(n):
+        pass
+    empty = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(n):
+        counter.inc("chat_message", "handled")
+    results["Counter.inc"] = (time.perf_counter() - start - empty) / n
+
+    start = time.perf_counter()
+    for i in range(n):
+        histogram.observe(0.0003, "chat_message")
+    results["Histogram.observe"] = (time.perf_counter() - start - empty) / n
+
+    start = time.perf_counter()
+    for _ in range(n):
+        with histogram.time("chat_message"):
+            pass
+    results["Histogram.time() 블록"] = (time.perf_counter() - start - empty) / n
+    return results
+
+
+async def handler_overhead(n: int) -> tuple:
+    registry = Registry()
+    events = registry.counter("e", "e", ("event", "outcome"))
+    durations = registry.histogram("d", "d", ("event",), FAST_BUCKETS)
+    limiter = RateLimiter(budgets={})  # 예산 없는 이벤트 (딕셔너리 조회만)
+
+    async def chat_message(sid, data):
+        return None
+
+    # socketio_server.event_handler와 같은 구조
+    def event_handler(handler):
+        event = handler.__name__
+
+        @functools.wraps(handler)
+        async def wrapper(sid, *args):
+            if not limiter.allow(sid, event):
+                events.inc(event, 'throttled')
+                return None
+            start = time.perf_counter()
+            outcome = 'error'
+            try:
+                result = await handler(sid, *args)
+                outcome = 'handled'
+                return result
+            finally:
+                durations.observe(time.perf_counter() - start, event)
+                events.inc(event, outcome)
+        return wrapper
+
+    wrapped = event_handler(chat_message)
+    data = {"roomId": "r"}
+    start = time.perf_counter()
+    for _ in range(n):
+        await chat_message("sid", data)
+    raw = (time.perf_counter() - start) / n
+    start = time.perf_counter()
+    for _ in range(n):
+        await wrapped("sid", data)
+    return raw, (time.perf_counter() - start) / n
+
+
+async def http_throughput(requests: int, instrumented: bool) -> float:
+    app = FastAPI()
+
+    @app.get("/api/rooms/{room_id}")
+    async def get_room(room_id: str):
+        return {"id": room_id}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for i in range(50):
+            await client.get(f"/api/rooms/{i}")
+        start = time.perf_counter()
+        for i in range(requests):
+            await client.get(f"/api/rooms/{i}")
+        return requests / (time.perf_counter() - start)
+
+
+def render_cost(series: int) -> tuple:
+    registry = Registry()
+    histogram = registry.histogram("h", "h", ("event", "route"))
+    counter = registry.counter("c", "c", ("event", "outcome"))
+    for i in range(series):
+        histogram.observe(0.01, f"event{i % 40}", f"/route/{i}")
+        counter.inc(f"event{i}", "handled")
+    start = time.perf_counter()
+    body = registry.render()
+    return time.perf_counter() - start, len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--series", type=int, default=200)
+    args = parser.parse_args()
+
+    for name, cost in per_call(args.calls).items():
+        print(f"{name:>22}: {cost * 1e9:6.0f}ns/회")
+
+    raw, wrapped = asyncio.run(handler_overhead(args.calls // 5))
+    print(f"Socket.IO 핸들러: 직접 {raw * 1e9:.0f}ns → 래퍼 {wrapped * 1e9:.0f}ns (+{(wrapped - raw) * 1e9:.0f}ns/이벤트)")
+
+    plain = asyncio.run(http_throughput(args.requests, False))
+    measured = asyncio.run(http_throughput(args.requests, True))
+    print(f"HTTP 처리량: 미들웨어 없음 {plain:.0f}req/s vs MetricsMiddleware {measured:.0f}req/s "
+          f"(요청당 +{(1 / measured - 1 / plain) * 1e6:.0f}us)")
+
+    seconds, size = render_cost(args.series)
+    print(f"/metrics 생성: 히스토그램 {args.series}개 + 카운터 {args.series}개 → {size / 1024:.0f}KB, {seconds * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""
+벤치마크: 한 클라이언트의 chat_message 폭주가 방 전체에 미치는 영향 (rate_limit.RateLimiter)
+- unlimited: 속도 제한 끔 (RATE_LIMIT_ENABLED=0)
+- limited: 기본 예산 (chat_message 초당 5건, 버스트 10)
+
+--peers명이 한 방에 들어간 뒤 1명이 --seconds 동안 chat_message를 초당 --flood-rate건 보내고
+(ack 없음, 서버가 연결을 끊으면 중단) 다른 1명은 0.2초마다 정상 메시지를 보냅니다. 나머지 참가자가 받은 이벤트 수(팬아웃 증폭),
+정상 메시지의 전달 지연, 서버 CPU를 비교합니다. 마지막으로 RateLimiter.allow 한 번의 비용을 측정합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/rate_limit_flood.py --peers 10
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import socketio
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from rate_limit import RateLimiter  # noqa: E402
+
+ROOM_ID = "bench-flood"
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+NORMAL_INTERVAL = 0.2
+
+MODES = {
+    "unlimited": {"RATE_LIMIT_ENABLED": "0"},
+    "limited": {},
+}
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+
+
+def start_server(port: int, workdir: str, extra_env: dict) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "LOG_LEVEL": "ERROR",
+           "FANOUT_HARD_LIMIT": "1000000", **extra_env}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+async def run_mode(mode: str, peers: int, seconds: float, flood_rate: int, port: int) -> dict:
+    workdir = tempfile.mkdtemp()
+    proc = start_server(port, workdir, MODES[mode])
+    url = f"http://127.0.0.1:{port}"
+    try:
+        clients = [socketio.AsyncClient() for _ in range(peers)]
+        flooder, normal, listeners = clients[0], clients[1], clients[2:]
+        received = {"flood": 0, "normal": 0}
+        latencies = []
+
+        def on_chat(data):
+            if data["content"].startswith("normal"):
+                received["normal"] += 1
+                latencies.append(time.perf_counter() - float(data["timestamp"]))
+            else:
+                received["flood"] += 1
+
+        for client in listeners:
+            client.on("chat_message", on_chat)
+        for i, client in enumerate(clients):
+            await client.connect(url, transports=["websocket"])
+            await client.emit("join_room", {"roomId": ROOM_ID, "userInfo": {"username": f"peer{i}"}})
+        await asyncio.sleep(1.0)
+
+        stop = time.perf_counter() + seconds
+        sent = {"flood": 0, "normal": 0}
+
+        async def flood():
+            start = time.perf_counter()
+            while time.perf_counter() < stop and flooder.connected:
+                delay = start + sent["flood"] / flood_rate - time.perf_counter()
+                if delay > 0.001:
+                    await asyncio.sleep(delay)
+                try:
+                    await flooder.emit("chat_message", {"roomId": ROOM_ID, "message": {
+                        "username": "flood", "content": f"flood {sent['flood']}", "timestamp": "0"}})
+                except socketio.exceptions.BadNamespaceError:
+                    break  # 서버가 연결 해제
+                sent["flood"] += 1
+
+        async def talk():
+            while time.perf_counter() < stop:
+                await normal.emit("chat_message", {"roomId": ROOM_ID, "message": {
+                    "username": "normal", "content": "normal", "timestamp": repr(time.perf_counter())}})
+                sent["normal"] += 1
+                await asyncio.sleep(NORMAL_INTERVAL)
+
+        before_cpu = cpu_seconds(proc.pid)
+        start = time.perf_counter()
+        await asyncio.gather(flood(), talk())
+        # 큐에 남은 전달이 끝날 때까지 (새 이벤트가 1초간 없으면 종료)
+        last = -1
+        while last != received["flood"] + received["normal"]:
+            last = received["flood"] + received["normal"]
+            await asyncio.sleep(1.0)
+        elapsed = time.perf_counter() - start
+        cpu = cpu_seconds(proc.pid) - before_cpu
+
+        stats = httpx.get(f"{url}/api/stats").json()["rate_limit"]
+        for client in clients:
+            if client.connected:
+                await client.disconnect()
+        latencies.sort()
+        return {
+            "flood_sent": sent["flood"],
+            "flood_delivered": received["flood"],
+            "flood_expected": sent["flood"] * len(listeners),
+            "normal_delivered": received["normal"] / max(1, sent["normal"] * len(listeners)),
+            "latency_p50_ms": statistics.median(latencies) * 1000 if latencies else float("nan"),
+            "latency_p99_ms": latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float("nan"),
+            "cpu_seconds": cpu,
+            "elapsed": elapsed,
+            "throttled": stats["throttled_total"],
+            "disconnects": stats["disconnects"],
+        }
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+def allow_cost(n: int = 1_000_000) -> float:
+    limiter = RateLimiter()
+    now = 0.0
+    start = time.perf_counter()
+    for i in range(n):
+        now += 0.0001
+        limiter.allow("sid", "chat_message", now)
+    return (time.perf_counter() - start) / n * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--peers", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--flood-rate", type=int, default=1000, help="폭주 클라이언트의 초당 전송 수")
+    parser.add_argument("--port", type=int, default=7931)
+    args = parser.parse_args()
+
+    print(f"참가자 {args.peers}명 (폭주 1, 정상 1, 수신 {args.peers - 2}), 폭주 초당 {args.flood_rate}건 x {args.seconds:.0f}초")
+    for i, mode in enumerate(MODES):
+        r = asyncio.run(run_mode(mode, args.peers, args.seconds, args.flood_rate, args.port + i))
+        print(f"[{mode:>9}] 폭주 {r['flood_sent']}건 → 수신 측 전달 {r['flood_delivered']}/{r['flood_expected']}건, 제한 {r['throttled']}건, "
+              f"연결 해제 {r['disconnects']}회 | 정상 메시지 전달률 {r['normal_delivered'] * 100:.0f}%, "
+              f"지연 p50 {r['latency_p50_ms']:.1f}ms / p99 {r['latency_p99_ms']:.1f}ms | "
+              f"서버 CPU {r['cpu_seconds']:.2f}초 ({r['elapsed']:.1f}초 동안)")
+    print(f"RateLimiter.allow 비용: {allow_cost():.0f}ns/회")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+"""
+벤치마크: 이어 받기 가능한 청크 업로드 (/api/files/uploads) vs 단일 multipart POST (/api/files/upload)
+- single: 한 번의 POST. --drop-at 지점에서 연결이 끊기면 처음부터 다시 전송
+- chunked: 세션 생성 후 청크를 --parallel개씩 병렬 PUT. 끊기면 GET으로 빠진 범위만 확인해 이어서 전송,
+           마지막에 전체 sha256으로 commit
+
+끊김은 클라이언트가 --drop-at 비율만큼 보낸 뒤 진행 중인 요청을 모두 취소하는 방식으로 흉내 냅니다.
+전송한 총 바이트, 완료까지 걸린 시간, 서버가 돌려준 해시가 원본과 같은지 비교합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/resumable_upload.py --size 512 --parallel 4
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MB = 1024 * 1024
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "LOG_LEVEL": "WARNING"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(200):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+class Dropped(Exception):
+    pass
+
+
+async def single_upload(client: httpx.AsyncClient, data: bytes, drop_at: float) -> dict:
+    sent = 0
+    attempts = 0
+    while True:
+        attempts += 1
+        limit = int(len(data) * drop_at) if attempts == 1 and drop_at < 1 else None
+        progress = {"sent": 0}
+
+        async def body():
+            for start in range(0, len(data), MB):
+                if limit is not None and progress["sent"] >= limit:
+                    raise Dropped()
+                piece = data[start:start + MB]
+                progress["sent"] += len(piece)
+                yield piece
+
+        boundary = "benchboundary"
+        head = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"single.bin\"\r\n"
+                f"Content-Type: application/octet-stream\r\n\r\n").encode()
+        tail = f"\r\n--{boundary}--\r\n".encode()
+
+        async def multipart():
+            yield head
+            async for piece in body():
+                yield piece
+            yield tail
+
+        try:
+            r = await client.post("/api/files/upload", content=multipart(),
+                                  headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+            sent += progress["sent"]
+            return {"sent": sent, "attempts": attempts, "hash": r.json()["hash"]}
+        except (Dropped, httpx.HTTPError):
+            sent += progress["sent"]
+
+
+async def chunked_upload(client: httpx.AsyncClient, data: bytes, chunk_mb: int, parallel: int,
+                         drop_at: float) -> dict:
+    r = await client.post("/api/files/uploads", json={"filename": "chunked.bin", "size": len(data),
+                                                      "chunkSize": chunk_mb * MB})
+    session = r.json()
+    upload_id, chunk_size, total = session["upload_id"], session["chunk_size"], session["total_chunks"]
+    sent = {"bytes": 0}
+    attempts = 0
+
+    async def put(index: int):
+        chunk = data[index * chunk_size:(index + 1) * chunk_size]
+        sent["bytes"] += len(chunk)
+        r = await client.put(f"/api/files/uploads/{upload_id}/chunks/{index}", content=chunk,
+                             headers={"X-Chunk-SHA256": hashlib.sha256(chunk).hexdigest()})
+        r.raise_for_status()
+
+    todo = list(range(total))
+    while todo:
+        attempts += 1
+        limit = int(len(data) * drop_at) if attempts == 1 and drop_at < 1 else None
+        queue = list(todo)
+        stop = asyncio.Event()
+
+        async def worker():
+            while queue and not stop.is_set():
+                await put(queue.pop(0))
+                if limit is not None and sent["bytes"] >= limit:
+                    stop.set()
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(parallel)]
+        if limit is not None:
+            # 끊김: 진행 중인 요청까지 모두 취소
+            await stop.wait()
+            for w in workers:
+                w.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        # 서버 기준으로 빠진 청크만 다시
+        status = (await client.get(f"/api/files/uploads/{upload_id}")).json()
+        todo = [i for first, last in status["missing"] for i in range(first, last + 1)]
+
+    r = await client.post(f"/api/files/uploads/{upload_id}/commit",
+                          json={"sha256": hashlib.sha256(data).hexdigest()})
+    r.raise_for_status()
+    return {"sent": sent["bytes"], "attempts": attempts, "hash": r.json()["hash"]}
+
+
+async def run(port: int, size_mb: int, chunk_mb: int, parallel: int, drop_at: float):
+    data = os.urandom(size_mb * MB)
+    expected = hashlib.sha256(data).hexdigest()
+    limits = httpx.Limits(max_connections=parallel + 2)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=300, limits=limits) as client:
+        for name, upload in (("single", lambda: single_upload(client, data, drop_at)),
+                             ("chunked x1", lambda: chunked_upload(client, data, chunk_mb, 1, drop_at)),
+                             (f"chunked x{parallel}", lambda: chunked_upload(client, data, chunk_mb, parallel, drop_at))):
+            start = time.perf_counter()
+            r = await upload()
+            elapsed = time.perf_counter() - start
+            ok = "OK" if r["hash"] == expected else "해시 불일치"
+            print(f"[{name:>11}] {elapsed:6.2f}초, 전송 {r['sent'] / MB:7.0f}MB ({r['sent'] / len(data):.2f}배), "
+                  f"시도 {r['attempts']}회, {size_mb / elapsed:6.1f}MB/s, {ok}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=512, help="MB")
+    parser.add_argument("--chunk", type=int, default=8, help="청크 크기 (MB)")
+    parser.add_argument("--parallel", type=int, default=4)
+    parser.add_argument("--drop-at", type=float, default=0.7, help="첫 시도에서 연결이 끊기는 지점 (1이면 끊기지 않음)")
+    parser.add_argument("--port", type=int, default=7941)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp()
+    proc = start_server(args.port, workdir)
+    try:
+        print(f"{args.size}MB, 청크 {args.chunk}MB, 첫 시도 {args.drop_at:.0%} 지점에서 끊김")
+        asyncio.run(run(args.port, args.size, args.chunk, args.parallel, args.drop_at))
+    finally:
+        proc.terminate()
+        proc.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+벤치마크: join 한 번당 전송되는 명단 바이트 수
+- legacy: user_joined (기존 참가자 n-1명에게) + current_participants 전체 목록
+- delta: user_joined (rosterVersion 포함) + roster_sync 변경분
+재접속 시나리오는 끊긴 사이에 명단 변경이 `--missed`건 있었다고 가정합니다.
+JSON 직렬화 크기를 기준으로 하며 Socket.IO 패킷 헤더는 제외합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/roster_bytes.py
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from roster import RoomRoster  # noqa: E402
+
+
+def size(payload) -> int:
+    return len(json.dumps(payload, separators=(",", ":")).encode())
+
+
+def user_info(i: int) -> dict:
+    return {"id": str(i), "username": f"user{i:03d}", "email": f"user{i:03d}@example.com"}
+
+
+def sid(i: int) -> str:
+    return f"sid{i:017d}"  # Socket.IO sid 길이(20자)와 동일
+
+
+def legacy_join_bytes(roster: RoomRoster, joiner: str, info: dict) -> int:
+    others = [s for s in roster.members if s != joiner]
+    user_joined = size({"userId": joiner, "userInfo": info})
+    current = size([{"userId": s, "userInfo": roster.members[s]} for s in others])
+    return user_joined * len(others) + current
+
+
+def delta_join_bytes(roster: RoomRoster, joiner: str, info: dict, version: int, since) -> int:
+    others = [s for s in roster.members if s != joiner]
+    user_joined = size({"userId": joiner, "userInfo": info, "rosterVersion": version})
+    return user_joined * len(others) + size(roster.sync(since, exclude=joiner))
+
+
+def run(participants: int, missed: int) -> dict:
+    roster = RoomRoster()
+    for i in range(participants - 1):
+        roster.add(sid(i), user_info(i))
+
+    # 재접속하는 클라이언트는 끊기기 전 버전을 알고 있음
+    last_seen = roster.version
+    for j in range(missed):
+        roster.add(sid(10_000 + j), user_info(10_000 + j))
+        if j % 2:
+            roster.remove(sid(10_000 + j))
+
+    joiner, info = sid(99_999), user_info(99_999)
+    version = roster.add(joiner, info)
+    return {
+        "legacy": legacy_join_bytes(roster, joiner, info),
+        "delta_first_join": delta_join_bytes(roster, joiner, info, version, None),
+        "delta_reconnect": delta_join_bytes(roster, joiner, info, version, last_seen),
+        "sync_only_legacy": size([{"userId": s, "userInfo": roster.members[s]} for s in roster.members if s != joiner]),
+        "sync_only_delta": size(roster.sync(last_seen, exclude=joiner)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--missed", type=int, default=2, help="재접속 동안 놓친 명단 변경 수")
+    args = parser.parse_args()
+
+    print(f"{'참가자':>6} | {'legacy':>9} | {'delta(첫 참가)':>12} | {'delta(재접속)':>12} | 목록 전송만 legacy→delta")
+    for n in (10, 50, 100):
+        r = run(n, args.missed)
+        print(
+            f"{n:>6} | {r['legacy']:>8}B | {r['delta_first_join']:>11}B | {r['delta_reconnect']:>11}B | "
+            f"{r['sync_only_legacy']}B → {r['sync_only_delta']}B"
+        )
+    print("재접속 폭주(n명 전원 재접속) 시 목록 전송량은 legacy O(n²), delta O(n·missed)")
+
+
+if __name__ == "__main__":
+    main()
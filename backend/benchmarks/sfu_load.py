@@ -0,0 +1,317 @@
+"""
+벤치마크: SFU 모드 서버 CPU - 전달 스트림 하나당 비용
+송출자 P명이 한 SFU 방에서 합성 영상(움직이는 패턴) + 합성 음성(사인파)을 보내고, 구독만 하는
+참가자 S명을 늘려 가며 서버 CPU를 측정합니다. 서버는 송출 트랙마다 한 번 디코딩/인코딩하고
+(송출 트랙 수는 고정) 전달 스트림마다 RTP 분할/암호화/전송만 하므로, 전달 스트림 수에 대한
+CPU 기울기가 전달 스트림 하나당 비용이고 절편이 송출 트랙 처리 비용입니다.
+전달 스트림 = 2 x P x (P-1 + S)
+
+헤드리스 참가자는 aiortc 클라이언트이며, 벤치마크 프로세스의 CPU를 아끼기 위해 수신 트랙을
+디코딩하지 않고 RTP 수신 통계(inbound-rtp)로만 전달을 확인합니다.
+서버(main:combined_app)를 임시 디렉토리에서 띄우고 --duration 동안 서버 프로세스가 쓴 CPU 시간
+(/proc/<pid>/stat의 utime+stime)을 측정합니다. (Linux 전용)
+
+--viewport H를 주면 모든 참가자가 media_stats로 표시 높이 H를 보고해 서버가 낮은 화질 레이어로 인코딩합니다.
+
+실행 방법 (backend 디렉토리에서, aiortc 필요): python benchmarks/sfu_load.py --publishers 2 --subscribers 0,2,4,8
+"""
+
+import argparse
+import asyncio
+import fractions
+import math
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+import socketio
+from aiortc import MediaStreamTrack, RTCBundlePolicy, RTCConfiguration, RTCPeerConnection, RTCSessionDescription
+from aiortc import rtcrtpreceiver
+from av import AudioFrame, VideoFrame
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+AUDIO_RATE = 48000
+AUDIO_PTIME = 0.02
+
+
+def peer_connection() -> RTCPeerConnection:
+    # 브라우저처럼 max-bundle (aiortc 기본값 balanced는 같은 종류 트랙이 여럿이면 일부를 받지 못함)
+    return RTCPeerConnection(RTCConfiguration(iceServers=[], bundlePolicy=RTCBundlePolicy.MAX_BUNDLE))
+
+
+class _NullDecoder:
+    """구독 트랙 디코딩 생략 (전달 여부는 RTP 통계로 확인)"""
+
+    def decode(self, encoded_frame):
+        return []
+
+
+rtcrtpreceiver.get_decoder = lambda codec: _NullDecoder()
+
+
+def cpu_seconds(pid: int) -> float:
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime, stime
+
+
+def start_server(port: int, workdir: str) -> subprocess.Popen:
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR, "SFU_ICE_SERVERS": "", "LOG_LEVEL": "WARNING"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:combined_app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/")
+            return proc
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("서버 시작 실패")
+
+
+def create_sfu_room(workdir: str) -> str:
+    """서버 DB에 호스트와 SFU 방을 직접 생성 (마이그레이션은 서버 시작 시 적용됨)"""
+    conn = sqlite3.connect(os.path.join(workdir, "videonet.db"))
+    with conn:
+        conn.execute(
+            "INSERT INTO users (email, username, password, personal_code) VALUES ('b@x', 'bench', '-', 'BENCH')"
+        )
+        room_id = conn.execute(
+            "INSERT INTO meetings (room_code, title, host_id, media_mode) VALUES ('SFUBENCH', 'sfu bench', 1, 'sfu')"
+        ).lastrowid
+    conn.close()
+    return str(room_id)
+
+
+class SyntheticVideoTrack(MediaStreamTrack):
+    """움직이는 그라디언트 (정지 화면이면 VP8 인코딩 비용이 비현실적으로 작음)"""
+
+    kind = "video"
+
+    def __init__(self, width: int, height: int, fps: int):
+        super().__init__()
+        self.fps = fps
+        self.frame_index = 0
+        self.start = None
+        y, x = np.mgrid[0:height, 0:width]
+        self.base = (x + y).astype(np.uint16)
+
+    async def recv(self):
+        if self.start is None:
+            self.start = time.time()
+        target = self.start + self.frame_index / self.fps
+        await asyncio.sleep(max(0.0, target - time.time()))
+        shift = self.frame_index * 4
+        gray = ((self.base + shift) % 256).astype(np.uint8)
+        frame = VideoFrame.from_ndarray(np.dstack([gray, np.roll(gray, shift, axis=1), 255 - gray]), format="rgb24")
+        frame.pts = self.frame_index * (90000 // self.fps)
+        frame.time_base = fractions.Fraction(1, 90000)
+        self.frame_index += 1
+        return frame
+
+
+class SyntheticAudioTrack(MediaStreamTrack):
+    """440Hz 사인파 (20ms 프레임)"""
+
+    kind = "audio"
+
+    def __init__(self):
+        super().__init__()
+        self.samples = int(AUDIO_RATE * AUDIO_PTIME)
+        self.timestamp = 0
+        self.start = None
+
+    async def recv(self):
+        if self.start is None:
+            self.start = time.time()
+        target = self.start + self.timestamp / AUDIO_RATE
+        await asyncio.sleep(max(0.0, target - time.time()))
+        t = (np.arange(self.samples) + self.timestamp) / AUDIO_RATE
+        pcm = (np.sin(2 * math.pi * 440 * t) * 8000).astype(np.int16).reshape(1, -1)
+        frame = AudioFrame.from_ndarray(pcm, format="s16", layout="mono")
+        frame.sample_rate = AUDIO_RATE
+        frame.pts = self.timestamp
+        frame.time_base = fractions.Fraction(1, AUDIO_RATE)
+        self.timestamp += self.samples
+        return frame
+
+
+class Participant:
+    """헤드리스 SFU 참가자 (publish PC 하나 + 서버가 재협상하는 subscribe PC 하나)"""
+
+    def __init__(self, name: str, room_id: str, args):
+        self.name = name
+        self.room_id = room_id
+        self.args = args
+        self.client = socketio.AsyncClient()
+        self.publish_pc = peer_connection()
+        self.subscribe_pc = None
+        self.media_mode = None
+        self.streams = {}
+
+        self.client.on("room_media_mode", self.on_media_mode)
+        self.client.on("sfu_offer", self.on_offer)
+        self.client.on("sfu_streams", self.on_streams)
+
+    async def on_media_mode(self, data):
+        self.media_mode = data["mode"]
+
+    async def on_offer(self, data):
+        if self.subscribe_pc is None:
+            self.subscribe_pc = peer_connection()
+        self.streams = data["streams"]
+        await self.subscribe_pc.setRemoteDescription(RTCSessionDescription(**data["offer"]))
+        await self.subscribe_pc.setLocalDescription(await self.subscribe_pc.createAnswer())
+        local = self.subscribe_pc.localDescription
+        await self.client.emit("sfu_answer", {"answer": {"type": local.type, "sdp": local.sdp}})
+
+    async def on_streams(self, data):
+        self.streams = data["streams"]
+
+    async def join(self, url: str):
+        await self.client.connect(url, transports=["websocket"])
+        await self.client.emit("join_room", {"roomId": self.room_id, "userInfo": {"username": self.name}})
+
+    async def publish(self, send_media: bool = True):
+        """송출 (send_media=False면 카메라 없는 참가자처럼 구독만)"""
+        for _ in range(50):
+            if self.media_mode:
+                break
+            await asyncio.sleep(0.1)
+        if self.media_mode != "sfu":
+            raise RuntimeError("SFU 방이 아닙니다 (aiortc가 서버에 설치되어 있는지 확인)")
+        if not send_media:
+            result = await self.client.call("sfu_publish", {"roomId": self.room_id, "offer": None}, timeout=30)
+            if result.get("error"):
+                raise RuntimeError(result["error"])
+            return
+
+        self.publish_pc.addTransceiver(SyntheticVideoTrack(self.args.width, self.args.height, self.args.fps),
+                                       direction="sendonly")
+        self.publish_pc.addTransceiver(SyntheticAudioTrack(), direction="sendonly")
+        await self.publish_pc.setLocalDescription(await self.publish_pc.createOffer())
+        local = self.publish_pc.localDescription
+        result = await self.client.call("sfu_publish", {
+            "roomId": self.room_id, "offer": {"type": local.type, "sdp": local.sdp},
+        }, timeout=30)
+        if result.get("error"):
+            raise RuntimeError(result["error"])
+        await self.publish_pc.setRemoteDescription(RTCSessionDescription(**result["answer"]))
+
+    async def received(self) -> dict:
+        """mid별 수신 패킷 수"""
+        if self.subscribe_pc is None:
+            return {}
+        counts = {}
+        for transceiver in self.subscribe_pc.getTransceivers():
+            for stat in (await transceiver.receiver.getStats()).values():
+                if stat.type == "inbound-rtp":
+                    counts[transceiver.mid] = stat.packetsReceived
+        return counts
+
+    async def close(self):
+        await self.client.disconnect()
+        await self.publish_pc.close()
+        if self.subscribe_pc is not None:
+            await self.subscribe_pc.close()
+
+
+async def run_load(url: str, room_id: str, publishers: int, subscribers: int, pid: int, args) -> dict:
+    participants = [Participant(f"p{i}", room_id, args) for i in range(publishers + subscribers)]
+    for i, participant in enumerate(participants):
+        await participant.join(url)
+        await participant.publish(send_media=i < publishers)
+
+    # 모든 참가자가 (자신을 제외한) 송출자의 영상/음성을 받기 시작할 때까지 대기
+    deadline = time.time() + 60
+    while True:
+        counts = [await p.received() for p in participants]
+        expected = [2 * (publishers - 1 if i < publishers else publishers) for i in range(len(participants))]
+        if all(len(p.streams) == n and sum(1 for c in counts[i].values() if c > 0) >= n
+               for i, (p, n) in enumerate(zip(participants, expected))):
+            break
+        if time.time() > deadline:
+            raise RuntimeError("전달 스트림 연결 시간 초과")
+        await asyncio.sleep(0.5)
+
+    if args.viewport is not None:
+        for participant in participants:
+            owners = {stream["userId"] for stream in participant.streams.values()}
+            await participant.client.call("media_stats", {
+                "roomId": room_id, "viewports": {owner: args.viewport for owner in owners},
+            }, timeout=10)
+
+    await asyncio.sleep(args.warmup)
+    before_packets = sum(sum(c.values()) for c in [await p.received() for p in participants])
+    before_cpu = cpu_seconds(pid)
+    start = time.perf_counter()
+    await asyncio.sleep(args.duration)
+    cpu = cpu_seconds(pid) - before_cpu
+    elapsed = time.perf_counter() - start
+    after_packets = sum(sum(c.values()) for c in [await p.received() for p in participants])
+    stats = httpx.get(f"{url}/api/stats").json()["sfu"]
+
+    for participant in participants:
+        await participant.close()
+    return {
+        "forwarded": stats["forwarded_streams"],
+        "published": stats["published_tracks"],
+        "cpu_pct": cpu / elapsed * 100,
+        "packets_per_s": (after_packets - before_packets) / elapsed,
+        "dropped": stats["packets_dropped"],
+        "layers": {rid: n for rid, n in stats["encoded_layers"].items() if n},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--publishers", type=int, default=2)
+    parser.add_argument("--subscribers", default="0,2,4,8", help="구독만 하는 참가자 수 목록 (쉼표 구분)")
+    parser.add_argument("--width", type=int, default=320)
+    parser.add_argument("--height", type=int, default=240)
+    parser.add_argument("--fps", type=int, default=15)
+    parser.add_argument("--warmup", type=float, default=3.0)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--viewport", type=int, help="참가자가 보고할 표시 높이 (px, 없으면 원본 레이어)")
+    parser.add_argument("--port", type=int, default=7797)
+    args = parser.parse_args()
+
+    url = f"http://127.0.0.1:{args.port}"
+    print(f"합성 트랙: 영상 {args.width}x{args.height}@{args.fps}fps VP8 + 음성 Opus, "
+          f"송출자 {args.publishers}명, 측정 {args.duration:.0f}초")
+    results = []
+    for subscribers in (int(s) for s in args.subscribers.split(",")):
+        with tempfile.TemporaryDirectory() as workdir:
+            server = start_server(args.port, workdir)
+            try:
+                room_id = create_sfu_room(workdir)
+                r = asyncio.run(run_load(url, room_id, args.publishers, subscribers, server.pid, args))
+            finally:
+                server.terminate()
+                server.wait()
+        results.append(r)
+        print(f"[구독자 {subscribers:>2}명] 송출 트랙 {r['published']}개, 전달 스트림 {r['forwarded']:>3}개: "
+              f"서버 CPU {r['cpu_pct']:5.1f}%, 수신 {r['packets_per_s']:.0f} pkt/s, 버린 패킷 {r['dropped']}, "
+              f"인코딩 레이어 {r['layers']}")
+
+    if len(results) >= 2:
+        # 최소제곱 직선: CPU% = 절편 + 기울기 x 전달 스트림 수
+        xs = [r["forwarded"] for r in results]
+        ys = [r["cpu_pct"] for r in results]
+        mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+        slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / sum((x - mean_x) ** 2 for x in xs)
+        intercept = mean_y - slope * mean_x
+        print(f"전달 스트림당 서버 CPU {slope:.2f}% (1코어 기준), "
+              f"송출 트랙 {results[0]['published']}개 처리(디코딩+인코딩) {intercept:.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+벤치마크: verify_token 경로 비교 (jwt.decode 매번 vs 검증 토큰 캐시)
+클라이언트 수만큼의 토큰을 돌아가며 검증하고, 호출당 비용과
+10k req/s 부하에서 필요한 CPU 코어 비율을 계산합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/token_verify.py --clients 2000 --requests 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_cache import TokenCache  # noqa: E402
+
+SECRET_KEY = "benchmark-secret-key-with-32-bytes!!"
+ALGORITHM = "HS256"
+TARGET_RPS = 10_000
+
+
+def make_tokens(count: int) -> list:
+    expire = datetime.utcnow() + timedelta(hours=1)
+    return [
+        jwt.encode({"user_id": i, "username": f"user{i}", "is_admin": False, "exp": expire}, SECRET_KEY, algorithm=ALGORITHM)
+        for i in range(count)
+    ]
+
+
+def verify_uncached(token: str) -> dict:
+    return jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+
+
+def make_verify_cached(cache: TokenCache):
+    def verify_cached(token: str) -> dict:
+        payload = cache.get(token)
+        if payload is not None:
+            return payload
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        cache.put(token, payload)
+        return payload
+    return verify_cached
+
+
+def measure(verify, tokens: list, requests: int) -> float:
+    """호출당 평균 시간 (초)"""
+    n = len(tokens)
+    start = time.perf_counter()
+    for i in range(requests):
+        verify(tokens[i % n])
+    return (time.perf_counter() - start) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=2000, help="서로 다른 토큰 수")
+    parser.add_argument("--requests", type=int, default=100_000)
+    args = parser.parse_args()
+
+    tokens = make_tokens(args.clients)
+    cache = TokenCache(max_size=args.clients * 2)
+
+    results = [
+        ("jwt.decode", measure(verify_uncached, tokens, args.requests)),
+        ("cached", measure(make_verify_cached(cache), tokens, args.requests)),
+    ]
+    for name, per_call in results:
+        print(
+            f"[{name:>10}] 호출당 {per_call * 1e6:.2f}us | "
+            f"{TARGET_RPS} req/s 유지 시 CPU {per_call * TARGET_RPS * 100:.1f}% (1코어 기준)"
+        )
+    print(f"캐시 통계: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+벤치마크: 파일 업로드 저장 + SHA256 (file_transfer.save_upload)
+- baseline: 8KB씩 스레드에서 쓴 뒤 (이전 aiofiles와 같은 방식) 파일 전체를 다시 읽어 해시 (이벤트 루프에서 동기 실행)
+- streaming: 적응형 버퍼(64KB → 4MB)로 읽으며 청크마다 쓰기+해시를 스레드에서 처리, 다음 청크 읽기와 겹침
+
+업로드 핸들러가 받는 UploadFile(디스크로 넘어간 임시 파일)을 그대로 흉내 내어 저장 단계만 측정합니다.
+처리량(MB/s), 디스크 읽기/쓰기량, 이벤트 루프 지연(1ms 주기 프로브)을 비교합니다.
+
+실행 방법 (backend 디렉토리에서): python benchmarks/upload_hash_stream.py --sizes 100,1000,5000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from starlette.datastructures import UploadFile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_transfer import save_upload  # noqa: E402
+
+PROBE_INTERVAL = 0.001
+MB = 1024 * 1024
+
+
+def calculate_file_hash(file_path: str) -> str:
+    """기존 file_transfer.calculate_file_hash (저장 후 파일 전체를 다시 읽음)"""
+    sha256 = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        while chunk := f.read(8192):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+async def baseline_upload(file: UploadFile, file_path: str):
+    """기존 upload_file의 저장 + 해시 (aiofiles처럼 8KB 쓰기마다 스레드 왕복)"""
+    loop = asyncio.get_running_loop()
+    total_size = 0
+    f = await loop.run_in_executor(None, open, file_path, 'wb')
+    try:
+        while chunk := await file.read(8192):
+            await loop.run_in_executor(None, f.write, chunk)
+            total_size += len(chunk)
+    finally:
+        await loop.run_in_executor(None, f.close)
+    return total_size, calculate_file_hash(file_path)
+
+
+async def probe(lags: list, stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - start - PROBE_INTERVAL)
+
+
+def io_bytes() -> tuple:
+    """이 프로세스의 실제 디스크 읽기/쓰기 바이트 (/proc/self/io, 없으면 0)"""
+    try:
+        with open("/proc/self/io") as f:
+            fields = dict(line.split(": ") for line in f.read().splitlines())
+        return int(fields["read_bytes"]), int(fields["write_bytes"]), int(fields["rchar"])
+    except (OSError, KeyError):
+        return 0, 0, 0
+
+
+def make_source(path: str, size: int) -> str:
+    block = os.urandom(MB)
+    sha256 = hashlib.sha256()
+    with open(path, "wb") as f:
+        written = 0
+        while written < size:
+            part = block[:min(MB, size - written)]
+            f.write(part)
+            sha256.update(part)
+            written += len(part)
+    return sha256.hexdigest()
+
+
+async def run(mode: str, source: str, target: str) -> dict:
+    lags, stop = [], asyncio.Event()
+    prober = asyncio.ensure_future(probe(lags, stop))
+    before = io_bytes()
+    with open(source, "rb") as src:
+        upload = UploadFile(file=src, filename="bench.bin")
+        start = time.perf_counter()
+        if mode == "baseline":
+            size, digest = await baseline_upload(upload, target)
+        else:
+            size, digest = await save_upload(upload, target)
+        elapsed = time.perf_counter() - start
+    after = io_bytes()
+    stop.set()
+    await prober
+    lags.sort()
+    return {
+        "size": size,
+        "digest": digest,
+        "mb_s": size / MB / elapsed,
+        "elapsed": elapsed,
+        "read_mb": (after[2] - before[2]) / MB,  # 파일 읽기 호출량 (원본 + 다시 읽기)
+        "lag_p99_ms": lags[int(len(lags) * 0.99)] * 1000 if lags else 0,
+        "lag_max_ms": lags[-1] * 1000 if lags else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100,1000", help="MB 단위, 쉼표 구분")
+    parser.add_argument("--dir", default=None, help="임시 파일 위치 (기본: 시스템 임시 디렉토리)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(dir=args.dir)
+    try:
+        for size_mb in (int(s) for s in args.sizes.split(",")):
+            source = os.path.join(workdir, "source.bin")
+            target = os.path.join(workdir, "upload.bin")
+            expected = make_source(source, size_mb * MB)
+            print(f"{size_mb}MB")
+            for mode in ("baseline", "streaming"):
+                r = asyncio.run(run(mode, source, target))
+                ok = "OK" if r["digest"] == expected and r["size"] == size_mb * MB else "해시 불일치"
+                print(f"  [{mode:>9}] {r['mb_s']:7.1f}MB/s ({r['elapsed']:.2f}초), 읽은 양 {r['read_mb']:.0f}MB, "
+                      f"루프 지연 p99 {r['lag_p99_ms']:.1f}ms / 최대 {r['lag_max_ms']:.1f}ms, {ok}")
+                os.remove(target)
+            os.remove(source)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
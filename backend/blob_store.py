@@ -0,0 +1,130 @@
+"""
+내용 주소 기반 파일 저장소 (업로드 중복 제거)
+업로드한 파일은 파일 이름이 아니라 SHA256으로 저장합니다: blobs/ab/cd/abcd...(전체 해시)
+- 같은 내용을 다시 올리면 새로 쓰지 않고 기존 파일을 가리킴 (이름이 같아도 덮어쓰지 않음)
+- 해시를 미리 아는 클라이언트는 업로드 세션 생성 시 sha256을 보내고, 서버가 고른 구간으로
+  내용을 가지고 있음을 증명하면 본문 전송 없이 완료 (해시만 아는 사람은 내용을 가져갈 수 없음)
+- 방별 참조 수와 삭제 시점은 file_index.FileIndex(SQLite)가 관리
+
+해시 앞 두 글자씩 두 단계로 나누어 한 디렉토리의 항목 수가 커지지 않게 합니다.
+"""
+
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+from pathlib import Path
+from typing import List
+
+DIGEST_PATTERN = re.compile(r"[0-9a-f]{64}")
+PROOF_SPAN = 1024 * 1024  # 소유 증명에 쓰는 구간 길이 (파일이 더 작으면 전체)
+
+
+def is_digest(value: str) -> bool:
+    """소문자 16진수 SHA256인지 (경로를 만들기 전에 반드시 확인)"""
+    return isinstance(value, str) and DIGEST_PATTERN.fullmatch(value) is not None
+
+
+def possession_proof(nonce: str, data: bytes) -> str:
+    """소유 증명 값 = sha256(nonce(16진수 디코딩) + 구간 바이트) - 클라이언트도 같은 방식으로 계산"""
+    return hashlib.sha256(bytes.fromhex(nonce) + data).hexdigest()
+
+
+class BlobStore:
+    """SHA256 → 파일"""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+
+    def path_for(self, digest: str) -> Path:
+        if not is_digest(digest):
+            raise ValueError("올바른 SHA256이 아닙니다")
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def exists(self, digest: str) -> bool:
+        return is_digest(digest) and self.path_for(digest).is_file()
+
+    async def put(self, source: Path, digest: str) -> bool:
+        """임시 파일을 저장소로 이동 - 같은 내용이 이미 있으면 임시 파일만 지우고 False"""
+        target = self.path_for(digest)
+        loop = asyncio.get_running_loop()
+        if target.is_file():
+            size = await loop.run_in_executor(None, os.path.getsize, source)
+            await loop.run_in_executor(None, os.remove, source)
+            self.deduplicated += 1
+            self.bytes_saved += size
+            return False
+
+        def place():
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.utime(source)  # 수정 시각 = 저장 시각 (고아 정리의 유예 기준)
+            # 같은 파일 시스템 안의 이름 변경 (동시에 같은 내용이 들어와도 결과는 같음)
+            os.replace(source, target)
+
+        await loop.run_in_executor(None, place)
+        self.stored += 1
+        return True
+
+    async def verify_possession(self, digest: str, size: int, nonce: str, offset: int, length: int,
+                                proof: str) -> bool:
+        """이미 있는 내용을 본문 없이 재사용 - 클라이언트가 [offset, offset+length) 구간의 증명 값을 맞히면 True
+
+        내용이 없거나 크기가 다를 때도 같은 방식으로 실패하므로 응답으로 존재 여부를 알 수 없습니다.
+        """
+        if not is_digest(digest) or not isinstance(proof, str):
+            return False
+        path = self.path_for(digest)
+
+        def read_span():
+            try:
+                with open(path, "rb") as f:
+                    if os.fstat(f.fileno()).st_size != size:
+                        return None
+                    return os.pread(f.fileno(), length, offset)
+            except FileNotFoundError:
+                return None
+
+        data = await asyncio.get_running_loop().run_in_executor(None, read_span)
+        if data is None or len(data) != length:
+            return False
+        if not hmac.compare_digest(possession_proof(nonce, data), proof.lower()):
+            return False
+        self.deduplicated += 1
+        self.bytes_saved += size
+        return True
+
+    def remove(self, digest: str) -> bool:
+        """파일 삭제 (DB 스레드에서 호출) - 있었으면 True"""
+        if not is_digest(digest):
+            return False
+        try:
+            os.remove(self.path_for(digest))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def scan(self, older_than: float) -> List[str]:
+        """수정 시각이 older_than(epoch초) 이전인 파일의 해시 목록 (고아 정리용, 스레드에서 실행)"""
+        digests = []
+        for first in os.scandir(self.root):
+            if not first.is_dir():
+                continue
+            for second in os.scandir(first.path):
+                if not second.is_dir():
+                    continue
+                for entry in os.scandir(second.path):
+                    if is_digest(entry.name) and entry.is_file() and entry.stat().st_mtime < older_than:
+                        digests.append(entry.name)
+        return digests
+
+    def stats(self) -> dict:
+        return {
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "bytes_saved": self.bytes_saved,
+        }
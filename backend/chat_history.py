@@ -0,0 +1,273 @@
+"""
+채팅 기록 저장소
+chat_message는 방에 전달한 뒤 chat_messages 테이블(추가 전용)에 기록합니다.
+- 쓰기: 메시지마다 INSERT하지 않고 CHAT_FLUSH_INTERVAL 동안 모아 한 트랜잭션으로 기록
+  (CHAT_FLUSH_BATCH건이 쌓이면 바로 기록)
+- 최근 메시지: 활성 방마다 최근 CHAT_REPLAY_SIZE건을 메모리 링 버퍼에 유지해 입장 시 디스크 없이 재생
+  (방이 비면 버퍼 해제, 다시 활성화되면 처음 한 번만 DB에서 채움)
+- 이전 기록: GET /api/rooms/{room_id}/messages?before=<cursor> - ts(마이크로초) 기준 커서 페이지네이션
+
+ts는 워커 안에서 단조 증가하는 서버 시각(마이크로초)이며 (room_id, ts) 인덱스의 정렬 키이자 커서입니다.
+멀티 워커에서는 다른 워커로 들어온 메시지가 이 워커의 버퍼에 없으므로 입장 시 DB에서 재생합니다.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+from database import run_db
+
+CHAT_FLUSH_INTERVAL = float(os.getenv("CHAT_FLUSH_INTERVAL", "0.5"))  # 초
+CHAT_FLUSH_BATCH = int(os.getenv("CHAT_FLUSH_BATCH", "200"))  # 이만큼 쌓이면 구간을 기다리지 않고 기록
+CHAT_REPLAY_SIZE = int(os.getenv("CHAT_REPLAY_SIZE", "50"))  # 방별 링 버퍼 크기 (입장 시 재생 건수)
+CHAT_PENDING_LIMIT = int(os.getenv("CHAT_PENDING_LIMIT", "10000"))  # 기록 실패가 이어질 때 보관 한도
+CHAT_MAX_LENGTH = int(os.getenv("CHAT_MAX_LENGTH", "4000"))  # 메시지 본문 최대 글자 수
+CHAT_NAME_LENGTH = 100  # username 최대 글자 수
+CHAT_TIMESTAMP_LENGTH = 64  # 클라이언트 timestamp 최대 글자 수
+CHAT_PAGE_LIMIT = 100  # 기록 조회 한 번에 최대 건수
+
+_COLUMNS = "room_id, ts, user_id, username, content, client_timestamp"
+
+
+_INSERT = f"INSERT INTO chat_messages ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?)"
+
+
+def chat_text(value, limit: int) -> Optional[str]:
+    """클라이언트가 보낸 값 → 길이 제한을 넘지 않는 문자열 (None, dict/list 등은 None)"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        value = str(value)
+    if not isinstance(value, str):
+        return None
+    return value[:limit]
+
+
+def _insert_messages(conn, rows: List[tuple]):
+    conn.executemany(_INSERT, rows)
+
+
+def _insert_each(conn, rows: List[tuple]) -> int:
+    """한 건씩 기록하고 기록할 수 없는 행(값 형식 오류 등)은 건너뜀 - 건너뛴 수 반환
+
+    잠금 등 DB 자체의 오류(OperationalError)는 그대로 올려 전체를 다시 시도하게 합니다.
+    """
+    skipped = 0
+    for row in rows:
+        try:
+            conn.execute(_INSERT, row)
+        except sqlite3.OperationalError:
+            raise
+        except (sqlite3.Error, ValueError, TypeError):
+            skipped += 1
+    return skipped
+
+
+def _select_messages(conn, room_id: str, before: Optional[int], limit: int) -> list:
+    # idx_chat_messages_room_ts로 범위 탐색 후 역순으로 limit건만 읽음
+    if before is None:
+        return conn.execute(
+            f"SELECT {_COLUMNS} FROM chat_messages WHERE room_id = ? ORDER BY ts DESC LIMIT ?",
+            (room_id, limit),
+        ).fetchall()
+    return conn.execute(
+        f"SELECT {_COLUMNS} FROM chat_messages WHERE room_id = ? AND ts < ? ORDER BY ts DESC LIMIT ?",
+        (room_id, before, limit),
+    ).fetchall()
+
+
+def _to_message(row) -> dict:
+    """DB 행 → chat_message 이벤트와 같은 모양"""
+    return {
+        'userId': row['user_id'],
+        'username': row['username'],
+        'content': row['content'],
+        'timestamp': row['client_timestamp'],
+        'ts': row['ts'],
+    }
+
+
+class ChatHistory:
+    """방별 최근 메시지 링 버퍼 + 일괄 기록 큐"""
+
+    def __init__(
+        self,
+        interval: float = CHAT_FLUSH_INTERVAL,
+        batch: int = CHAT_FLUSH_BATCH,
+        replay_size: int = CHAT_REPLAY_SIZE,
+    ):
+        self.interval = interval
+        self.batch = batch
+        self.replay_size = replay_size
+        self._recent: Dict[str, Deque[dict]] = {}  # room_id -> 최근 메시지 (활성 방만)
+        self._pending: List[tuple] = []  # 기록 대기 행
+        self._loading: Dict[str, asyncio.Future] = {}  # room_id -> 버퍼를 DB에서 채우는 중
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+        self._last_ts = 0
+        self.appended = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.replays = 0
+        self.replay_loads = 0
+        self.replay_errors = 0
+
+    def _next_ts(self) -> int:
+        # 같은 마이크로초에 여러 메시지가 와도 커서가 겹치지 않도록 단조 증가
+        self._last_ts = max(self._last_ts + 1, time.time_ns() // 1000)
+        return self._last_ts
+
+    def append(self, room_id: str, message: dict) -> dict:
+        """메시지 기록 요청 (즉시 반환) - ts를 붙인 메시지 반환"""
+        message = {**message, 'ts': self._next_ts()}
+        self.appended += 1
+        recent = self._recent.get(room_id)
+        if recent is not None:
+            recent.append(message)
+
+        # 핸들러에서 검사하지만 한 행이 배치 전체를 막지 않도록 여기서도 문자열로 맞춤
+        self._pending.append((str(room_id), message['ts'], chat_text(message.get('userId'), CHAT_NAME_LENGTH),
+                              chat_text(message.get('username'), CHAT_NAME_LENGTH),
+                              chat_text(message.get('content'), CHAT_MAX_LENGTH) or '',
+                              chat_text(message.get('timestamp'), CHAT_TIMESTAMP_LENGTH)))
+        if len(self._pending) > CHAT_PENDING_LIMIT:
+            overflow = len(self._pending) - CHAT_PENDING_LIMIT
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+        if len(self._pending) >= self.batch:
+            asyncio.ensure_future(self.flush())
+        elif self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.interval, lambda: asyncio.ensure_future(self.flush()))
+        return message
+
+    async def flush(self):
+        """대기 중인 메시지를 하나의 트랜잭션으로 기록"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            rows, self._pending = self._pending, []
+            if not rows:
+                return
+            skipped = 0
+            try:
+                try:
+                    await run_db(_insert_messages, rows)
+                except sqlite3.OperationalError:
+                    raise
+                except Exception as e:
+                    # 특정 행의 값 때문에 배치가 실패 - 한 건씩 기록해 문제 행만 버림
+                    skipped = await run_db(_insert_each, rows)
+                    print(f'[ERROR] 채팅 {skipped}건 기록 불가로 버림: {e}')
+            except Exception as e:
+                self.failures += 1
+                print(f'[ERROR] 채팅 {len(rows)}건 기록 실패: {e}')
+                # 순서를 유지해 다음 구간에 재시도 (그 사이 들어온 메시지는 뒤에)
+                self._pending[:0] = rows
+                if self._timer is None:
+                    loop = asyncio.get_running_loop()
+                    self._timer = loop.call_later(self.interval, lambda: asyncio.ensure_future(self.flush()))
+                return
+            self.flushes += 1
+            self.written += len(rows) - skipped
+            self.rejected += skipped
+
+    async def recent(self, room_id: str, from_store: bool = False) -> List[dict]:
+        """입장 시 재생할 최근 메시지 (오래된 것부터)
+
+        활성 방은 링 버퍼에서 바로 반환하고, 버퍼가 없으면 한 번만 DB에서 채웁니다.
+        from_store=True면 버퍼 대신 DB에서 읽음 (멀티 워커)
+        DB를 읽지 못하면 재생 없이 빈 목록 (다음 입장에서 다시 시도)
+        """
+        self.replays += 1
+        try:
+            if from_store:
+                return await self._load(room_id)
+
+            loading = self._loading.get(room_id)
+            if loading is not None:
+                await asyncio.shield(loading)  # 같은 방의 첫 입장이 채우는 중
+            elif room_id not in self._recent:
+                loading = self._loading[room_id] = asyncio.ensure_future(self._fill(room_id))
+                try:
+                    await asyncio.shield(loading)
+                finally:
+                    self._loading.pop(room_id, None)
+        except Exception as e:
+            self.replay_errors += 1
+            print(f'[ERROR] 방 {room_id} 채팅 재생 기록 읽기 실패: {e}')
+            return []
+        return list(self._recent.get(room_id, ()))
+
+    async def _fill(self, room_id: str):
+        # 버퍼를 먼저 만들어 DB를 읽는 동안 들어온 메시지도 담고, 읽은 기록은 그보다 앞에 둠
+        recent = self._recent[room_id] = deque(maxlen=self.replay_size)
+        try:
+            loaded = await self._load(room_id)
+        except BaseException:
+            # 빈 버퍼가 남으면 방이 빌 때까지 모든 입장이 기록 없이 재생되므로 제거
+            if self._recent.get(room_id) is recent:
+                del self._recent[room_id]
+            raise
+        newer = list(recent)
+        first_newer = newer[0]['ts'] if newer else None
+        recent.clear()
+        recent.extend(m for m in loaded if first_newer is None or m['ts'] < first_newer)
+        recent.extend(newer)
+
+    async def _load(self, room_id: str) -> List[dict]:
+        await self.flush()
+        rows = await run_db(_select_messages, room_id, None, self.replay_size)
+        self.replay_loads += 1
+        return [_to_message(row) for row in reversed(rows)]
+
+    def discard_room(self, room_id: str):
+        """방이 비었을 때 버퍼 해제 (기록은 DB에 남음)"""
+        self._recent.pop(room_id, None)
+
+    async def history(self, room_id: str, before: Optional[int] = None, limit: int = 50) -> dict:
+        """ts가 before보다 이전인 메시지를 최신 limit건까지 (오래된 것부터) + 다음 페이지 커서"""
+        limit = max(1, min(limit, CHAT_PAGE_LIMIT))
+        await self.flush()  # 아직 기록되지 않은 메시지도 조회되도록
+        rows = await run_db(_select_messages, room_id, before, limit + 1)
+        has_more = len(rows) > limit
+        messages = [_to_message(row) for row in reversed(rows[:limit])]
+        return {
+            'messages': messages,
+            'nextCursor': str(messages[0]['ts']) if has_more else None,
+        }
+
+    async def close(self):
+        """서버 종료 시 남은 메시지 기록 (실패 시 최대 3회 재시도)"""
+        for _ in range(3):
+            await self.flush()
+            if not self._pending:
+                return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        print(f'[ERROR] 종료 시 채팅 {len(self._pending)}건 기록 실패')
+
+    def stats(self) -> dict:
+        return {
+            "appended": self.appended,
+            "written": self.written,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "avg_batch": round(self.written / self.flushes, 2) if self.flushes else 0,
+            "failures": self.failures,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "buffered_rooms": len(self._recent),
+            "replays": self.replays,
+            "replay_loads": self.replay_loads,
+            "replay_errors": self.replay_errors,
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,414 @@
+"""
+멀티 워커 시그널링 백엔드
+Socket.IO 이벤트 전달(client manager)과 방 참가 상태 공유를 교체 가능한 백엔드로 분리
+
+- memory (기본): 단일 워커. 기존과 동일하게 프로세스 메모리만 사용
+- sqlite: 같은 호스트의 여러 워커가 SQLite 파일(SIGNALING_DB)을 공유
+  * SQLitePubSubManager: 다른 워커에 접속한 클라이언트에게도 emit 전달
+  * SQLiteMembershipStore: 워커별 참가자를 한 테이블에 기록하여 전체 참가자 수/명단 조회
+
+외부 서비스(Redis 등) 없이 동작하므로 로컬 테스트에서도 그대로 사용할 수 있습니다.
+워커 간에는 스티키 세션이 없으므로 sqlite 백엔드에서는 websocket 전송만 허용합니다 (signaling_transports).
+"""
+
+import asyncio
+import base64
+import json
+import os
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from room_state import RoomMembership
+
+# ===== 설정 =====
+SIGNALING_BACKEND = os.getenv("SIGNALING_BACKEND", "memory")  # memory | sqlite
+SIGNALING_DB = os.getenv("SIGNALING_DB", "signaling.db")
+CLUSTER_POLL_INTERVAL = float(os.getenv("CLUSTER_POLL_INTERVAL", "0.01"))  # pub/sub 메시지 폴링 간격 (초)
+CLUSTER_REFRESH_INTERVAL = float(os.getenv("CLUSTER_REFRESH_INTERVAL", "1.0"))  # 전체 참가자 수 갱신/하트비트 (초)
+CLUSTER_WORKER_TTL = float(os.getenv("CLUSTER_WORKER_TTL", "10"))  # 하트비트가 끊긴 워커 정리 기준 (초)
+CLUSTER_MESSAGE_RETENTION = float(os.getenv("CLUSTER_MESSAGE_RETENTION", "30"))  # pub/sub 메시지 보관 시간 (초)
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")
+    conn.execute("PRAGMA busy_timeout = 5000")
+    return conn
+
+
+class _SQLiteWorker:
+    """SQLite 파일 하나에 대한 전용 스레드 + 커넥션 (이벤트 루프를 막지 않도록)"""
+
+    def __init__(self, path: str, name: str):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=name)
+        self._conn: Optional[sqlite3.Connection] = None
+        self.path = path
+
+    def _call(self, func, args):
+        if self._conn is None:
+            self._conn = _connect(self.path)
+        return func(self._conn, *args)
+
+    async def run(self, func: Callable, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._call, func, args)
+
+    def close(self):
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._executor.submit(_close).result()
+        self._executor.shutdown(wait=True)
+
+
+def signaling_transports() -> Optional[List[str]]:
+    """허용할 Engine.IO 전송 (None이면 기본값 polling + websocket)
+
+    long-polling은 요청마다 다른 워커로 갈 수 있어 스티키 세션 없이는 세션이 끊기므로,
+    여러 워커가 상태를 공유하는 백엔드에서는 websocket만 허용합니다.
+    """
+    return None if SIGNALING_BACKEND == "memory" else ["websocket"]
+
+
+# ===== 워커 간 emit 전달 =====
+
+_MARKERS = ("__bytes__", "__tuple__", "__dict__")
+
+
+def pack_message(value):
+    """pub/sub 메시지 → JSON으로 저장할 수 있는 값 (bytes와 tuple(여러 인자 emit)을 표시해 보존)"""
+    if isinstance(value, (bytes, bytearray)):
+        return {"__bytes__": base64.b64encode(value).decode("ascii")}
+    if isinstance(value, tuple):
+        return {"__tuple__": [pack_message(item) for item in value]}
+    if isinstance(value, list):
+        return [pack_message(item) for item in value]
+    if isinstance(value, dict):
+        packed = {key: pack_message(item) for key, item in value.items()}
+        # 표시용 키 하나뿐인 원래 dict는 한 번 더 감싸서 구분
+        if len(packed) == 1 and next(iter(packed)) in _MARKERS:
+            return {"__dict__": packed}
+        return packed
+    return value
+
+
+def unpack_message(value):
+    """pack_message의 역변환"""
+    if isinstance(value, list):
+        return [unpack_message(item) for item in value]
+    if isinstance(value, dict):
+        if len(value) == 1:
+            (key, item), = value.items()
+            if key == "__bytes__":
+                return base64.b64decode(item)
+            if key == "__tuple__":
+                return tuple(unpack_message(part) for part in item)
+            if key == "__dict__":
+                return {k: unpack_message(v) for k, v in item.items()}
+        return {k: unpack_message(v) for k, v in value.items()}
+    return value
+
+
+class SQLitePubSubManager(AsyncPubSubManager):
+    """SQLite 테이블을 메시지 큐로 사용하는 Socket.IO pub/sub client manager
+
+    emit/enter_room 등은 pubsub_messages에 기록되고, 각 워커가 폴링하여 자기에게 접속한
+    클라이언트에게 전달합니다. 메시지는 JSON으로 저장하며 바이너리 첨부는 base64로 담습니다
+    (pack_message, 파일을 쓸 수 있는 누구든 임의 객체를 만들 수 있는 pickle은 사용하지 않음).
+    """
+
+    name = 'sqlitepubsub'
+
+    def __init__(self, db_path: str = SIGNALING_DB, channel: str = 'socketio',
+                 poll_interval: float = CLUSTER_POLL_INTERVAL,
+                 retention: float = CLUSTER_MESSAGE_RETENTION,
+                 write_only: bool = False, logger=None):
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self._db = _SQLiteWorker(db_path, "videonet-pubsub")
+        self._init_schema()
+
+    def _init_schema(self):
+        conn = _connect(self._db.path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS pubsub_messages (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                channel TEXT NOT NULL,
+                payload BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+        """)
+        conn.close()
+
+    @staticmethod
+    def _insert(conn, channel, payload):
+        conn.execute(
+            "INSERT INTO pubsub_messages (channel, payload, created_at) VALUES (?, ?, ?)",
+            (channel, payload, time.time())
+        )
+
+    @staticmethod
+    def _fetch(conn, channel, last_id):
+        return conn.execute(
+            "SELECT id, payload FROM pubsub_messages WHERE id > ? AND channel = ? ORDER BY id",
+            (last_id, channel)
+        ).fetchall()
+
+    @staticmethod
+    def _last_id(conn):
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM pubsub_messages").fetchone()[0]
+
+    @staticmethod
+    def _prune(conn, before):
+        conn.execute("DELETE FROM pubsub_messages WHERE created_at < ?", (before,))
+
+    async def _publish(self, data):
+        await self._db.run(self._insert, self.channel, json.dumps(pack_message(data), separators=(",", ":")))
+
+    async def _listen(self):
+        last_id = await self._db.run(self._last_id)
+        last_prune = time.monotonic()
+        while True:
+            rows = await self._db.run(self._fetch, self.channel, last_id)
+            for row_id, payload in rows:
+                last_id = row_id
+                try:
+                    message = unpack_message(json.loads(payload))
+                except (TypeError, ValueError) as e:
+                    print(f'[ERROR] pub/sub 메시지 {row_id} 해석 실패: {e}')
+                    continue
+                yield message
+
+            if time.monotonic() - last_prune > self.retention:
+                last_prune = time.monotonic()
+                await self._db.run(self._prune, time.time() - self.retention)
+            if not rows:
+                await asyncio.sleep(self.poll_interval)
+
+
+# ===== 참가 상태 공유 =====
+
+class MemoryMembershipStore:
+    """단일 워커용 - 로컬 RoomMembership이 곧 전체 상태"""
+
+    local_only = True
+    snapshot_max_age: Optional[float] = None
+
+    def __init__(self, membership: RoomMembership, connected: Dict[str, dict]):
+        self.membership = membership
+        self.connected = connected
+
+    async def start(self) -> bool:
+        """시작 - 다른 살아있는 워커가 없으면 True"""
+        return True
+
+    async def stop(self):
+        pass
+
+    async def on_join(self, sid: str, room_id: str, user_info: dict):
+        pass
+
+    async def on_leave(self, sid: str, room_id: str):
+        pass
+
+    def counts(self) -> Dict[str, int]:
+        return self.membership.counts()
+
+    async def room_count(self, room_id: str) -> int:
+        return self.membership.count(room_id)
+
+    async def members(self, room_id: str) -> List[dict]:
+        return [
+            {'userId': sid, 'userInfo': self.connected[sid].get('userInfo', {})}
+            for sid in self.membership.members(room_id) if sid in self.connected
+        ]
+
+    def can_reach(self, sid: str) -> bool:
+        """sid로 emit할 수 있는지 (이 워커에 접속 중인지)"""
+        return sid in self.connected
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "rooms": len(self.membership.rooms)}
+
+
+class SQLiteMembershipStore:
+    """여러 워커용 - 참가자를 공유 SQLite 테이블에 기록
+
+    전체 참가자 수는 CLUSTER_REFRESH_INTERVAL마다 다시 읽어 캐시하며(동기 조회용),
+    이 워커의 변경은 즉시 반영합니다. 하트비트가 끊긴 워커의 참가자는 자동 정리됩니다.
+    """
+
+    local_only = False
+
+    def __init__(self, membership: RoomMembership, connected: Dict[str, dict],
+                 db_path: str = SIGNALING_DB,
+                 refresh_interval: float = CLUSTER_REFRESH_INTERVAL,
+                 worker_ttl: float = CLUSTER_WORKER_TTL,
+                 on_change: Optional[Callable[[], None]] = None):
+        self.membership = membership
+        self.connected = connected
+        self.worker_id = uuid.uuid4().hex
+        self.refresh_interval = refresh_interval
+        self.worker_ttl = worker_ttl
+        self.on_change = on_change  # 다른 워커로 인해 참가자 수가 바뀌었을 때 호출
+        self.snapshot_max_age = refresh_interval  # 다른 워커의 방 생성 등은 이 주기로 반영
+        self._db = _SQLiteWorker(db_path, "videonet-cluster")
+        self._counts: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _init_schema(conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cluster_workers (
+                worker_id TEXT PRIMARY KEY,
+                heartbeat_at REAL NOT NULL
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS cluster_members (
+                sid TEXT NOT NULL,
+                room_id TEXT NOT NULL,
+                worker_id TEXT NOT NULL,
+                user_info TEXT,
+                joined_at REAL NOT NULL,
+                PRIMARY KEY (room_id, sid)
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cluster_members_worker ON cluster_members (worker_id)")
+
+    def _heartbeat(self, conn) -> int:
+        """하트비트 기록, 죽은 워커 정리 후 살아있는 다른 워커 수 반환"""
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO cluster_workers (worker_id, heartbeat_at) VALUES (?, ?)",
+                (self.worker_id, now)
+            )
+            dead = [row[0] for row in conn.execute(
+                "SELECT worker_id FROM cluster_workers WHERE heartbeat_at < ?", (now - self.worker_ttl,)
+            )]
+            for worker_id in dead:
+                conn.execute("DELETE FROM cluster_members WHERE worker_id = ?", (worker_id,))
+                conn.execute("DELETE FROM cluster_workers WHERE worker_id = ?", (worker_id,))
+            others = conn.execute(
+                "SELECT COUNT(*) FROM cluster_workers WHERE worker_id != ?", (self.worker_id,)
+            ).fetchone()[0]
+            conn.execute("COMMIT")
+        except BaseException:
+            # 트랜잭션을 열어 둔 채 두면 이 워커의 다음 쓰기와 다른 워커의 쓰기가 모두 막힘
+            conn.execute("ROLLBACK")
+            raise
+        return others
+
+    @staticmethod
+    def _read_counts(conn) -> Dict[str, int]:
+        return dict(conn.execute("SELECT room_id, COUNT(*) FROM cluster_members GROUP BY room_id"))
+
+    async def start(self) -> bool:
+        await self._db.run(self._init_schema)
+        others = await self._db.run(self._heartbeat)
+        self._counts = await self._db.run(self._read_counts)
+        self._task = asyncio.create_task(self._refresh_loop())
+        return others == 0
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        def _unregister(conn):
+            conn.execute("DELETE FROM cluster_members WHERE worker_id = ?", (self.worker_id,))
+            conn.execute("DELETE FROM cluster_workers WHERE worker_id = ?", (self.worker_id,))
+
+        await self._db.run(_unregister)
+        self._db.close()
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self._db.run(self._heartbeat)
+                await self._refresh_counts()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f'[ERROR] 클러스터 상태 갱신 실패: {e}')
+
+    async def _refresh_counts(self):
+        counts = await self._db.run(self._read_counts)
+        if counts != self._counts:
+            self._counts = counts
+            if self.on_change is not None:
+                self.on_change()
+
+    async def on_join(self, sid: str, room_id: str, user_info: dict):
+        def _insert(conn):
+            conn.execute(
+                "INSERT OR REPLACE INTO cluster_members (sid, room_id, worker_id, user_info, joined_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (sid, room_id, self.worker_id, json.dumps(user_info), time.time())
+            )
+        await self._db.run(_insert)
+        self._counts = await self._db.run(self._read_counts)
+
+    async def on_leave(self, sid: str, room_id: str):
+        def _delete(conn):
+            conn.execute("DELETE FROM cluster_members WHERE room_id = ? AND sid = ?", (room_id, sid))
+        await self._db.run(_delete)
+        self._counts = await self._db.run(self._read_counts)
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self._counts)
+
+    async def room_count(self, room_id: str) -> int:
+        def _count(conn):
+            return conn.execute("SELECT COUNT(*) FROM cluster_members WHERE room_id = ?", (room_id,)).fetchone()[0]
+        return await self._db.run(_count)
+
+    async def members(self, room_id: str) -> List[dict]:
+        def _members(conn):
+            return conn.execute(
+                "SELECT sid, user_info FROM cluster_members WHERE room_id = ? ORDER BY joined_at", (room_id,)
+            ).fetchall()
+        rows = await self._db.run(_members)
+        return [{'userId': sid, 'userInfo': json.loads(info) if info else {}} for sid, info in rows]
+
+    def can_reach(self, sid: str) -> bool:
+        # 다른 워커에 접속한 클라이언트일 수 있으므로 pub/sub에 맡김 (없는 sid면 무시됨)
+        return bool(sid)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "sqlite",
+            "worker_id": self.worker_id,
+            "cluster_rooms": len(self._counts),
+            "cluster_participants": sum(self._counts.values()),
+            "local_rooms": len(self.membership.rooms),
+        }
+
+
+def create_client_manager() -> Optional[socketio.AsyncManager]:
+    """SIGNALING_BACKEND에 맞는 Socket.IO client manager (memory면 기본 매니저)"""
+    if SIGNALING_BACKEND == "sqlite":
+        return SQLitePubSubManager(SIGNALING_DB)
+    if SIGNALING_BACKEND != "memory":
+        raise ValueError(f"알 수 없는 SIGNALING_BACKEND: {SIGNALING_BACKEND}")
+    return None
+
+
+def create_membership_store(membership: RoomMembership, connected: Dict[str, dict],
+                            on_change: Optional[Callable[[], None]] = None):
+    """SIGNALING_BACKEND에 맞는 참가 상태 저장소"""
+    if SIGNALING_BACKEND == "sqlite":
+        return SQLiteMembershipStore(membership, connected, SIGNALING_DB, on_change=on_change)
+    return MemoryMembershipStore(membership, connected)
@@ -0,0 +1,172 @@
+"""
+데이터베이스 접근 계층
+REST API(main.py)와 Socket.IO 서버가 함께 사용하는 SQLite 커넥션 풀
+- WAL 저널 모드 (읽기와 쓰기가 서로 막지 않음)
+- 커넥션 재사용으로 prepared statement 캐시 유지
+- 비동기 핸들러용 run_db(): 블로킹 sqlite3 작업을 전용 DB 스레드에서 실행
+"""
+
+import asyncio
+import os
+import queue
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, List, Optional
+
+# ===== 설정 =====
+DATABASE_NAME = os.getenv("DATABASE_NAME", "videonet.db")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+DB_STATEMENT_CACHE = int(os.getenv("DB_STATEMENT_CACHE", "256"))
+
+# 커넥션 생성 시 한 번 적용되는 PRAGMA
+PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",  # WAL에서는 NORMAL로도 손상 없이 안전
+    "PRAGMA cache_size = -16000",  # 약 16MB 페이지 캐시
+    "PRAGMA mmap_size = 268435456",  # 256MB 메모리 매핑 읽기
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA busy_timeout = 5000",  # 쓰기 락 대기 (ms)
+)
+
+
+class ConnectionPool:
+    """크기가 제한된 SQLite 커넥션 풀
+
+    커넥션은 필요할 때 최대 size개까지 생성되고, 반납된 커넥션은
+    다음 요청에서 재사용됩니다. 모든 커넥션이 사용 중이면 timeout초까지 대기합니다.
+    """
+
+    def __init__(self, database: str, size: int = DB_POOL_SIZE, timeout: float = DB_POOL_TIMEOUT):
+        self.database = database
+        self.size = size
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database,
+            check_same_thread=False,  # 풀을 통해 여러 스레드가 번갈아 사용
+            cached_statements=DB_STATEMENT_CACHE,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def acquire(self) -> sqlite3.Connection:
+        """커넥션 하나를 빌려옴"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                try:
+                    return self._connect()
+                except Exception:
+                    self._created -= 1
+                    raise
+
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError(f"DB 커넥션 풀 고갈 (size={self.size}, timeout={self.timeout}s)")
+
+    def release(self, conn: sqlite3.Connection):
+        """커넥션 반납"""
+        self._idle.put(conn)
+
+    def discard(self, conn: sqlite3.Connection):
+        """손상된 커넥션을 풀에서 제거"""
+        try:
+            conn.close()
+        finally:
+            with self._lock:
+                self._created -= 1
+
+    @contextmanager
+    def connection(self):
+        """트랜잭션 단위로 커넥션 사용 (정상 종료 시 commit, 예외 시 rollback)"""
+        conn = self.acquire()
+        try:
+            yield conn
+            conn.commit()
+        except BaseException:
+            self._rollback_or_discard(conn)
+            raise
+        else:
+            self.release(conn)
+
+    def _rollback_or_discard(self, conn: sqlite3.Connection):
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+        else:
+            self.release(conn)
+
+    def close_all(self):
+        """유휴 커넥션 모두 닫기 (서버 종료 시)"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
+
+
+pool = ConnectionPool(DATABASE_NAME)
+
+
+@contextmanager
+def get_db():
+    """풀에서 커넥션을 빌려 트랜잭션 하나를 실행"""
+    with pool.connection() as conn:
+        yield conn
+
+
+# ===== 비동기 접근 =====
+# 풀 크기만큼의 전용 스레드 - 이벤트 루프는 DB 작업을 기다리는 동안 다른 이벤트를 처리
+_executor = ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix="videonet-db")
+
+
+def _run_in_transaction(func: Callable, args: tuple) -> Any:
+    with get_db() as conn:
+        return func(conn, *args)
+
+
+async def run_db(func: Callable, *args) -> Any:
+    """func(conn, *args)를 DB 스레드에서 하나의 트랜잭션으로 실행하고 결과 반환
+
+    func 안에서 발생한 예외(HTTPException 포함)는 rollback 후 그대로 전달됩니다.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, _run_in_transaction, func, args)
+
+
+async def fetch_one(sql: str, params: tuple = ()) -> Optional[sqlite3.Row]:
+    """단일 행 조회"""
+    return await run_db(lambda conn: conn.execute(sql, params).fetchone())
+
+
+async def fetch_all(sql: str, params: tuple = ()) -> List[sqlite3.Row]:
+    """여러 행 조회"""
+    return await run_db(lambda conn: conn.execute(sql, params).fetchall())
+
+
+async def execute(sql: str, params: tuple = ()) -> int:
+    """쓰기 쿼리 실행 후 lastrowid 반환"""
+    return await run_db(lambda conn: conn.execute(sql, params).lastrowid)
+
+
+def shutdown_db():
+    """DB 스레드 종료 및 커넥션 정리 (서버 종료 시)"""
+    _executor.shutdown(wait=True)
+    pool.close_all()
@@ -0,0 +1,183 @@
+"""
+방 단위 이벤트 팬아웃 스케줄러
+클라이언트마다 크기가 제한된 송신 큐와 전송 태스크를 두어, 느린 수신자 한 명이
+보내는 쪽 핸들러를 붙잡지 않도록 합니다. 큐가 찼을 때의 처리는 이벤트 종류별 정책을 따릅니다.
+
+- coalesce: 같은 키의 대기 중인 이벤트를 최신 값으로 교체 (미디어 토글, 방 목록 갱신)
+            교체할 대상이 없는데 큐가 가득 차면 버림
+- backpressure: 큐에 자리가 날 때까지 보내는 쪽이 대기 (파일 청크)
+- lossless: 한도를 넘어도 큐에 넣음 (채팅, 입장/퇴장, 시그널링)
+            FANOUT_HARD_LIMIT를 넘으면 따라오지 못하는 클라이언트로 보고 연결 해제
+- drop: 큐가 가득 차면 버림
+
+한 클라이언트로 가는 이벤트는 모두 같은 큐를 거치므로 순서가 유지됩니다.
+"""
+
+import asyncio
+import logging
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Hashable, Iterable, List, Optional
+
+from structured_logging import get_logger, log_event
+
+FANOUT_QUEUE_LIMIT = int(os.getenv("FANOUT_QUEUE_LIMIT", "256"))  # 클라이언트별 송신 큐 크기
+FANOUT_HARD_LIMIT = int(os.getenv("FANOUT_HARD_LIMIT", str(FANOUT_QUEUE_LIMIT * 4)))  # lossless 이벤트 허용 한도
+
+log = get_logger('fanout')
+
+COALESCE = 'coalesce'
+BACKPRESSURE = 'backpressure'
+LOSSLESS = 'lossless'
+DROP = 'drop'
+
+# 이벤트별 정책 (없으면 lossless)
+EVENT_POLICIES: Dict[str, str] = {
+    'media_toggled': COALESCE,
+    'room_list_updated': COALESCE,
+    'file_chunk': BACKPRESSURE,
+    'file_chunk_bin': BACKPRESSURE,
+    'chat_message': LOSSLESS,
+}
+
+
+class ClientQueue:
+    """클라이언트 하나의 송신 큐"""
+
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.items: Deque[list] = deque()  # [event, data, coalesce_key]
+        self.keys: Dict[Hashable, list] = {}  # coalesce_key -> 대기 중인 항목
+        self.space = asyncio.Event()
+        self.space.set()
+        self.task: Optional[asyncio.Task] = None
+        self.closed = False
+
+    def __len__(self):
+        return len(self.items)
+
+
+class FanoutScheduler:
+    """클라이언트별 제한 큐 + 이벤트 종류별 정책"""
+
+    def __init__(
+        self,
+        send: Callable[[str, str, object], Awaitable[None]],
+        evict: Optional[Callable[[str], Awaitable[None]]] = None,
+        limit: int = FANOUT_QUEUE_LIMIT,
+        hard_limit: int = FANOUT_HARD_LIMIT,
+    ):
+        self.send = send  # 실제 전송 (sid, event, data)
+        self.evict = evict  # lossless 한도 초과 클라이언트 처리 (연결 해제)
+        self.limit = limit
+        self.hard_limit = max(hard_limit, limit)
+        self.queues: Dict[str, ClientQueue] = {}
+        self.enqueued = 0
+        self.sent = 0
+        self.coalesced = 0
+        self.backpressure_waits = 0
+        self.evicted = 0
+        self.send_errors = 0
+        self.max_depth = 0
+        self.dropped: Dict[str, int] = {}  # event -> 버린 수
+
+    async def emit(self, sids: Iterable[str], event: str, data=None, key: Hashable = None):
+        """sids 각각의 큐에 이벤트 추가 (backpressure 정책이면 자리가 날 때까지 대기)"""
+        policy = EVENT_POLICIES.get(event, LOSSLESS)
+        for sid in sids:
+            queue = self.queues.get(sid)
+            if queue is None:
+                queue = self.queues[sid] = ClientQueue(sid)
+            await self._put(queue, policy, event, data, key)
+
+    async def _put(self, queue: ClientQueue, policy: str, event: str, data, key: Hashable):
+        if policy == COALESCE and key is not None:
+            entry = queue.keys.get((event, key))
+            if entry is not None:
+                entry[1] = data
+                self.coalesced += 1
+                return
+
+        if len(queue) >= self.limit:
+            if policy == BACKPRESSURE:
+                self.backpressure_waits += 1
+                while len(queue) >= self.limit and not queue.closed:
+                    queue.space.clear()
+                    await queue.space.wait()
+                if queue.closed:
+                    return
+            elif policy in (COALESCE, DROP):
+                self.dropped[event] = self.dropped.get(event, 0) + 1
+                return
+            elif len(queue) >= self.hard_limit:
+                self.dropped[event] = self.dropped.get(event, 0) + 1
+                await self._evict(queue)
+                return
+
+        entry = [event, data, (event, key) if policy == COALESCE and key is not None else None]
+        queue.items.append(entry)
+        if entry[2] is not None:
+            queue.keys[entry[2]] = entry
+        self.enqueued += 1
+        self.max_depth = max(self.max_depth, len(queue))
+
+        if queue.task is None:
+            queue.task = asyncio.create_task(self._drain(queue))
+
+    async def _drain(self, queue: ClientQueue):
+        """큐가 빌 때까지 순서대로 전송 (비면 태스크 종료, 다음 이벤트에서 다시 시작)"""
+        try:
+            while queue.items and not queue.closed:
+                event, data, key = queue.items.popleft()
+                if key is not None:
+                    queue.keys.pop(key, None)
+                if len(queue) < self.limit:
+                    queue.space.set()
+                try:
+                    await self.send(queue.sid, event, data)
+                    self.sent += 1
+                except Exception as e:
+                    self.send_errors += 1
+                    log_event(log, logging.ERROR, 'fanout_send_failed', sid=queue.sid, event=event, error=e)
+        finally:
+            queue.task = None
+
+    async def _evict(self, queue: ClientQueue):
+        self.evicted += 1
+        log_event(log, logging.WARNING, 'fanout_evicted', sid=queue.sid, depth=len(queue))
+        self.remove(queue.sid)
+        if self.evict is not None:
+            await self.evict(queue.sid)
+
+    def remove(self, sid: str):
+        """연결 해제 - 큐를 비우고 대기 중인 backpressure 송신자를 깨움"""
+        queue = self.queues.pop(sid, None)
+        if queue is None:
+            return
+        queue.closed = True
+        queue.items.clear()
+        queue.keys.clear()
+        queue.space.set()
+        if queue.task is not None and queue.task is not asyncio.current_task():
+            queue.task.cancel()
+
+    def depths(self) -> List[int]:
+        return [len(queue) for queue in self.queues.values()]
+
+    def stats(self) -> dict:
+        depths = self.depths()
+        return {
+            "clients": len(depths),
+            "queued": sum(depths),
+            "max_queue_depth": max(depths, default=0),
+            "peak_queue_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "coalesced": self.coalesced,
+            "dropped": dict(self.dropped),
+            "backpressure_waits": self.backpressure_waits,
+            "evicted": self.evicted,
+            "send_errors": self.send_errors,
+            "limit": self.limit,
+            "hard_limit": self.hard_limit,
+        }
@@ -0,0 +1,219 @@
+"""
+파일 다운로드 응답 (HTTP Range, 조건부 GET)
+/api/files/download에서 사용합니다.
+- ETag: 저장된 SHA256을 그대로 강한 ETag로 사용 ("<sha256>"), If-None-Match가 맞으면 304
+- Range: bytes=처음-끝 / 처음- / -마지막N 여러 개 (겹치는 범위는 병합)
+  범위 하나는 206 + Content-Range, 여러 개는 206 multipart/byteranges
+  If-Range가 현재 ETag와 다르면 Range를 무시하고 전체 전송
+  만족할 수 있는 범위가 없으면 416 (Content-Range: bytes */크기)
+- 전송: 서버가 ASGI zerocopysend 확장을 지원하면 sendfile로 복사 없이 전송,
+  아니면 DOWNLOAD_CHUNK_SIZE씩 스레드에서 읽되 다음 청크 읽기를 현재 청크 전송과 겹침
+
+file_id는 내용 해시에서 나오므로 같은 file_id의 내용은 바뀌지 않습니다 (immutable 캐시).
+"""
+
+import asyncio
+import os
+import secrets
+from typing import List, Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import Request
+from starlette.responses import Response
+
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("DOWNLOAD_CHUNK_SIZE", str(1024 * 1024)))
+MAX_RANGES = 16  # 이보다 많은 범위 요청은 무시하고 전체 전송 (작은 범위 다수로 부하를 키우는 요청 방지)
+ZEROCOPY = "http.response.zerocopysend"
+CACHE_CONTROL = "private, max-age=31536000, immutable"
+
+_stats = {
+    "full": 0,
+    "partial": 0,
+    "multipart": 0,
+    "not_modified": 0,
+    "unsatisfiable": 0,
+    "zerocopy": 0,
+    "bytes_sent": 0,
+}
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """Range 헤더 → 정렬·병합된 [처음, 끝) 목록
+
+    None: 헤더가 없거나 해석할 수 없음 (전체 전송), []: 만족할 수 있는 범위 없음 (416)
+    """
+    if not header:
+        return None
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        return None
+    parts = [part.strip() for part in spec.split(",") if part.strip()]
+    if not parts or len(parts) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for part in parts:
+        first, sep, last = part.partition("-")
+        first, last = first.strip(), last.strip()
+        if not sep or (first and not first.isdigit()) or (last and not last.isdigit()):
+            return None
+        if not first:
+            # 마지막 N바이트
+            if not last:
+                return None
+            count = int(last)
+            if count == 0 or size == 0:
+                continue
+            ranges.append((max(size - count, 0), size))
+            continue
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(int(last) + 1, size) if last else size))
+
+    merged: List[Tuple[int, int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    # If-None-Match는 약한 비교 (W/ 접두사 무시)
+    for tag in header.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag.removeprefix("W/") == etag:
+            return True
+    return False
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+class RangedFileResponse(Response):
+    """파일 전체 또는 일부 범위를 보내는 응답 (상태 코드와 헤더는 생성 시 확정)"""
+
+    media_type = "application/octet-stream"
+
+    def __init__(self, path: str, size: int, ranges: Optional[List[Tuple[int, int]]], headers: dict):
+        self.path = path
+        self.background = None
+        self.tail = b""
+        if ranges is None:
+            self.status_code = 200
+            self.parts = [(b"", 0, size)]
+            length = size
+        elif len(ranges) == 1:
+            start, end = ranges[0]
+            self.status_code = 206
+            self.parts = [(b"", start, end)]
+            headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+            length = end - start
+        else:
+            self.status_code = 206
+            boundary = secrets.token_hex(16)
+            self.media_type = f"multipart/byteranges; boundary={boundary}"
+            self.parts = []
+            for i, (start, end) in enumerate(ranges):
+                head = (f"--{boundary}\r\n"
+                        f"Content-Type: application/octet-stream\r\n"
+                        f"Content-Range: bytes {start}-{end - 1}/{size}\r\n\r\n").encode()
+                # 두 번째 부분부터는 앞 부분 본문 뒤 줄바꿈이 경계의 일부
+                self.parts.append((head if i == 0 else b"\r\n" + head, start, end))
+            self.tail = f"\r\n--{boundary}--\r\n".encode()
+            length = sum(len(head) + end - start for head, start, end in self.parts) + len(self.tail)
+        headers["Content-Length"] = str(length)
+        self.length = length
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send):
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if scope["method"] == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        zerocopy = ZEROCOPY in scope.get("extensions", {})
+        loop = asyncio.get_running_loop()
+        f = await loop.run_in_executor(None, open, self.path, "rb")
+        try:
+            for head, start, end in self.parts:
+                if head:
+                    await send({"type": "http.response.body", "body": head, "more_body": True})
+                if zerocopy:
+                    await send({"type": ZEROCOPY, "file": f, "offset": start, "count": end - start,
+                                "more_body": True})
+                else:
+                    await self._send_range(send, loop, f.fileno(), start, end)
+            await send({"type": "http.response.body", "body": self.tail, "more_body": False})
+        finally:
+            await loop.run_in_executor(None, f.close)
+        if zerocopy:
+            _stats["zerocopy"] += 1
+        _stats["bytes_sent"] += self.length
+
+    @staticmethod
+    async def _send_range(send, loop, fd: int, start: int, end: int):
+        # 현재 청크를 보내는 동안 다음 청크를 읽음
+        position = start
+        pending = loop.run_in_executor(None, os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, end - position), position)
+        try:
+            while pending is not None:
+                chunk = await pending
+                if not chunk:
+                    raise OSError(f"파일이 예상보다 짧습니다 ({position}/{end})")
+                position += len(chunk)
+                pending = None
+                if position < end:
+                    pending = loop.run_in_executor(
+                        None, os.pread, fd, min(DOWNLOAD_CHUNK_SIZE, end - position), position
+                    )
+                await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        finally:
+            # 전송이 실패/취소돼도 스레드의 읽기가 끝난 뒤에 호출자가 파일을 닫도록
+            # (실행 중인 executor 작업은 취소할 수 없으므로 결과는 버리고 기다림)
+            if pending is not None:
+                await asyncio.wait([pending])
+
+
+def download_response(request: Request, path: str, size: int, filename: str, file_hash: str) -> Response:
+    """요청의 조건부/Range 헤더에 맞는 응답 (200, 206, 304, 416)"""
+    etag = f'"{file_hash}"'
+    headers = {
+        "ETag": etag,
+        "Cache-Control": CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, etag):
+        _stats["not_modified"] += 1
+        return Response(status_code=304, headers=headers)
+
+    ranges = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range.strip() == etag:  # If-Range는 강한 비교 (날짜는 지원하지 않으므로 전체 전송)
+        ranges = parse_range(request.headers.get("range"), size)
+    if ranges == []:
+        _stats["unsatisfiable"] += 1
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    headers["Content-Disposition"] = _content_disposition(filename)
+    if ranges is None:
+        _stats["full"] += 1
+    elif len(ranges) == 1:
+        _stats["partial"] += 1
+    else:
+        _stats["multipart"] += 1
+    return RangedFileResponse(path, size, ranges, headers)
+
+
+def download_stats() -> dict:
+    return dict(_stats)
@@ -0,0 +1,280 @@
+"""
+업로드 파일 메타데이터 색인 (SQLite)
+file_transfer의 파일 메타데이터와 방별 참조 수를 files / file_refs 테이블에 보관합니다.
+- 재시작 후에도 유지되고 다른 워커에서도 같은 파일을 조회·다운로드할 수 있음
+- 조회: /metadata, /download 등 반복 조회는 LRU 캐시(FILE_CACHE_SIZE개)에서 처리
+  (다른 워커의 삭제는 FILE_CACHE_TTL초까지 늦게 반영될 수 있음, 다운로드는 파일 존재를 따로 확인)
+- 만료: 마지막 등록 후 FILE_TTL초가 지난 파일은 정리 태스크가 FILE_SWEEP_INTERVAL마다 삭제
+- 고아 정리: 메타데이터가 없는 blob(등록 전 중단 등)도 같은 주기에 삭제
+
+참조 변경과 blob 삭제는 같은 쓰기 트랜잭션 안에서 처리하므로,
+다른 워커가 같은 내용을 등록하는 동안 파일이 지워지면 등록이 실패하고 다시 시도하게 됩니다.
+"""
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from blob_store import BlobStore, is_digest
+from database import run_db
+
+FILE_TTL = float(os.getenv("FILE_TTL", str(7 * 24 * 3600)))  # 초, 0이면 만료 없음
+FILE_CACHE_SIZE = int(os.getenv("FILE_CACHE_SIZE", "1024"))
+FILE_CACHE_TTL = float(os.getenv("FILE_CACHE_TTL", "30"))  # 캐시 항목 유효 시간 (초)
+FILE_SWEEP_INTERVAL = float(os.getenv("FILE_SWEEP_INTERVAL", "300"))  # 초
+FILE_SWEEP_BATCH = 500  # 트랜잭션 하나에서 정리하는 최대 건수 (쓰기 잠금을 오래 잡지 않음)
+ORPHAN_GRACE = 3600  # 이보다 최근에 쓴 blob은 등록 대기 중일 수 있으므로 고아로 보지 않음 (초)
+ROOM_LIST_LIMIT = 200
+
+NO_ROOM = ""  # 방 없이 올린 파일의 참조 키
+
+_COLUMNS = "file_id, hash, filename, size, room_id, created_at"
+
+
+class BlobMissing(Exception):
+    """등록하려던 blob이 (동시 삭제로) 사라짐 - 다시 업로드해야 함"""
+
+
+def _refs(conn, file_id: str) -> Dict[str, int]:
+    rows = conn.execute("SELECT room_id, refs FROM file_refs WHERE file_id = ?", (file_id,)).fetchall()
+    return {row["room_id"]: row["refs"] for row in rows}
+
+
+def _register(conn, blobs: BlobStore, row: tuple, room_key: str) -> Dict[str, int]:
+    file_id, digest = row[0], row[1]
+    if not is_digest(digest) or file_id != digest[:16]:
+        raise ValueError("올바른 SHA256이 아닙니다")
+    conn.execute(
+        f"INSERT INTO files ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (file_id) DO UPDATE SET hash = excluded.hash, filename = excluded.filename, "
+        "size = excluded.size, room_id = excluded.room_id, created_at = excluded.created_at",
+        row,
+    )
+    conn.execute(
+        "INSERT INTO file_refs (file_id, room_id, refs) VALUES (?, ?, 1) "
+        "ON CONFLICT (file_id, room_id) DO UPDATE SET refs = refs + 1",
+        (file_id, room_key),
+    )
+    # 쓰기 잠금을 잡은 상태에서 확인 (정리 트랜잭션과 순서가 정해짐)
+    if not blobs.exists(digest):
+        raise BlobMissing(digest)
+    return _refs(conn, file_id)
+
+
+def _release(conn, blobs: BlobStore, file_id: str, room_key: Optional[str]) -> Tuple[Dict[str, int], bool]:
+    """참조 해제 - (남은 방별 참조 수, blob 삭제 여부)"""
+    if room_key is None:
+        conn.execute("DELETE FROM file_refs WHERE file_id = ?", (file_id,))
+    else:
+        conn.execute("UPDATE file_refs SET refs = refs - 1 WHERE file_id = ? AND room_id = ?", (file_id, room_key))
+        conn.execute("DELETE FROM file_refs WHERE file_id = ? AND room_id = ? AND refs <= 0", (file_id, room_key))
+    remaining = _refs(conn, file_id)
+    if remaining:
+        return remaining, False
+    row = conn.execute("SELECT hash FROM files WHERE file_id = ?", (file_id,)).fetchone()
+    conn.execute("DELETE FROM files WHERE file_id = ?", (file_id,))
+    # 형식이 맞지 않는 해시는 저장소 밖을 가리킬 수 있으므로 행만 지움
+    return {}, bool(row) and is_digest(row["hash"]) and blobs.remove(row["hash"])
+
+
+def _expire(conn, blobs: BlobStore, cutoff: float, limit: int) -> Tuple[List[str], int]:
+    """created_at이 cutoff 이전인 파일 삭제 - (삭제한 file_id 목록, 삭제한 blob 수)"""
+    conn.execute("BEGIN IMMEDIATE")
+    rows = conn.execute(
+        "SELECT file_id, hash FROM files WHERE created_at < ? LIMIT ?", (cutoff, limit)
+    ).fetchall()
+    removed = 0
+    for row in rows:
+        conn.execute("DELETE FROM file_refs WHERE file_id = ?", (row["file_id"],))
+        conn.execute("DELETE FROM files WHERE file_id = ?", (row["file_id"],))
+        if is_digest(row["hash"]):
+            removed += blobs.remove(row["hash"])
+    return [row["file_id"] for row in rows], removed
+
+
+def _remove_orphans(conn, blobs: BlobStore, digests: List[str]) -> int:
+    conn.execute("BEGIN IMMEDIATE")
+    removed = 0
+    for digest in digests:
+        known = conn.execute(
+            "SELECT 1 FROM files WHERE file_id = ? AND hash = ?", (digest[:16], digest)
+        ).fetchone()
+        if known is None:
+            removed += blobs.remove(digest)
+    return removed
+
+
+def _select(conn, file_id: str):
+    return conn.execute(f"SELECT {_COLUMNS} FROM files WHERE file_id = ?", (file_id,)).fetchone()
+
+
+def _select_room(conn, room_key: str, limit: int) -> list:
+    # idx_file_refs_room으로 방의 file_id를 찾은 뒤 files 기본 키 조회
+    return conn.execute(
+        f"SELECT {', '.join('f.' + c for c in _COLUMNS.split(', '))}, r.refs FROM file_refs r "
+        "JOIN files f ON f.file_id = r.file_id WHERE r.room_id = ? ORDER BY f.created_at DESC LIMIT ?",
+        (room_key, limit),
+    ).fetchall()
+
+
+class FileIndex:
+    """file_id → 메타데이터 (SQLite + LRU 캐시) 와 만료/고아 정리 태스크"""
+
+    def __init__(self, blobs: BlobStore, ttl: float = FILE_TTL, cache_size: int = FILE_CACHE_SIZE,
+                 cache_ttl: float = FILE_CACHE_TTL, sweep_interval: float = FILE_SWEEP_INTERVAL):
+        self.blobs = blobs
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.cache_ttl = cache_ttl
+        self.sweep_interval = sweep_interval
+        self._cache: "OrderedDict[str, Tuple[dict, float]]" = OrderedDict()  # file_id -> (메타데이터, 캐시한 시각)
+        self._task: Optional[asyncio.Task] = None
+        self.hits = 0
+        self.misses = 0
+        self.registered = 0
+        self.released = 0
+        self.expired = 0
+        self.orphans_removed = 0
+        self.blobs_removed = 0
+        self.sweeps = 0
+
+    def _to_metadata(self, row) -> dict:
+        return {
+            "filename": row["filename"],
+            "size": row["size"],
+            "hash": row["hash"],
+            "room_id": row["room_id"],
+            "created_at": row["created_at"],
+        }
+
+    def _expired(self, metadata: dict, now: float) -> bool:
+        return self.ttl > 0 and metadata["created_at"] < now - self.ttl
+
+    def _remember(self, file_id: str, metadata: dict):
+        self._cache[file_id] = (metadata, time.monotonic())
+        self._cache.move_to_end(file_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def get(self, file_id: str) -> Optional[dict]:
+        """메타데이터 조회 (없거나 만료되면 None)"""
+        now = time.time()
+        entry = self._cache.get(file_id)
+        if entry is not None and time.monotonic() - entry[1] < self.cache_ttl:
+            self._cache.move_to_end(file_id)
+            self.hits += 1
+            metadata = entry[0]
+        else:
+            self.misses += 1
+            row = await run_db(_select, file_id)
+            if row is None:
+                self._cache.pop(file_id, None)
+                return None
+            metadata = self._to_metadata(row)
+            self._remember(file_id, metadata)
+        return None if self._expired(metadata, now) else metadata
+
+    async def register(self, digest: str, filename: str, size: int, room_id: Optional[str]) -> Dict[str, int]:
+        """blob 저장소에 있는 내용을 file_id로 등록하고 방 참조 추가 - 방별 참조 수 반환
+
+        blob이 동시에 삭제되었으면 BlobMissing, digest가 SHA256 형식이 아니면 ValueError
+        """
+        if not is_digest(digest):
+            raise ValueError("올바른 SHA256이 아닙니다")
+        file_id = digest[:16]
+        row = (file_id, digest, filename, size, room_id, time.time())
+        refs = await run_db(_register, self.blobs, row, room_id or NO_ROOM)
+        self._remember(file_id, {
+            "filename": filename,
+            "size": size,
+            "hash": digest,
+            "room_id": room_id,
+            "created_at": row[5],
+        })
+        self.registered += 1
+        return refs
+
+    async def release(self, file_id: str, room_id: Optional[str] = None) -> Dict[str, int]:
+        """참조 하나 해제 (room_id가 None이면 모든 방의 참조) - 남은 방별 참조 수 반환
+
+        참조가 모두 사라지면 메타데이터와 blob을 함께 삭제합니다.
+        """
+        room_key = None if room_id is None else room_id or NO_ROOM
+        remaining, removed = await run_db(_release, self.blobs, file_id, room_key)
+        self.released += 1
+        if not remaining:
+            self._cache.pop(file_id, None)
+            self.blobs_removed += removed
+        return remaining
+
+    async def room_files(self, room_id: str, limit: int = ROOM_LIST_LIMIT) -> List[dict]:
+        """방에 공유된 파일 (최근 등록 순)"""
+        now = time.time()
+        rows = await run_db(_select_room, room_id, max(1, min(limit, ROOM_LIST_LIMIT)))
+        files = []
+        for row in rows:
+            metadata = self._to_metadata(row)
+            if not self._expired(metadata, now):
+                files.append({"file_id": row["file_id"], "refs": row["refs"], **metadata})
+        return files
+
+    async def sweep(self, now: Optional[float] = None):
+        """만료된 파일과 고아 blob 정리"""
+        now = time.time() if now is None else now
+        if self.ttl > 0:
+            while True:
+                file_ids, removed = await run_db(_expire, self.blobs, now - self.ttl, FILE_SWEEP_BATCH)
+                for file_id in file_ids:
+                    self._cache.pop(file_id, None)
+                self.expired += len(file_ids)
+                self.blobs_removed += removed
+                if len(file_ids) < FILE_SWEEP_BATCH:
+                    break
+
+        loop = asyncio.get_running_loop()
+        candidates = await loop.run_in_executor(None, self.blobs.scan, now - ORPHAN_GRACE)
+        for start in range(0, len(candidates), FILE_SWEEP_BATCH):
+            removed = await run_db(_remove_orphans, self.blobs, candidates[start:start + FILE_SWEEP_BATCH])
+            self.orphans_removed += removed
+            self.blobs_removed += removed
+        self.sweeps += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await self.sweep()
+            except Exception as e:
+                print(f'[ERROR] 파일 정리 실패: {e}')
+            await asyncio.sleep(self.sweep_interval)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "cache_size": len(self._cache),
+            "cache_max_size": self.cache_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "registered": self.registered,
+            "released": self.released,
+            "expired": self.expired,
+            "orphans_removed": self.orphans_removed,
+            "blobs_removed": self.blobs_removed,
+            "sweeps": self.sweeps,
+            "ttl_seconds": self.ttl,
+        }
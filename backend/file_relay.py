@@ -0,0 +1,251 @@
+"""
+바이너리 파일 청크 중계 (크레딧 기반 흐름 제어)
+file_chunk_bin 이벤트는 (transferId, chunkIndex, bytes)를 그대로 방에 전달합니다.
+청크를 dict로 감싸지 않으므로 바이너리 첨부는 다시 직렬화되지 않고, 방 전체에 한 번만 인코딩됩니다.
+
+흐름 제어:
+- 송신자는 file_transfer_start ack로 협상된 chunkSize와 window(미확인 청크 허용 수)를 받음
+- 수신자는 file_receiver 이벤트로 수신 준비를 알린 참가자만 (파일 패널이 열려 있어 확인을 보낼 수 있는 클라이언트)
+- 수신자는 청크마다 file_chunk_ack를 보내고, 모든 수신자가 확인한 마지막 청크가 앞으로 가면
+  서버가 송신자에게 file_credit(transferId, ackedIndex)를 보냄
+- 송신자는 chunkIndex - ackedIndex <= window 인 동안만 전송 (고정 sleep 대신)
+  서버도 같은 조건을 확인해 크레딧을 넘은 청크는 중계하지 않음
+- FILE_RELAY_ACK_TIMEOUT 동안 확인이 앞으로 가지 않는 수신자는 전송에서 제외 (남은 수신자만 기다림)
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+
+FILE_RELAY_MAX_CHUNK = int(os.getenv("FILE_RELAY_MAX_CHUNK", str(256 * 1024)))  # 협상 가능한 최대 청크 크기 (바이트)
+FILE_RELAY_MIN_CHUNK = 16 * 1024
+FILE_RELAY_WINDOW = int(os.getenv("FILE_RELAY_WINDOW", "16"))  # 확인 없이 보낼 수 있는 청크 수
+FILE_RELAY_ACK_TIMEOUT = float(os.getenv("FILE_RELAY_ACK_TIMEOUT", "15"))  # 초 (확인이 멈춘 수신자 제외)
+
+
+class Transfer:
+    """진행 중인 바이너리 전송 하나"""
+
+    def __init__(self, transfer_id: str, sender: str, room_id: str, receivers: Set[str],
+                 chunk_size: int, total_chunks: int, now: float):
+        self.transfer_id = transfer_id
+        self.sender = sender
+        self.room_id = room_id
+        self.chunk_size = chunk_size
+        self.total_chunks = total_chunks
+        self.acked: Dict[str, int] = {sid: -1 for sid in receivers}  # 수신자별 마지막 확인 청크
+        self.progress_at: Dict[str, float] = {sid: now for sid in receivers}  # 수신자별 마지막으로 확인이 앞으로 간 시각
+        self.sent = -1  # 중계한 가장 큰 청크
+        self.active_at = now  # 마지막 청크/확인 시각
+        self.credited = self.min_acked()  # 송신자에게 마지막으로 알린 ackedIndex
+
+    def min_acked(self) -> int:
+        """모든 수신자가 확인한 마지막 청크 (수신자가 없으면 전체 허용)"""
+        if not self.acked:
+            return self.total_chunks - 1
+        return min(self.acked.values())
+
+
+class FileRelay:
+    """전송별 수신자 확인 상태 관리 (송신자 워커 기준)"""
+
+    def __init__(
+        self,
+        on_credit: Optional[Callable[[Transfer], Awaitable[None]]] = None,
+        max_chunk: int = FILE_RELAY_MAX_CHUNK,
+        window: int = FILE_RELAY_WINDOW,
+        ack_timeout: float = FILE_RELAY_ACK_TIMEOUT,
+    ):
+        self.on_credit = on_credit
+        self.max_chunk = max_chunk
+        self.window = window
+        self.ack_timeout = ack_timeout
+        self.transfers: Dict[str, Transfer] = {}
+        self._by_sid: Dict[str, Set[str]] = {}  # sid -> 송신/수신 중인 transfer_id (연결 해제 시 전체 탐색 없이)
+        self._task: Optional[asyncio.Task] = None
+        self.started = 0
+        self.chunks = 0
+        self.bytes = 0
+        self.credits = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.abandoned = 0
+
+    def negotiate_chunk_size(self, requested) -> int:
+        try:
+            requested = int(requested)
+        except (TypeError, ValueError):
+            requested = self.max_chunk
+        return max(FILE_RELAY_MIN_CHUNK, min(requested, self.max_chunk))
+
+    def start(self, sender: str, room_id: str, receivers: Set[str], requested_chunk, file_size,
+              now: Optional[float] = None) -> Transfer:
+        chunk_size = self.negotiate_chunk_size(requested_chunk)
+        try:
+            file_size = max(0, int(file_size or 0))
+        except (TypeError, ValueError):
+            file_size = 0
+        total_chunks = max(1, -(-file_size // chunk_size))
+        transfer = Transfer(uuid.uuid4().hex, sender, room_id, receivers, chunk_size, total_chunks,
+                            time.monotonic() if now is None else now)
+        self.transfers[transfer.transfer_id] = transfer
+        for sid in (sender, *receivers):
+            self._by_sid.setdefault(sid, set()).add(transfer.transfer_id)
+        self.started += 1
+        return transfer
+
+    def get(self, transfer_id) -> Optional[Transfer]:
+        return self.transfers.get(transfer_id)
+
+    def admit(self, transfer_id, sender: str, chunk_index, size: int,
+              now: Optional[float] = None) -> Optional[Transfer]:
+        """송신자의 청크를 중계해도 되는지 - 크레딧을 넘었거나 범위를 벗어난 청크는 None"""
+        transfer = self.transfers.get(transfer_id) if isinstance(transfer_id, str) else None
+        if transfer is None or transfer.sender != sender:
+            return None
+        if (not isinstance(chunk_index, int) or isinstance(chunk_index, bool)
+                or not 0 <= chunk_index < transfer.total_chunks
+                or size > transfer.chunk_size
+                or chunk_index - transfer.credited > self.window):
+            self.rejected += 1
+            return None
+        transfer.sent = max(transfer.sent, chunk_index)
+        transfer.active_at = time.monotonic() if now is None else now
+        self.chunks += 1
+        self.bytes += size
+        return transfer
+
+    def ack(self, transfer_id, receiver: str, chunk_index, now: Optional[float] = None) -> Optional[Transfer]:
+        """수신 확인 - 송신자에게 알릴 크레딧이 늘었으면 Transfer 반환"""
+        transfer = self.transfers.get(transfer_id) if isinstance(transfer_id, str) else None
+        if transfer is None or receiver not in transfer.acked:
+            return None
+        try:
+            chunk_index = int(chunk_index)
+        except (TypeError, ValueError):
+            return None
+        # 같은 소켓의 청크는 순서대로 도착하므로 가장 큰 인덱스가 곧 연속 확인 위치 (중계하지 않은 청크는 확인 불가)
+        chunk_index = min(chunk_index, transfer.sent)
+        if chunk_index > transfer.acked[receiver]:
+            transfer.acked[receiver] = chunk_index
+            transfer.progress_at[receiver] = transfer.active_at = time.monotonic() if now is None else now
+        return self._advance(transfer)
+
+    def _advance(self, transfer: Transfer) -> Optional[Transfer]:
+        acked = transfer.min_acked()
+        if acked <= transfer.credited:
+            return None
+        transfer.credited = acked
+        self.credits += 1
+        return transfer
+
+    def _unindex(self, sid: str, transfer_id: str):
+        ids = self._by_sid.get(sid)
+        if ids is not None:
+            ids.discard(transfer_id)
+            if not ids:
+                del self._by_sid[sid]
+
+    def _remove(self, transfer: Transfer):
+        del self.transfers[transfer.transfer_id]
+        for sid in (transfer.sender, *transfer.acked):
+            self._unindex(sid, transfer.transfer_id)
+
+    def _drop_receiver(self, transfer: Transfer, sid: str) -> bool:
+        """수신자 제외 - 크레딧이 늘었으면 True"""
+        transfer.acked.pop(sid, None)
+        transfer.progress_at.pop(sid, None)
+        self._unindex(sid, transfer.transfer_id)
+        return self._advance(transfer) is not None
+
+    def finish(self, transfer_id, sender: str):
+        transfer = self.transfers.get(transfer_id) if isinstance(transfer_id, str) else None
+        if transfer is not None and transfer.sender == sender:
+            self._remove(transfer)
+
+    def drop_sid(self, sid: str, room_id: Optional[str] = None, sending: bool = True) -> List[Transfer]:
+        """연결 해제/퇴장 - 송신 중이던 전송은 취소, 수신 중이던 전송은 크레딧 재계산
+
+        sending=False면 수신 중이던 전송만 정리 (수신 준비 해제)
+        크레딧이 늘어난 전송 목록 반환 (남은 수신자만 기다리도록 송신자에게 알려야 함)
+        """
+        advanced = []
+        for transfer_id in list(self._by_sid.get(sid, ())):
+            transfer = self.transfers[transfer_id]
+            if room_id is not None and transfer.room_id != room_id:
+                continue
+            if transfer.sender == sid:
+                if sending:
+                    self._remove(transfer)
+            elif self._drop_receiver(transfer, sid):
+                advanced.append(transfer)
+        return advanced
+
+    def expire(self, now: Optional[float] = None) -> List[Transfer]:
+        """확인이 ack_timeout 동안 멈춘 수신자 제외, 그보다 오래 움직임이 없는 전송 정리
+
+        크레딧이 늘어난 전송 목록 반환
+        """
+        now = time.monotonic() if now is None else now
+        advanced = []
+        for transfer in list(self.transfers.values()):
+            # 송신자가 끝을 알리지 않고 멈춘 전송 (file_transfer_end 누락)
+            if now - transfer.active_at > self.ack_timeout * 4:
+                self._remove(transfer)
+                self.abandoned += 1
+                continue
+            stalled = [sid for sid, acked in transfer.acked.items()
+                       if acked < transfer.sent and now - transfer.progress_at[sid] > self.ack_timeout]
+            credited = False
+            for sid in stalled:
+                credited = self._drop_receiver(transfer, sid) or credited
+                self.timed_out += 1
+            if credited:
+                advanced.append(transfer)
+        return advanced
+
+    def start_watchdog(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ack_timeout / 3)
+            try:
+                advanced = self.expire()
+            except Exception as e:
+                print(f'[ERROR] 파일 중계 시간 초과 검사 실패: {e}')
+                continue
+            for transfer in advanced:
+                if self.on_credit is None:
+                    continue
+                try:
+                    await self.on_credit(transfer)
+                except Exception as e:  # 한 송신자에게 알리지 못해도 감시는 계속
+                    print(f'[ERROR] 파일 크레딧 전송 실패 ({transfer.transfer_id}): {e}')
+
+    async def stop_watchdog(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.transfers),
+            "started": self.started,
+            "chunks": self.chunks,
+            "bytes": self.bytes,
+            "credits": self.credits,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "abandoned": self.abandoned,
+            "max_chunk": self.max_chunk,
+            "window": self.window,
+            "ack_timeout_seconds": self.ack_timeout,
+        }
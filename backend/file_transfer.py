@@ -6,11 +6,16 @@ VideoNet Pro - P2P 파일 전송 시스템
 import os
 import hashlib
 import asyncio
-from typing import Dict, Optional
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from fastapi.responses import FileResponse
-import aiofiles
+import secrets
+from typing import BinaryIO, Optional, Tuple
+from fastapi import APIRouter, UploadFile, File, HTTPException, Request
 from pathlib import Path
+from pydantic import BaseModel
+
+from blob_store import PROOF_SPAN, BlobStore, is_digest
+from file_download import download_response
+from file_index import BlobMissing, FileIndex
+from upload_sessions import UploadError, UploadSessions
 
 router = APIRouter(prefix="/api/files", tags=["File Transfer"])
 
@@ -18,17 +23,93 @@ router = APIRouter(prefix="/api/files", tags=["File Transfer"])
 UPLOAD_DIR = Path("uploads")
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-# 파일 메타데이터 저장
-file_metadata: Dict[str, dict] = {}
+# 업로드 읽기 버퍼: 최소 크기에서 시작해 청크가 가득 찰 때마다 두 배로 (큰 파일일수록 스레드 왕복 감소)
+UPLOAD_CHUNK_MIN = int(os.getenv("UPLOAD_CHUNK_MIN", str(64 * 1024)))
+UPLOAD_CHUNK_MAX = int(os.getenv("UPLOAD_CHUNK_MAX", str(4 * 1024 * 1024)))
+
+# 이어 받기 가능한 청크 업로드 세션 (부분 파일은 같은 파일 시스템에 두어 완료 시 이름만 변경)
+upload_sessions = UploadSessions(UPLOAD_DIR / ".partial")
+
+# 내용 주소 기반 저장소 (SHA256으로 저장, 같은 내용은 한 번만 기록)
+blob_store = BlobStore(UPLOAD_DIR / "blobs")
+
+# 파일 메타데이터 (SQLite files / file_refs + LRU 캐시, 만료·고아 정리)
+file_index = FileIndex(blob_store)
+
+
+class UploadSessionCreate(BaseModel):
+    filename: str
+    size: int
+    chunkSize: Optional[int] = None
+    room_id: Optional[str] = None
+    sha256: Optional[str] = None  # 전체 파일 해시 (응답의 dedup 구간으로 소유를 증명하면 본문 전송 없이 완료)
+
+
+class UploadSessionCommit(BaseModel):
+    sha256: Optional[str] = None  # 전체 파일 해시 (보내면 서버 계산값과 비교)
+
+
+class UploadSessionClaim(BaseModel):
+    proof: str  # sha256(nonce 바이트 + 파일[offset:offset+length]) 16진수
+
+
+def _write_and_hash(out: BinaryIO, sha256, chunk: bytes):
+    # 스레드에서 실행 (파일 쓰기와 큰 버퍼의 sha256.update는 GIL을 놓음)
+    out.write(chunk)
+    sha256.update(chunk)
+
 
+async def save_upload(file: UploadFile, file_path: Path) -> Tuple[int, str]:
+    """업로드를 저장하면서 SHA256을 함께 계산 - (크기, 해시) 반환
 
-def calculate_file_hash(file_path: str) -> str:
-    """파일의 SHA256 해시 계산 (무결성 검증용)"""
+    청크마다 쓰기+해시를 스레드에 넘기고, 그동안 다음 청크를 읽습니다.
+    저장이 끝나면 해시도 끝나 있으므로 파일을 다시 읽지 않습니다.
+    """
+    loop = asyncio.get_running_loop()
     sha256 = hashlib.sha256()
-    with open(file_path, 'rb') as f:
-        while chunk := f.read(8192):
-            sha256.update(chunk)
-    return sha256.hexdigest()
+    total_size = 0
+    chunk_size = UPLOAD_CHUNK_MIN
+    pending: Optional[asyncio.Future] = None
+
+    out = await loop.run_in_executor(None, open, file_path, 'wb')
+    try:
+        while True:
+            chunk = await file.read(chunk_size)
+            if pending is not None:
+                await pending  # 해시 순서 유지: 이전 청크 처리가 끝난 뒤 다음 청크 제출
+                pending = None
+            if not chunk:
+                break
+            total_size += len(chunk)
+            pending = loop.run_in_executor(None, _write_and_hash, out, sha256, chunk)
+            if len(chunk) == chunk_size and chunk_size < UPLOAD_CHUNK_MAX:
+                chunk_size = min(chunk_size * 2, UPLOAD_CHUNK_MAX)
+    finally:
+        if pending is not None:
+            await asyncio.gather(pending, return_exceptions=True)
+        await loop.run_in_executor(None, out.close)
+
+    return total_size, sha256.hexdigest()
+
+
+async def register_file(file_hash: str, filename: str, size: int, room_id: Optional[str],
+                        deduplicated: bool) -> dict:
+    """저장소에 있는 내용을 파일로 등록하고 방 참조 추가 - 업로드 응답 반환"""
+    file_id = file_hash[:16]  # 짧은 ID 생성
+    try:
+        rooms = await file_index.register(file_hash, filename, size, room_id)
+    except BlobMissing:
+        raise HTTPException(status_code=409, detail="저장 중 파일이 정리되었습니다. 다시 업로드해 주세요")
+
+    return {
+        "file_id": file_id,
+        "filename": filename,
+        "size": size,
+        "hash": file_hash,
+        "deduplicated": deduplicated,
+        "rooms": rooms,
+        "message": "이미 있는 파일을 공유했습니다" if deduplicated else "파일이 성공적으로 업로드되었습니다"
+    }
 
 
 @router.post("/upload")
@@ -39,66 +120,143 @@ async def upload_file(
     """
     파일 업로드 (청크 기반)
     - 무손실 전송
-    - 해시 검증
+    - 해시 검증 (저장하면서 계산)
+    - 같은 내용이 이미 있으면 새로 저장하지 않음 (이름이 같은 다른 파일도 덮어쓰지 않음)
     """
+    # 임시 파일에 저장하며 해시 계산 후 저장소로 이동 (해시를 알기 전에는 위치를 정할 수 없음)
+    tmp_path = upload_sessions.partial_dir / f"{secrets.token_urlsafe(16)}.upload"
     try:
-        # 파일 저장 경로
-        file_path = UPLOAD_DIR / file.filename
-
-        # 파일 크기 추적
-        total_size = 0
-
-        # 청크 단위로 파일 저장
-        async with aiofiles.open(file_path, 'wb') as f:
-            while chunk := await file.read(8192):  # 8KB 청크
-                await f.write(chunk)
-                total_size += len(chunk)
-
-        # 파일 해시 계산
-        file_hash = calculate_file_hash(str(file_path))
-
-        # 메타데이터 저장
-        file_id = file_hash[:16]  # 짧은 ID 생성
-        file_metadata[file_id] = {
-            "filename": file.filename,
-            "size": total_size,
-            "hash": file_hash,
-            "path": str(file_path),
-            "room_id": room_id
-        }
-
-        return {
-            "file_id": file_id,
-            "filename": file.filename,
-            "size": total_size,
-            "hash": file_hash,
-            "message": "파일이 성공적으로 업로드되었습니다"
-        }
-
+        total_size, file_hash = await save_upload(file, tmp_path)
+        stored = await blob_store.put(tmp_path, file_hash)
     except Exception as e:
+        if tmp_path.exists():
+            os.remove(tmp_path)
         raise HTTPException(status_code=500, detail=f"파일 업로드 실패: {str(e)}")
 
+    return await register_file(file_hash, file.filename, total_size, room_id, not stored)
 
-@router.get("/download/{file_id}")
-async def download_file(file_id: str):
+
+@router.post("/uploads")
+async def create_upload_session(body: UploadSessionCreate, request: Request):
+    """
+    청크 업로드 세션 생성 - 협상된 청크 크기와 개수 반환
+    - sha256을 보내면 응답에 dedup {nonce, offset, length} 구간이 붙음
+      같은 내용이 이미 있으면 그 구간의 증명 값으로 /claim을 호출해 본문 없이 완료
+      (내용이 있는지와 관계없이 항상 같은 응답이므로 해시로 서버의 파일 존재를 알아낼 수 없음)
+    """
+    file_hash = None
+    if body.sha256 is not None:
+        file_hash = body.sha256.lower()
+        if not is_digest(file_hash):
+            raise HTTPException(status_code=400, detail="sha256은 64자리 16진수여야 합니다")
+    try:
+        session = upload_sessions.create(body.filename, body.size, body.chunkSize, body.room_id,
+                                         request.client.host if request.client else None)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    if file_hash is not None:
+        length = min(PROOF_SPAN, session.size)
+        offset = secrets.randbelow(session.size - length + 1)
+        session.challenge = (file_hash, secrets.token_hex(16), offset, length)
+    return session.describe()
+
+
+@router.put("/uploads/{upload_id}/chunks/{index}")
+async def put_upload_chunk(upload_id: str, index: int, request: Request):
+    """
+    청크 업로드 (본문 = 청크 바이트, 병렬 전송 가능)
+    - X-Chunk-SHA256 헤더가 있으면 받은 청크의 해시와 비교 (불일치 시 422, 다시 전송)
+    - 이미 받은 청크는 본문을 읽지 않고 기존 해시 반환
+    """
+    try:
+        session = upload_sessions.get(upload_id)
+        digest = await upload_sessions.write_chunk(
+            session, index, request.stream(), request.headers.get("x-chunk-sha256")
+        )
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    return {"index": index, "sha256": digest, "received_chunks": len(session.received)}
+
+
+@router.get("/uploads/{upload_id}")
+async def get_upload_session(upload_id: str):
+    """업로드 진행 상태 - missing은 빠진 청크 번호 [처음, 끝] 범위 목록"""
+    try:
+        session = upload_sessions.get(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    return session.describe()
+
+
+@router.post("/uploads/{upload_id}/commit")
+async def commit_upload_session(upload_id: str, body: UploadSessionCommit):
+    """모든 청크를 받았으면 전체 해시 확인 후 파일 등록 (upload_file과 같은 응답)"""
+    stored = {}
+
+    async def store(path: Path, digest: str):
+        stored["new"] = await blob_store.put(path, digest)
+
+    try:
+        session = upload_sessions.get(upload_id)
+        file_hash = await upload_sessions.commit(session, body.sha256, store)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+
+    response = await register_file(file_hash, session.filename, session.size, session.room_id, not stored["new"])
+    response["chunks"] = [session.received[i] for i in range(session.total_chunks) if i in session.received]
+    return response
+
+
+@router.post("/uploads/{upload_id}/claim")
+async def claim_upload_session(upload_id: str, body: UploadSessionClaim):
+    """이미 있는 내용의 소유 증명 - 맞으면 본문 없이 파일 등록 (upload_file과 같은 응답), 한 번만 시도 가능"""
+    try:
+        session = upload_sessions.get(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    if session.challenge is None:
+        raise HTTPException(status_code=409, detail="소유 증명을 요청하지 않았거나 이미 시도한 업로드입니다")
+    if session.writing or session.received or session.committing:
+        raise HTTPException(status_code=409, detail="이미 청크를 보내기 시작한 업로드입니다")
+
+    file_hash, nonce, offset, length = session.challenge
+    session.challenge = None
+    if not await blob_store.verify_possession(file_hash, session.size, nonce, offset, length, body.proof):
+        raise HTTPException(status_code=409, detail="내용을 확인하지 못했습니다. 청크로 업로드해 주세요")
+
+    upload_sessions.abort(session)
+    return await register_file(file_hash, session.filename, session.size, session.room_id, True)
+
+
+@router.delete("/uploads/{upload_id}")
+async def abort_upload_session(upload_id: str):
+    """업로드 취소 - 부분 파일 삭제"""
+    try:
+        session = upload_sessions.get(upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=e.status, detail=e.detail)
+    upload_sessions.abort(session)
+    return {"message": "업로드가 취소되었습니다"}
+
+
+@router.api_route("/download/{file_id}", methods=["GET", "HEAD"])
+async def download_file(file_id: str, request: Request):
     """
     파일 다운로드
     - 무손실 전송 보장
+    - Range (이어 받기, 동영상 탐색, 여러 범위), ETag = SHA256, If-None-Match가 맞으면 304
     """
-    if file_id not in file_metadata:
+    metadata = await file_index.get(file_id)
+    if metadata is None:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
-    metadata = file_metadata[file_id]
-    file_path = metadata["path"]
-
-    if not os.path.exists(file_path):
+    try:
+        file_path = str(blob_store.path_for(metadata["hash"]))
+        size = os.stat(file_path).st_size
+    except (ValueError, FileNotFoundError):
         raise HTTPException(status_code=404, detail="파일이 존재하지 않습니다")
 
-    return FileResponse(
-        file_path,
-        filename=metadata["filename"],
-        media_type="application/octet-stream"
-    )
+    return download_response(request, file_path, size, metadata["filename"], metadata["hash"])
 
 
 @router.get("/verify/{file_id}")
@@ -107,10 +265,10 @@ async def verify_file(file_id: str, client_hash: str):
     파일 무결성 검증
     - 클라이언트 해시와 서버 해시 비교
     """
-    if file_id not in file_metadata:
+    metadata = await file_index.get(file_id)
+    if metadata is None:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
-    metadata = file_metadata[file_id]
     server_hash = metadata["hash"]
 
     is_valid = (client_hash == server_hash)
@@ -128,26 +286,32 @@ async def verify_file(file_id: str, client_hash: str):
 @router.get("/metadata/{file_id}")
 async def get_file_metadata(file_id: str):
     """파일 메타데이터 조회"""
-    if file_id not in file_metadata:
+    metadata = await file_index.get(file_id)
+    if metadata is None:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
-    return file_metadata[file_id]
+    return metadata
+
+
+@router.get("/room/{room_id}")
+async def list_room_files(room_id: str, limit: int = 50):
+    """방에 공유된 파일 목록 (최근 등록 순)"""
+    return {"files": await file_index.room_files(room_id, limit)}
 
 
 @router.delete("/delete/{file_id}")
-async def delete_file(file_id: str):
-    """파일 삭제"""
-    if file_id not in file_metadata:
+async def delete_file(file_id: str, room_id: str = None):
+    """
+    파일 삭제
+    - room_id를 주면 그 방의 참조 하나만 해제, 없으면 모든 참조 해제
+    - 남은 참조가 없을 때만 실제 파일과 메타데이터 삭제
+    """
+    if await file_index.get(file_id) is None:
         raise HTTPException(status_code=404, detail="파일을 찾을 수 없습니다")
 
-    metadata = file_metadata[file_id]
-    file_path = metadata["path"]
-
-    # 파일 삭제
-    if os.path.exists(file_path):
-        os.remove(file_path)
+    remaining = await file_index.release(file_id, room_id)
 
-    # 메타데이터 삭제
-    del file_metadata[file_id]
+    if remaining:
+        return {"message": "방에서 파일 공유를 해제했습니다", "rooms": remaining}
 
     return {"message": "파일이 삭제되었습니다"}
@@ -0,0 +1,91 @@
+"""
+ICE 후보 묶음 전송
+trickle ICE는 후보 하나마다 webrtc_ice_candidate 이벤트를 하나씩 보냅니다.
+같은 (보낸 사람, 받는 사람) 쌍의 후보를 ICE_BATCH_WINDOW 동안 모아 한 번에 전달하여
+방에 여러 명이 동시에 들어올 때의 이벤트 수를 줄입니다.
+
+받는 쪽이 webrtc_ice_candidates(묶음)를 지원하면 한 이벤트로, 아니면 기존처럼 후보마다 전송합니다.
+"""
+
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+ICE_BATCH_WINDOW = float(os.getenv("ICE_BATCH_WINDOW", "0.005"))  # 초 (0이면 묶지 않음)
+
+
+class IceBatcher:
+    """(from, to) 쌍별 ICE 후보 버퍼"""
+
+    def __init__(
+        self,
+        flush: Callable[[str, str, List[dict]], Awaitable[None]],
+        window: float = ICE_BATCH_WINDOW,
+    ):
+        self.flush_pair = flush  # (from_sid, to_sid, candidates) 전달
+        self.window = window
+        self._pending: Dict[Tuple[str, str], List[dict]] = {}
+        self._pairs: Dict[str, Set[Tuple[str, str]]] = {}  # sid -> 보내거나 받을 후보가 쌓인 쌍 (drop_sid에서 전체 탐색 없이)
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.candidates = 0
+        self.flushes = 0
+
+    async def add(self, from_sid: str, to_sid: str, candidates: List[dict]):
+        self.candidates += len(candidates)
+        if self.window <= 0:
+            self.flushes += 1
+            await self.flush_pair(from_sid, to_sid, candidates)
+            return
+
+        pair = (from_sid, to_sid)
+        if pair not in self._pending:
+            self._pending[pair] = []
+            self._pairs.setdefault(from_sid, set()).add(pair)
+            self._pairs.setdefault(to_sid, set()).add(pair)
+        self._pending[pair].extend(candidates)
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.window, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        """모아 둔 후보를 쌍별로 전달"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        pending, self._pending = self._pending, {}
+        self._pairs = {}
+        for (from_sid, to_sid), candidates in pending.items():
+            self.flushes += 1
+            await self.flush_pair(from_sid, to_sid, candidates)
+
+    async def flush_now(self, from_sid: str, to_sid: str):
+        """offer/answer 전달 전에 호출 - 앞서 보낸 후보가 SDP보다 늦게 도착하지 않도록"""
+        candidates = self._pop((from_sid, to_sid))
+        if candidates:
+            self.flushes += 1
+            await self.flush_pair(from_sid, to_sid, candidates)
+
+    def _pop(self, pair: Tuple[str, str]) -> Optional[List[dict]]:
+        candidates = self._pending.pop(pair, None)
+        if candidates is not None:
+            for sid in pair:
+                pairs = self._pairs.get(sid)
+                if pairs is not None:
+                    pairs.discard(pair)
+                    if not pairs:
+                        del self._pairs[sid]
+        return candidates
+
+    def drop_sid(self, sid: str):
+        """연결 해제 - 해당 sid가 보내거나 받을 후보 폐기"""
+        for pair in list(self._pairs.get(sid, ())):
+            self._pop(pair)
+
+    def stats(self) -> dict:
+        return {
+            "candidates": self.candidates,
+            "flushes": self.flushes,
+            "avg_batch": round(self.candidates / self.flushes, 2) if self.flushes else 0,
+            "pending_pairs": len(self._pending),
+            "window_seconds": self.window,
+        }
@@ -18,6 +18,8 @@ from skimage.metrics import peak_signal_noise_ratio, structural_similarity
 import io
 from PIL import Image
 
+from metrics import media_stage_duration
+
 router = APIRouter(prefix="/api/compression", tags=["Image Compression"])
 
 
@@ -134,7 +136,8 @@ async def analyze_image_compression(
 
     # 이미지 디코딩
     nparr = np.frombuffer(content, np.uint8)
-    original_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    with media_stage_duration.time('image_compression', 'decode'):
+        original_image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
 
     if original_image is None:
         raise HTTPException(status_code=400, detail="이미지 파일을 읽을 수 없습니다")
@@ -156,22 +159,27 @@ async def analyze_image_compression(
         if format.lower() == "jpeg":
             if not (0 <= quality <= 100):
                 raise HTTPException(status_code=400, detail="JPEG 품질은 0-100 사이여야 합니다")
-            compressed_bytes, compressed_size = compress_image_jpeg(original_image, quality)
+            with media_stage_duration.time('image_compression', 'encode'):
+                compressed_bytes, compressed_size = compress_image_jpeg(original_image, quality)
         elif format.lower() == "png":
             if not (0 <= quality <= 9):
                 raise HTTPException(status_code=400, detail="PNG 압축 레벨은 0-9 사이여야 합니다")
-            compressed_bytes, compressed_size = compress_image_png(original_image, quality)
+            with media_stage_duration.time('image_compression', 'encode'):
+                compressed_bytes, compressed_size = compress_image_png(original_image, quality)
         else:
             raise HTTPException(status_code=400, detail="지원하지 않는 형식입니다 (jpeg 또는 png)")
 
         # 압축 해제 (품질 평가용)
-        compressed_image = decompress_image(compressed_bytes)
+        with media_stage_duration.time('image_compression', 'decode'):
+            compressed_image = decompress_image(compressed_bytes)
 
         # PSNR 계산
-        psnr = calculate_psnr(original_image, compressed_image)
+        with media_stage_duration.time('image_compression', 'psnr'):
+            psnr = calculate_psnr(original_image, compressed_image)
 
         # SSIM 계산
-        ssim = calculate_ssim(original_image, compressed_image)
+        with media_stage_duration.time('image_compression', 'ssim'):
+            ssim = calculate_ssim(original_image, compressed_image)
 
         # 압축률 계산
         compression_ratio = (1 - compressed_size / original_size) * 100 if original_size > 0 else 0
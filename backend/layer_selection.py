@@ -0,0 +1,181 @@
+"""
+화질 레이어(simulcast) 선택 - 수신자별 대역폭 추정과 표시 크기로 송출자별 레이어 결정
+
+레이어는 f(원본) / h(1/2 해상도) / q(1/4 해상도) 세 단계입니다.
+- 메시: 송출자가 상대마다 따로 인코딩하므로, webrtc_offer/webrtc_answer에 layers를 실어 보낸 송출자에게
+  서버가 media_layer로 해당 연결의 인코딩 파라미터(scaleResolutionDownBy, maxBitrate)를 알려줍니다
+- SFU: 서버가 송출 트랙을 구독자가 고른 레이어로만 인코딩하고 구독 슬롯마다 레이어를 바꿉니다
+
+수신자는 media_stats로 {bandwidth, received, loss, viewports}를 주기적으로 보냅니다.
+대역폭 추정은 내려갈 때 즉시, 올라갈 때 천천히 따라가며 (브라우저 추정값이 없으면 손실률 기반),
+레이어를 올릴 때는 LAYER_UPGRADE_HOLD 동안 여유가 유지되어야 합니다 (내릴 때는 즉시).
+"""
+
+import os
+import time
+from typing import Dict, Optional, Set
+
+LAYER_HEADROOM = float(os.getenv("LAYER_HEADROOM", "0.85"))  # 추정 대역폭 중 영상에 배정할 비율
+LAYER_UPGRADE_HOLD = float(os.getenv("LAYER_UPGRADE_HOLD", "4.0"))  # 초 (레이어 상향 전 여유 유지 시간)
+LAYER_INITIAL_BANDWIDTH = int(os.getenv("LAYER_INITIAL_BANDWIDTH", "2000000"))  # bps (첫 보고 전 추정값)
+
+# 높은 화질부터 (height: 이 레이어가 충분한 최대 표시 높이, 원본 720p 기준)
+LAYERS = (
+    {'rid': 'f', 'scaleResolutionDownBy': 1, 'maxBitrate': 1_500_000, 'height': 720},
+    {'rid': 'h', 'scaleResolutionDownBy': 2, 'maxBitrate': 500_000, 'height': 360},
+    {'rid': 'q', 'scaleResolutionDownBy': 4, 'maxBitrate': 150_000, 'height': 180},
+)
+LAYER_RIDS = tuple(layer['rid'] for layer in LAYERS)
+LAYER_PARAMS = {layer['rid']: layer for layer in LAYERS}
+
+AUDIO_BITRATE = 40_000  # 송출자당 오디오 몫 (bps, 레이어와 무관)
+BANDWIDTH_RISE = 0.3  # 브라우저 추정값이 올라갈 때 반영 비율 (EWMA)
+LOSS_HIGH = 0.10  # 손실률이 이 이상이면 추정값 감소 (손실률의 절반만큼)
+LOSS_LOW = 0.02  # 이 미만이면 보고마다 LOSS_INCREASE배 (실제 수신량보다 원본 레이어 하나만큼까지)
+LOSS_INCREASE = 1.15
+
+
+def plan_layers(budget: float, viewports: Dict[str, int]) -> Dict[str, str]:
+    """대역폭 예산 안에서 송출자별 레이어 선택 (viewports: 송출자 -> 표시 높이 px, 0이면 안 보임)
+
+    표시 크기보다 큰 레이어는 고르지 않고, 예산을 넘으면 가장 비싼 레이어부터 한 단계씩 내립니다
+    (같은 레이어면 작게 표시되는 쪽부터). 가장 낮은 레이어는 예산을 넘어도 유지합니다.
+    """
+    lowest = len(LAYERS) - 1
+    levels = {}
+    for sender, height in viewports.items():
+        level = 0
+        while level < lowest and LAYERS[level + 1]['height'] >= height:
+            level += 1
+        levels[sender] = level
+
+    budget -= AUDIO_BITRATE * len(viewports)
+    total = sum(LAYERS[level]['maxBitrate'] for level in levels.values())
+    while total > budget:
+        candidates = [sender for sender, level in levels.items() if level < lowest]
+        if not candidates:
+            break
+        sender = min(candidates, key=lambda s: (levels[s], viewports[s]))
+        total -= LAYERS[levels[sender]]['maxBitrate'] - LAYERS[levels[sender] + 1]['maxBitrate']
+        levels[sender] += 1
+    return {sender: LAYERS[level]['rid'] for sender, level in levels.items()}
+
+
+class _Receiver:
+    """수신자 한 명의 대역폭 추정과 송출자별 적용 레이어"""
+
+    def __init__(self, estimate: float):
+        self.estimate = estimate
+        self.layers: Dict[str, str] = {}  # 송출자 -> 적용 중인 레이어
+        self.upgrade_since: Dict[str, float] = {}  # 송출자 -> 상향 가능해진 시각
+
+
+class LayerSelector:
+    """media_stats 보고를 받아 (송출자, 수신자) 쌍별 레이어를 정하는 정책"""
+
+    def __init__(
+        self,
+        headroom: float = LAYER_HEADROOM,
+        upgrade_hold: float = LAYER_UPGRADE_HOLD,
+        initial_bandwidth: float = LAYER_INITIAL_BANDWIDTH,
+    ):
+        self.headroom = headroom
+        self.upgrade_hold = upgrade_hold
+        self.initial_bandwidth = initial_bandwidth
+        self.receivers: Dict[str, _Receiver] = {}
+        self._viewers: Dict[str, Set[str]] = {}  # 송출자 -> 레이어 상태를 가진 수신자 (forget에서 전체 탐색 없이)
+        self.reports = 0
+        self.upgrades = 0
+        self.downgrades = 0
+
+    def _update_estimate(self, state: _Receiver, bandwidth: Optional[float], received: Optional[float],
+                         loss: Optional[float]):
+        if bandwidth:
+            # 브라우저 추정값 (candidate-pair availableIncomingBitrate) - 내려갈 때 즉시, 올라갈 때 천천히
+            if bandwidth < state.estimate:
+                state.estimate = bandwidth
+            else:
+                state.estimate += BANDWIDTH_RISE * (bandwidth - state.estimate)
+        elif loss is not None and received is not None:
+            # 손실률 기반 (GCC의 loss-based 제어와 같은 방식)
+            if loss > LOSS_HIGH:
+                state.estimate *= 1 - 0.5 * loss
+            elif loss < LOSS_LOW:
+                ceiling = max(state.estimate, received + LAYERS[0]['maxBitrate'])
+                state.estimate = min(state.estimate * LOSS_INCREASE, ceiling)
+
+    def report(self, receiver: str, viewports: Dict[str, int], bandwidth: Optional[float] = None,
+               received: Optional[float] = None, loss: Optional[float] = None,
+               now: Optional[float] = None) -> Dict[str, str]:
+        """수신자 통계 반영 - 레이어가 바뀐 송출자만 {송출자: rid}로 반환"""
+        now = time.monotonic() if now is None else now
+        state = self.receivers.get(receiver)
+        if state is None:
+            state = self.receivers[receiver] = _Receiver(self.initial_bandwidth)
+        self.reports += 1
+        self._update_estimate(state, bandwidth, received, loss)
+
+        changes = {}
+        for sender, rid in plan_layers(state.estimate * self.headroom, viewports).items():
+            current = state.layers.get(sender)
+            if current is not None and LAYER_RIDS.index(rid) < LAYER_RIDS.index(current):
+                # 상향은 여유가 upgrade_hold 동안 유지된 뒤에
+                since = state.upgrade_since.setdefault(sender, now)
+                if now - since < self.upgrade_hold:
+                    continue
+                self.upgrades += 1
+            elif current is not None and rid != current:
+                self.downgrades += 1
+            state.upgrade_since.pop(sender, None)
+            if rid != current:
+                if current is None:
+                    self._viewers.setdefault(sender, set()).add(receiver)
+                state.layers[sender] = rid
+                changes[sender] = rid
+
+        # 더 이상 보이지 않는 송출자
+        for sender in [sender for sender in state.layers if sender not in viewports]:
+            del state.layers[sender]
+            state.upgrade_since.pop(sender, None)
+            self._unview(sender, receiver)
+        return changes
+
+    def _unview(self, sender: str, receiver: str):
+        viewers = self._viewers.get(sender)
+        if viewers is not None:
+            viewers.discard(receiver)
+            if not viewers:
+                del self._viewers[sender]
+
+    def estimate(self, receiver: str) -> Optional[float]:
+        state = self.receivers.get(receiver)
+        return state.estimate if state is not None else None
+
+    def forget(self, sid: str):
+        """연결 해제 - 수신자 상태와 다른 수신자에 남은 송출자 항목 삭제 (역인덱스로 관련 수신자만)"""
+        state = self.receivers.pop(sid, None)
+        if state is not None:
+            for sender in state.layers:
+                self._unview(sender, sid)
+        for receiver in self._viewers.pop(sid, ()):
+            other = self.receivers.get(receiver)
+            if other is not None:
+                other.layers.pop(sid, None)
+                other.upgrade_since.pop(sid, None)
+
+    def stats(self) -> dict:
+        layers = {rid: 0 for rid in LAYER_RIDS}
+        for state in self.receivers.values():
+            for rid in state.layers.values():
+                layers[rid] += 1
+        estimates = [state.estimate for state in self.receivers.values()]
+        return {
+            "receivers": len(self.receivers),
+            "reports": self.reports,
+            "upgrades": self.upgrades,
+            "downgrades": self.downgrades,
+            "layers": layers,
+            "avg_estimate_kbps": round(sum(estimates) / len(estimates) / 1000) if estimates else 0,
+            "headroom": self.headroom,
+            "upgrade_hold_seconds": self.upgrade_hold,
+        }
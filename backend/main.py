@@ -9,32 +9,44 @@ from dotenv import load_dotenv
 # .env 파일 로드
 load_dotenv()
 
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Request, status
+from fastapi.responses import JSONResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from pydantic import BaseModel, EmailStr
 from typing import Optional, List, Dict
 from datetime import datetime, timedelta
-from passlib.context import CryptContext
 import jwt
-import sqlite3
 import json
+import hmac
+import ipaddress
 import secrets
 import string
-from contextlib import contextmanager
 import uvicorn
 import socketio
-from socketio_server import sio, socket_app, get_all_room_participants, notify_room_list_update
-from file_transfer import router as file_router
+from socketio_server import sio, socket_app, get_all_room_participants, notify_room_list_update, room_list_broadcaster, room_status_writer, membership_store, file_relay, fanout, ice_batcher, sfu, layer_selector, chat_history, rate_limiter, room_history_access
+from sfu import MEDIA_MODES
+from file_transfer import router as file_router, blob_store, file_index, upload_sessions
+from file_download import download_stats
 from video_analysis import router as video_router
 from image_compression import router as compression_router
+from database import get_db, run_db, fetch_one, fetch_all, execute, shutdown_db
+from password_hashing import hash_password, verify_password, password_hasher, PasswordPoolSaturated
+from token_cache import token_cache, decode_access_token, SECRET_KEY, ALGORITHM
+from migrations import run_migrations
+from room_list_cache import room_list_snapshot
+from structured_logging import logging_stats
+from metrics import CONTENT_TYPE, MetricsMiddleware, loop_lag_monitor, registry
 
 # ===== 설정 =====
-SECRET_KEY = os.getenv("SECRET_KEY", "videonet-secret-key-2024")
-ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", str(60 * 24)))  # 24시간
 MASTER_INVITE_CODE = os.getenv("MASTER_INVITE_CODE", "MASTER2024")
-DATABASE_NAME = os.getenv("DATABASE_NAME", "videonet.db")
+# /api/stats, /metrics 접근: 허용 주소(IP/CIDR, 쉼표 구분) 또는 Bearer 토큰
+METRICS_ALLOW = [
+    ipaddress.ip_network(item.strip(), strict=False)
+    for item in os.getenv("METRICS_ALLOW", "127.0.0.1,::1").split(",") if item.strip()
+]
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
 
 # ===== FastAPI 앱 생성 =====
 app = FastAPI(
@@ -52,6 +64,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 라우트별 요청 시간 기록 (/metrics)
+app.add_middleware(MetricsMiddleware)
+
 # 파일 전송 라우터 추가
 app.include_router(file_router)
 
@@ -62,7 +77,6 @@ app.include_router(video_router)
 app.include_router(compression_router)
 
 # ===== 보안 설정 =====
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 # ===== 데이터 모델 =====
@@ -81,6 +95,7 @@ class RoomCreate(BaseModel):
     name: str
     isPrivate: Optional[bool] = False
     maxParticipants: Optional[int] = 100
+    mediaMode: Optional[str] = "mesh"  # mesh (P2P) | sfu (서버 중계, aiortc 필요)
 
 class MeetingCreate(BaseModel):
     title: str
@@ -92,67 +107,13 @@ class InviteCodeCreate(BaseModel):
     expires_days: int = 7
 
 # ===== 데이터베이스 =====
-@contextmanager
-def get_db():
-    conn = sqlite3.connect(DATABASE_NAME)
-    conn.row_factory = sqlite3.Row
-    try:
-        yield conn
-        conn.commit()
-    finally:
-        conn.close()
-
 def init_database():
-    """데이터베이스 초기화"""
+    """데이터베이스 초기화 (스키마 마이그레이션 적용)"""
     with get_db() as conn:
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                email TEXT UNIQUE NOT NULL,
-                username TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL,
-                full_name TEXT,
-                personal_code TEXT UNIQUE NOT NULL,
-                invite_code_used TEXT,
-                is_active BOOLEAN DEFAULT 1,
-                is_admin BOOLEAN DEFAULT 0,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS invite_codes (
-                code TEXT PRIMARY KEY,
-                creator_id INTEGER,
-                max_uses INTEGER DEFAULT 1,
-                current_uses INTEGER DEFAULT 0,
-                expires_at TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (creator_id) REFERENCES users (id)
-            )
-        """)
-        
-        conn.execute("""
-            CREATE TABLE IF NOT EXISTS meetings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                room_code TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                description TEXT,
-                host_id INTEGER NOT NULL,
-                password TEXT,
-                status TEXT DEFAULT 'active',
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (host_id) REFERENCES users (id)
-            )
-        """)
+        version = run_migrations(conn)
+        print(f"[DB] 스키마 버전 v{version}")
 
 # ===== 유틸리티 함수 =====
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
-
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
-
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -160,12 +121,25 @@ def create_access_token(data: dict) -> str:
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
 def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
-    token = credentials.credentials
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        return payload
-    except:
+    payload = decode_access_token(credentials.credentials)
+    if payload is None:
         raise HTTPException(status_code=401, detail="Invalid token")
+    return payload
+
+def verify_monitoring(request: Request) -> None:
+    """모니터링 엔드포인트 접근 확인 (허용 주소 또는 METRICS_TOKEN)"""
+    if METRICS_TOKEN:
+        scheme, _, token = request.headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(token.encode(), METRICS_TOKEN.encode()):
+            return
+    host = request.client.host if request.client else None
+    try:
+        address = ipaddress.ip_address(host)
+    except (TypeError, ValueError):
+        address = None
+    if address is not None and any(address in network for network in METRICS_ALLOW):
+        return
+    raise HTTPException(status_code=403, detail="Forbidden")
 
 def generate_code(length: int = 8) -> str:
     """랜덤 코드 생성"""
@@ -186,6 +160,17 @@ def generate_room_code() -> str:
 async def startup():
     """서버 시작시 실행"""
     init_database()
+    loop_lag_monitor.start()
+    file_index.start()
+    upload_sessions.start()
+    file_relay.start_watchdog()
+
+    # 다른 워커가 이미 실행 중이면 그 워커의 방 상태를 유지 (멀티 워커 모드)
+    alone = await membership_store.start()
+    if not alone:
+        print("[INIT] 실행 중인 다른 워커가 있어 방 상태 초기화 생략")
+        print("[OK] VideoNet Pro 서버 시작!")
+        return
     
     # 서버 시작 시 모든 방을 inactive로 초기화 (이슈 1 해결)
     # 서버 재시작 시 메모리 초기화로 인한 좀비 방 방지
@@ -197,6 +182,30 @@ async def startup():
     
     print("[OK] VideoNet Pro 서버 시작!")
 
+@app.on_event("shutdown")
+async def shutdown():
+    """서버 종료시 실행"""
+    await loop_lag_monitor.stop()
+    await file_index.stop()
+    await upload_sessions.stop()
+    await file_relay.stop_watchdog()
+    await room_status_writer.close()
+    await chat_history.close()
+    await room_list_broadcaster.flush()
+    await sfu.close()
+    await membership_store.stop()
+    shutdown_db()
+    password_hasher.shutdown()
+
+@app.exception_handler(PasswordPoolSaturated)
+async def password_pool_saturated_handler(request: Request, exc: PasswordPoolSaturated):
+    """해싱 대기열 포화 - 루프를 막지 않고 즉시 재시도 요청"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "로그인 요청이 많습니다. 잠시 후 다시 시도해주세요"},
+        headers={"Retry-After": "1"}
+    )
+
 @app.get("/")
 async def root():
     """홈페이지"""
@@ -212,26 +221,48 @@ async def root():
         ]
     }
 
+@app.get("/api/stats", dependencies=[Depends(verify_monitoring)])
+async def get_stats():
+    """서버 내부 상태 (모니터링용)"""
+    return {
+        "password_hashing": password_hasher.stats(),
+        "token_cache": token_cache.stats(),
+        "room_list_snapshot": room_list_snapshot.stats(),
+        "room_list_broadcast": room_list_broadcaster.stats(),
+        "room_status_writer": room_status_writer.stats(),
+        "signaling": membership_store.stats(),
+        "file_relay": file_relay.stats(),
+        "fanout": fanout.stats(),
+        "logging": logging_stats(),
+        "ice_batching": ice_batcher.stats(),
+        "sfu": sfu.stats(),
+        "layer_selection": layer_selector.stats(),
+        "chat_history": chat_history.stats(),
+        "rate_limit": rate_limiter.stats(),
+        "upload_sessions": upload_sessions.stats(),
+        "blob_store": blob_store.stats(),
+        "file_index": file_index.stats(),
+        "downloads": download_stats()
+    }
+
+@app.get("/metrics", dependencies=[Depends(verify_monitoring)])
+async def get_metrics():
+    """Prometheus 텍스트 형식 메트릭"""
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
 @app.post("/api/auth/register")
 async def register(user: UserRegister):
     """회원가입"""
-    with get_db() as conn:
+    def check_registration(conn):
         # 초대 코드 확인 (camelCase 필드 사용)
         if user.inviteCode != MASTER_INVITE_CODE:
             cursor = conn.execute(
                 "SELECT * FROM invite_codes WHERE code = ? AND current_uses < max_uses",
                 (user.inviteCode,)
             )
-            invite = cursor.fetchone()
-            if not invite:
+            if not cursor.fetchone():
                 raise HTTPException(status_code=400, detail="유효하지 않은 초대 코드")
-            
-            # 초대 코드 사용 횟수 증가
-            conn.execute(
-                "UPDATE invite_codes SET current_uses = current_uses + 1 WHERE code = ?",
-                (user.inviteCode,)
-            )
-        
+
         # 중복 확인
         cursor = conn.execute(
             "SELECT * FROM users WHERE email = ? OR username = ?",
@@ -239,100 +270,111 @@ async def register(user: UserRegister):
         )
         if cursor.fetchone():
             raise HTTPException(status_code=400, detail="이미 존재하는 이메일 또는 사용자명")
+
+    def create_user(conn):
+        # 해시 계산 중에 코드가 소진되거나 같은 이름이 가입했을 수 있으므로 트랜잭션 안에서 다시 확인
+        check_registration(conn)
+        if user.inviteCode != MASTER_INVITE_CODE:
+            # 초대 코드 사용 횟수 증가
+            conn.execute(
+                "UPDATE invite_codes SET current_uses = current_uses + 1 WHERE code = ?",
+                (user.inviteCode,)
+            )
         
         # 사용자 생성
-        personal_code = generate_personal_code()
-        is_admin = 1 if user.inviteCode == MASTER_INVITE_CODE else 0
-        
         cursor = conn.execute("""
             INSERT INTO users (email, username, password, full_name, personal_code, invite_code_used, is_admin)
             VALUES (?, ?, ?, ?, ?, ?, ?)
         """, (
             user.email,
             user.username,
-            hash_password(user.password),
+            password_hash,
             user.full_name,
             personal_code,
             user.inviteCode,
             is_admin
         ))
-        
-        user_id = cursor.lastrowid
-        
-        # 토큰 생성
-        access_token = create_access_token({
-            "user_id": user_id,
+        return cursor.lastrowid
+
+    # 잘못된 입력/초대 코드/중복 가입은 bcrypt 풀을 쓰기 전에 거절 (해시 비용으로 풀을 채우지 못하도록)
+    if not user.username.strip() or len(user.username) > 50:
+        raise HTTPException(status_code=400, detail="사용자명은 1~50자여야 합니다")
+    await run_db(check_registration)
+    password_hash = await hash_password(user.password)
+    personal_code = generate_personal_code()
+    is_admin = 1 if user.inviteCode == MASTER_INVITE_CODE else 0
+    user_id = await run_db(create_user)
+    
+    # 토큰 생성
+    access_token = create_access_token({
+        "user_id": user_id,
+        "username": user.username,
+        "is_admin": bool(is_admin)
+    })
+    
+    # 프론트엔드가 기대하는 형식으로 응답
+    return {
+        "access_token": access_token,
+        "user": {
+            "id": str(user_id),
             "username": user.username,
-            "is_admin": bool(is_admin)
-        })
-        
-        # 프론트엔드가 기대하는 형식으로 응답
-        return {
-            "access_token": access_token,
-            "user": {
-                "id": str(user_id),
-                "username": user.username,
-                "email": user.email,
-                "personalCode": personal_code,  # camelCase
-                "isOnline": True,
-                "createdAt": datetime.utcnow().isoformat()
-            }
+            "email": user.email,
+            "personalCode": personal_code,  # camelCase
+            "isOnline": True,
+            "createdAt": datetime.utcnow().isoformat()
         }
+    }
 
 @app.post("/api/auth/login")
 async def login(user: UserLogin):
     """로그인"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM users WHERE username = ? OR email = ?",
-            (user.username, user.username)
-        )
-        db_user = cursor.fetchone()
-        
-        if not db_user or not verify_password(user.password, db_user['password']):
-            raise HTTPException(status_code=401, detail="잘못된 인증 정보")
-        
-        # 토큰 생성
-        access_token = create_access_token({
-            "user_id": db_user['id'],
+    db_user = await fetch_one(
+        "SELECT * FROM users WHERE username = ? OR email = ?",
+        (user.username, user.username)
+    )
+    
+    if not db_user or not await verify_password(user.password, db_user['password']):
+        raise HTTPException(status_code=401, detail="잘못된 인증 정보")
+    
+    # 토큰 생성
+    access_token = create_access_token({
+        "user_id": db_user['id'],
+        "username": db_user['username'],
+        "is_admin": bool(db_user['is_admin'])
+    })
+    
+    # 프론트엔드가 기대하는 형식으로 응답
+    return {
+        "access_token": access_token,
+        "user": {
+            "id": str(db_user['id']),
             "username": db_user['username'],
-            "is_admin": bool(db_user['is_admin'])
-        })
-        
-        # 프론트엔드가 기대하는 형식으로 응답
-        return {
-            "access_token": access_token,
-            "user": {
-                "id": str(db_user['id']),
-                "username": db_user['username'],
-                "email": db_user['email'],
-                "personalCode": db_user['personal_code'],  # camelCase로 변경
-                "isOnline": True,
-                "createdAt": db_user['created_at'] if db_user['created_at'] else datetime.utcnow().isoformat()
-            }
+            "email": db_user['email'],
+            "personalCode": db_user['personal_code'],  # camelCase로 변경
+            "isOnline": True,
+            "createdAt": db_user['created_at'] if db_user['created_at'] else datetime.utcnow().isoformat()
         }
+    }
 
 @app.get("/api/auth/me")
 async def get_me(current_user = Depends(verify_token)):
     """현재 사용자 정보"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM users WHERE id = ?",
-            (current_user['user_id'],)
-        )
-        user = cursor.fetchone()
-        
-        if not user:
-            raise HTTPException(status_code=404, detail="사용자를 찾을 수 없음")
-        
-        return {
-            "id": str(user['id']),
-            "username": user['username'],
-            "email": user['email'],
-            "personalCode": user['personal_code'],  # camelCase
-            "isOnline": True,
-            "createdAt": user['created_at'] if user['created_at'] else datetime.utcnow().isoformat()
-        }
+    user = await fetch_one(
+        "SELECT * FROM users WHERE id = ?",
+        (current_user['user_id'],)
+    )
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="사용자를 찾을 수 없음")
+    
+    return {
+        "id": str(user['id']),
+        "username": user['username'],
+        "email": user['email'],
+        "personalCode": user['personal_code'],  # camelCase
+        "isOnline": True,
+        "createdAt": user['created_at'] if user['created_at'] else datetime.utcnow().isoformat()
+    }
 
 @app.post("/api/invites/generate")
 async def generate_invite(
@@ -340,43 +382,40 @@ async def generate_invite(
     current_user = Depends(verify_token)
 ):
     """초대 코드 생성"""
-    with get_db() as conn:
-        code = generate_code()
-        expires_at = datetime.utcnow() + timedelta(days=invite.expires_days)
-        
-        conn.execute("""
-            INSERT INTO invite_codes (code, creator_id, max_uses, expires_at)
-            VALUES (?, ?, ?, ?)
-        """, (code, current_user['user_id'], invite.max_uses, expires_at))
-        
-        return {
-            "code": code,
-            "max_uses": invite.max_uses,
-            "expires_at": expires_at.isoformat()
-        }
+    code = generate_code()
+    expires_at = datetime.utcnow() + timedelta(days=invite.expires_days)
+    
+    await execute("""
+        INSERT INTO invite_codes (code, creator_id, max_uses, expires_at)
+        VALUES (?, ?, ?, ?)
+    """, (code, current_user['user_id'], invite.max_uses, expires_at))
+    
+    return {
+        "code": code,
+        "max_uses": invite.max_uses,
+        "expires_at": expires_at.isoformat()
+    }
 
 @app.get("/api/invites/my-codes")
 async def get_my_invites(current_user = Depends(verify_token)):
     """내 초대 코드 목록"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM invite_codes WHERE creator_id = ? ORDER BY created_at DESC",
-            (current_user['user_id'],)
-        )
-        codes = cursor.fetchall()
-        
-        return {
-            "codes": [
-                {
-                    "code": code['code'],
-                    "max_uses": code['max_uses'],
-                    "current_uses": code['current_uses'],
-                    "created_at": code['created_at'],
-                    "expires_at": code['expires_at']
-                }
-                for code in codes
-            ]
-        }
+    codes = await fetch_all(
+        "SELECT * FROM invite_codes WHERE creator_id = ? ORDER BY created_at DESC",
+        (current_user['user_id'],)
+    )
+    
+    return {
+        "codes": [
+            {
+                "code": code['code'],
+                "max_uses": code['max_uses'],
+                "current_uses": code['current_uses'],
+                "created_at": code['created_at'],
+                "expires_at": code['expires_at']
+            }
+            for code in codes
+        ]
+    }
 
 @app.post("/api/meetings/create")
 async def create_meeting(
@@ -384,140 +423,168 @@ async def create_meeting(
     current_user = Depends(verify_token)
 ):
     """회의 생성"""
-    with get_db() as conn:
-        room_code = generate_room_code()
-        
-        cursor = conn.execute("""
-            INSERT INTO meetings (room_code, title, description, host_id, password)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
-            room_code,
-            meeting.title,
-            meeting.description,
-            current_user['user_id'],
-            meeting.password
-        ))
-        
-        meeting_id = cursor.lastrowid
-        
-        return {
-            "id": meeting_id,
-            "room_code": room_code,
-            "title": meeting.title,
-            "join_url": f"/meeting/{room_code}"
-        }
+    room_code = generate_room_code()
+    
+    meeting_id = await execute("""
+        INSERT INTO meetings (room_code, title, description, host_id, password)
+        VALUES (?, ?, ?, ?, ?)
+    """, (
+        room_code,
+        meeting.title,
+        meeting.description,
+        current_user['user_id'],
+        meeting.password
+    ))
+    room_list_snapshot.invalidate()
+    
+    return {
+        "id": meeting_id,
+        "room_code": room_code,
+        "title": meeting.title,
+        "join_url": f"/meeting/{room_code}"
+    }
 
 # ===== Rooms API (프론트엔드 호환) =====
+async def build_room_list() -> list:
+    """활성 방 목록 생성 (스냅샷이 무효화된 경우에만 호출됨)"""
+    meetings = await fetch_all("""
+        SELECT m.id, m.title, m.host_id, m.password, m.created_at, m.media_mode, u.username as host_name
+        FROM meetings m
+        JOIN users u ON m.host_id = u.id
+        WHERE m.status = 'active'
+    """)
+
+    # Socket.IO로부터 실시간 참가자 수 가져오기
+    room_participant_counts = get_all_room_participants()
+
+    rooms = []
+    for meeting in meetings:
+        room_id = str(meeting['id'])
+        participant_count = room_participant_counts.get(room_id, 0)
+
+        rooms.append({
+            "id": room_id,
+            "name": meeting['title'],
+            "hostId": str(meeting['host_id']),
+            "participants": [],
+            "participantCount": participant_count,  # 실시간 참가자 수 추가
+            "isPrivate": bool(meeting['password']),
+            "maxParticipants": 100,
+            "mediaMode": meeting['media_mode'],
+            "createdAt": meeting['created_at']
+        })
+
+    return rooms
+
 @app.get("/api/rooms")
-async def get_rooms(current_user = Depends(verify_token)):
-    """모든 활성 방 목록"""
-    with get_db() as conn:
-        cursor = conn.execute("""
-            SELECT m.*, u.username as host_name
-            FROM meetings m
-            JOIN users u ON m.host_id = u.id
-            WHERE m.status = 'active'
-        """)
-        meetings = cursor.fetchall()
-
-        # Socket.IO로부터 실시간 참가자 수 가져오기
-        room_participant_counts = get_all_room_participants()
-
-        rooms = []
-        for meeting in meetings:
-            room_id = str(meeting['id'])
-            participant_count = room_participant_counts.get(room_id, 0)
-
-            rooms.append({
-                "id": room_id,
-                "name": meeting['title'],
-                "hostId": str(meeting['host_id']),
-                "participants": [],
-                "participantCount": participant_count,  # 실시간 참가자 수 추가
-                "isPrivate": bool(meeting['password']),
-                "maxParticipants": 100,
-                "createdAt": meeting['created_at']
-            })
-
-        return rooms
+async def get_rooms(request: Request, current_user = Depends(verify_token)):
+    """모든 활성 방 목록 (변경이 없으면 304)"""
+    body, etag = await room_list_snapshot.get(build_room_list)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 @app.post("/api/rooms")
 async def create_room(room: RoomCreate, current_user = Depends(verify_token)):
     """새 방 만들기"""
-    with get_db() as conn:
-        room_code = generate_code(8)
-        
-        cursor = conn.execute("""
-            INSERT INTO meetings (room_code, title, description, host_id, password, status)
-            VALUES (?, ?, ?, ?, ?, 'active')
-        """, (
-            room_code,
-            room.name,
-            "",
-            current_user['user_id'],
-            None
-        ))
-        
-        room_id = cursor.lastrowid
+    media_mode = room.mediaMode or "mesh"
+    if media_mode not in MEDIA_MODES:
+        raise HTTPException(status_code=400, detail="mediaMode는 mesh 또는 sfu여야 합니다")
+    if media_mode == "sfu" and not sfu.available:
+        raise HTTPException(status_code=400, detail="이 서버는 SFU 모드를 지원하지 않습니다 (aiortc 미설치)")
 
-        # Socket.IO로 방 리스트 업데이트 알림
-        await notify_room_list_update()
+    room_code = generate_code(8)
+    
+    room_id = await execute("""
+        INSERT INTO meetings (room_code, title, description, host_id, password, status, media_mode)
+        VALUES (?, ?, ?, ?, ?, 'active', ?)
+    """, (
+        room_code,
+        room.name,
+        "",
+        current_user['user_id'],
+        None,
+        media_mode
+    ))
+
+    # Socket.IO로 방 리스트 업데이트 알림
+    await notify_room_list_update()
 
-        return {
-            "id": str(room_id),
-            "name": room.name,
-            "hostId": str(current_user['user_id']),
-            "participants": [],
-            "isPrivate": room.isPrivate,
-            "maxParticipants": room.maxParticipants,
-            "createdAt": datetime.utcnow().isoformat()
-        }
+    return {
+        "id": str(room_id),
+        "name": room.name,
+        "hostId": str(current_user['user_id']),
+        "participants": [],
+        "isPrivate": room.isPrivate,
+        "maxParticipants": room.maxParticipants,
+        "mediaMode": media_mode,
+        "createdAt": datetime.utcnow().isoformat()
+    }
 
 @app.post("/api/rooms/{room_id}/join")
 async def join_room(room_id: str, current_user = Depends(verify_token)):
     """방 참가"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM meetings WHERE id = ?",
-            (int(room_id),)
-        )
-        meeting = cursor.fetchone()
-        
-        if not meeting:
-            raise HTTPException(status_code=404, detail="방을 찾을 수 없습니다")
-        
-        return {
-            "id": str(meeting['id']),
-            "name": meeting['title'],
-            "hostId": str(meeting['host_id']),
-            "participants": [],
-            "isPrivate": bool(meeting['password']),
-            "maxParticipants": 100,
-            "createdAt": meeting['created_at']
-        }
+    meeting = await fetch_one(
+        "SELECT * FROM meetings WHERE id = ?",
+        (int(room_id),)
+    )
+    
+    if not meeting:
+        raise HTTPException(status_code=404, detail="방을 찾을 수 없습니다")
+    
+    return {
+        "id": str(meeting['id']),
+        "name": meeting['title'],
+        "hostId": str(meeting['host_id']),
+        "participants": [],
+        "isPrivate": bool(meeting['password']),
+        "maxParticipants": 100,
+        "mediaMode": meeting['media_mode'],
+        "createdAt": meeting['created_at']
+    }
+
+async def check_room_access(room_id: str, current_user: dict, password: Optional[str]):
+    """방 기록 조회 권한 확인 - 비밀번호 방은 방장, 지금 참가 중인 사용자, 비밀번호를 아는 사용자만"""
+    allowed = await room_history_access(room_id, current_user['user_id'], password)
+    if allowed is None:
+        raise HTTPException(status_code=404, detail="방을 찾을 수 없습니다")
+    if not allowed:
+        raise HTTPException(status_code=403, detail="이 방의 기록을 볼 권한이 없습니다")
+
+@app.get("/api/rooms/{room_id}/messages")
+async def get_room_messages(room_id: str, before: Optional[str] = None, limit: int = 50,
+                            password: Optional[str] = None, current_user = Depends(verify_token)):
+    """채팅 기록 - before(이전 페이지의 nextCursor)보다 오래된 메시지를 최신 limit건까지, 오래된 것부터"""
+    try:
+        cursor = int(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 커서입니다")
+    await check_room_access(room_id, current_user, password)
+    return await chat_history.history(room_id, cursor, limit)
 
 @app.get("/api/meetings/{room_code}")
 async def get_meeting(room_code: str):
     """회의 정보 조회"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT m.*, u.username as host_name FROM meetings m JOIN users u ON m.host_id = u.id WHERE m.room_code = ?",
-            (room_code,)
-        )
-        meeting = cursor.fetchone()
-        
-        if not meeting:
-            raise HTTPException(status_code=404, detail="회의를 찾을 수 없음")
-        
-        return {
-            "id": meeting['id'],
-            "room_code": meeting['room_code'],
-            "title": meeting['title'],
-            "description": meeting['description'],
-            "host_name": meeting['host_name'],
-            "status": meeting['status'],
-            "has_password": bool(meeting['password'])
-        }
+    meeting = await fetch_one(
+        "SELECT m.*, u.username as host_name FROM meetings m JOIN users u ON m.host_id = u.id WHERE m.room_code = ?",
+        (room_code,)
+    )
+    
+    if not meeting:
+        raise HTTPException(status_code=404, detail="회의를 찾을 수 없음")
+    
+    return {
+        "id": meeting['id'],
+        "room_code": meeting['room_code'],
+        "title": meeting['title'],
+        "description": meeting['description'],
+        "host_name": meeting['host_name'],
+        "status": meeting['status'],
+        "has_password": bool(meeting['password'])
+    }
 
 @app.post("/api/meetings/{room_code}/join")
 async def join_meeting(
@@ -526,48 +593,44 @@ async def join_meeting(
     current_user = Depends(verify_token)
 ):
     """회의 참가"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM meetings WHERE room_code = ?",
-            (room_code,)
-        )
-        meeting = cursor.fetchone()
-        
-        if not meeting:
-            raise HTTPException(status_code=404, detail="회의를 찾을 수 없음")
-        
-        if meeting['password'] and meeting['password'] != password:
-            raise HTTPException(status_code=401, detail="잘못된 비밀번호")
-        
-        return {
-            "message": "회의 참가 성공",
-            "meeting_id": meeting['id'],
-            "room_code": room_code,
-            "is_host": meeting['host_id'] == current_user['user_id']
-        }
+    meeting = await fetch_one(
+        "SELECT * FROM meetings WHERE room_code = ?",
+        (room_code,)
+    )
+    
+    if not meeting:
+        raise HTTPException(status_code=404, detail="회의를 찾을 수 없음")
+    
+    if meeting['password'] and meeting['password'] != password:
+        raise HTTPException(status_code=401, detail="잘못된 비밀번호")
+    
+    return {
+        "message": "회의 참가 성공",
+        "meeting_id": meeting['id'],
+        "room_code": room_code,
+        "is_host": meeting['host_id'] == current_user['user_id']
+    }
 
 @app.get("/api/meetings/user/list")
 async def get_user_meetings(current_user = Depends(verify_token)):
     """내 회의 목록"""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "SELECT * FROM meetings WHERE host_id = ? ORDER BY created_at DESC LIMIT 10",
-            (current_user['user_id'],)
-        )
-        meetings = cursor.fetchall()
-        
-        return {
-            "meetings": [
-                {
-                    "id": m['id'],
-                    "room_code": m['room_code'],
-                    "title": m['title'],
-                    "status": m['status'],
-                    "created_at": m['created_at']
-                }
-                for m in meetings
-            ]
-        }
+    meetings = await fetch_all(
+        "SELECT * FROM meetings WHERE host_id = ? ORDER BY created_at DESC LIMIT 10",
+        (current_user['user_id'],)
+    )
+    
+    return {
+        "meetings": [
+            {
+                "id": m['id'],
+                "room_code": m['room_code'],
+                "title": m['title'],
+                "status": m['status'],
+                "created_at": m['created_at']
+            }
+            for m in meetings
+        ]
+    }
 
 
 # ===== Socket.IO와 FastAPI 통합 =====
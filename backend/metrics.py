@@ -0,0 +1,264 @@
+"""
+Prometheus 텍스트 형식 메트릭 (GET /metrics)
+prometheus_client 없이 필요한 만큼만 구현합니다. 기록은 딕셔너리 조회와 리스트 증가뿐이고
+(락 없음 - 이벤트 루프 스레드에서만 기록), 문자열 변환은 수집(스크랩) 때만 합니다.
+
+- Counter: 누적 건수
+- Histogram: 고정 버킷 분포 (bisect로 버킷 찾기), time()으로 구간 측정
+- Gauge: 수집 시점에 콜백으로 값 계산 (방/참가자 수처럼 이미 있는 상태를 그대로 읽음)
+- LoopLagMonitor: METRICS_LOOP_LAG_INTERVAL마다 sleep이 늦게 깨어난 시간 = 이벤트 루프 지연
+
+라벨 값은 이벤트 이름, 라우트 템플릿처럼 종류가 정해진 값만 씁니다 (방 ID, sid 금지).
+"""
+
+import asyncio
+import os
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+METRICS_LOOP_LAG_INTERVAL = float(os.getenv("METRICS_LOOP_LAG_INTERVAL", "0.5"))  # 초
+
+# 초 단위 버킷 (Prometheus 기본값)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 소켓 핸들러/루프 지연처럼 짧은 구간
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# 이미지/영상 처리 단계, GPT 호출처럼 긴 구간
+SLOW_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """누적 건수 (라벨 값 튜플별)"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.values: Dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def samples(self) -> Iterable[str]:
+        for labels, value in self.values.items():
+            yield f"{self.name}_total{_labels(self.label_names, labels)} {_number(value)}"
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram: "Histogram", labels: tuple):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Histogram:
+    """고정 버킷 분포 - 라벨 값 튜플마다 [버킷별 건수..., 합계, 건수]"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.values: Dict[tuple, List[float]] = {}
+
+    def observe(self, value: float, *labels):
+        series = self.values.get(labels)
+        if series is None:
+            series = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        # 버킷은 누적이 아닌 구간별로 세고 수집할 때 누적 (마지막 칸은 +Inf 구간)
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def time(self, *labels) -> _Timer:
+        """with histogram.time(...): 블록 실행 시간 기록"""
+        return _Timer(self, labels)
+
+    def samples(self) -> Iterable[str]:
+        for labels, series in self.values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), series):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                yield f"{self.name}_bucket{_labels(self.label_names, labels, le)} {cumulative}"
+            yield f"{self.name}_sum{_labels(self.label_names, labels)} {_number(series[-1])}"
+            yield f"{self.name}_count{_labels(self.label_names, labels)} {cumulative}"
+
+
+class Gauge:
+    """수집 시점 값 - 콜백이 숫자 또는 {라벨 값 튜플: 숫자}를 반환"""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, func: Callable[[], Union[float, Dict[tuple, float]]],
+                 labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self.func = func
+
+    def samples(self) -> Iterable[str]:
+        value = self.func()
+        if isinstance(value, dict):
+            for labels, v in value.items():
+                yield f"{self.name}{_labels(self.label_names, labels)} {_number(v)}"
+        else:
+            yield f"{self.name} {_number(value)}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"이미 등록된 메트릭: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, func: Callable, labels: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, help, func, labels))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            try:
+                lines.extend(metric.samples())
+            except Exception as e:
+                # 콜백 하나가 실패해도 나머지 메트릭은 내보냄
+                print(f'[ERROR] 메트릭 수집 실패 {metric.name}: {e}')
+        lines.append("")
+        return "\n".join(lines)
+
+
+registry = Registry()
+
+# ===== 공통 메트릭 =====
+http_request_duration = registry.histogram(
+    "http_request_duration_seconds", "HTTP 요청 처리 시간 (라우트 템플릿별)",
+    ("method", "route", "status"),
+)
+socketio_events = registry.counter(
+    "socketio_events", "Socket.IO 이벤트 수 (outcome: handled | throttled | error)",
+    ("event", "outcome"),
+)
+socketio_handler_duration = registry.histogram(
+    "socketio_handler_duration_seconds", "Socket.IO 이벤트 핸들러 실행 시간",
+    ("event",), FAST_BUCKETS,
+)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "이벤트 루프 지연 (예약한 시각보다 늦게 깨어난 시간)",
+    buckets=FAST_BUCKETS,
+)
+media_stage_duration = registry.histogram(
+    "media_stage_duration_seconds", "이미지/영상 분석 단계별 처리 시간",
+    ("pipeline", "stage"), SLOW_BUCKETS,
+)
+
+
+class MetricsMiddleware:
+    """FastAPI 요청 시간 기록 (ASGI 미들웨어 - 응답 본문 전송까지 포함)
+
+    라우트 라벨은 매칭된 경로 템플릿(/api/rooms/{room_id}/join)이며, 매칭되지 않은 요청은 "unmatched"
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            http_request_duration.observe(
+                time.perf_counter() - start,
+                scope["method"], getattr(route, "path", "unmatched"), status[0],
+            )
+
+
+class LoopLagMonitor:
+    """이벤트 루프 지연 측정 태스크"""
+
+    def __init__(self, interval: float = METRICS_LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last = 0.0
+        self.max = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - start - self.interval)
+            self.last = lag
+            self.max = max(self.max, lag)
+            event_loop_lag.observe(lag)
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
+registry.gauge("event_loop_lag_last_seconds", "마지막 측정한 이벤트 루프 지연", lambda: loop_lag_monitor.last)
@@ -0,0 +1,160 @@
+"""
+데이터베이스 스키마 마이그레이션
+PRAGMA user_version에 적용된 버전을 기록하고, 그보다 높은 버전만 순서대로 적용
+새 스키마 변경은 MIGRATIONS 끝에 (버전, 설명, SQL 목록)으로 추가하세요
+"""
+
+import sqlite3
+from typing import List, Tuple
+
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "기본 테이블 (users, invite_codes, meetings)", [
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            email TEXT UNIQUE NOT NULL,
+            username TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL,
+            full_name TEXT,
+            personal_code TEXT UNIQUE NOT NULL,
+            invite_code_used TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            is_admin BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS invite_codes (
+            code TEXT PRIMARY KEY,
+            creator_id INTEGER,
+            max_uses INTEGER DEFAULT 1,
+            current_uses INTEGER DEFAULT 0,
+            expires_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (creator_id) REFERENCES users (id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS meetings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_code TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            description TEXT,
+            host_id INTEGER NOT NULL,
+            password TEXT,
+            status TEXT DEFAULT 'active',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (host_id) REFERENCES users (id)
+        )
+        """,
+    ]),
+    (2, "meetings / invite_codes 조회용 인덱스", [
+        # GET /api/rooms: status로 필터 후 목록 컬럼만 읽음 → 테이블 접근 없는 covering index
+        """
+        CREATE INDEX IF NOT EXISTS idx_meetings_status_listing
+        ON meetings (status, id, title, host_id, password, created_at)
+        """,
+        # GET /api/meetings/user/list: host_id로 필터, created_at 역순 정렬 (정렬 단계 제거)
+        """
+        CREATE INDEX IF NOT EXISTS idx_meetings_host_created
+        ON meetings (host_id, created_at DESC)
+        """,
+        # GET /api/invites/my-codes
+        """
+        CREATE INDEX IF NOT EXISTS idx_invite_codes_creator_created
+        ON invite_codes (creator_id, created_at DESC)
+        """,
+    ]),
+    (3, "meetings.media_mode (mesh | sfu)", [
+        "ALTER TABLE meetings ADD COLUMN media_mode TEXT NOT NULL DEFAULT 'mesh'",
+        # 방 목록이 media_mode도 읽으므로 covering index에 포함
+        "DROP INDEX IF EXISTS idx_meetings_status_listing",
+        """
+        CREATE INDEX idx_meetings_status_listing
+        ON meetings (status, id, title, host_id, password, created_at, media_mode)
+        """,
+    ]),
+    (4, "채팅 기록 (chat_messages, 추가 전용)", [
+        # room_id는 Socket.IO 방 이름 그대로 (문자열), ts는 서버 시각 (마이크로초, 페이지 커서)
+        """
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            room_id TEXT NOT NULL,
+            ts INTEGER NOT NULL,
+            user_id TEXT,
+            username TEXT,
+            content TEXT NOT NULL,
+            client_timestamp TEXT
+        )
+        """,
+        # 입장 재생/기록 조회: room_id로 범위를 좁히고 ts 역순으로 limit건 (정렬 단계 없음)
+        """
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_room_ts
+        ON chat_messages (room_id, ts)
+        """,
+    ]),
+    (5, "업로드 파일 메타데이터 (files, file_refs)", [
+        # file_id = SHA256 앞 16자, 실제 파일은 blob 저장소의 hash 경로 (created_at은 마지막 등록 시각, TTL 기준)
+        """
+        CREATE TABLE IF NOT EXISTS files (
+            file_id TEXT PRIMARY KEY,
+            hash TEXT NOT NULL,
+            filename TEXT NOT NULL,
+            size INTEGER NOT NULL,
+            room_id TEXT,
+            created_at REAL NOT NULL
+        ) WITHOUT ROWID
+        """,
+        # 만료 정리: created_at 범위 탐색
+        """
+        CREATE INDEX IF NOT EXISTS idx_files_created
+        ON files (created_at)
+        """,
+        # 방별 참조 수 (방 없이 올린 파일은 room_id = '')
+        """
+        CREATE TABLE IF NOT EXISTS file_refs (
+            file_id TEXT NOT NULL,
+            room_id TEXT NOT NULL,
+            refs INTEGER NOT NULL,
+            PRIMARY KEY (file_id, room_id)
+        ) WITHOUT ROWID
+        """,
+        # GET /api/files/room/{room_id}: 방에 공유된 파일 목록
+        """
+        CREATE INDEX IF NOT EXISTS idx_file_refs_room
+        ON file_refs (room_id, file_id)
+        """,
+    ]),
+]
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def run_migrations(conn: sqlite3.Connection) -> int:
+    """적용되지 않은 마이그레이션을 실행하고 최종 버전 반환
+
+    각 마이그레이션은 버전 기록과 함께 하나의 트랜잭션으로 적용됩니다.
+    """
+    current = get_schema_version(conn)
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            # 여러 워커가 동시에 시작하면 다른 워커가 먼저 적용했을 수 있음 (쓰기 잠금 획득 후 재확인)
+            if get_schema_version(conn) >= version:
+                conn.execute("COMMIT")
+                current = version
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        print(f"[MIGRATION] v{version} 적용: {description}")
+        current = version
+    return current
@@ -0,0 +1,106 @@
+"""
+비밀번호 해싱 워커 풀
+bcrypt 해시/검증(요청당 200~300ms CPU)을 이벤트 루프 밖의 제한된 스레드 풀에서 실행
+- bcrypt는 해싱 중 GIL을 해제하므로 스레드만으로 코어를 나눠 쓸 수 있음
+- 대기열이 가득 차면 루프를 막는 대신 즉시 PasswordPoolSaturated 발생 (→ 503)
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict
+from passlib.context import CryptContext
+
+# ===== 설정 =====
+PASSWORD_WORKERS = int(os.getenv("PASSWORD_WORKERS", str(min(4, os.cpu_count() or 1))))
+PASSWORD_QUEUE_LIMIT = int(os.getenv("PASSWORD_QUEUE_LIMIT", "32"))  # 워커 외에 대기 가능한 요청 수
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+class PasswordPoolSaturated(Exception):
+    """해싱 대기열이 가득 참"""
+
+
+class PasswordHasher:
+    """크기와 대기열 길이가 제한된 bcrypt 워커 풀"""
+
+    def __init__(self, workers: int = PASSWORD_WORKERS, queue_limit: int = PASSWORD_QUEUE_LIMIT):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="videonet-bcrypt")
+        self._pending = 0  # 이벤트 루프에서만 변경
+        self._peak_pending = 0
+        self._rejected = 0
+        self._ops: Dict[str, Dict[str, float]] = {
+            op: {"count": 0, "total_seconds": 0.0, "max_seconds": 0.0, "wait_seconds": 0.0}
+            for op in ("hash", "verify")
+        }
+
+    async def _submit(self, op: str, func: Callable, *args):
+        if self._pending >= self.workers + self.queue_limit:
+            self._rejected += 1
+            raise PasswordPoolSaturated()
+
+        self._pending += 1
+        self._peak_pending = max(self._peak_pending, self._pending)
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            result, started, finished = await loop.run_in_executor(self._executor, _timed, func, args)
+        finally:
+            self._pending -= 1
+
+        stats = self._ops[op]
+        stats["count"] += 1
+        stats["total_seconds"] += finished - started
+        stats["max_seconds"] = max(stats["max_seconds"], finished - started)
+        stats["wait_seconds"] += started - submitted
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", pwd_context.verify, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """해시 지연 시간 및 대기열 상태"""
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "in_flight": self._pending,
+            "queue_depth": max(0, self._pending - self.workers),
+            "peak_in_flight": self._peak_pending,
+            "rejected": self._rejected,
+            **{
+                op: {
+                    "count": int(s["count"]),
+                    "avg_ms": round(s["total_seconds"] / s["count"] * 1000, 2) if s["count"] else 0.0,
+                    "max_ms": round(s["max_seconds"] * 1000, 2),
+                    "avg_wait_ms": round(s["wait_seconds"] / s["count"] * 1000, 2) if s["count"] else 0.0,
+                }
+                for op, s in self._ops.items()
+            },
+        }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+def _timed(func: Callable, args: tuple):
+    started = time.perf_counter()
+    result = func(*args)
+    return result, started, time.perf_counter()
+
+
+password_hasher = PasswordHasher()
+
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
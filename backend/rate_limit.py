@@ -0,0 +1,147 @@
+"""
+Socket.IO 이벤트 속도 제한 (연결별 토큰 버킷)
+chat_message, media_toggle 같은 이벤트는 방 전체로 전달되므로 한 클라이언트가 초당 N건을 보내면
+서버는 N x (참가자 수)건을 보내게 됩니다. 핸들러(팬아웃) 앞에서 이벤트별 예산을 확인해
+예산을 넘은 이벤트는 전달하지 않고 버립니다.
+
+- RATE_LIMITS: 이벤트별 예산 "event=초당건수/버스트,..." (기본값 위에 덮어씀, 초당건수 0이면 제한 없음)
+- RATE_LIMIT_DISCONNECT: RATE_LIMIT_WINDOW 안에 이만큼 제한되면 연결 해제 (0이면 끊지 않음)
+
+버킷은 (sid, 이벤트)마다 [남은 토큰, 마지막 갱신 시각] 리스트 하나이며, 확인할 때 경과 시간만큼 채웁니다
+(타이머 없음). 예산이 없는 이벤트는 딕셔너리 조회 한 번으로 통과합니다.
+"""
+
+import os
+import time
+from typing import Dict, Optional, Tuple
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+RATE_LIMITS = os.getenv("RATE_LIMITS", "")
+RATE_LIMIT_WINDOW = float(os.getenv("RATE_LIMIT_WINDOW", "10"))  # 초 (연결 해제 판단 구간)
+RATE_LIMIT_DISCONNECT = int(os.getenv("RATE_LIMIT_DISCONNECT", "200"))  # 구간 내 제한 건수 (0이면 끊지 않음)
+
+# 이벤트별 기본 예산: (초당 건수, 버스트) - 정상 클라이언트의 최대 사용량보다 넉넉하게
+# WebRTC 시그널링(webrtc_offer/answer/ice_candidate(s))은 상대 한 명에게만 전달되어 증폭되지 않고,
+# 풀 메시 입장 시 참가자 수에 비례해 몰리므로 (버스트를 넘으면 연결이 맺어지지 않음) 예산을 두지 않음
+DEFAULT_BUDGETS: Dict[str, Tuple[float, float]] = {
+    'join_room': (2, 5),
+    'leave_room': (2, 5),
+    'roster_sync': (2, 5),
+    'sfu_publish': (5, 10),
+    'sfu_answer': (5, 10),
+    'media_stats': (2, 5),
+    'media_toggle': (5, 10),
+    'chat_message': (5, 10),
+    'screen_share_started': (2, 4),
+    'screen_share_stopped': (2, 4),
+    'file_transfer_start': (2, 5),
+    'file_chunk': (150, 300),  # 기존 클라이언트는 16KB 청크마다 10ms 대기 (최대 100건/초)
+    'file_chunk_bin': (500, 500),  # 크레딧 흐름 제어가 있으므로 크레딧을 무시하는 송신자만 걸림
+    'file_chunk_ack': (1000, 1000),
+    'file_receiver': (5, 10),
+    'file_transfer_end': (2, 5),
+    'ping': (1, 5),
+}
+
+
+def parse_budgets(spec: str, defaults: Dict[str, Tuple[float, float]] = DEFAULT_BUDGETS) -> Dict[str, Tuple[float, float]]:
+    """"event=rate/burst,..." → {event: (rate, burst)} (burst 생략 시 rate, rate 0이면 제한 해제)"""
+    budgets = dict(defaults)
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        event, _, value = item.partition("=")
+        rate, _, burst = value.partition("/")
+        try:
+            rate = float(rate)
+            burst = float(burst) if burst else rate
+        except ValueError:
+            continue
+        if rate <= 0:
+            budgets.pop(event.strip(), None)
+        else:
+            budgets[event.strip()] = (rate, max(1.0, burst))
+    return budgets
+
+
+class RateLimiter:
+    """연결별 이벤트 토큰 버킷"""
+
+    def __init__(
+        self,
+        budgets: Optional[Dict[str, Tuple[float, float]]] = None,
+        enabled: bool = RATE_LIMIT_ENABLED,
+        window: float = RATE_LIMIT_WINDOW,
+        disconnect_after: int = RATE_LIMIT_DISCONNECT,
+    ):
+        self.budgets = parse_budgets(RATE_LIMITS) if budgets is None else budgets
+        self.enabled = enabled
+        self.window = window
+        self.disconnect_after = disconnect_after
+        self._buckets: Dict[str, Dict[str, list]] = {}  # sid -> event -> [tokens, last]
+        self._violations: Dict[str, list] = {}  # sid -> [구간 시작, 구간 내 제한 건수]
+        self.allowed: Dict[str, int] = {}
+        self.throttled: Dict[str, int] = {}
+        self.disconnects = 0
+
+    def allow(self, sid: str, event: str, now: Optional[float] = None) -> bool:
+        """이벤트 하나를 처리해도 되면 True (토큰 1개 사용)"""
+        budget = self.budgets.get(event)
+        if budget is None or not self.enabled:
+            return True
+        rate, burst = budget
+        now = time.monotonic() if now is None else now
+
+        buckets = self._buckets.get(sid)
+        if buckets is None:
+            buckets = self._buckets[sid] = {}
+        bucket = buckets.get(event)
+        if bucket is None:
+            bucket = buckets[event] = [burst, now]
+        else:
+            bucket[0] = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            self.allowed[event] = self.allowed.get(event, 0) + 1
+            return True
+        self.throttled[event] = self.throttled.get(event, 0) + 1
+        return False
+
+    def retry_after(self, sid: str, event: str) -> float:
+        """다음 토큰이 찰 때까지 남은 시간 (초)"""
+        budget = self.budgets.get(event)
+        bucket = self._buckets.get(sid, {}).get(event)
+        if budget is None or bucket is None:
+            return 0.0
+        return max(0.0, (1 - bucket[0]) / budget[0])
+
+    def violation(self, sid: str, now: Optional[float] = None) -> bool:
+        """제한된 이벤트 기록 - 구간 내 한도를 넘으면 True (호출한 쪽이 연결 해제)"""
+        if self.disconnect_after <= 0:
+            return False
+        now = time.monotonic() if now is None else now
+        state = self._violations.get(sid)
+        if state is None or now - state[0] >= self.window:
+            state = self._violations[sid] = [now, 0]
+        state[1] += 1
+        if state[1] == self.disconnect_after:
+            self.disconnects += 1
+            return True
+        return False
+
+    def forget(self, sid: str):
+        """연결 해제 시 버킷 삭제"""
+        self._buckets.pop(sid, None)
+        self._violations.pop(sid, None)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "clients": len(self._buckets),
+            "allowed": dict(self.allowed),
+            "throttled": dict(self.throttled),
+            "throttled_total": sum(self.throttled.values()),
+            "disconnects": self.disconnects,
+            "disconnect_after": self.disconnect_after,
+            "window_seconds": self.window,
+        }
@@ -0,0 +1,75 @@
+"""
+방 목록 스냅샷 캐시
+GET /api/rooms 응답(JSON 바이트 + ETag)을 메모리에 보관하고,
+방 생성/활성화/비활성화/참가/퇴장 이벤트에서만 무효화합니다.
+폴링하는 대시보드는 변경이 없으면 DB 조회 없이 304를 받습니다.
+멀티 워커 모드에서는 다른 워커의 변경을 알 수 없으므로 max_age초가 지나면 다시 생성합니다.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from typing import Awaitable, Callable, Optional, Tuple
+
+
+class RoomListSnapshot:
+    """무효화 기반 방 목록 스냅샷"""
+
+    def __init__(self, max_age: Optional[float] = None):
+        self.version = 0  # invalidate()마다 증가
+        self.max_age = max_age  # None이면 무효화될 때까지 유지
+        self._body: Optional[bytes] = None
+        self._etag: Optional[str] = None
+        self._built_version = -1
+        self._built_at = 0.0
+        self._lock = asyncio.Lock()
+        self.hits = 0
+        self.rebuilds = 0
+
+    def invalidate(self):
+        """방 목록에 영향을 주는 변경이 있을 때 호출"""
+        self.version += 1
+
+    def _fresh(self) -> bool:
+        if self._built_version != self.version:
+            return False
+        return self.max_age is None or time.monotonic() - self._built_at < self.max_age
+
+    async def get(self, build: Callable[[], Awaitable[list]]) -> Tuple[bytes, str]:
+        """(JSON 바이트, ETag) 반환 - 스냅샷이 오래됐으면 build()로 재생성
+
+        동시에 여러 요청이 들어와도 재생성은 한 번만 실행됩니다.
+        """
+        if self._fresh():
+            self.hits += 1
+            return self._body, self._etag
+
+        async with self._lock:
+            if self._fresh():
+                self.hits += 1
+                return self._body, self._etag
+
+            version = self.version
+            built_at = time.monotonic()
+            rooms = await build()
+            body = json.dumps(rooms, ensure_ascii=False, separators=(",", ":")).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            self.rebuilds += 1
+
+            # 재생성 도중 무효화되었다면 결과는 반환하되 다음 요청에서 다시 생성
+            self._body, self._etag = body, etag
+            self._built_version = version
+            self._built_at = built_at
+            return body, etag
+
+    def stats(self) -> dict:
+        return {
+            "version": self.version,
+            "fresh": self._fresh(),
+            "hits": self.hits,
+            "rebuilds": self.rebuilds,
+        }
+
+
+room_list_snapshot = RoomListSnapshot()
@@ -0,0 +1,75 @@
+"""
+방 참가 상태 인덱스
+room_id -> sids, sid -> room_ids 양방향 인덱스와 방별 명단(RoomRoster)을 한 곳에서 갱신하여
+항상 서로 일치하도록 유지합니다. 연결 해제 시 전체 방을 훑지 않고 해당 sid가 속한 방만 처리합니다.
+"""
+
+from typing import Dict, List, Optional, Set, Tuple
+
+from roster import RoomRoster
+
+
+class RoomMembership:
+    """방 참가 상태 (모든 변경은 join/leave를 통해서만)"""
+
+    def __init__(self):
+        self.rooms: Dict[str, Set[str]] = {}  # room_id -> set of session_ids
+        self.sid_rooms: Dict[str, Set[str]] = {}  # session_id -> set of room_ids
+        self.rosters: Dict[str, RoomRoster] = {}  # room_id -> 버전 관리 참가자 명단
+
+    def join(self, sid: str, room_id: str, user_info: dict) -> Tuple[bool, int]:
+        """참가 처리 - (방이 새로 생겼는지, 명단 버전) 반환"""
+        is_first = room_id not in self.rooms
+        self.rooms.setdefault(room_id, set()).add(sid)
+        self.sid_rooms.setdefault(sid, set()).add(room_id)
+        roster = self.rosters.setdefault(room_id, RoomRoster())
+        return is_first, roster.add(sid, user_info)
+
+    def leave(self, sid: str, room_id: str) -> Tuple[bool, bool, Optional[int]]:
+        """퇴장 처리 - (실제로 참가 중이었는지, 방이 비었는지, 명단 버전) 반환"""
+        participants = self.rooms.get(room_id)
+        if participants is None or sid not in participants:
+            return False, False, None
+
+        participants.discard(sid)
+        sid_rooms = self.sid_rooms.get(sid)
+        if sid_rooms is not None:
+            sid_rooms.discard(room_id)
+            if not sid_rooms:
+                del self.sid_rooms[sid]
+
+        roster_version = self.rosters[room_id].remove(sid)
+        emptied = not participants
+        if emptied:
+            del self.rooms[room_id]
+            del self.rosters[room_id]
+        return True, emptied, roster_version
+
+    def rooms_of(self, sid: str) -> List[str]:
+        """sid가 참가 중인 방 목록 (복사본)"""
+        return list(self.sid_rooms.get(sid, ()))
+
+    def members(self, room_id: str) -> Set[str]:
+        return self.rooms.get(room_id, set())
+
+    def roster(self, room_id: str) -> Optional[RoomRoster]:
+        return self.rosters.get(room_id)
+
+    def count(self, room_id: str) -> int:
+        return len(self.rooms.get(room_id, ()))
+
+    def counts(self) -> Dict[str, int]:
+        return {room_id: len(participants) for room_id, participants in self.rooms.items()}
+
+    def check_invariants(self):
+        """양방향 인덱스 일치 여부 검사 (디버깅/스트레스 테스트용)"""
+        for room_id, participants in self.rooms.items():
+            assert participants, f"빈 방이 남아 있음: {room_id}"
+            assert set(self.rosters[room_id].members) == participants, f"명단 불일치: {room_id}"
+            for sid in participants:
+                assert room_id in self.sid_rooms.get(sid, ()), f"역인덱스 누락: {sid} -> {room_id}"
+        for sid, room_ids in self.sid_rooms.items():
+            assert room_ids, f"빈 역인덱스가 남아 있음: {sid}"
+            for room_id in room_ids:
+                assert sid in self.rooms.get(room_id, ()), f"정인덱스 누락: {room_id} -> {sid}"
+        assert set(self.rosters) == set(self.rooms), "명단과 방 목록 불일치"
@@ -0,0 +1,115 @@
+"""
+방 상태(active/inactive) 지연 기록기
+첫 참가/마지막 퇴장마다 UPDATE를 바로 실행하지 않고, 짧은 구간 동안 방별 최종 상태만 모아
+DB 스레드에서 하나의 트랜잭션으로 기록합니다.
+0명 ↔ 1명을 반복하는 방도 구간당 최대 한 번만 기록되며, 마지막으로 기록한 상태와 같으면 생략합니다.
+(멀티 워커 모드에서는 다른 워커가 같은 방 상태를 바꿀 수 있으므로 dedupe=False로 생략하지 않음)
+"""
+
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from database import run_db
+from structured_logging import get_logger, log_event
+
+ROOM_STATUS_FLUSH_INTERVAL = float(os.getenv("ROOM_STATUS_FLUSH_INTERVAL", "0.2"))  # 초
+
+log = get_logger('room_status')
+
+
+def _write_statuses(conn, updates: List[tuple]):
+    conn.executemany("UPDATE meetings SET status = ? WHERE id = ?", updates)
+
+
+class RoomStatusWriter:
+    """방 상태 변경을 모아서 한 번에 기록하는 write-behind 큐"""
+
+    def __init__(
+        self,
+        interval: float = ROOM_STATUS_FLUSH_INTERVAL,
+        on_flushed: Optional[Callable[[List[str]], Awaitable[None]]] = None,
+        dedupe: bool = True,
+    ):
+        self.interval = interval
+        self.dedupe = dedupe
+        self.on_flushed = on_flushed  # 기록 완료 후 호출 (변경된 room_id 목록)
+        self._pending: Dict[str, str] = {}  # room_id -> 기록할 최종 상태
+        self._persisted: Dict[str, str] = {}  # room_id -> 마지막으로 기록한 상태
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+        self.requested = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+
+    def set_status(self, room_id: str, status: str):
+        """상태 변경 요청 (즉시 반환, interval 뒤에 기록)"""
+        self.requested += 1
+        self._pending[room_id] = status
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.interval, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        """대기 중인 상태 변경을 하나의 트랜잭션으로 기록"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            updates = []
+            for room_id, status in pending.items():
+                if self.dedupe and self._persisted.get(room_id) == status:
+                    continue
+                try:
+                    updates.append((status, int(room_id)))
+                except (TypeError, ValueError):
+                    log_event(log, logging.ERROR, 'room_status_invalid_id', room=room_id)
+            if not updates:
+                return
+
+            try:
+                await run_db(_write_statuses, updates)
+            except Exception as e:
+                self.failures += 1
+                log_event(log, logging.ERROR, 'room_status_write_failed', count=len(updates), error=e)
+                # 그 사이 새로 들어온 요청이 우선, 나머지는 다음 구간에 재시도
+                for room_id, status in pending.items():
+                    self._pending.setdefault(room_id, status)
+                if self._pending and self._timer is None:
+                    loop = asyncio.get_running_loop()
+                    self._timer = loop.call_later(self.interval, lambda: asyncio.ensure_future(self.flush()))
+                return
+
+            for status, room_id in updates:
+                self._persisted[str(room_id)] = status
+            self.flushes += 1
+            self.written += len(updates)
+            log_event(log, logging.DEBUG, 'room_status_written', count=len(updates))
+
+        if self.on_flushed is not None:
+            await self.on_flushed([str(room_id) for _, room_id in updates])
+
+    async def close(self):
+        """서버 종료 시 남은 변경을 모두 기록 (실패 시 최대 3회 재시도)"""
+        for _ in range(3):
+            await self.flush()
+            if not self._pending:
+                return
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        log_event(log, logging.ERROR, 'room_status_close_failed', count=len(self._pending))
+
+    def stats(self) -> dict:
+        return {
+            "pending": len(self._pending),
+            "requested": self.requested,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "interval_seconds": self.interval,
+        }
@@ -0,0 +1,78 @@
+"""
+방 참가자 명단 (버전 관리)
+참가/퇴장마다 버전을 올리고 최근 변경 로그를 보관하여,
+재접속한 클라이언트에게는 전체 목록 대신 마지막으로 본 버전 이후의 변경분만 전송
+로그 범위를 벗어난 오래된 버전이면 전체 스냅샷으로 대체
+"""
+
+import os
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+ROSTER_DELTA_LOG = int(os.getenv("ROSTER_DELTA_LOG", "256"))  # 방별로 보관하는 최근 변경 수
+
+
+class RoomRoster:
+    """방 하나의 버전 관리 참가자 명단"""
+
+    def __init__(self, log_size: int = ROSTER_DELTA_LOG):
+        # 방이 비었다가 다시 생성되어도 이전 버전과 겹치지 않도록 현재 시각(us)에서 시작
+        self.version = time.time_ns() // 1000
+        self.members: Dict[str, dict] = {}  # sid -> userInfo
+        self._log: Deque[Tuple[int, str, Optional[dict]]] = deque(maxlen=log_size)  # (version, sid, userInfo | None=퇴장)
+
+    def add(self, sid: str, user_info: dict) -> int:
+        """참가자 추가 후 새 버전 반환"""
+        self.version += 1
+        self.members[sid] = user_info
+        self._log.append((self.version, sid, user_info))
+        return self.version
+
+    def remove(self, sid: str) -> Optional[int]:
+        """참가자 제거 후 새 버전 반환 (명단에 없으면 None)"""
+        if sid not in self.members:
+            return None
+        self.version += 1
+        del self.members[sid]
+        self._log.append((self.version, sid, None))
+        return self.version
+
+    def snapshot(self, exclude: Optional[str] = None) -> dict:
+        """전체 명단"""
+        return {
+            'mode': 'snapshot',
+            'version': self.version,
+            'participants': [
+                {'userId': sid, 'userInfo': info}
+                for sid, info in self.members.items() if sid != exclude
+            ],
+        }
+
+    def changes_since(self, version: int, exclude: Optional[str] = None) -> Optional[dict]:
+        """version 이후의 순 변경분 (로그로 재구성할 수 없으면 None)"""
+        if version > self.version:
+            return None
+        if version < self.version and (not self._log or self._log[0][0] > version + 1):
+            return None
+
+        # 같은 참가자의 여러 변경은 마지막 상태만 남김
+        latest: Dict[str, Optional[dict]] = {}
+        for entry_version, sid, info in self._log:
+            if entry_version > version and sid != exclude:
+                latest[sid] = info
+
+        return {
+            'mode': 'delta',
+            'version': self.version,
+            'added': [{'userId': sid, 'userInfo': info} for sid, info in latest.items() if info is not None],
+            'removed': [sid for sid, info in latest.items() if info is None],
+        }
+
+    def sync(self, since: Optional[int], exclude: Optional[str] = None) -> dict:
+        """클라이언트가 마지막으로 본 버전 기준 동기화 메시지 (변경분, 불가능하면 스냅샷)"""
+        if since is not None:
+            delta = self.changes_since(since, exclude)
+            if delta is not None:
+                return delta
+        return self.snapshot(exclude)
@@ -3,10 +3,14 @@ VideoNet Pro - 통합 서버 실행
 FastAPI + Socket.IO를 함께 실행합니다
 
 실행 방법: python run.py
+멀티 워커: WORKERS=4 python run.py (SIGNALING_BACKEND 기본값이 sqlite로 바뀜)
 """
 
+import os
+
 import uvicorn
-from main import combined_app
+
+WORKERS = int(os.getenv("WORKERS", "1"))
 
 if __name__ == "__main__":
     print("=" * 60)
@@ -20,9 +24,24 @@ if __name__ == "__main__":
     # reload=True는 import string 방식에서만 작동
     # 개발 시 자동 재시작이 필요하면 uvicorn 명령어 직접 사용 권장:
     # uvicorn main:combined_app --host 0.0.0.0 --port 7701 --reload
-    uvicorn.run(
-        combined_app,
-        host="0.0.0.0",
-        port=7701,
-        log_level="info"
-    )
+    if WORKERS > 1:
+        # 워커끼리 Socket.IO 이벤트와 방 참가 상태를 공유해야 함 (cluster.py)
+        # 스티키 세션이 없으므로 websocket 전송만 허용 (polling은 워커가 바뀌면 끊김, cluster.signaling_transports)
+        os.environ.setdefault("SIGNALING_BACKEND", "sqlite")
+        print(f"[CLUSTER] 워커 {WORKERS}개, SIGNALING_BACKEND={os.environ['SIGNALING_BACKEND']}")
+        uvicorn.run(
+            "main:combined_app",
+            host="0.0.0.0",
+            port=7701,
+            workers=WORKERS,
+            log_level="info"
+        )
+    else:
+        from main import combined_app
+        uvicorn.run(
+            combined_app,
+            host="0.0.0.0",
+            port=7701,
+            log_level="info"
+        )
+
@@ -0,0 +1,434 @@
+"""
+SFU(Selective Forwarding Unit) 모드 - 방 생성 시 mediaMode='sfu'로 선택
+메시 모드는 참가자마다 스트림을 N-1번 올리지만, SFU 모드에서는 서버(aiortc)가 참가자당
+업스트림 하나(publish PC)만 받고 다른 참가자들의 subscribe PC로 전달합니다.
+
+- 업스트림: 클라이언트 offer(sfu_publish) → 서버 answer (트랙당 PublishedTrack 하나)
+- 다운스트림: 서버가 참가자별 subscribe PC에 슬롯(sendonly 트랜시버)을 만들고 sfu_offer로 재협상
+  sfu_answer를 받으면 다음 변경을 반영하며, streams(mid -> 송출자 sid)로 트랙 주인을 알려줌
+- 나간 참가자의 슬롯은 비워 두었다가 같은 종류의 새 트랙에 재사용 (재협상 없이 sfu_streams만 전송)
+
+aiortc는 수신한 RTP를 항상 디코딩하므로, 송출 트랙마다 한 번만 VP8/Opus로 다시 인코딩하고
+인코딩된 패킷을 모든 구독 슬롯이 공유합니다 (구독자별 RTCRtpSender는 RTP 분할/암호화만 수행).
+구독자 PLI는 전달되지 않으므로 슬롯 연결, 큐 넘침, SFU_KEYFRAME_INTERVAL마다 키프레임을 만듭니다.
+영상은 구독 슬롯이 고른 화질 레이어(layer_selection.LAYERS)마다 따로 인코딩하며, 쓰는 슬롯이 없는 레이어는 건너뜁니다.
+
+aiortc가 설치되지 않았으면 SFU_AVAILABLE=False이고 모든 방은 메시로 동작합니다.
+멀티 워커에서는 같은 워커에 접속한 참가자끼리만 전달합니다.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Set
+
+from layer_selection import LAYER_PARAMS, LAYER_RIDS
+from structured_logging import get_logger, log_event
+
+try:
+    import av
+    from aiortc import (
+        RTCBundlePolicy, RTCConfiguration, RTCIceServer, RTCPeerConnection, RTCRtpSender, RTCSessionDescription,
+    )
+    from aiortc.codecs.opus import SAMPLES_PER_FRAME, TIME_BASE as AUDIO_TIME_BASE, OpusEncoder
+    from aiortc.codecs.vpx import Vp8Encoder
+    from aiortc.mediastreams import VIDEO_TIME_BASE, MediaStreamError, MediaStreamTrack
+    SFU_AVAILABLE = True
+except ImportError:  # aiortc 미설치 - 메시 모드만 지원
+    SFU_AVAILABLE = False
+    MediaStreamTrack = Vp8Encoder = object
+
+SFU_ICE_SERVERS = os.getenv("SFU_ICE_SERVERS", "stun:stun.l.google.com:19302")  # 쉼표 구분, 비우면 host 후보만
+SFU_KEYFRAME_INTERVAL = float(os.getenv("SFU_KEYFRAME_INTERVAL", "3.0"))  # 초 (구독자 패킷 손실 복구용)
+SFU_SLOT_QUEUE = int(os.getenv("SFU_SLOT_QUEUE", "64"))  # 구독 슬롯별 대기 패킷 수 (넘치면 비우고 키프레임 요청)
+
+MEDIA_MODES = ('mesh', 'sfu')
+FORWARD_CODECS = {'video': 'video/vp8', 'audio': 'audio/opus'}  # 구독 PC에서 협상할 코덱 (인코딩 결과와 일치)
+
+log = get_logger('sfu')
+
+
+class _Vp8FrameEncoder(Vp8Encoder):
+    """VP8 인코딩 결과를 RTP로 나누지 않고 프레임 단위로 반환 (분할은 구독자별 RTCRtpSender.pack)"""
+
+    @classmethod
+    def _packetize(cls, buffer: bytes, picture_id: int) -> List[bytes]:
+        return [buffer] if buffer else []
+
+
+class ForwardedTrack(MediaStreamTrack):
+    """구독 슬롯 - subscribe PC의 sendonly 트랜시버 하나에 붙는 트랙
+
+    송출자가 바뀌거나 없어도 트랙은 끝나지 않습니다 (끝나면 aiortc 송신 루프가 종료되어 재사용 불가).
+    """
+
+    def __init__(self, kind: str, subscriber: str):
+        super().__init__()
+        self.kind = kind
+        self.subscriber = subscriber
+        self.source: Optional["PublishedTrack"] = None
+        self.transceiver = None
+        self.layer = LAYER_RIDS[0] if kind == 'video' else None  # 받을 화질 레이어 (media_stats로 변경)
+        self._packets: Deque = deque()
+        self._ready = asyncio.Event()
+        self.forwarded = 0
+        self.dropped = 0
+
+    def attach(self, source: "PublishedTrack"):
+        self.detach()
+        self.source = source
+        source.subscribers.add(self)
+        source.request_keyframe(self.layer)
+
+    def detach(self):
+        if self.source is not None:
+            self.source.subscribers.discard(self)
+            self.source = None
+        self._packets.clear()
+
+    def set_layer(self, layer: str) -> bool:
+        """받을 레이어 변경 - 새 레이어는 키프레임부터 전달 (이미 쌓인 이전 레이어 패킷은 그대로 전송)"""
+        if self.kind != 'video' or layer == self.layer:
+            return False
+        self.layer = layer
+        if self.source is not None:
+            self.source.request_keyframe(layer)
+        return True
+
+    def push(self, packet):
+        if len(self._packets) >= SFU_SLOT_QUEUE:
+            # 느린 구독자 - 오래된 패킷을 버리고 키프레임부터 다시 전송
+            self.dropped += len(self._packets)
+            self._packets.clear()
+            if self.source is not None:
+                self.source.request_keyframe(self.layer)
+        self._packets.append(packet)
+        self._ready.set()
+
+    async def recv(self):
+        while not self._packets:
+            if self.readyState != "live":
+                raise MediaStreamError
+            self._ready.clear()
+            await self._ready.wait()
+        self.forwarded += 1
+        return self._packets.popleft()
+
+    def stop(self):
+        self.detach()
+        super().stop()
+        self._ready.set()
+
+
+class PublishedTrack:
+    """참가자 한 명의 업스트림 트랙 - 레이어별로 한 번 인코딩해서 해당 레이어 구독 슬롯 전체에 패킷 공유"""
+
+    def __init__(self, owner: str, source):
+        self.owner = owner
+        self.kind = source.kind
+        self.source = source
+        self.subscribers: Set[ForwardedTrack] = set()
+        self.encoders: Dict[Optional[str], object] = {}  # 레이어 -> 인코더 (오디오는 None 하나)
+        self.keyframes: Set[Optional[str]] = set()  # 다음 프레임을 키프레임으로 인코딩할 레이어
+        self.last_keyframe: Dict[Optional[str], float] = {}
+        self.frames = 0
+        self.encoded = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._pump())
+
+    def request_keyframe(self, layer: Optional[str] = None):
+        self.keyframes.add(layer)
+
+    def _encode_layers(self, frame, keyframes: Dict[Optional[str], bool]) -> Dict[Optional[str], list]:
+        """구독 중인 레이어마다 축소 후 인코딩 (실행기 스레드에서 한 번에)"""
+        encoded = {}
+        for layer, keyframe in keyframes.items():
+            encoder = self.encoders.get(layer)
+            if encoder is None:
+                if self.kind == 'video':
+                    encoder = _Vp8FrameEncoder()
+                    encoder.target_bitrate = LAYER_PARAMS[layer]['maxBitrate']
+                else:
+                    encoder = OpusEncoder()
+                self.encoders[layer] = encoder
+            scaled = frame
+            scale = LAYER_PARAMS[layer]['scaleResolutionDownBy'] if layer is not None else 1
+            if scale > 1:
+                # VP8은 짝수 크기가 필요
+                scaled = frame.reformat(width=max(2, frame.width // scale & ~1),
+                                        height=max(2, frame.height // scale & ~1))
+                scaled.pts, scaled.time_base = frame.pts, frame.time_base
+            encoded[layer] = self._encode(encoder, scaled, keyframe)
+        return encoded
+
+    def _encode(self, encoder, frame, keyframe: bool) -> list:
+        payloads, timestamp = encoder.encode(frame, keyframe)
+        packets = []
+        for i, payload in enumerate(payloads):
+            packet = av.Packet(payload)
+            if self.kind == 'video':
+                packet.pts, packet.time_base = timestamp, VIDEO_TIME_BASE
+            else:
+                packet.pts, packet.time_base = timestamp + i * SAMPLES_PER_FRAME, AUDIO_TIME_BASE
+            packets.append(packet)
+        return packets
+
+    async def _pump(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                frame = await self.source.recv()
+                self.frames += 1
+                if not self.subscribers:
+                    continue  # 구독자가 없으면 인코딩 생략 (연결될 때 키프레임 요청)
+
+                groups: Dict[Optional[str], List[ForwardedTrack]] = {}
+                for slot in self.subscribers:
+                    groups.setdefault(slot.layer, []).append(slot)
+                keyframes = {}
+                now = time.monotonic()
+                for layer in groups:
+                    keyframe = False
+                    if self.kind == 'video':
+                        keyframe = (layer in self.keyframes
+                                    or now - self.last_keyframe.get(layer, 0.0) >= SFU_KEYFRAME_INTERVAL)
+                        if keyframe:
+                            self.keyframes.discard(layer)
+                            self.last_keyframe[layer] = now
+                    keyframes[layer] = keyframe
+                encoded = await loop.run_in_executor(None, self._encode_layers, frame, keyframes)
+                self.encoded += len(encoded)
+                for layer, packets in encoded.items():
+                    for slot in groups[layer]:
+                        if slot.layer != layer or slot.source is not self:
+                            continue  # 인코딩 중에 레이어가 바뀌었거나 분리된 슬롯
+                        for packet in packets:
+                            slot.push(packet)
+        except MediaStreamError:
+            pass
+        except Exception as e:
+            log_event(log, logging.ERROR, 'sfu_track_failed', sid=self.owner, kind=self.kind, error=e)
+
+    def stop(self) -> Set[str]:
+        """송출 중단 - 연결돼 있던 구독자 sid 반환 (streams 갱신 대상)"""
+        if self._task is not None:
+            self._task.cancel()
+        subscribers = {slot.subscriber for slot in self.subscribers}
+        for slot in list(self.subscribers):
+            slot.detach()
+        return subscribers
+
+
+class SfuPeer:
+    """SFU 방 참가자 한 명 (publish PC + subscribe PC)"""
+
+    def __init__(self, sid: str, room_id: str):
+        self.sid = sid
+        self.room_id = room_id
+        self.publish_pc = None
+        self.subscribe_pc = None
+        self.published: List[PublishedTrack] = []
+        self.slots: List[ForwardedTrack] = []
+        self.negotiating = False  # sfu_offer를 보내고 sfu_answer 대기 중
+        self.needs_offer = False  # 슬롯 추가 - 재협상 필요
+        self.streams_changed = False  # 슬롯 재사용 - sfu_streams만 전송
+
+
+class SfuServer:
+    """방별 SFU 참가자 관리와 재협상 (signal로 sfu_offer / sfu_streams 전송)"""
+
+    def __init__(self, signal: Callable[[str, str, object], Awaitable[None]]):
+        self.signal = signal  # (sid, event, data)
+        self.available = SFU_AVAILABLE
+        self.rooms: Dict[str, Dict[str, SfuPeer]] = {}
+        self.peers: Dict[str, SfuPeer] = {}
+        self.publishes = 0
+        self.offers = 0
+        self.slot_reuses = 0
+        self.layer_switches = 0
+
+    def _peer_connection(self):
+        servers = [RTCIceServer(urls=url.strip()) for url in SFU_ICE_SERVERS.split(",") if url.strip()]
+        # max-bundle: 같은 종류 트랜시버가 여럿이면 balanced에서 BUNDLE 이후 전송 경로를 잃는 경우가 있음
+        return RTCPeerConnection(RTCConfiguration(iceServers=servers, bundlePolicy=RTCBundlePolicy.MAX_BUNDLE))
+
+    async def publish(self, sid: str, room_id: str, offer: Optional[dict]) -> Optional[dict]:
+        """업스트림 offer 처리 후 answer 반환 (offer가 없으면 구독만)"""
+        if not self.available:
+            raise RuntimeError("aiortc가 설치되지 않아 SFU 모드를 사용할 수 없습니다")
+
+        peer = self.peers.get(sid)
+        if peer is not None and peer.room_id != room_id:
+            await self.leave(sid)
+            peer = None
+        if peer is None:
+            peer = self.peers[sid] = SfuPeer(sid, room_id)
+            self.rooms.setdefault(room_id, {})[sid] = peer
+        others = [other for other in self.rooms[room_id].values() if other is not peer]
+
+        answer = None
+        if offer:
+            self.publishes += 1
+            dirty = self._unpublish(peer)
+            pc = peer.publish_pc = self._peer_connection()
+
+            @pc.on("track")
+            def on_track(track):
+                published = PublishedTrack(sid, track)
+                peer.published.append(published)
+                published.start()
+                for other in others:
+                    self._attach(other, published)
+
+            await pc.setRemoteDescription(RTCSessionDescription(sdp=offer['sdp'], type=offer['type']))
+            await pc.setLocalDescription(await pc.createAnswer())
+            answer = {'type': pc.localDescription.type, 'sdp': pc.localDescription.sdp}
+            for other_sid in dirty:
+                self.peers[other_sid].streams_changed = True
+
+        # 이미 송출 중인 다른 참가자의 트랙 구독
+        for other in others:
+            for published in other.published:
+                if not any(slot.source is published for slot in peer.slots):
+                    self._attach(peer, published)
+
+        log_event(log, logging.INFO, 'sfu_publish', sid=sid, room=room_id,
+                  tracks=len(peer.published), slots=len(peer.slots))
+        for target in [peer, *others]:
+            await self._sync(target)
+        return answer
+
+    def _attach(self, peer: SfuPeer, published: PublishedTrack):
+        """구독자에게 송출 트랙 연결 - 빈 슬롯이 있으면 재사용, 없으면 트랜시버 추가"""
+        for slot in peer.slots:
+            if slot.kind == published.kind and slot.source is None:
+                slot.attach(published)
+                peer.streams_changed = True
+                self.slot_reuses += 1
+                return
+
+        if peer.subscribe_pc is None:
+            peer.subscribe_pc = self._peer_connection()
+        slot = ForwardedTrack(published.kind, peer.sid)
+        slot.transceiver = peer.subscribe_pc.addTransceiver(slot, direction="sendonly")
+        codec = FORWARD_CODECS[published.kind]
+        slot.transceiver.setCodecPreferences([
+            c for c in RTCRtpSender.getCapabilities(published.kind).codecs
+            if c.mimeType.lower() in (codec, f"{published.kind}/rtx")
+        ])
+        slot.attach(published)
+        peer.slots.append(slot)
+        peer.needs_offer = True
+
+    def _streams(self, peer: SfuPeer) -> dict:
+        return {
+            slot.transceiver.mid: {'userId': slot.source.owner, 'kind': slot.kind}
+            for slot in peer.slots
+            if slot.source is not None and slot.transceiver.mid is not None
+        }
+
+    async def _sync(self, peer: SfuPeer):
+        """쌓인 변경을 클라이언트에 반영 (협상 중이면 answer를 받은 뒤)"""
+        if peer.negotiating or peer.sid not in self.peers:
+            return
+        if peer.needs_offer:
+            peer.negotiating = True
+            peer.needs_offer = peer.streams_changed = False
+            pc = peer.subscribe_pc
+            await pc.setLocalDescription(await pc.createOffer())
+            self.offers += 1
+            await self.signal(peer.sid, 'sfu_offer', {
+                'offer': {'type': pc.localDescription.type, 'sdp': pc.localDescription.sdp},
+                'streams': self._streams(peer),
+            })
+        elif peer.streams_changed:
+            peer.streams_changed = False
+            await self.signal(peer.sid, 'sfu_streams', {'streams': self._streams(peer)})
+
+    async def answer(self, sid: str, answer: dict):
+        """subscribe PC의 answer 수신"""
+        peer = self.peers.get(sid)
+        if peer is None or peer.subscribe_pc is None or not peer.negotiating:
+            return
+        await peer.subscribe_pc.setRemoteDescription(RTCSessionDescription(sdp=answer['sdp'], type=answer['type']))
+        peer.negotiating = False
+        await self._sync(peer)
+
+    def _unpublish(self, peer: SfuPeer) -> Set[str]:
+        dirty: Set[str] = set()
+        for published in peer.published:
+            dirty |= published.stop()
+        peer.published.clear()
+        if peer.publish_pc is not None:
+            asyncio.ensure_future(peer.publish_pc.close())
+            peer.publish_pc = None
+        return dirty
+
+    def set_layer(self, subscriber: str, owner: str, layer: str) -> bool:
+        """구독자가 받는 송출자 영상의 레이어 변경 (layer_selection 정책 결과)"""
+        peer = self.peers.get(subscriber)
+        if peer is None:
+            return False
+        changed = False
+        for slot in peer.slots:
+            if slot.source is not None and slot.source.owner == owner and slot.set_layer(layer):
+                changed = True
+        if changed:
+            self.layer_switches += 1
+        return changed
+
+    async def leave(self, sid: str, room_id: Optional[str] = None):
+        """방 나가기 / 연결 해제 - 송출 중단, 구독 슬롯 정리, 남은 참가자에게 sfu_streams"""
+        peer = self.peers.get(sid)
+        if peer is None or (room_id is not None and peer.room_id != room_id):
+            return
+        del self.peers[sid]
+        room = self.rooms.get(peer.room_id, {})
+        room.pop(sid, None)
+        if not room:
+            self.rooms.pop(peer.room_id, None)
+
+        dirty = self._unpublish(peer)
+        for slot in peer.slots:
+            slot.stop()
+        if peer.subscribe_pc is not None:
+            await peer.subscribe_pc.close()
+        log_event(log, logging.INFO, 'sfu_leave', sid=sid, room=peer.room_id)
+
+        for other_sid in dirty:
+            other = self.peers.get(other_sid)
+            if other is not None:
+                other.streams_changed = True
+                await self._sync(other)
+
+    async def close(self):
+        for sid in list(self.peers):
+            await self.leave(sid)
+
+    def stats(self) -> dict:
+        published = [track for peer in self.peers.values() for track in peer.published]
+        slots = [slot for peer in self.peers.values() for slot in peer.slots]
+        return {
+            "available": self.available,
+            "rooms": len(self.rooms),
+            "peers": len(self.peers),
+            "published_tracks": len(published),
+            "forwarded_streams": sum(1 for slot in slots if slot.source is not None),
+            "idle_slots": sum(1 for slot in slots if slot.source is None),
+            "frames_received": sum(track.frames for track in published),
+            "frames_encoded": sum(track.encoded for track in published),
+            "encoded_layers": {  # 레이어별로 인코딩 중인 영상 트랙 수
+                rid: sum(1 for track in published if any(slot.layer == rid for slot in track.subscribers))
+                for rid in LAYER_RIDS
+            },
+            "packets_forwarded": sum(slot.forwarded for slot in slots),
+            "packets_dropped": sum(slot.dropped for slot in slots),
+            "publishes": self.publishes,
+            "offers": self.offers,
+            "slot_reuses": self.slot_reuses,
+            "layer_switches": self.layer_switches,
+        }
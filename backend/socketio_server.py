@@ -3,142 +3,344 @@ Socket.IO 서버 - WebRTC 시그널링 서버
 실시간 통신과 WebRTC 연결을 관리합니다
 """
 
+import asyncio
+import functools
+import hmac
+import logging
+import os
+import time
 import socketio
-from typing import Dict, Set
+from typing import Dict, Optional
 import json
+from room_list_cache import room_list_snapshot
+from room_state import RoomMembership
+from room_status import RoomStatusWriter
+from cluster import create_client_manager, create_membership_store, signaling_transports
+from file_relay import FileRelay
+from fanout import FanoutScheduler
+from ice_batching import IceBatcher
+from sfu import SfuServer
+from layer_selection import LAYER_PARAMS, LAYER_RIDS, LayerSelector
+from chat_history import CHAT_MAX_LENGTH, CHAT_NAME_LENGTH, CHAT_TIMESTAMP_LENGTH, ChatHistory, chat_text
+from rate_limit import RateLimiter
+from database import fetch_one
+from token_cache import decode_access_token
+from metrics import registry, socketio_events, socketio_handler_duration
+from structured_logging import ENGINEIO_LOGGER, SOCKETIO_LOGGER, get_logger, library_logger, log_event
 
 # ✅ 완벽한 CORS 설정
+# SIGNALING_BACKEND=sqlite면 여러 워커가 pub/sub으로 이벤트를 주고받음 (cluster.py)
 sio = socketio.AsyncServer(
     async_mode='asgi',
+    client_manager=create_client_manager(),
+    transports=signaling_transports(),  # 멀티 워커면 websocket만 (스티키 세션 없음)
     cors_allowed_origins=['*'],  # 모든 origin 허용
     cors_credentials=True,
     cors_methods=['GET', 'POST', 'PUT', 'DELETE', 'OPTIONS', 'PATCH', 'HEAD'],
     cors_headers=['Content-Type', 'Authorization', 'Accept', 'Origin'],
-    logger=True,
-    engineio_logger=True
+    # 패킷 단위 상세 로그는 디버깅할 때만 (SOCKETIO_LOGGER=1 / ENGINEIO_LOGGER=1)
+    logger=library_logger('socketio', SOCKETIO_LOGGER),
+    engineio_logger=library_logger('engineio', ENGINEIO_LOGGER)
 )
 
+log = get_logger('signaling')
+
 # ASGI 앱 생성
 socket_app = socketio.ASGIApp(sio)
 
+# room_list_updated 브로드캐스트 병합 구간 (초)
+ROOM_LIST_BROADCAST_WINDOW = float(os.getenv("ROOM_LIST_BROADCAST_WINDOW", "0.25"))
+
 # 연결된 사용자 관리
 connected_users: Dict[str, Dict] = {}  # session_id -> user_info
-room_participants: Dict[str, Set[str]] = {}  # room_id -> set of session_ids
+membership = RoomMembership()  # 방 <-> sid 양방향 인덱스 (변경은 membership.join/leave로만)
+room_participants = membership.rooms  # room_id -> set of session_ids (읽기 전용, 이 워커의 참가자만)
+
+# /metrics 게이지 (수집할 때 현재 상태를 읽음, 이 워커 기준)
+ROOM_SIZE_BUCKETS = ((1, '1'), (2, '2'), (5, '3-5'), (10, '6-10'), (float('inf'), '11+'))
+
+def rooms_by_size() -> Dict[tuple, int]:
+    counts = {(label,): 0 for _, label in ROOM_SIZE_BUCKETS}
+    for members in room_participants.values():
+        size = len(members)
+        for upper, label in ROOM_SIZE_BUCKETS:
+            if size <= upper:
+                counts[(label,)] += 1
+                break
+    return counts
+
+registry.gauge("socketio_connected_clients", "이 워커에 연결된 Socket.IO 클라이언트 수", lambda: len(connected_users))
+registry.gauge("rooms_active", "참가자가 있는 방 수", lambda: len(room_participants))
+registry.gauge("room_participants", "방에 참가 중인 인원 합계", lambda: sum(len(m) for m in room_participants.values()))
+registry.gauge("room_participants_max", "가장 큰 방의 인원", lambda: max(map(len, room_participants.values()), default=0))
+registry.gauge("rooms_by_size", "인원 구간별 방 수", rooms_by_size, ("size",))
+
+def on_cluster_membership_changed():
+    """다른 워커의 참가/퇴장으로 전체 참가자 수가 바뀌었을 때"""
+    room_list_snapshot.invalidate()
+    room_list_broadcaster.schedule(False)
+
+# 워커 전체의 참가 상태 (memory면 membership 그대로, sqlite면 공유 테이블)
+membership_store = create_membership_store(membership, connected_users, on_change=on_cluster_membership_changed)
+room_list_snapshot.max_age = membership_store.snapshot_max_age
 
 # 방 참가자 수 조회 함수 (외부에서 import 가능)
 def get_room_participant_count(room_id: str) -> int:
     """특정 방의 현재 참가자 수 반환"""
-    return len(room_participants.get(room_id, set()))
+    return membership_store.counts().get(room_id, 0)
 
 def get_all_room_participants() -> Dict[str, int]:
     """모든 방의 참가자 수 반환"""
-    return {room_id: len(participants) for room_id, participants in room_participants.items()}
+    return membership_store.counts()
+
+async def on_room_status_flushed(room_ids):
+    """방 상태가 DB에 기록된 뒤 방 목록 갱신 알림 (활성화/비활성화는 목록 구성이 바뀜)"""
+    await notify_room_list_update()
+
+# 엔진IO 송신 큐가 이만큼 쌓이면 비워질 때까지 다음 이벤트 전송 대기 (전송 계층 속도에 맞춤)
+FANOUT_TRANSPORT_HIGH_WATER = int(os.getenv("FANOUT_TRANSPORT_HIGH_WATER", "16"))
+
+async def fanout_send(sid, event, data):
+    """팬아웃 큐에서 꺼낸 이벤트를 이 워커의 클라이언트에게 전송"""
+    await sio.emit(event, data, to=sid, ignore_queue=True)
+
+    # engineio 소켓 큐는 제한이 없으므로, 쌓여 있으면 웹소켓에 실제로 쓰일 때까지 기다림
+    eio_sid = sio.manager.eio_sid_from_sid(sid, '/')
+    eio_socket = sio.eio.sockets.get(eio_sid) if eio_sid else None
+    if eio_socket is not None and eio_socket.queue.qsize() >= FANOUT_TRANSPORT_HIGH_WATER:
+        await eio_socket.queue.join()
+
+async def fanout_evict(sid):
+    """송신 큐 한도를 넘긴 클라이언트 연결 해제"""
+    await sio.disconnect(sid)
+
+# 클라이언트별 제한 송신 큐 (느린 수신자가 보내는 쪽 핸들러를 붙잡지 않도록)
+fanout = FanoutScheduler(fanout_send, evict=fanout_evict)
+
+async def emit_room(event, data, room_id, skip_sid=None, key=None):
+    """방 참가자들에게 팬아웃 큐를 거쳐 전송"""
+    targets = [p for p in membership.members(room_id) if p != skip_sid]
+    await fanout.emit(targets, event, data, key)
+    if not membership_store.local_only:
+        # 다른 워커의 참가자는 pub/sub으로 전달 (이 워커의 참가자는 위에서 처리했으므로 제외)
+        skip = targets + ([skip_sid] if skip_sid else [])
+        await sio.emit(event, data, room=room_id, skip_sid=skip)
+
+async def emit_to(sid, event, data):
+    """한 클라이언트에게 전송 - 이 워커에 접속 중이면 같은 큐를 거쳐 순서 유지"""
+    if sid in connected_users:
+        await fanout.emit([sid], event, data)
+    else:
+        await sio.emit(event, data, to=sid)
+
+async def deliver_ice_candidates(from_sid, to_sid, candidates):
+    """묶인 ICE 후보 전달 - 받는 쪽이 묶음을 지원하면 한 이벤트, 아니면 후보마다"""
+    if connected_users.get(to_sid, {}).get('iceBatch'):
+        await emit_to(to_sid, 'webrtc_ice_candidates', {'from': from_sid, 'candidates': candidates})
+        return
+    for candidate in candidates:
+        await emit_to(to_sid, 'webrtc_ice_candidate', {'from': from_sid, 'candidate': candidate})
+
+# 같은 대상에게 가는 ICE 후보를 ICE_BATCH_WINDOW 동안 모아서 전달
+ice_batcher = IceBatcher(deliver_ice_candidates)
+
+async def send_file_credit(transfer):
+    """송신자에게 모든 (남은) 수신자가 확인한 마지막 청크 알림"""
+    await emit_to(transfer.sender, 'file_credit', (transfer.transfer_id, transfer.credited))
+
+# 바이너리 파일 청크 중계 (file_chunk_bin, 크레딧 기반 흐름 제어, 확인이 멈춘 수신자는 시간 초과로 제외)
+file_relay = FileRelay(send_file_credit)
+
+# mediaMode='sfu'인 방의 미디어 전달 (aiortc 미설치면 sfu 방도 메시로 동작)
+sfu = SfuServer(emit_to)
+# room_id -> 'mesh' | 'sfu' (방 생성 후 바뀌지 않으므로 캐시)
+# DB에 있는 방만, 이 워커에서 방이 비면 삭제 (아직 없는 방 id로 먼저 입장해도 나중에 만든 방의 모드가 반영됨)
+room_media_modes: Dict[str, str] = {}
+
+async def get_room_media_mode(room_id: str) -> str:
+    mode = room_media_modes.get(room_id)
+    if mode is None:
+        try:
+            row = await fetch_one("SELECT media_mode FROM meetings WHERE id = ?", (int(room_id),))
+        except (TypeError, ValueError):
+            row = None  # 숫자 id가 아닌 방 (테스트/벤치마크용)
+        if row is None:
+            return 'mesh'
+        mode = room_media_modes[room_id] = row['media_mode']
+    if mode == 'sfu' and not sfu.available:
+        return 'mesh'
+    return mode
+
+async def room_history_access(room_id, user_id: Optional[str], password=None) -> Optional[bool]:
+    """방 채팅 기록을 볼 수 있는지 (DB에 없는 방이면 None)
+
+    비밀번호 방은 방장, 비밀번호를 아는 사용자, 다른 연결로 지금 참가 중인 같은 사용자만.
+    user_id는 검증된 JWT의 사용자 id (참가자 userInfo.id도 join_room에서 같은 값으로 바꿔 기록)
+    """
+    room_id = str(room_id)
+    meeting = await fetch_one(
+        "SELECT host_id, password FROM meetings WHERE id = ?", (int(room_id),)
+    ) if room_id.isdigit() else None
+    if not meeting:
+        return None
+    if not meeting['password'] or (user_id is not None and str(meeting['host_id']) == str(user_id)):
+        return True
+    if isinstance(password, str) and hmac.compare_digest(meeting['password'].encode(), password.encode()):
+        return True
+    if user_id is None:
+        return False
+    return any(str(m['userInfo'].get('id')) == str(user_id) for m in await membership_store.members(room_id))
+
+# 수신자별 대역폭/표시 크기로 송출자 화질 레이어 선택 (media_stats → media_layer 또는 SFU 슬롯 레이어)
+layer_selector = LayerSelector()
+
+def negotiated_layers(data) -> Optional[list]:
+    """offer/answer에 실린 layers 중 서버가 아는 레이어만 (없으면 None - 레이어 조정 미지원 클라이언트)"""
+    layers = data.get('layers')
+    if not isinstance(layers, list):
+        return None
+    return [rid for rid in LAYER_RIDS if rid in layers]
+
+# 채팅 기록 (일괄 기록 + 활성 방별 최근 메시지 링 버퍼)
+chat_history = ChatHistory()
+
+# 방 상태(active/inactive) 변경은 모아서 한 트랜잭션으로 기록
+room_status_writer = RoomStatusWriter(on_flushed=on_room_status_flushed, dedupe=membership_store.local_only)
+
+# 연결별 이벤트 속도 제한 (방 전체로 증폭되기 전에 버림)
+rate_limiter = RateLimiter()
+
+def event_handler(handler):
+    """핸들러 앞에서 이벤트 예산 확인 (넘으면 핸들러를 부르지 않고 ack로 알림) + 처리 시간 기록"""
+    event = handler.__name__
+
+    @functools.wraps(handler)
+    async def wrapper(sid, *args):
+        if not rate_limiter.allow(sid, event):
+            socketio_events.inc(event, 'throttled')
+            log_event(log, logging.WARNING, 'rate_limited', sid=sid, event_name=event)
+            if rate_limiter.violation(sid):
+                log_event(log, logging.WARNING, 'rate_limit_disconnect', sid=sid, event_name=event)
+                await sio.disconnect(sid)
+            return {'error': 'rate_limited', 'retryAfter': round(rate_limiter.retry_after(sid, event), 3)}
+
+        start = time.perf_counter()
+        outcome = 'error'
+        try:
+            result = await handler(sid, *args)
+            outcome = 'handled'
+            return result
+        finally:
+            socketio_handler_duration.observe(time.perf_counter() - start, event)
+            socketio_events.inc(event, outcome)
+    return wrapper
 
 @sio.event
 async def connect(sid, environ, auth=None):
     """클라이언트 연결"""
-    print(f'[OK] 클라이언트 연결: {sid}')
+    log_event(log, logging.INFO, 'client_connected', sid=sid)
     connected_users[sid] = {
-        'sid': sid,
-        'rooms': set()
+        'sid': sid
     }
+    # auth.token(JWT)이 유효하면 검증된 사용자 id 기록 (userInfo는 클라이언트가 보낸 값이라 권한 판단에 쓰지 않음)
+    token = auth.get('token') if isinstance(auth, dict) else None
+    payload = decode_access_token(token) if isinstance(token, str) else None
+    if payload is not None and payload.get('user_id') is not None:
+        connected_users[sid]['authUserId'] = str(payload['user_id'])
     return True
 
 @sio.event
 async def disconnect(sid):
-    """클라이언트 연결 해제 - 모든 방에서 완전히 제거"""
-    print(f'[DISCONNECT] 클라이언트 연결 해제: {sid}')
-
-    # 모든 방에서 사용자 제거
-    if sid in connected_users:
-        rooms_to_leave = list(connected_users[sid].get('rooms', set()))
-        print(f'   사용자가 속한 방: {rooms_to_leave}')
-
-        for room_id in rooms_to_leave:
-            await leave_room_internal(sid, room_id)
-
-        del connected_users[sid]
-        print(f'   connected_users에서 제거 완료')
-
-    # room_participants에서도 완전히 제거 (안전장치)
-    removed_from_rooms = []
-    for room_id, participants in list(room_participants.items()):
-        if sid in participants:
-            participants.discard(sid)
-            removed_from_rooms.append(room_id)
-            print(f'[WARNING] disconnect에서 강제 제거: {sid} from room {room_id}')
+    """클라이언트 연결 해제 - 참가 중이던 방에서만 제거 (역인덱스 사용)"""
+    rooms_to_leave = membership.rooms_of(sid)
+    log_event(log, logging.INFO, 'client_disconnected', sid=sid, rooms=len(rooms_to_leave))
 
-            # 방이 비면 삭제
-            if not participants:
-                del room_participants[room_id]
-                print(f'[DELETE] 빈 방 삭제: {room_id}')
+    for room_id in rooms_to_leave:
+        await leave_room_internal(sid, room_id)
+    await release_file_transfers(sid)
+    ice_batcher.drop_sid(sid)
+    layer_selector.forget(sid)
+    rate_limiter.forget(sid)
 
-    if removed_from_rooms:
-        print(f'   총 {len(removed_from_rooms)}개 방에서 강제 제거됨')
-
-    print(f'[STATS] 현재 활성 방: {list(room_participants.keys())}')
+    connected_users.pop(sid, None)
+    fanout.remove(sid)
+    log_event(log, logging.DEBUG, 'active_rooms', count=len(room_participants))
 
 @sio.event
+@event_handler
 async def join_room(sid, data):
     """방 참가"""
     room_id = data.get('roomId')
     user_info = data.get('userInfo', {})
-
-    print(f'[JOIN] 방 참가 요청: {sid} -> Room {room_id} (사용자: {user_info.get("username", "Unknown")})')
+    user_info = dict(user_info) if isinstance(user_info, dict) else {}
+    # userInfo.id는 연결 시 검증한 JWT의 사용자 id로 (다른 사용자로 행세하지 못하도록)
+    auth_user_id = connected_users.get(sid, {}).get('authUserId')
+    user_info.pop('id', None)
+    if auth_user_id is not None:
+        user_info['id'] = auth_user_id
 
     # Socket.IO 룸에 참가
     await sio.enter_room(sid, room_id)
 
-    # 사용자 정보 업데이트
+    # 사용자 정보 업데이트 (iceBatch: webrtc_ice_candidates 묶음 수신 지원 여부)
     if sid in connected_users:
-        connected_users[sid]['rooms'].add(room_id)
         connected_users[sid]['userInfo'] = user_info
+        connected_users[sid]['iceBatch'] = bool(data.get('iceBatch'))
 
-    # 방 참가자 목록 업데이트
-    if room_id not in room_participants:
-        room_participants[room_id] = set()
-    room_participants[room_id].add(sid)
-
-    participant_count = len(room_participants[room_id])
-    print(f'[STATS] 현재 방 {room_id} 참가자: {participant_count}명')
-    print(f'   참가자 목록: {list(room_participants[room_id])}')
+    # SFU 방이면 다른 이벤트보다 먼저 알림 (클라이언트가 P2P 연결 대신 sfu_publish 사용)
+    if await get_room_media_mode(room_id) == 'sfu':
+        await emit_to(sid, 'room_media_mode', {'roomId': room_id, 'mode': 'sfu'})
 
-    # 방을 active 상태로 변경 (이슈 1 해결)
-    try:
-        import sqlite3
-        conn = sqlite3.connect('videonet.db')
-        conn.execute(
-            "UPDATE meetings SET status = 'active' WHERE id = ?",
-            (int(room_id),)
-        )
-        conn.commit()
-        conn.close()
-        print(f'[OK] 방 {room_id} 활성화 완료')
-        
-        # 방 목록 업데이트 알림 발송 (이슈 2 해결)
-        await notify_room_list_update()
-    except Exception as e:
-        print(f'[ERROR] 방 {room_id} 활성화 실패: {e}')
+    # 채팅 재생 권한은 이번 참가 전에 확인 (비밀번호 방은 방장/비밀번호/이미 참가 중인 같은 사용자만)
+    can_replay = await room_history_access(room_id, auth_user_id, data.get('password')) is not False
 
-    # 다른 참가자들에게 알림
-    await sio.emit('user_joined', {
+    # 방 참가자 목록 업데이트
+    is_first_join, roster_version = membership.join(sid, room_id, user_info)
+    await membership_store.on_join(sid, room_id, user_info)
+    room_list_snapshot.invalidate()  # 참가자 수 변경
+    if not membership_store.local_only:
+        # 명단 버전은 워커별로 따로 증가하므로 멀티 워커에서는 사용하지 않음 (항상 스냅샷 동기화)
+        roster_version = None
+
+    log_event(log, logging.INFO, 'join_room', sid=sid, room=room_id, user=user_info.get('username', 'Unknown'),
+              participants=get_room_participant_count(room_id))
+
+    # 첫 참가자면 방을 active 상태로 변경 (이슈 1 해결, 멀티 워커에서는 워커별 첫 참가마다 - 중복 기록은 무해)
+    # DB 기록 후 on_room_status_flushed에서 방 목록 알림 발송 (이슈 2 해결), 아니면 참가자 수만 알림
+    if is_first_join:
+        room_status_writer.set_status(room_id, 'active')
+    else:
+        await notify_room_list_update(structural=False)
+
+    # 다른 참가자들에게 알림 (rosterVersion으로 수신 측에서 누락 감지 가능)
+    await emit_room('user_joined', {
         'userId': sid,
-        'userInfo': user_info
-    }, room=room_id, skip_sid=sid)
-
-    # 현재 참가자 목록 전송
-    current_participants = []
-    for participant_sid in room_participants.get(room_id, set()):
-        if participant_sid != sid and participant_sid in connected_users:
-            current_participants.append({
-                'userId': participant_sid,
-                'userInfo': connected_users[participant_sid].get('userInfo', {})
-            })
-
-    print(f'   기존 참가자 {len(current_participants)}명 정보 전송')
-    await sio.emit('current_participants', current_participants, to=sid)
+        'userInfo': user_info,
+        'rosterVersion': roster_version
+    }, room_id, skip_sid=sid)
+
+    # 최근 채팅 재생 (활성 방은 메모리 버퍼, 멀티 워커면 다른 워커 메시지도 포함되도록 DB)
+    recent_messages = await chat_history.recent(room_id, from_store=not membership_store.local_only) if can_replay else []
+    if recent_messages:
+        await emit_to(sid, 'chat_history', {
+            'roomId': room_id,
+            'messages': recent_messages,
+            # 버퍼가 가득 찼으면 더 이전 기록이 있을 수 있음 (GET /api/rooms/{roomId}/messages?before=)
+            'nextCursor': str(recent_messages[0]['ts']) if len(recent_messages) >= chat_history.replay_size else None,
+        })
+
+    # 명단 동기화를 지원하는 클라이언트: 마지막으로 본 버전 이후 변경분만 전송 (첫 참가는 스냅샷)
+    if 'rosterVersion' in data:
+        await emit_to(sid, 'roster_sync', await roster_changes(sid, room_id, data.get('rosterVersion')))
+        return
+
+    # 현재 참가자 목록 전송 (멀티 워커면 다른 워커의 참가자 포함)
+    current_participants = [p for p in await membership_store.members(room_id) if p['userId'] != sid]
+    log_event(log, logging.DEBUG, 'current_participants', sid=sid, room=room_id, count=len(current_participants))
+    await emit_to(sid, 'current_participants', current_participants)
 
 @sio.event
+@event_handler
 async def leave_room(sid, data):
     """방 나가기"""
     room_id = data.get('roomId')
@@ -146,160 +348,280 @@ async def leave_room(sid, data):
 
 async def leave_room_internal(sid, room_id):
     """방 나가기 내부 처리"""
-    print(f'[LEAVE] 방 나가기 요청: {sid} <- Room {room_id}')
-
     # Socket.IO 룸에서 나가기
     await sio.leave_room(sid, room_id)
-
-    # 사용자 정보 업데이트
-    if sid in connected_users:
-        connected_users[sid]['rooms'].discard(room_id)
-        print(f'   connected_users 업데이트 완료')
+    await release_file_transfers(sid, room_id)
+    await sfu.leave(sid, room_id)
+    layer_selector.forget(sid)
 
     # 방 참가자 목록 업데이트
-    if room_id in room_participants:
-        room_participants[room_id].discard(sid)
-        remaining_count = len(room_participants[room_id])
-        print(f'[STATS] 방 {room_id} 남은 참가자: {remaining_count}명')
-
-        # 방에 아무도 없으면 방 정보 삭제 및 DB 업데이트
-        if not room_participants[room_id]:
-            del room_participants[room_id]
-            print(f'[DELETE] 빈 방 {room_id} 메모리에서 삭제')
-
-            # DB에서 방 상태를 inactive로 변경
-            try:
-                import sqlite3
-                conn = sqlite3.connect('videonet.db')
-                conn.execute(
-                    "UPDATE meetings SET status = 'inactive' WHERE id = ?",
-                    (int(room_id),)
-                )
-                conn.commit()
-                conn.close()
-                print(f'[OK] 방 {room_id} DB에서 비활성화 완료')
-
-                # 방 목록 업데이트 알림 발송
-                await notify_room_list_update()
-            except Exception as e:
-                print(f'[ERROR] 방 {room_id} 비활성화 실패: {e}')
+    left, emptied, roster_version = membership.leave(sid, room_id)
+    if left:
+        await membership_store.on_leave(sid, room_id)
+        room_list_snapshot.invalidate()  # 참가자 수 변경
+        if not membership_store.local_only:
+            roster_version = None
+            # 이 워커에서는 비었어도 다른 워커에 참가자가 남아 있으면 active 유지
+            emptied = emptied and await membership_store.room_count(room_id) == 0
+        log_event(log, logging.INFO, 'leave_room', sid=sid, room=room_id, remaining=get_room_participant_count(room_id))
+
+        if not membership.members(room_id):
+            chat_history.discard_room(room_id)  # 이 워커에서 빈 방은 재생 버퍼 해제
+            room_media_modes.pop(room_id, None)
+
+        # 방에 아무도 없으면 DB에서 방 상태를 inactive로 변경 (기록 후 방 목록 알림)
+        if emptied:
+            log_event(log, logging.INFO, 'room_emptied', room=room_id)
+            room_status_writer.set_status(room_id, 'inactive')
+        else:
+            await notify_room_list_update(structural=False)
 
     # 다른 참가자들에게 알림
-    await sio.emit('user_left', {
-        'userId': sid
-    }, room=room_id)
+    await emit_room('user_left', {
+        'userId': sid,
+        'rosterVersion': roster_version
+    }, room_id)
+
+@sio.event
+@event_handler
+async def roster_sync(sid, data):
+    """명단 동기화 요청 (클라이언트가 버전 누락을 감지했을 때) - ack로 변경분 또는 스냅샷 반환"""
+    return await roster_changes(sid, data.get('roomId'), data.get('version'))
+
+async def roster_changes(sid, room_id, version):
+    """version 이후 명단 변경분 (알 수 없으면 스냅샷) - join_room은 속도 제한 없이 이 함수를 직접 사용"""
+    if not membership_store.local_only:
+        participants = [p for p in await membership_store.members(room_id) if p['userId'] != sid]
+        return {'mode': 'snapshot', 'version': None, 'participants': participants}
+    roster = membership.roster(room_id)
+    if roster is None:
+        return {'mode': 'snapshot', 'version': None, 'participants': []}
+    return roster.sync(version, exclude=sid)
 
 # ===== WebRTC 시그널링 =====
 
 @sio.event
+@event_handler
 async def webrtc_offer(sid, data):
     """WebRTC Offer 전달"""
     target_sid = data.get('to')
     offer = data.get('offer')
     
-    print(f'[WEBRTC] Offer: {sid} -> {target_sid}')
+    log_event(log, logging.INFO, 'webrtc_offer', sid=sid, to=target_sid)
     
-    if target_sid in connected_users:
-        await sio.emit('webrtc_offer', {
+    if membership_store.can_reach(target_sid):
+        await ice_batcher.flush_now(sid, target_sid)
+        # layers: 보내는 쪽이 이 연결의 화질 레이어를 바꿀 수 있음 (받는 쪽은 media_stats에 포함)
+        await emit_to(target_sid, 'webrtc_offer', {
             'from': sid,
-            'offer': offer
-        }, to=target_sid)
+            'offer': offer,
+            'layers': negotiated_layers(data)
+        })
 
 @sio.event
+@event_handler
 async def webrtc_answer(sid, data):
     """WebRTC Answer 전달"""
     target_sid = data.get('to')
     answer = data.get('answer')
     
-    print(f'[WEBRTC] Answer: {sid} -> {target_sid}')
+    log_event(log, logging.INFO, 'webrtc_answer', sid=sid, to=target_sid)
     
-    if target_sid in connected_users:
-        await sio.emit('webrtc_answer', {
+    if membership_store.can_reach(target_sid):
+        await ice_batcher.flush_now(sid, target_sid)
+        await emit_to(target_sid, 'webrtc_answer', {
             'from': sid,
-            'answer': answer
-        }, to=target_sid)
+            'answer': answer,
+            'layers': negotiated_layers(data)
+        })
 
 @sio.event
+@event_handler
 async def webrtc_ice_candidate(sid, data):
-    """WebRTC ICE Candidate 전달"""
+    """WebRTC ICE Candidate 전달 (ICE_BATCH_WINDOW 동안 같은 대상의 후보와 묶임)"""
     target_sid = data.get('to')
     candidate = data.get('candidate')
     
-    print(f'[ICE] Candidate: {sid} -> {target_sid}')
+    log_event(log, logging.INFO, 'webrtc_ice_candidate', sid=sid, to=target_sid)
     
-    if target_sid in connected_users:
-        await sio.emit('webrtc_ice_candidate', {
-            'from': sid,
-            'candidate': candidate
-        }, to=target_sid)
+    if membership_store.can_reach(target_sid):
+        await ice_batcher.add(sid, target_sid, [candidate])
+
+@sio.event
+@event_handler
+async def webrtc_ice_candidates(sid, data):
+    """WebRTC ICE Candidate 묶음 전달 (클라이언트가 여러 후보를 한 번에 보냄)"""
+    target_sid = data.get('to')
+    candidates = data.get('candidates') or []
+    
+    log_event(log, logging.INFO, 'webrtc_ice_candidates', sid=sid, to=target_sid, count=len(candidates))
+    
+    if membership_store.can_reach(target_sid) and candidates:
+        await ice_batcher.add(sid, target_sid, list(candidates))
+
+# ===== SFU =====
+
+@sio.event
+@event_handler
+async def sfu_publish(sid, data):
+    """SFU 업스트림 offer 처리 - ack로 answer 반환 (offer가 없으면 구독만)"""
+    room_id = data.get('roomId')
+    if room_id not in membership.rooms_of(sid) or await get_room_media_mode(room_id) != 'sfu':
+        return {'error': 'SFU 모드 방이 아닙니다'}
+    try:
+        answer = await sfu.publish(sid, room_id, data.get('offer'))
+    except Exception as e:
+        log_event(log, logging.ERROR, 'sfu_publish_failed', sid=sid, room=room_id, error=e)
+        return {'error': str(e)}
+    return {'answer': answer}
+
+@sio.event
+@event_handler
+async def sfu_answer(sid, data):
+    """서버가 보낸 sfu_offer(구독 재협상)에 대한 answer"""
+    try:
+        await sfu.answer(sid, data.get('answer'))
+    except Exception as e:
+        log_event(log, logging.ERROR, 'sfu_answer_failed', sid=sid, error=e)
+
+# ===== 화질 레이어 =====
+
+def _stat(value, upper=None) -> Optional[float]:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 <= value <= 1e15:
+        return None  # 음수, NaN, 무한대, 터무니없이 큰 값 포함
+    return min(value, upper) if upper is not None else value
+
+@sio.event
+@event_handler
+async def media_stats(sid, data):
+    """수신 품질 보고 - 송출자별 레이어를 다시 골라 바뀐 것만 적용
+
+    data: {roomId, bandwidth, received, loss, viewports: {송출자 sid: 표시 높이(px)}}
+    메시에서는 offer/answer에 layers를 보낸 송출자만 viewports에 넣습니다 (클라이언트가 거름)
+    """
+    room_id = data.get('roomId') if isinstance(data, dict) else None
+    if room_id not in membership.rooms_of(sid):
+        return None
+    reported = data.get('viewports') or {}
+    if not isinstance(reported, dict):
+        return None
+
+    # 같은 방의 송출자만 (다른 방 참가자의 레이어를 바꾸지 못하도록, 멀티 워커면 다른 워커 참가자 포함)
+    if membership_store.local_only:
+        room_members = membership.members(room_id)
+    else:
+        room_members = {p['userId'] for p in await membership_store.members(room_id)}
+    viewports = {}
+    for sender, height in reported.items():
+        height = _stat(height)
+        if height is not None and isinstance(sender, str) and sender != sid and sender in room_members:
+            viewports[sender] = int(min(height, 1 << 16))
+    changes = layer_selector.report(sid, viewports, bandwidth=_stat(data.get('bandwidth')),
+                                    received=_stat(data.get('received')), loss=_stat(data.get('loss'), 1.0))
+
+    for sender, rid in changes.items():
+        log_event(log, logging.INFO, 'media_layer', sid=sender, to=sid, layer=rid)
+        if sid in sfu.peers:
+            sfu.set_layer(sid, sender, rid)
+        elif membership_store.can_reach(sender):
+            # 메시 - 송출자가 이 수신자와의 연결 인코딩을 바꿈 (RTCRtpSender.setParameters)
+            layer = LAYER_PARAMS[rid]
+            await emit_to(sender, 'media_layer', {
+                'to': sid,
+                'rid': rid,
+                'scaleResolutionDownBy': layer['scaleResolutionDownBy'],
+                'maxBitrate': layer['maxBitrate'],
+            })
+    return {'estimate': round(layer_selector.estimate(sid)), 'changes': changes}
 
 # ===== 미디어 컨트롤 =====
 
 @sio.event
+@event_handler
 async def media_toggle(sid, data):
     """미디어 토글 (음소거/비디오 끄기)"""
     room_id = data.get('roomId')
     media_type = data.get('type')  # 'audio' or 'video'
     enabled = data.get('enabled')
     
-    print(f'[MEDIA] 미디어 토글: {sid} - {media_type} = {enabled}')
+    log_event(log, logging.INFO, 'media_toggle', sid=sid, room=room_id, type=media_type, enabled=enabled)
     
     # 같은 방의 다른 참가자들에게 알림
-    await sio.emit('media_toggled', {
+    await emit_room('media_toggled', {
         'userId': sid,
         'type': media_type,
         'enabled': enabled
-    }, room=room_id, skip_sid=sid)
+    }, room_id, skip_sid=sid, key=(sid, media_type))
 
 # ===== 채팅 =====
 
 @sio.event
+@event_handler
 async def chat_message(sid, data):
     """채팅 메시지 전송"""
+    if not isinstance(data, dict):
+        return {'error': 'invalid_message'}
     room_id = data.get('roomId')
     message = data.get('message')
     
-    print(f'[CHAT] 채팅: {sid} in Room {room_id}')
+    log_event(log, logging.INFO, 'chat_message', sid=sid, room=room_id)
     
     # 사용자 정보 가져오기
     user_info = connected_users.get(sid, {}).get('userInfo', {})
     
     # ✅ 메시지 구조를 플래튼하여 전송 (클라이언트가 msg.content로 접근 가능하도록)
     # ✅ 보낸 사람 제외하고 브로드캐스트 (보낸 사람은 로컬에서 이미 추가함)
-    await sio.emit('chat_message', {
+    # 클라이언트 값은 문자열로 맞추고 길이를 제한 (dict 등이 그대로 방송·기록되지 않도록)
+    if not isinstance(message, dict):
+        message = {'content': message, 'username': user_info.get('username'), 'timestamp': data.get('timestamp')}
+    content = chat_text(message.get('content'), CHAT_MAX_LENGTH)
+    if not content:
+        return {'error': 'invalid_message'}
+    payload = {
         'userId': sid,
-        'username': message.get('username') if isinstance(message, dict) else user_info.get('username'),
-        'content': message.get('content') if isinstance(message, dict) else str(message),
-        'timestamp': message.get('timestamp') if isinstance(message, dict) else data.get('timestamp'),
-    }, room=room_id, skip_sid=sid)
+        'username': chat_text(message.get('username'), CHAT_NAME_LENGTH),
+        'content': content,
+        'timestamp': chat_text(message.get('timestamp'), CHAT_TIMESTAMP_LENGTH),
+    }
+
+    # 방에 참가한 사람의 메시지만 기록 (ts: 기록 순서이자 재생 중복 제거 키, 보낸 사람에게는 ack로)
+    if room_id in membership.rooms_of(sid):
+        stored = {**payload, 'userId': str(user_info.get('id') or sid)}
+        payload['ts'] = chat_history.append(room_id, stored)['ts']
+
+    await emit_room('chat_message', payload, room_id, skip_sid=sid)
+    return {'ts': payload.get('ts')}
 
 # ===== 화면 공유 =====
 
 @sio.event
+@event_handler
 async def screen_share_started(sid, data):
     """화면 공유 시작"""
     room_id = data.get('roomId')
     
-    print(f'[SCREEN] 화면 공유 시작: {sid} in Room {room_id}')
+    log_event(log, logging.INFO, 'screen_share_started', sid=sid, room=room_id)
     
-    await sio.emit('screen_share_started', {
+    await emit_room('screen_share_started', {
         'userId': sid
-    }, room=room_id, skip_sid=sid)
+    }, room_id, skip_sid=sid)
 
 @sio.event
+@event_handler
 async def screen_share_stopped(sid, data):
     """화면 공유 중지"""
     room_id = data.get('roomId')
     
-    print(f'[SCREEN] 화면 공유 중지: {sid} in Room {room_id}')
+    log_event(log, logging.INFO, 'screen_share_stopped', sid=sid, room=room_id)
     
-    await sio.emit('screen_share_stopped', {
+    await emit_room('screen_share_stopped', {
         'userId': sid
-    }, room=room_id, skip_sid=sid)
+    }, room_id, skip_sid=sid)
 
 # ===== 파일 전송 (P2P) =====
 
 @sio.event
+@event_handler
 async def file_transfer_start(sid, data):
     """파일 전송 시작"""
     room_id = data.get('roomId')
@@ -308,43 +630,176 @@ async def file_transfer_start(sid, data):
     user_info = connected_users.get(sid, {}).get('userInfo', {})
     sender_name = user_info.get('username', '알 수 없음')
     
-    print(f'[FILE] 파일 전송 시작: {sender_name}이(가) {data.get("fileName")} ({data.get("fileSize")} bytes) 전송 in Room {room_id}')
+    log_event(log, logging.INFO, 'file_transfer_start', sid=sid, room=room_id, sender=sender_name,
+              file=data.get('fileName'), size=data.get('fileSize'))
+
+    # 바이너리 중계 요청이면 청크 크기/윈도우 협상
+    # (수신 확인은 이 워커에 접속해 file_receiver로 수신 준비를 알린 참가자 기준 - 확인을 보내지 않는 클라이언트를 기다리지 않도록)
+    negotiated = None
+    if data.get('binary'):
+        receivers = {p for p in membership.members(room_id)
+                     if p != sid and connected_users.get(p, {}).get('fileReceiver')}
+        transfer = file_relay.start(sid, room_id, receivers, data.get('chunkSize'), data.get('fileSize'))
+        negotiated = {
+            'transferId': transfer.transfer_id,
+            'chunkSize': transfer.chunk_size,
+            'totalChunks': transfer.total_chunks,
+            'window': file_relay.window,
+            'receivers': len(receivers),
+        }
 
     # ✅ 발신자 정보를 포함하여 같은 방의 모든 다른 사용자들에게 전달
-    await sio.emit('file_transfer_start', {
+    await emit_room('file_transfer_start', {
         **data,
+        **(negotiated or {}),
         'senderId': sid,
         'senderName': sender_name,
-    }, room=room_id, skip_sid=sid)
+    }, room_id, skip_sid=sid)
+
+    # 송신자에게는 ack로 협상 결과 반환 (기존 클라이언트는 ack를 요청하지 않음)
+    return negotiated
 
 @sio.event
+@event_handler
 async def file_chunk(sid, data):
-    """파일 청크 전송"""
+    """파일 청크 전송 (기존 클라이언트용 - dict에 담긴 청크)"""
     room_id = data.get('roomId')
 
     # 같은 방의 다른 사용자들에게 전달
-    await sio.emit('file_chunk', data, room=room_id, skip_sid=sid)
+    await emit_room('file_chunk', data, room_id, skip_sid=sid)
+
+@sio.event
+@event_handler
+async def file_chunk_bin(sid, transfer_id, chunk_index, payload):
+    """바이너리 청크 중계 - 받은 bytes를 그대로 방에 전달 (방 전체에 한 번만 인코딩)
+
+    크레딧(모든 수신자가 확인한 위치 + window)을 넘은 청크와 협상한 크기보다 큰 청크는 버림
+    """
+    if not isinstance(payload, (bytes, bytearray)):
+        return
+    transfer = file_relay.admit(transfer_id, sid, chunk_index, len(payload))
+    if transfer is None:
+        return
+
+    await emit_room('file_chunk_bin', (transfer_id, chunk_index, payload), transfer.room_id, skip_sid=sid)
 
 @sio.event
+@event_handler
+async def file_chunk_ack(sid, transfer_id, chunk_index):
+    """수신 확인 - 모든 수신자가 확인한 위치가 앞으로 가면 송신자에게 크레딧 전달"""
+    transfer = file_relay.ack(transfer_id, sid, chunk_index)
+    if transfer is not None:
+        await send_file_credit(transfer)
+
+@sio.event
+@event_handler
+async def file_receiver(sid, data):
+    """바이너리 파일 수신 준비 여부 (파일 패널이 열려 있어 file_chunk_ack를 보낼 수 있는지)"""
+    ready = isinstance(data, dict) and bool(data.get('ready'))
+    if sid in connected_users:
+        connected_users[sid]['fileReceiver'] = ready
+    if not ready:
+        # 받고 있던 전송에서 빠짐 (보내고 있던 전송은 유지)
+        for transfer in file_relay.drop_sid(sid, sending=False):
+            await send_file_credit(transfer)
+
+async def release_file_transfers(sid, room_id=None):
+    """퇴장/연결 해제 시 전송 정리 - 떠난 수신자를 기다리던 송신자에게 크레딧 재전송"""
+    for transfer in file_relay.drop_sid(sid, room_id):
+        await send_file_credit(transfer)
+
+@sio.event
+@event_handler
 async def file_transfer_end(sid, data):
     """파일 전송 완료"""
     room_id = data.get('roomId')
-    print(f'[FILE] 파일 전송 완료 in Room {room_id}')
+    log_event(log, logging.INFO, 'file_transfer_end', sid=sid, room=room_id)
+
+    if data.get('transferId'):
+        file_relay.finish(data.get('transferId'), sid)
 
     # 같은 방의 다른 사용자들에게 전달
-    await sio.emit('file_transfer_end', data, room=room_id, skip_sid=sid)
+    await emit_room('file_transfer_end', data, room_id, skip_sid=sid)
 
 # ===== 방 목록 실시간 업데이트 =====
 
-async def notify_room_list_update():
-    """모든 클라이언트에게 방 목록이 업데이트되었음을 알림"""
-    print('[NOTIFY] 방 목록 업데이트 알림 전송')
-    await sio.emit('room_list_updated', {
-        'timestamp': str(id({}))  # 간단한 타임스탬프
-    })
+class RoomListBroadcaster:
+    """room_list_updated 이벤트 병합기
+
+    window초 안에 발생한 변경을 하나의 이벤트로 합쳐서 보냅니다.
+    이벤트에는 단조 증가하는 version과 참가자 수가 바뀐 방의 counts가 포함되고,
+    방이 생성/활성화/비활성화된 경우에만 full=True (클라이언트가 목록을 다시 조회해야 함)
+    """
+
+    def __init__(self, window: float = ROOM_LIST_BROADCAST_WINDOW):
+        self.window = window
+        self.version = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._structural = False
+        self._last_counts: Dict[str, int] = {}
+        self.requested = 0
+        self.emitted = 0
+
+    def schedule(self, structural: bool):
+        self.requested += 1
+        self._structural = self._structural or structural
+        if self._timer is None:
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.window, lambda: asyncio.ensure_future(self.flush()))
+
+    async def flush(self):
+        """대기 중인 변경을 즉시 전송"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        counts = get_all_room_participants()
+        changed = {room_id: count for room_id, count in counts.items() if self._last_counts.get(room_id) != count}
+        changed.update({room_id: 0 for room_id in self._last_counts if room_id not in counts})
+        appeared = any(room_id not in self._last_counts for room_id in changed)
+        self._last_counts = counts
+
+        structural, self._structural = self._structural, False
+        if not membership_store.local_only:
+            # 다른 워커에서 방이 활성화/비활성화되었을 수 있음 (참가자 0명 ↔ 1명 이상)
+            structural = structural or appeared or 0 in changed.values()
+        if not structural and not changed:
+            return
+
+        self.version += 1
+        self.emitted += 1
+        # version은 워커별로 증가하므로 이 워커에 접속한 클라이언트에게만 전송
+        # 다른 워커의 변경은 각 워커가 공유 참가자 수를 다시 읽어 직접 알림
+        # 밀린 클라이언트에게는 최신 것만 남김 (version 누락을 보고 목록을 다시 조회함)
+        await fanout.emit(list(connected_users), 'room_list_updated', {
+            'version': self.version,
+            'timestamp': time.time(),
+            'full': structural,
+            'counts': changed,
+        }, key='all')
+
+    def stats(self) -> dict:
+        return {
+            'version': self.version,
+            'requested': self.requested,
+            'emitted': self.emitted,
+            'window_seconds': self.window,
+        }
+
+
+room_list_broadcaster = RoomListBroadcaster()
+
+async def notify_room_list_update(structural: bool = True):
+    """모든 클라이언트에게 방 목록이 업데이트되었음을 알림 (병합 후 전송)
+
+    structural=False는 참가자 수만 바뀐 경우 - 클라이언트는 counts만 반영하고 재조회를 생략할 수 있음
+    """
+    room_list_snapshot.invalidate()
+    room_list_broadcaster.schedule(structural)
 
 # 디버깅용 이벤트
 @sio.event
+@event_handler
 async def ping(sid):
     """연결 테스트용 ping"""
     await sio.emit('pong', to=sid)
@@ -0,0 +1,149 @@
+"""
+구조화 로깅 (시그널링 핫패스용)
+print 대신 이벤트 이름 + key=value 필드로 기록하며, 다음을 지원합니다.
+
+- LOG_LEVEL: 레벨 필터 (비활성 레벨은 문자열 포맷도 하지 않음)
+- LOG_FORMAT: text(기본) | json
+- LOG_SAMPLE_EVERY: 이벤트별 샘플링 "event=N,..." (N건 중 1건만 기록, 기록에 sample=N 포함)
+- 논블로킹 출력: 호출 스레드는 큐에 넣기만 하고, 포맷과 stdout 쓰기는 리스너 스레드가 처리
+- SOCKETIO_LOGGER / ENGINEIO_LOGGER: python-socketio / engineio 패킷 단위 상세 로그 (기본 끔)
+"""
+
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_SAMPLE_EVERY = os.getenv("LOG_SAMPLE_EVERY", "webrtc_ice_candidate=100,webrtc_ice_candidates=20,rate_limited=100")
+SOCKETIO_LOGGER = os.getenv("SOCKETIO_LOGGER", "0") == "1"
+ENGINEIO_LOGGER = os.getenv("ENGINEIO_LOGGER", "0") == "1"
+
+ROOT_LOGGER = "videonet"
+
+
+class StructuredFormatter(logging.Formatter):
+    """record.fields(dict)를 text(key=value) 또는 JSON 한 줄로 출력"""
+
+    def __init__(self, fmt_type: str = LOG_FORMAT):
+        super().__init__("%(asctime)s %(levelname)s %(name)s %(message)s")
+        self.json = fmt_type == "json"
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None) or {}
+        if self.json:
+            payload = {
+                "ts": round(record.created, 3),
+                "level": record.levelname,
+                "logger": record.name,
+                "event": record.getMessage(),
+                **fields,
+            }
+            if record.exc_info:
+                payload["exc"] = self.formatException(record.exc_info)
+            return json.dumps(payload, ensure_ascii=False, default=str)
+
+        line = super().format(record)
+        if fields:
+            line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return line
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """레코드를 그대로 큐에 넣음 (포맷은 리스너 스레드에서)"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+
+class EventSampler:
+    """이벤트별 1/N 샘플링 (카운터 기반이라 난수 없이 일정 간격으로 기록)"""
+
+    def __init__(self, spec: str = LOG_SAMPLE_EVERY):
+        self.every: Dict[str, int] = {}
+        for item in filter(None, (part.strip() for part in spec.split(","))):
+            event, _, n = item.partition("=")
+            try:
+                self.every[event.strip()] = max(1, int(n))
+            except ValueError:
+                continue
+        self.seen: Dict[str, int] = {}
+        self.suppressed = 0
+
+    def sample(self, event: str) -> int:
+        """기록해야 하면 샘플링 간격(N) 반환, 건너뛰면 0"""
+        every = self.every.get(event, 1)
+        if every == 1:
+            return 1
+        count = self.seen.get(event, 0)
+        self.seen[event] = count + 1
+        if count % every:
+            self.suppressed += 1
+            return 0
+        return every
+
+    def stats(self) -> dict:
+        return {"sample_every": dict(self.every), "suppressed": self.suppressed}
+
+
+_log_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+_listener: Optional[QueueListener] = None
+sampler = EventSampler()
+
+
+def _configure_root() -> logging.Logger:
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    if _listener is None:
+        stream = logging.StreamHandler(sys.stdout)
+        stream.setFormatter(StructuredFormatter())
+        _listener = QueueListener(_log_queue, stream)
+        _listener.start()
+        atexit.register(_listener.stop)
+
+        root.addHandler(_DeferredFormatQueueHandler(_log_queue))
+        root.setLevel(LOG_LEVEL)
+        root.propagate = False
+    return root
+
+
+def get_logger(name: str) -> logging.Logger:
+    """videonet.<name> 로거 (큐 핸들러를 공유)"""
+    _configure_root()
+    return logging.getLogger(f"{ROOT_LOGGER}.{name}")
+
+
+def library_logger(name: str, enabled: bool):
+    """AsyncServer(logger=..., engineio_logger=...)에 넘길 값 - 끄면 False"""
+    if not enabled:
+        return False
+    return get_logger(name)
+
+
+def log_event(logger: logging.Logger, level: int, event: str, **fields):
+    """구조화 이벤트 기록 (레벨/샘플링에 걸리면 아무 것도 만들지 않고 반환)"""
+    if not logger.isEnabledFor(level):
+        return
+    every = sampler.sample(event)
+    if not every:
+        return
+    if every > 1:
+        fields["sample"] = every
+    logger.log(level, event, extra={"fields": fields})
+
+
+def logging_stats() -> dict:
+    return {
+        "level": logging.getLevelName(logging.getLogger(ROOT_LOGGER).level),
+        "format": LOG_FORMAT,
+        "queued": _log_queue.qsize(),
+        **sampler.stats(),
+    }
+
@@ -0,0 +1,45 @@
+"""
+테스트 공통 설정
+모듈을 가져오기 전에 임시 작업 디렉토리와 DB를 정해 둡니다
+(file_transfer는 가져올 때 uploads/를, database는 DATABASE_NAME을 사용).
+
+실행 방법 (backend 디렉토리에서): python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="videonet-tests-")
+
+os.environ["DATABASE_NAME"] = os.path.join(WORKDIR, "test.db")
+os.chdir(WORKDIR)
+sys.path.insert(0, BACKEND_DIR)
+
+
+@pytest.fixture(scope="session")
+def migrated_db():
+    """테스트 DB에 스키마 마이그레이션 적용"""
+    from database import get_db
+    from migrations import run_migrations
+
+    with get_db() as conn:
+        run_migrations(conn)
+    return os.environ["DATABASE_NAME"]
+
+
+@pytest.fixture
+def file_client(migrated_db):
+    """/api/files 라우터만 올린 앱의 TestClient"""
+    from fastapi import FastAPI
+    from fastapi.testclient import TestClient
+
+    import file_transfer
+
+    app = FastAPI()
+    app.include_router(file_transfer.router)
+    with TestClient(app) as client:
+        yield client
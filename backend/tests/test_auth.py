@@ -0,0 +1,56 @@
+"""
+회원가입: 초대 코드/사용자명 확인이 bcrypt 해시보다 먼저
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def register(migrated_db, monkeypatch):
+    """해시 호출 횟수를 세는 /api/auth/register 호출 함수"""
+    import main
+
+    hashed = []
+
+    async def fake_hash(password):
+        hashed.append(password)
+        return "hashed"
+
+    monkeypatch.setattr(main, "hash_password", fake_hash)
+    client = TestClient(main.app)
+
+    def call(username, invite, email=None):
+        return client.post("/api/auth/register", json={
+            "email": email or f"{username}@example.com",
+            "username": username,
+            "password": "pw",
+            "inviteCode": invite,
+        })
+
+    call.hashed = hashed
+    return call
+
+
+def test_invalid_invite_code_is_rejected_before_hashing(register):
+    r = register("auth-nobody", "NOT-A-CODE")
+    assert r.status_code == 400
+    assert register.hashed == []
+
+
+def test_blank_or_long_username_is_rejected_before_hashing(register):
+    import main
+
+    assert register("   ", main.MASTER_INVITE_CODE, email="blank@example.com").status_code == 400
+    assert register("x" * 51, main.MASTER_INVITE_CODE, email="long@example.com").status_code == 400
+    assert register.hashed == []
+
+
+def test_duplicate_user_is_rejected_before_hashing(register):
+    import main
+
+    assert register("auth-dup", main.MASTER_INVITE_CODE).status_code == 200
+    assert len(register.hashed) == 1
+    r = register("auth-dup", main.MASTER_INVITE_CODE, email="other@example.com")
+    assert r.status_code == 400
+    assert len(register.hashed) == 1
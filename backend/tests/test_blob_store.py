@@ -0,0 +1,76 @@
+"""내용 주소 저장소 (blob_store.py, /api/files/uploads 소유 증명)"""
+
+import hashlib
+import os
+
+import pytest
+
+from blob_store import BlobStore, is_digest, possession_proof
+
+TRAVERSAL = "../" + "./" * 22 + "../" + "tmp/victim.txt"
+
+
+def proof_for(data: bytes, dedup: dict) -> str:
+    return possession_proof(dedup["nonce"], data[dedup["offset"]:dedup["offset"] + dedup["length"]])
+
+
+def test_is_digest_accepts_only_lowercase_hex():
+    digest = hashlib.sha256(b"x").hexdigest()
+    assert is_digest(digest)
+    assert not is_digest(digest.upper())
+    assert not is_digest(digest[:-1])
+    assert not is_digest(TRAVERSAL)
+    assert len(TRAVERSAL) == 64
+
+
+def test_path_for_rejects_non_digest(tmp_path):
+    store = BlobStore(tmp_path / "blobs")
+    with pytest.raises(ValueError):
+        store.path_for(TRAVERSAL)
+    assert not store.exists(TRAVERSAL)
+    assert store.remove(TRAVERSAL) is False
+
+
+def test_create_session_rejects_bad_sha256(file_client):
+    r = file_client.post("/api/files/uploads", json={"filename": "a.txt", "size": 12, "sha256": TRAVERSAL})
+    assert r.status_code == 400
+
+
+def test_dedup_requires_possession_and_hides_existence(file_client):
+    data = os.urandom(3000)
+    digest = hashlib.sha256(data).hexdigest()
+    r = file_client.post("/api/files/upload", files={"file": ("a.bin", data)})
+    assert r.status_code == 200 and r.json()["hash"] == digest
+
+    unknown = hashlib.sha256(b"not stored").hexdigest()
+    known = file_client.post("/api/files/uploads", json={"filename": "b.bin", "size": len(data), "sha256": digest})
+    missing = file_client.post("/api/files/uploads", json={"filename": "b.bin", "size": len(data), "sha256": unknown})
+    assert known.status_code == missing.status_code == 200
+    assert set(known.json()) == set(missing.json())
+
+    # 해시만 아는 경우: 증명 실패, 같은 세션으로 다시 시도할 수 없음
+    session = known.json()
+    r = file_client.post(f"/api/files/uploads/{session['upload_id']}/claim", json={"proof": "0" * 64})
+    assert r.status_code == 409
+    r = file_client.post(f"/api/files/uploads/{session['upload_id']}/claim",
+                         json={"proof": proof_for(data, session["dedup"])})
+    assert r.status_code == 409
+
+    # 내용을 가진 경우: 본문 없이 등록
+    session = file_client.post("/api/files/uploads", json={
+        "filename": "b.bin", "size": len(data), "sha256": digest, "room_id": "r2"}).json()
+    r = file_client.post(f"/api/files/uploads/{session['upload_id']}/claim",
+                         json={"proof": proof_for(data, session["dedup"])})
+    assert r.status_code == 200
+    assert r.json()["deduplicated"] is True and r.json()["hash"] == digest
+    assert file_client.get(f"/api/files/uploads/{session['upload_id']}").status_code == 404
+
+
+def test_claim_with_wrong_size_fails(file_client):
+    data = os.urandom(100)
+    digest = hashlib.sha256(data).hexdigest()
+    file_client.post("/api/files/upload", files={"file": ("c.bin", data)})
+    session = file_client.post("/api/files/uploads", json={"filename": "c.bin", "size": 101, "sha256": digest}).json()
+    r = file_client.post(f"/api/files/uploads/{session['upload_id']}/claim",
+                         json={"proof": proof_for(data, session["dedup"])})
+    assert r.status_code == 409
@@ -0,0 +1,189 @@
+"""
+채팅 기록: 입력 값 정리, 기록할 수 없는 행 격리, 기록 조회 권한
+"""
+
+import asyncio
+import sqlite3
+
+import pytest
+from fastapi.testclient import TestClient
+
+from chat_history import CHAT_MAX_LENGTH, ChatHistory, chat_text
+from database import fetch_all, get_db
+
+
+def test_chat_text_coerces_and_caps():
+    assert chat_text("hi", 10) == "hi"
+    assert chat_text("x" * 50, 10) == "x" * 10
+    assert chat_text(123, 10) == "123"
+    assert chat_text({"a": 1}, 10) is None
+    assert chat_text(["a"], 10) is None
+    assert chat_text(None, 10) is None
+    assert chat_text(True, 10) is None
+
+
+def test_append_stores_strings_only(migrated_db):
+    history = ChatHistory(interval=60, batch=1000)
+
+    async def scenario():
+        history.append("coerce-room", {"userId": "1", "username": {"x": 1}, "content": {"x": 1},
+                                       "timestamp": ["t"]})
+        history.append("coerce-room", {"userId": "1", "username": "kim", "content": "y" * (CHAT_MAX_LENGTH + 10)})
+        await history.flush()
+        return await fetch_all("SELECT username, content, client_timestamp FROM chat_messages "
+                               "WHERE room_id = 'coerce-room' ORDER BY ts")
+
+    rows = asyncio.run(scenario())
+    assert [tuple(row) for row in rows] == [(None, "", None), ("kim", "y" * CHAT_MAX_LENGTH, None)]
+    assert history.stats()["pending"] == 0
+
+
+def test_bad_row_does_not_block_batch(migrated_db):
+    history = ChatHistory(interval=60, batch=1000)
+
+    async def scenario():
+        history.append("poison-room", {"userId": "1", "username": "a", "content": "before"})
+        # append를 거치지 않은 행 (예: 이전 버전에서 쌓인 값) - executemany가 통째로 실패하는 경우
+        history._pending.append(("poison-room", history._next_ts(), "1", "a", {"x": 1}, None))
+        history.append("poison-room", {"userId": "1", "username": "a", "content": "after"})
+        await history.flush()
+        return await fetch_all("SELECT content FROM chat_messages WHERE room_id = 'poison-room' ORDER BY ts")
+
+    rows = asyncio.run(scenario())
+    assert [row["content"] for row in rows] == ["before", "after"]
+    stats = history.stats()
+    assert stats["pending"] == 0
+    assert stats["rejected"] == 1
+    assert stats["written"] == 2
+    assert stats["failures"] == 0
+
+
+def test_failed_replay_load_does_not_leave_empty_buffer(migrated_db, monkeypatch):
+    import chat_history
+
+    history = ChatHistory(interval=60, batch=1000)
+    real_run_db = chat_history.run_db
+
+    async def failing_run_db(*args):
+        raise sqlite3.OperationalError("database is locked")
+
+    async def scenario():
+        history.append("replay-fail-room", {"userId": "1", "username": "a", "content": "kept"})
+        await history.flush()
+
+        monkeypatch.setattr(chat_history, "run_db", failing_run_db)
+        assert await history.recent("replay-fail-room") == []
+        assert "replay-fail-room" not in history._recent
+        assert history.stats()["replay_errors"] == 1
+
+        # DB가 돌아오면 다음 입장에서 다시 채움
+        monkeypatch.setattr(chat_history, "run_db", real_run_db)
+        return await history.recent("replay-fail-room")
+
+    assert [m["content"] for m in asyncio.run(scenario())] == ["kept"]
+
+
+def test_chat_message_rejects_non_string_content(migrated_db):
+    import socketio_server
+
+    result = asyncio.run(socketio_server.chat_message("chat-sid", {"roomId": "1", "message": {"content": {"x": 1}}}))
+    assert result == {"error": "invalid_message"}
+
+
+@pytest.fixture(scope="module")
+def private_room(migrated_db):
+    """비밀번호 방 + 방장/다른 사용자 토큰"""
+    import main
+
+    with get_db() as conn:
+        users = []
+        for name in ("history-host", "history-guest"):
+            cursor = conn.execute(
+                "INSERT INTO users (email, username, password, personal_code) VALUES (?, ?, 'x', ?)",
+                (f"{name}@example.com", name, f"P-{name}"),
+            )
+            users.append(cursor.lastrowid)
+        room_id = conn.execute(
+            "INSERT INTO meetings (room_code, title, host_id, password) VALUES ('HISTROOM', 'private', ?, 'secret')",
+            (users[0],),
+        ).lastrowid
+        conn.commit()
+    host, guest = (main.create_access_token({"user_id": user_id}) for user_id in users)
+    return str(room_id), users[1], {"Authorization": f"Bearer {host}"}, {"Authorization": f"Bearer {guest}"}
+
+
+def test_private_room_history_requires_access(private_room):
+    import main
+    import socketio_server
+
+    room_id, guest_id, host, guest = private_room
+    client = TestClient(main.app)
+    url = f"/api/rooms/{room_id}/messages"
+
+    assert client.get(url, headers=guest).status_code == 403
+    assert client.get(url, params={"password": "wrong"}, headers=guest).status_code == 403
+    assert client.get(url, headers=host).status_code == 200
+    assert client.get(url, params={"password": "secret"}, headers=guest).status_code == 200
+    assert client.get("/api/rooms/999999/messages", headers=guest).status_code == 404
+
+    # 지금 방에 참가 중인 사용자(연결 시 검증한 JWT 기준)는 비밀번호 없이 조회
+    socketio_server.connected_users["history-sid"] = {"authUserId": str(guest_id), "userInfo": {"id": str(guest_id)}}
+    socketio_server.membership.join("history-sid", room_id, {"id": str(guest_id)})
+    try:
+        assert client.get(url, headers=guest).status_code == 200
+    finally:
+        socketio_server.membership.leave("history-sid", room_id)
+        socketio_server.connected_users.pop("history-sid", None)
+
+
+def test_join_room_replays_private_history_only_with_access(private_room, monkeypatch):
+    import main
+    import socketio_server as server
+
+    room_id, guest_id, host, guest = private_room
+    sent = []
+
+    async def capture(sid, event, data):
+        sent.append((sid, event, data))
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(server, "emit_to", capture)
+    monkeypatch.setattr(server, "emit_room", noop)
+    monkeypatch.setattr(server, "notify_room_list_update", noop)
+    monkeypatch.setattr(server.sio, "enter_room", noop)
+    monkeypatch.setattr(server.sio, "leave_room", noop)
+    host_token = host["Authorization"].split()[1]
+    guest_token = guest["Authorization"].split()[1]
+
+    def replayed(sid):
+        return [data for to, event, data in sent if to == sid and event == "chat_history"]
+
+    async def scenario():
+        server.chat_history.append(room_id, {"id": "m1", "content": "secret plans", "senderName": "host"})
+        await server.connect("jr-host", {}, {"token": host_token})
+        await server.connect("jr-forged", {}, None)
+        await server.connect("jr-guest", {}, {"token": guest_token})
+        await server.connect("jr-guest2", {}, {"token": guest_token})
+        try:
+            await server.join_room("jr-host", {"roomId": room_id, "userInfo": {"id": "someone-else"}})
+            assert server.connected_users["jr-host"]["userInfo"]["id"] != "someone-else"
+            assert replayed("jr-host")
+
+            # 토큰 없이 다른 사용자 id를 보내도 기록을 받지 못하고, 그 id로 기록되지도 않음
+            await server.join_room("jr-forged", {"roomId": room_id, "userInfo": {"id": str(guest_id)}})
+            assert replayed("jr-forged") == []
+            assert "id" not in server.connected_users["jr-forged"]["userInfo"]
+            assert TestClient(main.app).get(f"/api/rooms/{room_id}/messages", headers=guest).status_code == 403
+
+            await server.join_room("jr-guest", {"roomId": room_id, "userInfo": {}})
+            assert replayed("jr-guest") == []
+            # 같은 사용자가 이미 참가 중이면 (다른 탭) 재생
+            await server.join_room("jr-guest2", {"roomId": room_id, "userInfo": {}})
+            assert replayed("jr-guest2")
+        finally:
+            for sid in ("jr-host", "jr-forged", "jr-guest", "jr-guest2"):
+                await server.disconnect(sid)
+
+    asyncio.run(scenario())
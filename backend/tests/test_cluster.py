@@ -0,0 +1,79 @@
+"""
+멀티 워커 시그널링 (cluster.py): JSON pub/sub 메시지, 하트비트 실패 시 롤백, 전송 제한
+"""
+
+import asyncio
+import json
+import sqlite3
+
+import pytest
+
+import cluster
+from cluster import SQLiteMembershipStore, SQLitePubSubManager, pack_message, unpack_message
+from room_state import RoomMembership
+
+
+def test_pack_message_round_trip():
+    message = {
+        "method": "emit",
+        "event": "file_chunk_bin",
+        "data": ("transfer", 3, b"\x00\xff binary"),  # 여러 인자 emit
+        "room": "1",
+        "skip_sid": ["a", "b"],
+        "callback": None,
+        "nested": {"__bytes__": "not really bytes"},
+    }
+    encoded = json.dumps(pack_message(message))
+    assert unpack_message(json.loads(encoded)) == message
+
+
+def test_pubsub_stores_json_not_pickle(tmp_path):
+    manager = SQLitePubSubManager(str(tmp_path / "signaling.db"))
+    message = {"method": "emit", "event": "chat_message", "data": {"content": "hi"}, "room": "1"}
+
+    async def scenario():
+        listener = manager._listen()
+        first = asyncio.ensure_future(listener.__anext__())
+        await asyncio.sleep(0.05)  # 구독 시작 위치(last_id)를 먼저 읽도록
+        await manager._publish(message)
+        received = await asyncio.wait_for(first, 5)
+        await listener.aclose()
+        return received
+
+    try:
+        assert asyncio.run(scenario()) == message
+    finally:
+        manager._db.close()
+
+    conn = sqlite3.connect(tmp_path / "signaling.db")
+    (payload,) = conn.execute("SELECT payload FROM pubsub_messages").fetchone()
+    conn.close()
+    assert json.loads(payload)["event"] == "chat_message"
+
+
+def test_heartbeat_rolls_back_on_error(tmp_path):
+    path = str(tmp_path / "signaling.db")
+    store = SQLiteMembershipStore(RoomMembership(), {}, db_path=path, worker_ttl=10)
+    conn = cluster._connect(path)
+    SQLiteMembershipStore._init_schema(conn)
+    conn.execute("INSERT INTO cluster_workers (worker_id, heartbeat_at) VALUES ('dead', 0)")
+    conn.execute("DROP TABLE cluster_members")  # 죽은 워커 정리 중 실패하도록
+
+    with pytest.raises(sqlite3.OperationalError):
+        store._heartbeat(conn)
+    assert not conn.in_transaction
+
+    # 쓰기 잠금이 풀려 다른 연결이 바로 쓸 수 있음
+    other = sqlite3.connect(path, timeout=0.1, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("DELETE FROM cluster_workers")
+    other.execute("COMMIT")
+    other.close()
+    conn.close()
+
+
+def test_multi_worker_allows_websocket_only(monkeypatch):
+    monkeypatch.setattr(cluster, "SIGNALING_BACKEND", "memory")
+    assert cluster.signaling_transports() is None
+    monkeypatch.setattr(cluster, "SIGNALING_BACKEND", "sqlite")
+    assert cluster.signaling_transports() == ["websocket"]
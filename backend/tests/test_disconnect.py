@@ -0,0 +1,78 @@
+"""
+연결 해제 정리: 방 참가, 파일 중계, ICE 묶음, 레이어 선택, 속도 제한 상태가 모두 지워짐
+"""
+
+import asyncio
+
+from file_relay import FileRelay
+from ice_batching import IceBatcher
+from layer_selection import LayerSelector
+from rate_limit import DEFAULT_BUDGETS, RateLimiter
+
+
+def test_disconnect_clears_per_sid_state(migrated_db, monkeypatch):
+    import socketio_server as server
+
+    sent = []
+
+    async def capture(sid, event, data):
+        sent.append((sid, event, data))
+
+    async def capture_room(event, data, room_id, skip_sid=None, key=None):
+        sent.append((room_id, event, data))
+
+    async def deliver(from_sid, to_sid, candidates):
+        pass
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(server, "emit_to", capture)
+    monkeypatch.setattr(server, "emit_room", capture_room)
+    monkeypatch.setattr(server.sio, "enter_room", noop)
+    monkeypatch.setattr(server.sio, "leave_room", noop)
+    monkeypatch.setattr(server, "file_relay", FileRelay(server.send_file_credit))
+    monkeypatch.setattr(server, "ice_batcher", IceBatcher(deliver, window=60))
+    monkeypatch.setattr(server, "layer_selector", LayerSelector())
+    monkeypatch.setattr(server, "rate_limiter", RateLimiter(budgets=dict(DEFAULT_BUDGETS), enabled=True))
+    room = "disconnect-room"
+    server.connected_users["dc-gone"] = {"sid": "dc-gone"}
+    server.connected_users["dc-stays"] = {"sid": "dc-stays"}
+
+    async def scenario():
+        for sid in ("dc-gone", "dc-stays"):
+            await server.join_room(sid, {"roomId": room, "userInfo": {"username": sid}})
+        sending = server.file_relay.start("dc-gone", room, {"dc-stays"}, 16384, 10 ** 6)
+        receiving = server.file_relay.start("dc-stays", room, {"dc-gone"}, 16384, 10 ** 6)
+        await server.ice_batcher.add("dc-gone", "dc-stays", [{"c": 1}])
+        await server.ice_batcher.add("dc-stays", "dc-gone", [{"c": 2}])
+        server.layer_selector.report("dc-gone", {"dc-stays": 720}, now=0)
+        server.layer_selector.report("dc-stays", {"dc-gone": 720}, now=0)
+        server.rate_limiter.allow("dc-gone", "chat_message")
+
+        await server.disconnect("dc-gone")
+        return sending, receiving
+
+    try:
+        sending, receiving = asyncio.run(scenario())
+        assert server.membership.rooms_of("dc-gone") == []
+        assert server.membership.members(room) == {"dc-stays"}
+        assert "dc-gone" not in server.connected_users
+        assert "dc-gone" not in server.fanout.queues
+
+        # 보내던 전송은 사라지고, 받던 전송은 남은 송신자에게 크레딧이 다시 감
+        assert sending.transfer_id not in server.file_relay.transfers
+        assert "dc-gone" not in server.file_relay._by_sid
+        assert "dc-gone" not in receiving.acked
+        assert any(sid == "dc-stays" and event == "file_credit" for sid, event, _ in sent)
+
+        assert server.ice_batcher._pending == {} and server.ice_batcher._pairs == {}
+        assert "dc-gone" not in server.layer_selector.receivers
+        assert "dc-gone" not in server.layer_selector._viewers
+        assert server.layer_selector.receivers["dc-stays"].layers == {}
+        assert "dc-gone" not in server.rate_limiter._buckets
+        assert any(event == "user_left" for _, event, _ in sent)
+    finally:
+        asyncio.run(server.leave_room_internal("dc-stays", room))
+        server.connected_users.pop("dc-gone", None)
+        server.connected_users.pop("dc-stays", None)
@@ -0,0 +1,47 @@
+"""
+다운로드 전송: 본문 전송이 실패해도 미리 읽던 청크가 끝난 뒤에 반환 (파일을 닫기 전)
+"""
+
+import asyncio
+import os
+import threading
+import time
+
+import pytest
+
+import file_download
+from file_download import RangedFileResponse
+
+
+def test_send_range_waits_for_pending_read_on_send_error(tmp_path, monkeypatch):
+    path = tmp_path / "data.bin"
+    path.write_bytes(b"x" * 64)
+    monkeypatch.setattr(file_download, "DOWNLOAD_CHUNK_SIZE", 16)
+
+    real_pread = os.pread
+    reads = []
+    second_started = threading.Event()
+
+    def slow_pread(fd, size, offset):
+        if offset:
+            second_started.set()
+            time.sleep(0.2)
+        data = real_pread(fd, size, offset)
+        reads.append(offset)
+        return data
+
+    monkeypatch.setattr(os, "pread", slow_pread)
+
+    async def failing_send(message):
+        await asyncio.get_running_loop().run_in_executor(None, second_started.wait, 5)
+        raise ConnectionResetError("client went away")
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        with open(path, "rb") as f:
+            with pytest.raises(ConnectionResetError):
+                await RangedFileResponse._send_range(failing_send, loop, f.fileno(), 0, 64)
+            # 반환 시점에 다음 청크 읽기가 이미 끝나 있어야 파일을 닫아도 안전
+            assert reads == [0, 16]
+
+    asyncio.run(scenario())
@@ -0,0 +1,81 @@
+"""파일 메타데이터 색인 (file_index.py) - 해시 형식 검증, 만료 정리, 응답에 서버 경로 노출 금지"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import time
+
+import pytest
+
+from blob_store import BlobStore
+from database import get_db
+from file_index import FileIndex
+
+TRAVERSAL = "../" + "./" * 22 + "../" + "tmp/victim.txt"
+
+
+@pytest.fixture
+def index(migrated_db, tmp_path):
+    return FileIndex(BlobStore(tmp_path / "blobs"), ttl=60)
+
+
+def store_blob(blobs: BlobStore, data: bytes) -> str:
+    digest = hashlib.sha256(data).hexdigest()
+    path = blobs.path_for(digest)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return digest
+
+
+def test_register_rejects_non_digest(index):
+    with pytest.raises(ValueError):
+        asyncio.run(index.register(TRAVERSAL, "x", 12, "r"))
+    with get_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM files WHERE hash = ?", (TRAVERSAL,)).fetchone()[0] == 0
+
+
+def traversal_to(target: str) -> str:
+    """64자 '해시' 중 예전 path_for(root/h[:2]/h[2:4]/h)가 target을 가리키게 되는 값"""
+    relative = target.lstrip("/")
+    pad = 64 - 6 - len(relative)
+    value = "../" + "./" * (pad // 2) + "/" * (pad % 2) + "../" + relative
+    assert len(value) == 64 and os.path.realpath(os.path.join(value[2:4], value)) == target
+    return value
+
+
+def test_sweep_never_deletes_outside_store(index):
+    victim = os.path.join(tempfile.mkdtemp(dir="/tmp"), "v.txt")
+    with open(victim, "w") as f:
+        f.write("keep me")
+    bad_hash = traversal_to(victim)
+    # 예전 버전이 남겼을 수 있는 잘못된 행 (경로가 저장소 밖)
+    with get_db() as conn:
+        conn.execute("INSERT INTO files (file_id, hash, filename, size, room_id, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                     ("bad-row", bad_hash, "x", 7, "r", time.time() - 3600))
+    asyncio.run(index.sweep())
+    assert open(victim).read() == "keep me"
+    with get_db() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM files WHERE file_id = 'bad-row'").fetchone()[0] == 0
+
+
+def test_release_and_expire_remove_blob(index):
+    digest = store_blob(index.blobs, os.urandom(64))
+    assert asyncio.run(index.register(digest, "a.bin", 64, "r1")) == {"r1": 1}
+    assert asyncio.run(index.register(digest, "a.bin", 64, "r2")) == {"r1": 1, "r2": 1}
+    assert asyncio.run(index.release(digest[:16], "r1")) == {"r2": 1}
+    assert index.blobs.exists(digest)
+    asyncio.run(index.sweep(now=time.time() + 120))
+    assert not index.blobs.exists(digest)
+    assert asyncio.run(index.get(digest[:16])) is None
+
+
+def test_metadata_responses_have_no_server_path(file_client):
+    data = os.urandom(32)
+    r = file_client.post("/api/files/upload", params={"room_id": "room-path"}, files={"file": ("p.bin", data)})
+    file_id = r.json()["file_id"]
+    metadata = file_client.get(f"/api/files/metadata/{file_id}").json()
+    assert "path" not in metadata and metadata["hash"] == hashlib.sha256(data).hexdigest()
+    listed = file_client.get("/api/files/room/room-path").json()["files"]
+    assert listed and all("path" not in f for f in listed)
+    assert file_client.get(f"/api/files/download/{file_id}").content == data
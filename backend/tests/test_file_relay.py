@@ -0,0 +1,157 @@
+"""
+바이너리 파일 중계: 서버 측 크레딧 확인, 확인이 멈춘 수신자 제외, 수신 준비한 참가자만 기다리기
+"""
+
+import asyncio
+
+from file_relay import FileRelay
+
+CHUNK = 16 * 1024
+
+
+def start(relay, receivers=("r1", "r2"), chunks=100):
+    return relay.start("sender", "room", set(receivers), CHUNK, CHUNK * chunks, now=0)
+
+
+def test_chunks_beyond_credit_are_rejected():
+    relay = FileRelay(window=4)
+    transfer = start(relay)
+
+    assert all(relay.admit(transfer.transfer_id, "sender", i, CHUNK, now=0) for i in range(4))
+    assert relay.admit(transfer.transfer_id, "sender", 4, CHUNK, now=0) is None
+
+    relay.ack(transfer.transfer_id, "r1", 1, now=1)
+    assert relay.admit(transfer.transfer_id, "sender", 4, CHUNK, now=1) is None  # r2는 아직 확인 전
+    assert relay.ack(transfer.transfer_id, "r2", 1, now=1) is transfer
+    assert transfer.credited == 1
+    assert relay.admit(transfer.transfer_id, "sender", 5, CHUNK, now=1) is transfer
+    assert relay.admit(transfer.transfer_id, "sender", 6, CHUNK, now=1) is None
+    assert relay.stats()["rejected"] == 3
+
+
+def test_invalid_chunks_are_rejected():
+    relay = FileRelay(window=4)
+    transfer = start(relay, chunks=2)
+
+    assert relay.admit(transfer.transfer_id, "r1", 0, CHUNK) is None  # 송신자가 아님
+    assert relay.admit(transfer.transfer_id, "sender", "0", CHUNK) is None
+    assert relay.admit(transfer.transfer_id, "sender", 2, CHUNK) is None  # 범위 밖
+    assert relay.admit(transfer.transfer_id, "sender", 0, CHUNK + 1) is None  # 협상한 크기보다 큼
+    assert relay.admit(["not", "hashable"], "sender", 0, CHUNK) is None
+    # 중계하지 않은 청크를 확인해도 크레딧은 늘지 않음
+    assert relay.ack(transfer.transfer_id, "r1", 1) is None
+    assert relay.ack(transfer.transfer_id, "r2", 1) is None
+    assert transfer.credited == -1
+
+
+def test_transfer_without_receivers_is_not_throttled():
+    relay = FileRelay(window=2)
+    transfer = start(relay, receivers=(), chunks=10)
+    assert all(relay.admit(transfer.transfer_id, "sender", i, CHUNK) for i in range(10))
+
+
+def test_stalled_receiver_is_dropped():
+    relay = FileRelay(window=4, ack_timeout=10)
+    transfer = start(relay)
+    for i in range(4):
+        relay.admit(transfer.transfer_id, "sender", i, CHUNK, now=1)
+    relay.ack(transfer.transfer_id, "r1", 3, now=2)
+
+    assert relay.expire(now=9) == []
+    assert relay.expire(now=11) == [transfer]  # r2는 시작 후 10초 넘게 확인 없음
+    assert set(transfer.acked) == {"r1"}
+    assert transfer.credited == 3
+    assert relay.stats()["timed_out"] == 1
+    assert "r2" not in relay._by_sid
+
+
+def test_watchdog_survives_credit_errors():
+    credited = []
+
+    async def on_credit(transfer):
+        if transfer.transfer_id == failing.transfer_id:
+            raise ConnectionError("emit failed")
+        credited.append(transfer.transfer_id)
+
+    relay = FileRelay(on_credit, window=4, ack_timeout=0.03)
+    transfers = []
+    for _ in range(2):
+        transfer = relay.start("sender", "room", {"r1", "r2"}, CHUNK, CHUNK * 100)
+        relay.admit(transfer.transfer_id, "sender", 0, CHUNK)
+        relay.ack(transfer.transfer_id, "r1", 0)
+        transfers.append(transfer)
+    failing, ok = transfers
+
+    async def scenario():
+        relay.start_watchdog()
+        try:
+            await asyncio.sleep(0.1)
+            assert not relay._task.done()
+        finally:
+            await relay.stop_watchdog()
+
+    asyncio.run(scenario())
+    assert credited == [ok.transfer_id]
+    assert relay.stats()["timed_out"] == 2
+
+
+def test_idle_transfer_is_abandoned():
+    relay = FileRelay(ack_timeout=10)
+    transfer = start(relay)
+    relay.expire(now=41)
+    assert relay.get(transfer.transfer_id) is None
+    assert relay._by_sid == {}
+    assert relay.stats()["abandoned"] == 1
+
+
+def test_drop_sid_uses_reverse_index():
+    relay = FileRelay(window=4)
+    first = start(relay)
+    second = relay.start("r1", "other-room", {"sender"}, CHUNK, CHUNK * 10, now=0)
+    relay.admit(first.transfer_id, "sender", 0, CHUNK)
+    relay.ack(first.transfer_id, "r1", 0)
+
+    # r2가 빠지면 r1이 확인한 위치까지 크레딧이 늘어남
+    assert relay.drop_sid("r2") == [first]
+    assert first.credited == 0
+
+    # 수신 준비 해제는 보내고 있던 전송을 유지
+    relay.drop_sid("r1", sending=False)
+    assert relay.get(second.transfer_id) is second
+    assert set(first.acked) == set()
+
+    relay.drop_sid("sender")
+    assert relay.get(first.transfer_id) is None
+    assert set(second.acked) == set()
+    relay.finish(second.transfer_id, "r1")
+    assert relay.transfers == {} and relay._by_sid == {}
+
+
+def test_only_ready_participants_are_waited_on():
+    import socketio_server as server
+
+    room = "relay-ready-room"
+    users = {"relay-a": False, "relay-b": True, "relay-c": False}
+    for sid, ready in users.items():
+        server.connected_users[sid] = {"sid": sid, "fileReceiver": ready}
+        server.membership.join(sid, room, {})
+
+    async def scenario():
+        negotiated = await server.file_transfer_start(
+            "relay-a", {"roomId": room, "binary": True, "chunkSize": CHUNK, "fileSize": CHUNK * 4})
+        # 문자열 등 bytes가 아닌 청크는 버림
+        await server.file_chunk_bin("relay-a", negotiated["transferId"], 0, "not bytes")
+        await server.file_chunk_bin("relay-a", negotiated["transferId"], 0, {"x": 1})
+        return negotiated
+
+    try:
+        negotiated = asyncio.run(scenario())
+        transfer = server.file_relay.get(negotiated["transferId"])
+        assert negotiated["receivers"] == 1
+        assert set(transfer.acked) == {"relay-b"}
+        assert transfer.sent == -1
+    finally:
+        for sid in users:
+            server.membership.leave(sid, room)
+            server.connected_users.pop(sid, None)
+            server.file_relay.drop_sid(sid)
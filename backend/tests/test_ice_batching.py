@@ -0,0 +1,34 @@
+"""
+ICE 후보 묶음: 연결 해제 시 해당 sid의 쌍만 정리 (역인덱스)
+"""
+
+import asyncio
+
+from ice_batching import IceBatcher
+
+
+def test_drop_sid_discards_only_its_pairs():
+    delivered = []
+
+    async def deliver(from_sid, to_sid, candidates):
+        delivered.append((from_sid, to_sid, candidates))
+
+    batcher = IceBatcher(deliver, window=60)
+
+    async def scenario():
+        await batcher.add("a", "b", [{"c": 1}])
+        await batcher.add("b", "a", [{"c": 2}])
+        await batcher.add("c", "d", [{"c": 3}])
+        await batcher.add("a", "d", [{"c": 4}])
+        batcher.drop_sid("a")
+        assert set(batcher._pending) == {("c", "d")}
+        assert batcher._pairs == {"c": {("c", "d")}, "d": {("c", "d")}}
+
+        await batcher.flush_now("c", "d")
+        assert batcher._pending == {} and batcher._pairs == {}
+        await batcher.add("e", "f", [{"c": 5}])
+        await batcher.flush()
+        assert batcher._pairs == {}
+
+    asyncio.run(scenario())
+    assert delivered == [("c", "d", [{"c": 3}]), ("e", "f", [{"c": 5}])]
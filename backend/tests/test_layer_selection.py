@@ -0,0 +1,71 @@
+"""
+화질 레이어 선택: 송출자 역인덱스로 정리, media_stats 입력 검사
+"""
+
+import asyncio
+
+from layer_selection import LayerSelector
+
+
+def test_forget_cleans_sender_entries_via_reverse_index():
+    selector = LayerSelector()
+    selector.report("r1", {"s1": 720, "s2": 180}, now=0)
+    selector.report("r2", {"s1": 360}, now=0)
+    assert selector._viewers == {"s1": {"r1", "r2"}, "s2": {"r1"}}
+
+    # 더 이상 보이지 않는 송출자는 역인덱스에서도 빠짐
+    selector.report("r1", {"s1": 720}, now=1)
+    assert selector._viewers == {"s1": {"r1", "r2"}}
+
+    selector.forget("s1")
+    assert selector.receivers["r1"].layers == {}
+    assert selector.receivers["r2"].layers == {}
+    assert selector._viewers == {}
+
+    selector.report("r1", {"s3": 720}, now=2)
+    selector.forget("r1")
+    assert "r1" not in selector.receivers
+    assert selector._viewers == {}
+
+
+def test_media_stats_validates_viewports(monkeypatch):
+    import socketio_server as server
+
+    sent = []
+
+    async def capture(sid, event, data):
+        sent.append((sid, event, data))
+
+    monkeypatch.setattr(server, "emit_to", capture)
+    monkeypatch.setattr(server, "layer_selector", LayerSelector())
+    room, other_room = "layer-room", "layer-other-room"
+    server.membership.join("ls-receiver", room, {})
+    server.membership.join("ls-sender", room, {})
+    server.membership.join("ls-outsider", other_room, {})
+    server.connected_users["ls-sender"] = {"sid": "ls-sender"}
+
+    async def scenario():
+        results = [
+            await server.media_stats("ls-receiver", {"roomId": room, "viewports": ["ls-sender"]}),
+            await server.media_stats("ls-receiver", {"roomId": room, "viewports": "ls-sender"}),
+            await server.media_stats("ls-receiver", ["not", "a", "dict"]),
+        ]
+        ok = await server.media_stats("ls-receiver", {"roomId": room, "bandwidth": 10 ** 400, "viewports": {
+            "ls-sender": 180,
+            "ls-outsider": 180,  # 다른 방 참가자
+            "ls-ghost": 180,  # 없는 sid
+            "ls-nan": float("nan"),
+        }})
+        return results, ok
+
+    try:
+        results, ok = asyncio.run(scenario())
+    finally:
+        server.membership.leave("ls-receiver", room)
+        server.membership.leave("ls-sender", room)
+        server.membership.leave("ls-outsider", other_room)
+        server.connected_users.pop("ls-sender", None)
+
+    assert results == [None, None, None]
+    assert ok["changes"] == {"ls-sender": "q"}
+    assert [sid for sid, event, _ in sent if event == "media_layer"] == ["ls-sender"]
@@ -0,0 +1,42 @@
+"""
+방 미디어 모드 캐시: DB에 있는 방만 캐시, 방이 비면 삭제
+"""
+
+import asyncio
+
+from database import get_db
+
+
+def test_media_mode_cache_only_holds_existing_active_rooms(migrated_db, monkeypatch):
+    import socketio_server as server
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(server, "emit_room", noop)
+    monkeypatch.setattr(server, "notify_room_list_update", noop)
+    monkeypatch.setattr(server.sio, "leave_room", noop)
+    with get_db() as conn:
+        room_id = str(conn.execute("SELECT COALESCE(MAX(id), 0) + 1000 FROM meetings").fetchone()[0])
+
+    async def scenario():
+        # 아직 없는 방: mesh로 답하지만 캐시하지 않음
+        assert await server.get_room_media_mode(room_id) == "mesh"
+        assert await server.get_room_media_mode("not-a-room") == "mesh"
+        assert room_id not in server.room_media_modes and "not-a-room" not in server.room_media_modes
+
+        with get_db() as conn:
+            conn.execute("INSERT INTO users (email, username, password, personal_code) "
+                         "VALUES ('mode-host@example.com', 'mode-host', 'x', 'P-mode-host')")
+            conn.execute("INSERT INTO meetings (id, room_code, title, host_id, media_mode) "
+                         "VALUES (?, 'MODEROOM', 'sfu room', last_insert_rowid(), 'sfu')", (int(room_id),))
+            conn.commit()
+        await server.get_room_media_mode(room_id)
+        assert server.room_media_modes[room_id] == "sfu"
+
+        # 이 워커에서 방이 비면 캐시에서도 제거
+        server.membership.join("mode-sid", room_id, {})
+        await server.leave_room_internal("mode-sid", room_id)
+        assert room_id not in server.room_media_modes
+
+    asyncio.run(scenario())
@@ -0,0 +1,84 @@
+"""
+스키마 마이그레이션: 버전 순서, 여러 번 실행해도 같은 결과, 실패 시 롤백, meetings 조회 쿼리의 인덱스 사용
+"""
+
+import sqlite3
+
+import pytest
+
+import migrations
+from migrations import MIGRATIONS, get_schema_version, run_migrations
+
+
+def connect(path):
+    return sqlite3.connect(path, isolation_level=None)
+
+
+def tables(conn):
+    return {name for (name,) in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'index')")}
+
+
+def test_versions_are_strictly_increasing():
+    versions = [version for version, _, _ in MIGRATIONS]
+    assert versions == sorted(set(versions))
+    assert versions[0] == 1
+
+
+def test_run_migrations_is_idempotent(tmp_path):
+    conn = connect(tmp_path / "schema.db")
+    latest = MIGRATIONS[-1][0]
+    assert run_migrations(conn) == latest
+    schema = tables(conn)
+    assert {"users", "invite_codes", "meetings", "chat_messages", "files", "file_refs"} <= schema
+
+    assert run_migrations(conn) == latest
+    assert get_schema_version(conn) == latest
+    assert tables(conn) == schema
+    conn.close()
+
+
+def test_applies_only_newer_versions_in_order(tmp_path, monkeypatch):
+    conn = connect(tmp_path / "partial.db")
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:2])
+    assert run_migrations(conn) == 2
+
+    steps = [(version, description, statements + [f"INSERT INTO applied VALUES ({version})"])
+             for version, description, statements in MIGRATIONS]
+    conn.execute("CREATE TABLE applied (version INTEGER)")
+    monkeypatch.setattr(migrations, "MIGRATIONS", steps)
+    assert run_migrations(conn) == MIGRATIONS[-1][0]
+    applied = [version for (version,) in conn.execute("SELECT version FROM applied ORDER BY rowid")]
+    assert applied == [version for version, _, _ in MIGRATIONS if version > 2]
+    conn.close()
+
+
+def test_failed_migration_rolls_back(tmp_path, monkeypatch):
+    conn = connect(tmp_path / "broken.db")
+    monkeypatch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:1] + [
+        (2, "실패하는 변경", ["CREATE TABLE half_done (id INTEGER)", "NOT VALID SQL"]),
+    ])
+    with pytest.raises(sqlite3.OperationalError):
+        run_migrations(conn)
+    assert get_schema_version(conn) == 1
+    assert "half_done" not in tables(conn)
+    assert not conn.in_transaction
+    conn.close()
+
+
+def test_meetings_queries_use_indexes(tmp_path):
+    """benchmarks/meetings_query_plan.py의 인덱스 회귀 검사를 작은 테이블로"""
+    from benchmarks.meetings_query_plan import ROOM_LIST_QUERY, USER_MEETINGS_QUERY, plan, populate
+
+    conn = sqlite3.connect(tmp_path / "plan.db")
+    run_migrations(conn)
+    populate(conn, rows=5000, users=50, active=20)
+    conn.execute("ANALYZE")
+
+    room_plan = plan(conn, ROOM_LIST_QUERY)
+    assert any("COVERING INDEX idx_meetings_status_listing" in step for step in room_plan), room_plan
+    assert not any(step.startswith("SCAN m") for step in room_plan), room_plan
+
+    user_plan = plan(conn, USER_MEETINGS_QUERY, (1,))
+    assert any("idx_meetings_host_created" in step for step in user_plan), user_plan
+    assert not any("TEMP B-TREE" in step for step in user_plan), user_plan
+    conn.close()
@@ -0,0 +1,47 @@
+"""
+모니터링 엔드포인트(/api/stats, /metrics): 허용 주소 또는 METRICS_TOKEN만 접근
+"""
+
+import ipaddress
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture
+def client(migrated_db):
+    import main
+
+    # TestClient의 클라이언트 주소는 "testclient" (IP가 아님)
+    return TestClient(main.app)
+
+
+@pytest.mark.parametrize("path", ["/api/stats", "/metrics"])
+def test_monitoring_is_denied_by_default(client, path):
+    assert client.get(path).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer anything"}).status_code == 403
+
+
+@pytest.mark.parametrize("path", ["/api/stats", "/metrics"])
+def test_monitoring_accepts_token(client, path, monkeypatch):
+    import main
+
+    monkeypatch.setattr(main, "METRICS_TOKEN", "scrape-secret")
+    assert client.get(path, headers={"Authorization": "Bearer wrong"}).status_code == 403
+    assert client.get(path, headers={"Authorization": "Bearer scrape-secret"}).status_code == 200
+
+
+def test_monitoring_allowlist(monkeypatch):
+    import main
+    from starlette.requests import Request
+
+    def request(host):
+        return Request({"type": "http", "headers": [], "client": (host, 1234)})
+
+    monkeypatch.setattr(main, "METRICS_ALLOW", [ipaddress.ip_network("10.0.0.0/8"), ipaddress.ip_network("::1")])
+    assert main.verify_monitoring(request("10.1.2.3")) is None
+    assert main.verify_monitoring(request("::1")) is None
+    for host in ("192.168.0.1", "testclient"):
+        with pytest.raises(main.HTTPException) as denied:
+            main.verify_monitoring(request(host))
+        assert denied.value.status_code == 403
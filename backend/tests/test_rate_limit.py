@@ -0,0 +1,52 @@
+"""
+이벤트 속도 제한: WebRTC 시그널링은 예산 없음, join_room의 명단 동기화는 roster_sync 예산과 무관
+"""
+
+import asyncio
+
+from rate_limit import DEFAULT_BUDGETS, RateLimiter
+
+
+def test_webrtc_signaling_is_not_budgeted():
+    limiter = RateLimiter(budgets=dict(DEFAULT_BUDGETS), enabled=True)
+    # 20명 풀 메시 입장: 상대마다 offer 1건 + ICE 후보 여러 건이 한꺼번에
+    for event, count in (("webrtc_offer", 20), ("webrtc_answer", 20), ("webrtc_ice_candidate", 400),
+                         ("webrtc_ice_candidates", 100)):
+        assert all(limiter.allow("peer", event) for _ in range(count)), event
+    assert not all(limiter.allow("peer", "chat_message") for _ in range(50))
+
+
+def test_join_room_roster_sync_bypasses_budget(migrated_db, monkeypatch):
+    import socketio_server as server
+
+    sent = []
+
+    async def capture(sid, event, data):
+        sent.append((sid, event, data))
+
+    async def noop(*args, **kwargs):
+        pass
+
+    monkeypatch.setattr(server, "emit_to", capture)
+    monkeypatch.setattr(server.sio, "enter_room", noop)
+    monkeypatch.setattr(server.sio, "leave_room", noop)
+    monkeypatch.setattr(server, "rate_limiter", RateLimiter(budgets=dict(DEFAULT_BUDGETS), enabled=True))
+    room = "rate-limit-room"
+    server.connected_users["rl-sid"] = {"sid": "rl-sid"}
+
+    async def scenario():
+        # roster_sync 예산(버스트 5)을 모두 쓴 뒤에도 입장은 명단을 받아야 함
+        for _ in range(5):
+            await server.roster_sync("rl-sid", {"roomId": room})
+        assert (await server.roster_sync("rl-sid", {"roomId": room}))["error"] == "rate_limited"
+        await server.join_room("rl-sid", {"roomId": room, "userInfo": {"username": "a"}, "rosterVersion": None})
+        await server.leave_room_internal("rl-sid", room)
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.connected_users.pop("rl-sid", None)
+    roster = [data for sid, event, data in sent if event == "roster_sync"]
+    assert len(roster) == 1
+    assert "error" not in roster[0]
+    assert roster[0]["mode"] == "snapshot"
@@ -0,0 +1,85 @@
+"""
+청크 업로드 세션: 부분 파일 fd 재사용 한도, 세션 수 제한, 주기적 만료
+"""
+
+import asyncio
+import hashlib
+import os
+
+import pytest
+
+import upload_sessions as module
+from upload_sessions import MIN_CHUNK, UploadError, UploadSessions
+
+
+async def body(data: bytes):
+    yield data
+
+
+async def store_nothing(path, digest):
+    os.remove(path)
+
+
+def test_partial_files_are_opened_lazily_and_bounded(tmp_path):
+    sessions = UploadSessions(tmp_path, max_open=1)
+    files = [os.urandom(MIN_CHUNK * 2) for _ in range(3)]
+
+    async def scenario():
+        created = [sessions.create(f"f{i}.bin", len(data), MIN_CHUNK) for i, data in enumerate(files)]
+        assert all(session.fd < 0 for session in created)
+        assert sessions.stats()["open_files"] == 0
+
+        # 세션을 번갈아 쓰는 동안에도 열어 둔(사용 중이 아닌) 부분 파일은 한도 이하
+        for index in range(2):
+            for session, data in zip(created, files):
+                chunk = data[index * MIN_CHUNK:(index + 1) * MIN_CHUNK]
+                await sessions.write_chunk(session, index, body(chunk))
+                assert sum(1 for s in sessions._open.values() if s.fd_users == 0) <= 1
+                assert all(s.fd >= 0 for s in sessions._open.values())
+        return [await sessions.commit(session, None, store_nothing) for session in created]
+
+    digests = asyncio.run(scenario())
+    assert digests == [hashlib.sha256(data).hexdigest() for data in files]
+    assert sessions.stats()["open_files"] == 0
+    assert sessions.stats()["fd_opens"] > 1
+
+
+def test_sessions_are_capped_per_client_and_in_total(tmp_path):
+    sessions = UploadSessions(tmp_path, max_sessions=3, max_per_client=2)
+    first = sessions.create("a.bin", 10, client="1.1.1.1")
+    sessions.create("b.bin", 10, client="1.1.1.1")
+    with pytest.raises(UploadError) as e:
+        sessions.create("c.bin", 10, client="1.1.1.1")
+    assert e.value.status == 429
+
+    sessions.abort(first)
+    sessions.create("c.bin", 10, client="1.1.1.1")
+    sessions.create("d.bin", 10, client="2.2.2.2")
+    with pytest.raises(UploadError) as e:
+        sessions.create("e.bin", 10, client="3.3.3.3")
+    assert e.value.status == 503
+    assert sessions.stats()["rejected"] == 2
+
+    # 만료된 세션은 자리를 비움
+    sessions.ttl = 0
+    sessions.create("e.bin", 10, client="3.3.3.3")
+    assert len(sessions.sessions) == 1
+    assert sessions._per_client == {"3.3.3.3": 1}
+    assert sorted(os.listdir(tmp_path)) == [f"{next(iter(sessions.sessions))}.partial"]
+
+
+def test_expired_sessions_are_swept_periodically(tmp_path, monkeypatch):
+    monkeypatch.setattr(module, "UPLOAD_SWEEP_INTERVAL", 0.01)
+    sessions = UploadSessions(tmp_path, ttl=0)
+
+    async def scenario():
+        session = sessions.create("a.bin", 10)
+        sessions.start()
+        await asyncio.sleep(0.1)
+        await sessions.stop()
+        return session
+
+    session = asyncio.run(scenario())
+    assert sessions.sessions == {}
+    assert not session.path.exists()
+    assert sessions.stats()["expired"] == 1
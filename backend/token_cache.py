@@ -0,0 +1,104 @@
+"""
+검증된 JWT 캐시
+서명 검증을 통과한 토큰의 payload를 exp 시각까지 메모리에 보관하여
+같은 토큰으로 들어오는 반복 요청(대시보드 폴링 등)의 디코딩/서명 검증을 생략
+REST(verify_token)와 Socket.IO 연결(connect의 auth.token)이 decode_access_token을 함께 사용
+"""
+
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import jwt
+
+SECRET_KEY = os.getenv("SECRET_KEY", "videonet-secret-key-2024")
+ALGORITHM = os.getenv("ALGORITHM", "HS256")
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+
+
+class TokenCache:
+    """토큰 digest를 키로 하는 LRU 캐시 (만료 시각 인식)
+
+    verify_token은 동기 의존성이라 FastAPI 스레드풀에서 호출되므로 락으로 보호합니다.
+    """
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()  # digest -> (payload, exp)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # 원본 토큰은 보관하지 않음
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """캐시된 payload 반환 (없거나 만료되면 None)"""
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            payload, exp = entry
+            if exp <= now:
+                del self._entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    def put(self, token: str, payload: dict):
+        """검증된 payload 저장 - exp가 없는 토큰은 캐시하지 않음"""
+        exp = payload.get("exp")
+        if not isinstance(exp, (int, float)) or exp <= time.time():
+            return
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (payload, exp)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+token_cache = TokenCache()
+
+
+def decode_access_token(token: str) -> Optional[dict]:
+    """검증된 payload 반환 (이미 검증된 토큰이면 서명 검증 생략), 유효하지 않으면 None"""
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    token_cache.put(token, payload)
+    return payload
@@ -0,0 +1,422 @@
+"""
+이어 받기 가능한 청크 업로드 세션 (/api/files/uploads)
+1. POST   /uploads                      세션 생성 {filename, size, chunkSize?} → 청크 크기/개수
+2. PUT    /uploads/{id}/chunks/{index}  청크 본문 (병렬 가능, X-Chunk-SHA256 헤더로 청크 해시 검증)
+3. GET    /uploads/{id}                 받은/빠진 청크 범위 (연결이 끊긴 뒤 빠진 청크만 다시 전송)
+4. POST   /uploads/{id}/commit          {sha256} 전체 해시 확인 후 저장소(blob_store)로 이동 + file_index 등록
+   (1에서 sha256을 보냈으면 응답의 dedup 구간으로 소유를 증명해 본문 없이 끝낼 수 있음: POST /uploads/{id}/claim)
+
+청크는 미리 크기를 잡아 둔 부분 파일(.partial)의 제자리에 pwritev로 바로 씁니다 (조각 파일/합치기 복사 없음).
+요청 본문 조각을 모아 한 번에 쓰므로 조각을 이어 붙이는 복사도 하지 않습니다.
+전체 해시는 앞에서부터 이어진 청크가 도착할 때마다 스레드에서 따라 읽으며(대부분 페이지 캐시) 미리 계산해 두므로,
+commit은 남은 꼬리만 읽고 끝납니다.
+
+세션은 메모리에만 있으며(서버 재시작 시 사라짐) UPLOAD_SESSION_TTL 동안 활동이 없으면 부분 파일과 함께 삭제됩니다
+(주기적으로 확인). 세션 수는 전체 UPLOAD_MAX_SESSIONS, 클라이언트(IP)별 UPLOAD_MAX_SESSIONS_PER_CLIENT로 제한합니다.
+부분 파일은 세션마다 열어 두지 않고 청크를 쓰거나 해시를 읽을 때만 열며,
+최근에 쓴 UPLOAD_OPEN_FILES개까지만 열린 채로 재사용합니다 (LRU, 사용 중인 파일은 닫지 않음).
+"""
+
+import asyncio
+import hashlib
+import os
+import secrets
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional, Set
+
+UPLOAD_SESSION_CHUNK = int(os.getenv("UPLOAD_SESSION_CHUNK", str(8 * 1024 * 1024)))  # 기본 청크 크기 (바이트)
+UPLOAD_SESSION_TTL = float(os.getenv("UPLOAD_SESSION_TTL", str(24 * 3600)))  # 초 (마지막 활동 이후)
+UPLOAD_MAX_SIZE = int(os.getenv("UPLOAD_MAX_SIZE", str(20 * 1024 ** 3)))  # 세션 하나의 최대 파일 크기
+UPLOAD_MAX_SESSIONS = int(os.getenv("UPLOAD_MAX_SESSIONS", "1000"))  # 동시에 유지하는 세션 수
+UPLOAD_MAX_SESSIONS_PER_CLIENT = int(os.getenv("UPLOAD_MAX_SESSIONS_PER_CLIENT", "20"))  # 클라이언트(IP)별 세션 수
+UPLOAD_OPEN_FILES = int(os.getenv("UPLOAD_OPEN_FILES", "64"))  # 열어 둔 채 재사용하는 부분 파일 수
+UPLOAD_SWEEP_INTERVAL = 60  # 초 (만료 세션 확인 주기)
+MIN_CHUNK = 256 * 1024
+MAX_CHUNK = 64 * 1024 * 1024
+WRITE_BATCH = 1024 * 1024  # 본문 조각을 이만큼 모아 pwritev 한 번으로 기록
+WRITE_BATCH_PIECES = 512  # 조각 수 한도 (IOV_MAX 1024 이하)
+HASH_READ = 4 * 1024 * 1024  # 전체 해시를 따라 읽을 때 버퍼 크기
+
+
+class UploadError(Exception):
+    """클라이언트에 돌려줄 업로드 오류 (status: HTTP 상태 코드)"""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+def missing_ranges(total: int, received: Set[int]) -> List[List[int]]:
+    """빠진 청크 번호를 [처음, 끝] 범위 목록으로"""
+    ranges = []
+    start = None
+    for index in range(total):
+        if index in received:
+            if start is not None:
+                ranges.append([start, index - 1])
+                start = None
+        elif start is None:
+            start = index
+    if start is not None:
+        ranges.append([start, total - 1])
+    return ranges
+
+
+def _write_pieces(fd: int, pieces: List[bytes], offset: int, sha256):
+    # 스레드에서 실행 - 조각을 이어 붙이지 않고 한 번에 제자리 기록, 같은 조각으로 청크 해시 갱신
+    written = 0
+    while pieces:
+        n = os.pwritev(fd, pieces, offset + written)
+        written += n
+        # 부분 기록이면 남은 부분만 다시 씀 (일반 파일에서는 드묾)
+        while pieces and n >= len(pieces[0]):
+            n -= len(pieces[0])
+            sha256.update(pieces.pop(0))
+        if n:
+            sha256.update(pieces[0][:n])
+            pieces[0] = pieces[0][n:]
+    return written
+
+
+def _hash_range(fd: int, sha256, offset: int, length: int):
+    # 스레드에서 실행 - 이미 기록된 범위를 읽어 전체 해시에 반영
+    end = offset + length
+    while offset < end:
+        data = os.pread(fd, min(HASH_READ, end - offset), offset)
+        if not data:
+            raise OSError("부분 파일이 예상보다 짧습니다")
+        sha256.update(data)
+        offset += len(data)
+
+
+class UploadSession:
+    """업로드 하나의 상태"""
+
+    def __init__(self, upload_id: str, filename: str, size: int, chunk_size: int, path: Path,
+                 room_id: Optional[str], client: Optional[str] = None):
+        self.upload_id = upload_id
+        self.filename = filename
+        self.size = size
+        self.chunk_size = chunk_size
+        self.total_chunks = max(1, -(-size // chunk_size))
+        self.path = path
+        self.room_id = room_id
+        self.client = client
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, size)  # 미리 크기 확보 (sparse)
+        finally:
+            os.close(fd)
+        self.fd = -1  # 청크를 쓰거나 해시를 읽을 때만 열림 (UploadSessions가 관리)
+        self.fd_users = 0  # fd를 사용 중인 스레드 작업 수 (0일 때만 닫음)
+        self.discarded = False
+        self.received: Dict[int, str] = {}  # 청크 번호 -> sha256
+        self.writing: Set[int] = set()
+        self.file_hash = hashlib.sha256()
+        self.hashed_chunks = 0  # 전체 해시에 반영된 앞쪽 청크 수
+        self.hash_lock = asyncio.Lock()
+        self.committing = False
+        self.challenge: Optional[tuple] = None  # 소유 증명 (sha256, nonce, offset, length), 한 번만 시도 가능
+        self.touched = time.monotonic()
+
+    def chunk_length(self, index: int) -> int:
+        if index == self.total_chunks - 1:
+            return self.size - index * self.chunk_size
+        return self.chunk_size
+
+    def describe(self) -> dict:
+        described = {
+            "upload_id": self.upload_id,
+            "filename": self.filename,
+            "size": self.size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": self.total_chunks,
+            "received_chunks": len(self.received),
+            "missing": missing_ranges(self.total_chunks, set(self.received)),
+        }
+        if self.challenge is not None:
+            _, nonce, offset, length = self.challenge
+            described["dedup"] = {"nonce": nonce, "offset": offset, "length": length}
+        return described
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+
+
+class UploadSessions:
+    """업로드 세션 저장소 (partial_dir 아래 부분 파일)"""
+
+    def __init__(self, partial_dir: Path, ttl: float = UPLOAD_SESSION_TTL,
+                 max_sessions: int = UPLOAD_MAX_SESSIONS,
+                 max_per_client: int = UPLOAD_MAX_SESSIONS_PER_CLIENT,
+                 max_open: int = UPLOAD_OPEN_FILES):
+        self.partial_dir = partial_dir
+        self.partial_dir.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_per_client = max_per_client
+        self.max_open = max_open
+        self.sessions: Dict[str, UploadSession] = {}
+        self._per_client: Dict[str, int] = {}
+        self._open: "OrderedDict[str, UploadSession]" = OrderedDict()  # fd가 열린 세션 (오래 안 쓴 것부터)
+        self._task: Optional[asyncio.Task] = None
+        self.created = 0
+        self.rejected = 0
+        self.fd_opens = 0
+        self.committed = 0
+        self.expired = 0
+        self.chunks = 0
+        self.chunk_bytes = 0
+        self.hash_mismatches = 0
+
+    def create(self, filename: str, size: int, chunk_size: Optional[int] = None,
+               room_id: Optional[str] = None, client: Optional[str] = None) -> UploadSession:
+        if not filename or os.path.basename(filename) != filename:
+            raise UploadError(400, "파일 이름이 올바르지 않습니다")
+        if size < 0 or size > UPLOAD_MAX_SIZE:
+            raise UploadError(413, f"파일 크기는 {UPLOAD_MAX_SIZE}바이트 이하여야 합니다")
+        if len(self.sessions) >= self.max_sessions:
+            self.expire()
+            if len(self.sessions) >= self.max_sessions:
+                self.rejected += 1
+                raise UploadError(503, "진행 중인 업로드가 너무 많습니다. 잠시 후 다시 시도해 주세요")
+        if client is not None and self._per_client.get(client, 0) >= self.max_per_client:
+            self.rejected += 1
+            raise UploadError(429, f"동시에 진행할 수 있는 업로드는 {self.max_per_client}개까지입니다")
+        chunk_size = max(MIN_CHUNK, min(chunk_size or UPLOAD_SESSION_CHUNK, MAX_CHUNK))
+        upload_id = secrets.token_urlsafe(16)
+        session = UploadSession(upload_id, filename, size, chunk_size,
+                                self.partial_dir / f"{upload_id}.partial", room_id, client)
+        self.sessions[upload_id] = session
+        if client is not None:
+            self._per_client[client] = self._per_client.get(client, 0) + 1
+        self.created += 1
+        return session
+
+    def _forget(self, session: UploadSession):
+        if self.sessions.pop(session.upload_id, None) is None or session.client is None:
+            return
+        remaining = self._per_client.get(session.client, 0) - 1
+        if remaining > 0:
+            self._per_client[session.client] = remaining
+        else:
+            self._per_client.pop(session.client, None)
+
+    def _acquire(self, session: UploadSession) -> int:
+        """부분 파일 fd (없으면 열기) - 다 쓰면 _release"""
+        if session.fd < 0:
+            session.fd = os.open(session.path, os.O_RDWR)
+            self.fd_opens += 1
+        session.fd_users += 1
+        self._open[session.upload_id] = session
+        self._open.move_to_end(session.upload_id)
+        self._trim()
+        return session.fd
+
+    def _release(self, session: UploadSession):
+        session.fd_users -= 1
+        if session.discarded and session.fd_users == 0:
+            self._close(session)
+        else:
+            self._trim()
+
+    def _trim(self):
+        # 한도를 넘으면 오래 안 쓴 fd부터 닫음 (스레드에서 사용 중인 fd는 건너뜀)
+        if len(self._open) <= self.max_open:
+            return
+        for session in list(self._open.values()):
+            if len(self._open) <= self.max_open:
+                break
+            if session.fd_users == 0:
+                self._close(session)
+
+    def _close(self, session: UploadSession):
+        self._open.pop(session.upload_id, None)
+        session.close()
+
+    def get(self, upload_id: str) -> UploadSession:
+        session = self.sessions.get(upload_id)
+        if session is None:
+            raise UploadError(404, "업로드 세션을 찾을 수 없습니다")
+        session.touched = time.monotonic()
+        return session
+
+    async def write_chunk(self, session: UploadSession, index: int, body: AsyncIterator[bytes],
+                          expected_hash: Optional[str] = None) -> str:
+        """청크 하나 기록 - 청크 sha256 반환 (이미 받은 청크면 본문을 읽지 않고 기존 해시)"""
+        if not 0 <= index < session.total_chunks:
+            raise UploadError(400, "청크 번호가 범위를 벗어났습니다")
+        if session.committing:
+            raise UploadError(409, "이미 완료 처리 중인 업로드입니다")
+        if index in session.received:
+            return session.received[index]
+        if index in session.writing:
+            raise UploadError(409, "같은 청크를 전송 중입니다")
+
+        loop = asyncio.get_running_loop()
+        length = session.chunk_length(index)
+        offset = index * session.chunk_size
+        sha256 = hashlib.sha256()
+        written = 0
+        pieces: List[bytes] = []
+        batched = 0
+        session.writing.add(index)
+        fd = None
+        try:
+            async for piece in body:
+                if not piece:
+                    continue
+                if written + batched + len(piece) > length:
+                    raise UploadError(400, f"청크 {index}의 크기가 {length}바이트를 넘습니다")
+                pieces.append(piece)
+                batched += len(piece)
+                if batched >= WRITE_BATCH or len(pieces) >= WRITE_BATCH_PIECES:
+                    if fd is None:
+                        fd = self._acquire(session)
+                    written += await loop.run_in_executor(None, _write_pieces, fd, pieces,
+                                                          offset + written, sha256)
+                    pieces, batched = [], 0
+            if pieces:
+                if fd is None:
+                    fd = self._acquire(session)
+                written += await loop.run_in_executor(None, _write_pieces, fd, pieces,
+                                                      offset + written, sha256)
+            if written != length:
+                raise UploadError(400, f"청크 {index}는 {length}바이트여야 합니다 (받은 크기 {written})")
+            digest = sha256.hexdigest()
+            if expected_hash and expected_hash.lower() != digest:
+                self.hash_mismatches += 1
+                raise UploadError(422, f"청크 {index}의 해시가 일치하지 않습니다")
+        finally:
+            session.writing.discard(index)
+            if fd is not None:
+                self._release(session)
+        if session.discarded:
+            raise UploadError(404, "업로드 세션을 찾을 수 없습니다")
+
+        session.received[index] = digest
+        session.touched = time.monotonic()
+        self.chunks += 1
+        self.chunk_bytes += length
+        asyncio.ensure_future(self._advance_hash(session))
+        return digest
+
+    async def _advance_hash(self, session: UploadSession):
+        """앞에서부터 이어진 청크를 전체 해시에 반영 (순서대로, 한 번에 하나만)"""
+        async with session.hash_lock:
+            loop = asyncio.get_running_loop()
+            while session.hashed_chunks in session.received and not session.discarded:
+                start = session.hashed_chunks
+                end = start
+                while end + 1 in session.received:
+                    end += 1
+                offset = start * session.chunk_size
+                length = min(session.size, (end + 1) * session.chunk_size) - offset
+                try:
+                    fd = self._acquire(session)
+                    try:
+                        await loop.run_in_executor(None, _hash_range, fd, session.file_hash, offset, length)
+                    finally:
+                        self._release(session)
+                except OSError as e:
+                    # 세션이 취소되어 파일이 지워진 경우 등 - commit이 다시 시도하다 실패하면 클라이언트에 오류로 전달
+                    if not session.discarded:
+                        print(f'[ERROR] 업로드 {session.upload_id} 해시 계산 실패: {e}')
+                    return
+                session.hashed_chunks = end + 1
+
+    async def commit(self, session: UploadSession, expected_hash: Optional[str],
+                     store: Callable[[Path, str], Awaitable[object]]) -> str:
+        """모든 청크가 있으면 전체 해시 확인 후 store(부분 파일 경로, 해시)로 넘김 - 전체 sha256 반환"""
+        if session.writing:
+            raise UploadError(409, "전송 중인 청크가 있습니다")
+        missing = missing_ranges(session.total_chunks, set(session.received))
+        if missing and session.size > 0:
+            raise UploadError(409, f"빠진 청크가 있습니다: {missing[:10]}")
+        if session.committing:
+            raise UploadError(409, "이미 완료 처리 중인 업로드입니다")
+
+        session.committing = True
+        try:
+            await self._advance_hash(session)
+            if session.hashed_chunks < session.total_chunks and session.size > 0:
+                raise UploadError(500, "전체 해시를 계산하지 못했습니다")
+            digest = session.file_hash.hexdigest()
+            if expected_hash and expected_hash.lower() != digest:
+                self.hash_mismatches += 1
+                raise UploadError(422, "전체 파일 해시가 일치하지 않습니다")
+            fd = self._acquire(session)
+            try:
+                await asyncio.get_running_loop().run_in_executor(None, os.fsync, fd)
+            finally:
+                self._release(session)
+            self._close(session)
+            # 같은 파일 시스템 안에서 이름만 바꾸거나, 이미 있는 내용이면 부분 파일 삭제 (복사 없음)
+            await store(session.path, digest)
+        except BaseException:
+            session.committing = False
+            raise
+
+        self._forget(session)
+        self.committed += 1
+        return digest
+
+    def abort(self, session: UploadSession):
+        self._forget(session)
+        self._discard(session)
+
+    def _discard(self, session: UploadSession):
+        # 스레드에서 사용 중인 fd는 작업이 끝날 때(_release) 닫음 (파일은 지금 지워도 fd로는 계속 접근 가능)
+        session.discarded = True
+        if session.fd_users == 0:
+            self._close(session)
+        try:
+            os.remove(session.path)
+        except FileNotFoundError:
+            pass
+
+    def expire(self, now: Optional[float] = None):
+        """TTL 동안 활동이 없던 세션 삭제 (UPLOAD_SWEEP_INTERVAL마다, 세션 수가 한도에 닿았을 때 확인)"""
+        now = time.monotonic() if now is None else now
+        for session in list(self.sessions.values()):
+            if now - session.touched > self.ttl and not session.writing and not session.committing:
+                self._forget(session)
+                self._discard(session)
+                self.expired += 1
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(UPLOAD_SWEEP_INTERVAL)
+            self.expire()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "active": len(self.sessions),
+            "created": self.created,
+            "committed": self.committed,
+            "expired": self.expired,
+            "rejected": self.rejected,
+            "open_files": len(self._open),
+            "fd_opens": self.fd_opens,
+            "chunks": self.chunks,
+            "chunk_bytes": self.chunk_bytes,
+            "hash_mismatches": self.hash_mismatches,
+        }
@@ -15,6 +15,8 @@ from pydantic import BaseModel
 import tempfile
 import time
 
+from metrics import media_stage_duration
+
 router = APIRouter(prefix="/api/video", tags=["video"])
 
 # OpenAI 클라이언트 초기화 (lazy initialization)
@@ -81,14 +83,16 @@ def extract_key_frames(video_path: str, num_frames: int = 10) -> List[str]:
 
     key_frames = []
     for idx in frame_indices:
-        cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
-        ret, frame = cap.read()
+        with media_stage_duration.time('video_analysis', 'decode'):
+            cap.set(cv2.CAP_PROP_POS_FRAMES, idx)
+            ret, frame = cap.read()
 
         if ret:
-            # JPEG로 인코딩 (압축률 높임)
-            _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
-            # Base64 인코딩
-            frame_b64 = base64.b64encode(buffer).decode('utf-8')
+            with media_stage_duration.time('video_analysis', 'encode'):
+                # JPEG로 인코딩 (압축률 높임)
+                _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 60])
+                # Base64 인코딩
+                frame_b64 = base64.b64encode(buffer).decode('utf-8')
             key_frames.append(frame_b64)
 
     cap.release()
@@ -154,13 +158,14 @@ async def analyze_video(file: UploadFile = File(...)):
 
     try:
         # 동영상 메타데이터 추출
-        cap = cv2.VideoCapture(tmp_path)
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        duration = frame_count / fps if fps > 0 else 0
-        cap.release()
+        with media_stage_duration.time('video_analysis', 'probe'):
+            cap = cv2.VideoCapture(tmp_path)
+            fps = cap.get(cv2.CAP_PROP_FPS)
+            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            duration = frame_count / fps if fps > 0 else 0
+            cap.release()
 
         # 파일 크기
         file_size = len(content)
@@ -177,7 +182,8 @@ async def analyze_video(file: UploadFile = File(...)):
 
         for i, frame_b64 in enumerate(key_frames):  # 전체 프레임 분석
             print(f"  📸 프레임 {i+1}/{len(key_frames)} 분석 중...")
-            result = analyze_frame_with_gpt(frame_b64)
+            with media_stage_duration.time('video_analysis', 'gpt'):
+                result = analyze_frame_with_gpt(frame_b64)
 
             # "인물 없음" 감지
             description = result["description"]
@@ -31,6 +31,9 @@ interface FileTransferProps {
   myUserId: string;
 }
 
+// 바이너리 중계 시 요청하는 청크 크기 (서버가 FILE_RELAY_MAX_CHUNK 이하로 조정)
+const BINARY_CHUNK_SIZE = 256 * 1024;
+
 interface TransferStats {
   fileName: string;
   fileSize: number;
@@ -169,6 +172,38 @@ export default function FileTransfer({ roomId, socket, myUserId }: FileTransferP
     return new File([blob], response.data.filename, { type: 'audio/mpeg' });
   };
 
+  // 바이너리 청크 전송 - 서버가 보내는 크레딧(모든 수신자가 확인한 마지막 청크) 만큼만 앞서서 전송
+  const sendBinaryChunks = async (file: File, negotiated: any) => {
+    const { transferId, chunkSize, totalChunks, window } = negotiated;
+    let ackedIndex = negotiated.receivers > 0 ? -1 : totalChunks - 1;
+    let wake: (() => void) | null = null;
+
+    const onCredit = (id: string, index: number) => {
+      if (id !== transferId) return;
+      ackedIndex = Math.max(ackedIndex, index);
+      wake?.();
+    };
+    socket.on('file_credit', onCredit);
+
+    try {
+      for (let i = 0; i < totalChunks; i++) {
+        while (i - ackedIndex > window) {
+          await new Promise<void>((resolve) => {
+            wake = resolve;
+          });
+          wake = null;
+        }
+
+        const start = i * chunkSize;
+        const buffer = await file.slice(start, Math.min(start + chunkSize, file.size)).arrayBuffer();
+        socket.emit('file_chunk_bin', transferId, i, buffer);
+        setProgress(((i + 1) / totalChunks) * 100);
+      }
+    } finally {
+      socket.off('file_credit', onCredit);
+    }
+  };
+
   // 파일 전송 (청크 기반)
   const sendFile = async () => {
     if (!selectedFile) return;
@@ -228,48 +263,53 @@ export default function FileTransfer({ roomId, socket, myUserId }: FileTransferP
       toast('파일 해시 계산 중...', { icon: '🔐' });
       const fileHash = await calculateHash(fileToSend);
 
-      // 청크 크기: 16KB (대역폭 최소화)
-      const CHUNK_SIZE = 16 * 1024;
-      const totalChunks = Math.ceil(fileToSend.size / CHUNK_SIZE);
-
-      // 메타데이터 먼저 전송
-      socket.emit('file_transfer_start', {
+      // 바이너리 중계 협상: 서버가 청크 크기와 윈도우(확인 없이 보낼 수 있는 청크 수)를 정해줌
+      const metadata = {
         roomId,
         fileName: fileToSend.name,
         fileSize: fileToSend.size,
         fileType: fileToSend.type,
-        totalChunks,
         hash: fileHash,
         originalSize: originalSize, // 원본 크기도 전송
         compressionQuality: mediaType !== 'other' ? compressionQuality : null,
         mediaType: mediaType,
+      };
+      const negotiated: any = await new Promise((resolve) => {
+        socket.timeout(5000).emit(
+          'file_transfer_start',
+          { ...metadata, binary: true, chunkSize: BINARY_CHUNK_SIZE, totalChunks: Math.ceil(fileToSend.size / BINARY_CHUNK_SIZE) },
+          (err: any, response: any) => resolve(err ? null : response)
+        );
       });
 
-      // 청크 단위로 전송
-      for (let i = 0; i < totalChunks; i++) {
-        const start = i * CHUNK_SIZE;
-        const end = Math.min(start + CHUNK_SIZE, fileToSend.size);
-        const chunk = fileToSend.slice(start, end);
-
-        // ArrayBuffer로 변환
-        const buffer = await chunk.arrayBuffer();
-
-        // Socket.IO로 전송 (binary 모드)
-        socket.emit('file_chunk', {
-          roomId,
-          chunkIndex: i,
-          data: buffer,
-        });
-
-        // 진행률 업데이트
-        setProgress(((i + 1) / totalChunks) * 100);
-
-        // 백프레셔 방지 (10ms 대기)
-        await new Promise(resolve => setTimeout(resolve, 10));
+      if (negotiated?.transferId) {
+        await sendBinaryChunks(fileToSend, negotiated);
+      } else {
+        // 바이너리 중계를 지원하지 않는 서버: 기존 방식 (16KB 청크 + 고정 대기)
+        const CHUNK_SIZE = 16 * 1024;
+        const totalChunks = Math.ceil(fileToSend.size / CHUNK_SIZE);
+        socket.emit('file_transfer_start', { ...metadata, totalChunks });
+
+        for (let i = 0; i < totalChunks; i++) {
+          const start = i * CHUNK_SIZE;
+          const end = Math.min(start + CHUNK_SIZE, fileToSend.size);
+          const buffer = await fileToSend.slice(start, end).arrayBuffer();
+
+          socket.emit('file_chunk', {
+            roomId,
+            chunkIndex: i,
+            data: buffer,
+          });
+
+          setProgress(((i + 1) / totalChunks) * 100);
+
+          // 백프레셔 방지 (10ms 대기)
+          await new Promise(resolve => setTimeout(resolve, 10));
+        }
       }
 
       // 전송 완료 신호
-      socket.emit('file_transfer_end', { roomId });
+      socket.emit('file_transfer_end', { roomId, transferId: negotiated?.transferId });
 
       const endTime = Date.now();
       const transferTime = (endTime - startTime) / 1000; // 초
@@ -319,6 +359,14 @@ export default function FileTransfer({ roomId, socket, myUserId }: FileTransferP
       }
     });
 
+    // 바이너리 중계 청크 - 받은 즉시 확인을 보내 송신자에게 크레딧 반환
+    socket.on('file_chunk_bin', (transferId: string, chunkIndex: number, data: ArrayBuffer) => {
+      if (!fileMetadata || fileMetadata.transferId !== transferId) return;
+      receivedChunks[chunkIndex] = data;
+      setProgress(((chunkIndex + 1) / fileMetadata.totalChunks) * 100);
+      socket.emit('file_chunk_ack', transferId, chunkIndex);
+    });
+
     socket.on('file_transfer_end', () => {
       if (fileMetadata && receivedChunks.length > 0) {
         // 청크 합치기
@@ -340,12 +388,20 @@ export default function FileTransfer({ roomId, socket, myUserId }: FileTransferP
       }
     });
 
+    // 이 패널이 열려 있는 동안만 수신자로 등록 (서버는 등록한 참가자의 확인만 기다림, 재연결 시 다시 등록)
+    const announceReceiver = () => socket.emit('file_receiver', { roomId, ready: true });
+    announceReceiver();
+    socket.on('connect', announceReceiver);
+
     return () => {
+      socket.emit('file_receiver', { roomId, ready: false });
+      socket.off('connect', announceReceiver);
       socket.off('file_transfer_start');
       socket.off('file_chunk');
+      socket.off('file_chunk_bin');
       socket.off('file_transfer_end');
     };
-  }, [socket]);
+  }, [socket, roomId]);
 
   // 파일 검증 (모달로 표시)
   const verifyFile = async () => {
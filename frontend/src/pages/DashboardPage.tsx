@@ -17,7 +17,7 @@ import {
 } from '@heroicons/react/24/outline';
 import { useAuth } from '@/contexts/AuthContext';
 import { roomApi } from '@/utils/api';
-import type { Room } from '@/types';
+import type { Room, RoomListUpdate } from '@/types';
 import toast from 'react-hot-toast';
 import io, { Socket } from 'socket.io-client';
 import { createSocket } from "@/utils/socket";
@@ -31,7 +31,9 @@ export default function DashboardPage() {
   const [showPersonalCode, setShowPersonalCode] = useState(false);
   const [showSettings, setShowSettings] = useState(false);
   const [newRoomName, setNewRoomName] = useState('');
+  const [newRoomSfu, setNewRoomSfu] = useState(false);  // 서버 중계(SFU) 모드 - 인원이 많은 회의용
   const socketRef = useRef<Socket | null>(null);
+  const roomListVersionRef = useRef(0);
   
 
   // 방 목록 불러오기
@@ -49,7 +51,22 @@ export default function DashboardPage() {
       console.log("✅ Socket.IO 연결 성공 (대시보드)");
     });
 
-    socketRef.current.on("room_list_updated", () => {
+    socketRef.current.on("room_list_updated", (update?: RoomListUpdate) => {
+      const expectedVersion = roomListVersionRef.current + 1;
+      roomListVersionRef.current = update?.version ?? 0;
+
+      // 참가자 수만 바뀌었고 놓친 이벤트가 없으면 재조회 없이 반영
+      if (update && !update.full && update.version === expectedVersion) {
+        setRooms((prev) =>
+          prev.map((room) =>
+            room.id in update.counts
+              ? { ...room, participantCount: update.counts[room.id] }
+              : room
+          )
+        );
+        return;
+      }
+
       console.log("📢 방 목록 업데이트 알림 수신 - 새로고침");
       fetchRooms();
     });
@@ -93,6 +110,7 @@ export default function DashboardPage() {
       const room = await roomApi.createRoom({
         name: newRoomName,
         maxParticipants: 100,
+        mediaMode: newRoomSfu ? 'sfu' : 'mesh',
       });
       
       console.log('방 생성 성공:', room);
@@ -100,6 +118,7 @@ export default function DashboardPage() {
       toast.success('방이 생성되었습니다!');
       setShowCreateModal(false);
       setNewRoomName('');
+      setNewRoomSfu(false);
       
       // 방 목록 새로고침
       await fetchRooms();
@@ -272,7 +291,8 @@ export default function DashboardPage() {
                       </h3>
 
                       <p className="text-sm text-gray-400">
-                        {(room as any).participantCount || 0}/{room.maxParticipants}명 참가 중
+                        {room.participantCount || 0}/{room.maxParticipants}명 참가 중
+                        {room.mediaMode === 'sfu' && ' · SFU'}
                       </p>
                     </div>
                     <VideoCameraIcon className="w-5 h-5 text-discord-brand" />
@@ -356,6 +376,17 @@ export default function DashboardPage() {
                 />
               </div>
 
+              <div className="mb-4">
+                <label className="flex items-center gap-2 text-sm text-gray-600 dark:text-gray-300">
+                  <input
+                    type="checkbox"
+                    checked={newRoomSfu}
+                    onChange={(e) => setNewRoomSfu(e.target.checked)}
+                  />
+                  서버 중계 (SFU) - 참가자가 많을 때 업로드를 한 번만 보냄
+                </label>
+              </div>
+
               <div className="flex gap-3">
                 <button
                   onClick={handleCreateRoom}
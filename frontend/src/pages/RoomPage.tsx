@@ -26,6 +26,8 @@ import {
 } from '@heroicons/react/24/solid';
 import { useAuth } from '@/contexts/AuthContext';
 import { NativeWebRTCConnection } from '@/utils/webrtc-native';
+import { SfuSession } from '@/utils/sfu-client';
+import { MEDIA_LAYERS, MEDIA_STATS_INTERVAL_MS, ReceiveStatsCollector } from '@/utils/media-stats';
 import { roomApi } from '@/utils/api';
 import type { Socket } from 'socket.io-client';
 import toast from 'react-hot-toast';
@@ -34,6 +36,25 @@ import WebcamCompression from '@/components/WebcamCompression';
 import WebcamEffects from '@/components/WebcamEffects';
 import { createSocket } from "@/utils/socket";
 
+// ICE 후보를 모아서 보내는 시간 (ms) - 수집 직후 몰려 나오는 후보를 한 이벤트로 묶음
+const ICE_BATCH_MS = 5;
+
+/**
+ * 채팅 목록 병합 - 서버 ts가 있는 메시지는 ts로 중복 제거 후 정렬 (ack 전의 내 메시지는 맨 뒤 유지)
+ */
+const mergeMessages = (...lists: any[][]): any[] => {
+  const byTs = new Map<number, any>();
+  const unsent: any[] = [];
+  lists.flat().forEach((message) => {
+    if (message.ts == null) {
+      unsent.push(message);
+    } else {
+      byTs.set(message.ts, message);
+    }
+  });
+  return [...Array.from(byTs.values()).sort((a, b) => a.ts - b.ts), ...unsent];
+};
+
 interface VideoStream {
   userId: string;
   username: string;
@@ -56,6 +77,7 @@ export default function RoomPage() {
   const [participants, setParticipants] = useState<VideoStream[]>([]);
   const [messages, setMessages] = useState<any[]>([]);
   const [messageInput, setMessageInput] = useState('');
+  const [chatCursor, setChatCursor] = useState<string | null>(null);  // 더 이전 채팅 기록 커서
   const [showSettings, setShowSettings] = useState(false);
   const [currentVideoTrack, setCurrentVideoTrack] = useState<MediaStreamTrack | null>(null);
   const [originalVideoTrack, setOriginalVideoTrack] = useState<MediaStreamTrack | null>(null);
@@ -70,6 +92,17 @@ export default function RoomPage() {
   const localStreamRef = useRef<MediaStream | null>(null);
   // ✅ 참가자 정보 저장 (username 등) - 연결 전에 정보를 알기 위함
   const participantInfoRef = useRef<Map<string, { username: string; userInfo: any }>>(new Map());
+  // 서버 명단 버전 (재접속 시 변경분만 받기 위해 유지)
+  const rosterVersionRef = useRef<number | null>(null);
+  // 상대별로 모아 둔 ICE 후보 (ICE_BATCH_MS 동안 모아서 webrtc_ice_candidates로 전송)
+  const pendingIceRef = useRef<Map<string, RTCIceCandidateInit[]>>(new Map());
+  // SFU 모드 방이면 P2P 연결 대신 서버 연결 사용 (room_media_mode 이벤트로 시작)
+  const sfuRef = useRef<SfuSession | null>(null);
+  // 화질 레이어 조정을 지원하는 상대 (offer/answer에 layers를 보냄) - media_stats의 viewports 대상
+  const adaptiveSendersRef = useRef<Set<string>>(new Set());
+  // 상대별 비디오 요소 (표시 높이 측정용)
+  const videoElementsRef = useRef<Map<string, HTMLVideoElement>>(new Map());
+  const mediaStatsTimerRef = useRef<ReturnType<typeof setInterval> | null>(null);
 
   // 컴포넌트 마운트 시 초기화
   useEffect(() => {
@@ -220,12 +253,70 @@ export default function RoomPage() {
       console.log("✅ Socket.IO 연결 성공, Socket ID:", socket.id);
       socketIdRef.current = socket.id;
 
+      // 재접속이면 서버가 이전 SFU 연결을 정리했으므로 join 이후 새로 시작
+      sfuRef.current?.close();
+      sfuRef.current = null;
+
       socket.emit("join_room", {
         roomId,
         userInfo: { id: user?.id, username: user?.username, email: user?.email },
+        rosterVersion: rosterVersionRef.current,
+        iceBatch: true,
       });
     });
 
+    // 명단 버전 추적 - 중간 버전이 빠졌으면 서버에 변경분 요청
+    const trackRosterVersion = (version?: number | null) => {
+      if (version == null) return;
+      const current = rosterVersionRef.current;
+      if (current !== null && version > current + 1) {
+        socket.emit('roster_sync', { roomId, version: current }, applyRosterSync);
+        return;
+      }
+      if (current === null || version > current) {
+        rosterVersionRef.current = version;
+      }
+    };
+
+    // 명단 동기화 (join 응답 또는 roster_sync 요청 결과) - delta 또는 snapshot
+    const applyRosterSync = (sync: any) => {
+      if (!sync) return;
+      const added: any[] = sync.mode === 'snapshot' ? sync.participants : sync.added;
+      const removed: string[] = sync.mode === 'snapshot'
+        ? Array.from(participantInfoRef.current.keys()).filter(
+            (userId) => !added.some((p) => p.userId === userId)
+          )
+        : sync.removed;
+
+      added.forEach(({ userId, userInfo }) => {
+        if (userId && userId !== socketIdRef.current) {
+          participantInfoRef.current.set(userId, { username: userInfo?.username || 'User', userInfo });
+        }
+      });
+      removed.forEach((userId) => removeParticipant(userId, false));
+
+      if (sync.version != null) {
+        rosterVersionRef.current = sync.version;
+      }
+      console.log(`[roster_sync] ${sync.mode}: +${added.length} -${removed.length} (v${sync.version})`);
+    };
+
+    socket.on('roster_sync', applyRosterSync);
+
+    // 서버가 고른 화질 레이어 - 해당 상대와의 연결 인코딩만 변경 (메시)
+    socket.on('media_layer', ({ to, scaleResolutionDownBy, maxBitrate }: any) => {
+      connectionsRef.current.get(to)?.setLayer(scaleResolutionDownBy, maxBitrate).catch(console.error);
+    });
+    startMediaStats(socket);
+
+    // SFU 모드 방 - join_room 직후 다른 이벤트보다 먼저 도착
+    socket.on('room_media_mode', ({ mode }: any) => {
+      console.log('[room_media_mode]', mode);
+      if (mode === 'sfu' && !sfuRef.current) {
+        startSfu(socket);
+      }
+    });
+
     // 단일 connect_error 핸들러
     socket.on("connect_error", (error: any) => {
       console.error("❌ Socket.IO 연결 에러:", error);
@@ -233,8 +324,9 @@ export default function RoomPage() {
     });
 
     // 새 사용자 참가 - initiator 역할을 socketId 정렬로 결정
-    socket.on('user_joined', ({ userId, userInfo }: any) => {
+    socket.on('user_joined', ({ userId, userInfo, rosterVersion }: any) => {
       console.log('[user_joined] 새 사용자 참가:', userInfo?.username, 'userId:', userId, 'myId:', socketIdRef.current);
+      trackRosterVersion(rosterVersion);
 
       if (!socketIdRef.current) return;
 
@@ -245,6 +337,9 @@ export default function RoomPage() {
         // 참가자 정보 저장
         participantInfoRef.current.set(userId, { username: userInfo?.username || 'User', userInfo });
 
+        // SFU 모드에서는 서버가 새 참가자의 트랙을 구독 연결로 보내줌
+        if (sfuRef.current) return;
+
         // 기존 연결이 있으면 정리 (재입장 케이스)
         const existingConnection = connectionsRef.current.get(userId);
         if (existingConnection) {
@@ -278,14 +373,13 @@ export default function RoomPage() {
       }
     });
 
-    // ✅ 사용자 나감 - 해당 사용자 연결만 정리 (다른 연결에 영향 없음)
-    socket.on('user_left', ({ userId }: any) => {
-      console.log('[user_left] 사용자 나감:', userId);
-      
+    // ✅ 참가자 정리 - 해당 사용자 연결만 정리 (다른 연결에 영향 없음)
+    const removeParticipant = (userId: string, notify: boolean) => {
       if (userId && userId !== socketIdRef.current) {
         // 참가자 정보 가져오기 및 삭제
         const info = participantInfoRef.current.get(userId);
         participantInfoRef.current.delete(userId);
+        adaptiveSendersRef.current.delete(userId);
         
         // ✅ P2P 연결 정리 (먼저 정리)
         const connection = connectionsRef.current.get(userId);
@@ -297,24 +391,44 @@ export default function RoomPage() {
         }
         
         // ✅ toast를 setParticipants 밖으로 이동 (React 렌더링 경고 방지)
-        const username = info?.username || 'User';
-        setTimeout(() => {
-          toast(`${username}님이 나갔습니다`, { icon: '👋' });
-        }, 0);
+        if (notify) {
+          const username = info?.username || 'User';
+          setTimeout(() => {
+            toast(`${username}님이 나갔습니다`, { icon: '👋' });
+          }, 0);
+        }
         
         // 참가자 목록에서 제거
         setParticipants(prev => prev.filter(p => p.userId !== userId));
       }
+    };
+
+    // ✅ 사용자 나감
+    socket.on('user_left', ({ userId, rosterVersion }: any) => {
+      console.log('[user_left] 사용자 나감:', userId);
+      trackRosterVersion(rosterVersion);
+      removeParticipant(userId, true);
     });
 
     // WebRTC 시그널링
-    socket.on('webrtc_offer', ({ from, offer }: any) => {
+    const trackAdaptiveSender = (from: string, layers?: string[] | null) => {
+      if (layers && layers.length > 0) {
+        adaptiveSendersRef.current.add(from);
+      } else {
+        adaptiveSendersRef.current.delete(from);
+      }
+    };
+
+    socket.on('webrtc_offer', ({ from, offer, layers }: any) => {
       console.log('[webrtc_offer] Offer 수신:', from);
+      if (sfuRef.current) return;
+      trackAdaptiveSender(from, layers);
       handleWebRTCOffer(from, offer);
     });
 
-    socket.on('webrtc_answer', ({ from, answer }: any) => {
+    socket.on('webrtc_answer', ({ from, answer, layers }: any) => {
       console.log('[webrtc_answer] Answer 수신:', from);
+      trackAdaptiveSender(from, layers);
       handleWebRTCAnswer(from, answer);
     });
 
@@ -322,12 +436,87 @@ export default function RoomPage() {
       handleWebRTCIceCandidate(from, candidate);
     });
 
+    socket.on('webrtc_ice_candidates', ({ from, candidates }: any) => {
+      (candidates || []).forEach((candidate: RTCIceCandidateInit) => handleWebRTCIceCandidate(from, candidate));
+    });
+
     // 채팅 메시지
     socket.on('chat_message', (message: any) => {
-      setMessages(prev => [...prev, message]);
+      setMessages(prev => mergeMessages(prev, [message]));
+    });
+
+    // 입장 시 최근 채팅 재생 (재접속이면 이미 본 메시지와 ts로 병합)
+    socket.on('chat_history', ({ messages: recent, nextCursor }: any) => {
+      setMessages(prev => mergeMessages(recent || [], prev));
+      setChatCursor(nextCursor || null);
     });
   };
 
+  // SFU 세션 시작 - 송출자별 스트림을 참가자 목록에 반영
+  const startSfu = (socket: Socket) => {
+    const session = new SfuSession(socket, roomId!);
+    session.setOnStream((userId, stream) => {
+      if (!stream) {
+        setParticipants(prev => prev.filter(p => p.userId !== userId));
+        return;
+      }
+      const username = participantInfoRef.current.get(userId)?.username || 'User';
+      console.log(`[SFU] 원격 스트림 수신: ${username} (${userId})`);
+      setParticipants(prev => {
+        const filtered = prev.filter(p => p.userId !== userId);
+        return [...filtered, { userId, username, stream, isMuted: false, isVideoOff: false }];
+      });
+    });
+    sfuRef.current = session;
+
+    session.publish(localStreamRef.current || undefined).catch((error) => {
+      console.error('[SFU] 송출 실패:', error);
+      toast.error('SFU 서버 연결에 실패했습니다');
+    });
+  };
+
+  // 수신 품질 보고 - 서버가 상대별 화질 레이어를 고름 (메시는 layers를 보낸 상대만, SFU는 전체)
+  const startMediaStats = (socket: Socket) => {
+    if (mediaStatsTimerRef.current) {
+      clearInterval(mediaStatsTimerRef.current);
+    }
+    const collector = new ReceiveStatsCollector();
+
+    mediaStatsTimerRef.current = setInterval(async () => {
+      if (!socket.connected) return;
+      const sfu = sfuRef.current;
+      const connections = sfu
+        ? [sfu.subscribeConnection]
+        : Array.from(connectionsRef.current.values()).map((connection) => connection.peerConnection);
+
+      const viewports: Record<string, number> = {};
+      videoElementsRef.current.forEach((element, userId) => {
+        if (sfu || adaptiveSendersRef.current.has(userId)) {
+          viewports[userId] = Math.round(element.clientHeight * window.devicePixelRatio);
+        }
+      });
+      if (Object.keys(viewports).length === 0) return;
+
+      const stats = await collector.collect(connections.filter((pc): pc is RTCPeerConnection => !!pc));
+      socket.emit('media_stats', { roomId, ...stats, viewports });
+    }, MEDIA_STATS_INTERVAL_MS);
+  };
+
+  // ICE 후보 묶음 전송 - 같은 상대의 후보를 ICE_BATCH_MS 동안 모아 한 이벤트로
+  const queueIceCandidate = (to: string, candidate: RTCIceCandidateInit) => {
+    const pending = pendingIceRef.current.get(to);
+    if (pending) {
+      pending.push(candidate);
+      return;
+    }
+    pendingIceRef.current.set(to, [candidate]);
+    setTimeout(() => {
+      const candidates = pendingIceRef.current.get(to) || [];
+      pendingIceRef.current.delete(to);
+      socketRef.current?.emit('webrtc_ice_candidates', { to, candidates });
+    }, ICE_BATCH_MS);
+  };
+
   // ✅ P2P 연결 생성 (단순화됨)
   const createPeerConnection = async (userId: string, username: string, isInitiator: boolean) => {
     // 이미 연결이 있으면 스킵
@@ -341,12 +530,7 @@ export default function RoomPage() {
     const connection = new NativeWebRTCConnection(userId, isInitiator);
     
     // ICE candidate 콜백
-    connection.setOnIceCandidate((candidate) => {
-      socketRef.current?.emit('webrtc_ice_candidate', {
-        to: userId,
-        candidate,
-      });
-    });
+    connection.setOnIceCandidate((candidate) => queueIceCandidate(userId, candidate));
 
     // 원격 스트림 수신 콜백
     connection.setOnStream((stream) => {
@@ -375,6 +559,7 @@ export default function RoomPage() {
         socketRef.current?.emit('webrtc_offer', {
           to: userId,
           offer,
+          layers: MEDIA_LAYERS,
         });
         console.log(`[createPeerConnection] Offer 전송 완료: ${userId}`);
       } catch (error) {
@@ -422,12 +607,7 @@ export default function RoomPage() {
         console.log(`[handleWebRTCOffer] 새 연결 생성: ${from}`);
         connection = new NativeWebRTCConnection(from, false);
         
-        connection.setOnIceCandidate((candidate) => {
-          socketRef.current?.emit('webrtc_ice_candidate', {
-            to: from,
-            candidate,
-          });
-        });
+        connection.setOnIceCandidate((candidate) => queueIceCandidate(from, candidate));
 
         connection.setOnStream((stream) => {
           console.log(`[handleWebRTCOffer] 스트림 수신: ${username} (${from})`);
@@ -452,6 +632,7 @@ export default function RoomPage() {
       socketRef.current?.emit('webrtc_answer', {
         to: from,
         answer,
+        layers: MEDIA_LAYERS,
       });
       console.log(`[handleWebRTCOffer] Answer 전송: ${from}`);
     } catch (error) {
@@ -574,6 +755,7 @@ export default function RoomPage() {
             connectionsRef.current.forEach(connection => {
               connection.toggleScreenShare(true, screenTrack, originalVideoTrack).catch(console.error);
             });
+            sfuRef.current?.replaceVideoTrack(screenTrack).catch(console.error);
           }
         }
 
@@ -625,6 +807,7 @@ export default function RoomPage() {
         connectionsRef.current.forEach(connection => {
           connection.toggleScreenShare(false, undefined, originalVideoTrack).catch(console.error);
         });
+        sfuRef.current?.replaceVideoTrack(originalVideoTrack).catch(console.error);
       }
       
       setIsScreenSharing(false);
@@ -668,6 +851,10 @@ export default function RoomPage() {
     });
     connectionsRef.current.clear();
 
+    // SFU 연결 종료
+    sfuRef.current?.close();
+    sfuRef.current = null;
+
     // ✅ 참가자 정보 정리
     participantInfoRef.current.clear();
 
@@ -684,6 +871,13 @@ export default function RoomPage() {
     setCurrentVideoTrack(null);
     setOriginalVideoTrack(null);
 
+    // 수신 품질 보고 중단
+    if (mediaStatsTimerRef.current) {
+      clearInterval(mediaStatsTimerRef.current);
+      mediaStatsTimerRef.current = null;
+    }
+    adaptiveSendersRef.current.clear();
+
     // Socket 연결 종료
     if (socketRef.current) {
       socketRef.current.removeAllListeners();
@@ -713,15 +907,39 @@ export default function RoomPage() {
       timestamp: new Date().toISOString(),
     };
 
+    // ack의 ts로 재생/재접속 시 중복을 걸러냄
     socketRef.current?.emit('chat_message', {
       roomId,
       message,
+    }, (ack: any) => {
+      if (ack?.error === 'rate_limited') {
+        // 서버가 전달하지 않은 메시지 - 로컬에서도 제거
+        setMessages(prev => prev.filter(m => m !== message));
+        toast.error('메시지를 너무 빠르게 보내고 있습니다. 잠시 후 다시 시도하세요');
+        return;
+      }
+      if (ack?.ts) {
+        setMessages(prev => mergeMessages(prev.map(m => (m === message ? { ...m, ts: ack.ts } : m))));
+      }
     });
 
     setMessages(prev => [...prev, message]);
     setMessageInput('');
   };
 
+  // 이전 채팅 기록 불러오기
+  const loadEarlierMessages = async () => {
+    if (!roomId || !chatCursor) return;
+    try {
+      const page = await roomApi.getMessages(roomId, chatCursor);
+      setMessages(prev => mergeMessages(page.messages, prev));
+      setChatCursor(page.nextCursor);
+    } catch (error) {
+      console.error('채팅 기록 조회 실패:', error);
+      toast.error('이전 메시지를 불러오지 못했습니다');
+    }
+  };
+
   // 비디오 그리드 클래스 계산
   const getGridClass = () => {
     const count = participants.length + 1; // +1 for local video
@@ -887,7 +1105,12 @@ export default function RoomPage() {
                   autoPlay
                   playsInline
                   ref={(el) => {
-                    if (el) el.srcObject = participant.stream;
+                    if (el) {
+                      el.srcObject = participant.stream;
+                      videoElementsRef.current.set(participant.userId, el);
+                    } else {
+                      videoElementsRef.current.delete(participant.userId);
+                    }
                   }}
                   className="w-full h-full object-cover bg-discord-darker"
                   poster="data:image/svg+xml,%3Csvg xmlns='http://www.w3.org/2000/svg' width='640' height='480'%3E%3Crect width='640' height='480' fill='%232f3136'/%3E%3Ctext x='50%25' y='50%25' text-anchor='middle' dy='.3em' fill='%23747f8d' font-family='Arial' font-size='20'%3E연결 중...%3C/text%3E%3C/svg%3E"
@@ -1051,6 +1274,14 @@ export default function RoomPage() {
           {sidebarTab === 'chat' && (
             <>
               <div className="flex-1 overflow-y-auto p-4">
+                {chatCursor && (
+                  <button
+                    onClick={loadEarlierMessages}
+                    className="w-full mb-3 text-xs text-gray-500 dark:text-gray-400 hover:text-gray-700 dark:hover:text-white"
+                  >
+                    이전 메시지 더 보기
+                  </button>
+                )}
                 {messages.map((msg, idx) => (
                   <div key={idx} className="chat-message">
                     <div className="flex-1">
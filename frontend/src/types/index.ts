@@ -42,9 +42,19 @@ export interface Room {
   participants: Participant[];  // 참가자 목록
   isPrivate: boolean;           // 비공개 방 여부
   maxParticipants: number;      // 최대 참가자 수
+  participantCount?: number;    // 실시간 참가자 수
+  mediaMode?: 'mesh' | 'sfu';   // 미디어 전달 방식 (mesh: P2P, sfu: 서버 중계)
   createdAt: string;            // 생성 시간
 }
 
+// room_list_updated 이벤트 (서버에서 병합 후 전송)
+export interface RoomListUpdate {
+  version: number;                  // 단조 증가 버전
+  timestamp: number;
+  full: boolean;                    // true면 방 목록 재조회 필요
+  counts: Record<string, number>;   // 참가자 수가 바뀐 방 (roomId -> 인원)
+}
+
 // 참가자 정보 타입
 export interface Participant {
   userId: string;               // 사용자 ID
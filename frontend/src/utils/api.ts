@@ -144,6 +144,7 @@ export const roomApi = {
     name: string;
     isPrivate?: boolean;
     maxParticipants?: number;
+    mediaMode?: 'mesh' | 'sfu';
   }): Promise<Room> {
     const response = await api.post<Room>('/rooms', data);
     return response.data;
@@ -154,6 +155,12 @@ export const roomApi = {
     return response.data;
   },
 
+  // 채팅 기록 - before(이전 페이지의 nextCursor)보다 오래된 메시지, 오래된 것부터
+  async getMessages(roomId: string, before?: string | null): Promise<{ messages: any[]; nextCursor: string | null }> {
+    const response = await api.get(`/rooms/${roomId}/messages`, { params: before ? { before } : {} });
+    return response.data;
+  },
+
   async leaveRoom(roomId: string): Promise<void> {
     await api.post(`/rooms/${roomId}/leave`);
   },
@@ -0,0 +1,66 @@
+/**
+ * 수신 품질 수집 - 서버 화질 레이어 선택(media_stats)용
+ * 모든 수신 연결의 inbound-rtp를 합산해 수신 비트레이트와 손실률을 계산하고,
+ * 브라우저가 제공하면 candidate-pair의 availableIncomingBitrate(대역폭 추정값)를 함께 보냅니다.
+ */
+
+// 레이어 조정을 지원한다는 표시 (webrtc_offer/webrtc_answer의 layers)
+export const MEDIA_LAYERS = ['f', 'h', 'q'];
+
+// media_stats 보고 주기 (ms)
+export const MEDIA_STATS_INTERVAL_MS = 2000;
+
+export interface ReceiveStats {
+  bandwidth: number | null;  // bps, 브라우저 추정값 (없으면 null - 서버가 손실률로 추정)
+  received: number | null;   // bps, 직전 보고 이후 실제 수신량 (첫 수집이면 null)
+  loss: number | null;       // 직전 보고 이후 손실률 (0~1, 첫 수집이면 null)
+}
+
+interface Counters {
+  bytes: number;
+  packets: number;
+  lost: number;
+  time: number;
+}
+
+export class ReceiveStatsCollector {
+  private previous: Counters | null = null;
+
+  async collect(connections: RTCPeerConnection[]): Promise<ReceiveStats> {
+    const current: Counters = { bytes: 0, packets: 0, lost: 0, time: performance.now() };
+    let bandwidth = 0;
+    let hasEstimate = false;
+
+    const reports = await Promise.all(connections.map((pc) => pc.getStats().catch(() => null)));
+    reports.forEach((report) => {
+      report?.forEach((stat: any) => {
+        if (stat.type === 'inbound-rtp') {
+          current.bytes += stat.bytesReceived || 0;
+          current.packets += stat.packetsReceived || 0;
+          current.lost += Math.max(0, stat.packetsLost || 0);
+        } else if (stat.type === 'candidate-pair' && stat.nominated && stat.availableIncomingBitrate) {
+          bandwidth += stat.availableIncomingBitrate;
+          hasEstimate = true;
+        }
+      });
+    });
+
+    const previous = this.previous;
+    this.previous = current;
+    if (!previous) {
+      return { bandwidth: hasEstimate ? bandwidth : null, received: null, loss: null };
+    }
+
+    // 연결이 끊겨 누적값이 줄었으면 이번 구간은 0으로 취급
+    const bytes = Math.max(0, current.bytes - previous.bytes);
+    const packets = Math.max(0, current.packets - previous.packets);
+    const lost = Math.max(0, current.lost - previous.lost);
+    const seconds = (current.time - previous.time) / 1000;
+
+    return {
+      bandwidth: hasEstimate ? bandwidth : null,
+      received: seconds > 0 ? Math.round((bytes * 8) / seconds) : 0,
+      loss: packets + lost > 0 ? lost / (packets + lost) : 0,
+    };
+  }
+}
@@ -0,0 +1,184 @@
+/**
+ * SFU 모드 클라이언트 - mediaMode가 'sfu'인 방에서 사용
+ * 상대마다 P2P 연결을 만드는 대신 서버와 연결 두 개만 유지합니다.
+ * - publish: 내 트랙을 올리는 연결 (내가 offer, sfu_publish ack로 answer 수신)
+ * - subscribe: 다른 참가자 트랙을 받는 연결 (서버가 sfu_offer로 재협상, sfu_answer로 응답)
+ * 서버(aiortc)는 trickle ICE를 쓰지 않으므로 ICE 수집이 끝난 SDP를 주고받습니다.
+ */
+
+import type { Socket } from 'socket.io-client';
+
+const ICE_SERVERS: RTCIceServer[] = [
+  { urls: 'stun:stun.l.google.com:19302' },
+  { urls: 'stun:stun1.l.google.com:19302' },
+];
+
+// ICE 수집 대기 한도 (ms) - 넘으면 그때까지 모인 후보로 전송
+const ICE_GATHER_TIMEOUT_MS = 2000;
+
+type SfuStreams = Record<string, { userId: string; kind: string }>;  // mid -> 송출자
+
+/**
+ * ICE 수집 완료 대기 후 localDescription 반환
+ */
+async function gatheredDescription(pc: RTCPeerConnection): Promise<RTCSessionDescriptionInit> {
+  if (pc.iceGatheringState !== 'complete') {
+    await new Promise<void>((resolve) => {
+      const timer = setTimeout(done, ICE_GATHER_TIMEOUT_MS);
+      function done() {
+        clearTimeout(timer);
+        pc.removeEventListener('icegatheringstatechange', check);
+        resolve();
+      }
+      function check() {
+        if (pc.iceGatheringState === 'complete') done();
+      }
+      pc.addEventListener('icegatheringstatechange', check);
+    });
+  }
+  const { type, sdp } = pc.localDescription!;
+  return { type, sdp };
+}
+
+export class SfuSession {
+  private publishPc: RTCPeerConnection | null = null;
+  private subscribePc: RTCPeerConnection | null = null;
+  private streams: SfuStreams = {};
+  private remoteStreams: Map<string, MediaStream> = new Map();  // 송출자 sid -> 스트림
+
+  // 송출자별 스트림이 바뀔 때 호출 (트랙이 없으면 null)
+  private onStream: ((userId: string, stream: MediaStream | null) => void) | null = null;
+
+  constructor(
+    private readonly socket: Socket,
+    private readonly roomId: string
+  ) {
+    this.socket.on('sfu_offer', this.handleOffer);
+    this.socket.on('sfu_streams', this.handleStreams);
+  }
+
+  /**
+   * 내 트랙 송출 시작 (스트림이 없으면 구독만)
+   */
+  async publish(localStream?: MediaStream): Promise<void> {
+    let offer: RTCSessionDescriptionInit | null = null;
+
+    if (localStream && localStream.getTracks().length > 0) {
+      // 서버 구독 연결과 마찬가지로 전송 경로 하나 (max-bundle)
+      this.publishPc = new RTCPeerConnection({ iceServers: ICE_SERVERS, bundlePolicy: 'max-bundle' });
+      localStream.getTracks().forEach((track) => {
+        this.publishPc!.addTransceiver(track, { direction: 'sendonly', streams: [localStream] });
+      });
+      await this.publishPc.setLocalDescription(await this.publishPc.createOffer());
+      offer = await gatheredDescription(this.publishPc);
+    }
+
+    const result: any = await new Promise((resolve, reject) => {
+      this.socket.timeout(15000).emit(
+        'sfu_publish',
+        { roomId: this.roomId, offer },
+        (err: any, response: any) => (err ? reject(err) : resolve(response))
+      );
+    });
+    if (result?.error) {
+      throw new Error(result.error);
+    }
+    if (this.publishPc && result?.answer) {
+      await this.publishPc.setRemoteDescription(result.answer);
+    }
+    console.log(`[SFU] 송출 시작 (트랙 ${localStream?.getTracks().length || 0}개)`);
+  }
+
+  /**
+   * 송출 중인 비디오 트랙 교체 (화면 공유) - 재협상 없이 replaceTrack
+   */
+  async replaceVideoTrack(track: MediaStreamTrack): Promise<void> {
+    const sender = this.publishPc?.getSenders().find((s) => s.track?.kind === 'video');
+    if (sender) {
+      await sender.replaceTrack(track);
+    }
+  }
+
+  /**
+   * 서버의 구독 재협상 offer (트랙이 추가될 때)
+   */
+  private handleOffer = async ({ offer, streams }: { offer: RTCSessionDescriptionInit; streams: SfuStreams }) => {
+    try {
+      if (!this.subscribePc) {
+        this.subscribePc = new RTCPeerConnection({ iceServers: ICE_SERVERS, bundlePolicy: 'max-bundle' });
+        this.subscribePc.ontrack = () => this.rebuildStreams();
+      }
+      this.streams = streams;
+      await this.subscribePc.setRemoteDescription(offer);
+      await this.subscribePc.setLocalDescription(await this.subscribePc.createAnswer());
+      this.socket.emit('sfu_answer', { answer: await gatheredDescription(this.subscribePc) });
+      this.rebuildStreams();
+    } catch (error) {
+      console.error('[SFU] 구독 재협상 실패:', error);
+    }
+  };
+
+  /**
+   * 슬롯 재사용 등으로 mid -> 송출자 매핑만 바뀐 경우
+   */
+  private handleStreams = ({ streams }: { streams: SfuStreams }) => {
+    this.streams = streams;
+    this.rebuildStreams();
+  };
+
+  /**
+   * mid 매핑대로 송출자별 MediaStream 재구성 (슬롯이 다른 송출자에게 넘어가면 트랙을 옮김)
+   */
+  private rebuildStreams(): void {
+    if (!this.subscribePc) return;
+
+    const tracksByUser = new Map<string, MediaStreamTrack[]>();
+    this.subscribePc.getTransceivers().forEach((transceiver) => {
+      const owner = transceiver.mid ? this.streams[transceiver.mid] : undefined;
+      if (!owner) return;
+      const tracks = tracksByUser.get(owner.userId) || [];
+      tracks.push(transceiver.receiver.track);
+      tracksByUser.set(owner.userId, tracks);
+    });
+
+    // 사라진 송출자
+    Array.from(this.remoteStreams.keys()).forEach((userId) => {
+      if (!tracksByUser.has(userId)) {
+        this.remoteStreams.delete(userId);
+        this.onStream?.(userId, null);
+      }
+    });
+
+    // 새 송출자 또는 트랙 구성이 바뀐 송출자 (video 요소가 다시 그리도록 새 MediaStream)
+    tracksByUser.forEach((tracks, userId) => {
+      const current = this.remoteStreams.get(userId);
+      const unchanged = current
+        && current.getTracks().length === tracks.length
+        && tracks.every((track) => current.getTracks().includes(track));
+      if (unchanged) return;
+      const stream = new MediaStream(tracks);
+      this.remoteStreams.set(userId, stream);
+      this.onStream?.(userId, stream);
+    });
+  }
+
+  // 수신 품질 수집용 (media_stats)
+  get subscribeConnection(): RTCPeerConnection | null {
+    return this.subscribePc;
+  }
+
+  setOnStream(callback: (userId: string, stream: MediaStream | null) => void): void {
+    this.onStream = callback;
+  }
+
+  close(): void {
+    this.socket.off('sfu_offer', this.handleOffer);
+    this.socket.off('sfu_streams', this.handleStreams);
+    this.publishPc?.close();
+    this.subscribePc?.close();
+    this.publishPc = null;
+    this.subscribePc = null;
+    this.remoteStreams.clear();
+    console.log('[SFU] 연결 종료');
+  }
+}
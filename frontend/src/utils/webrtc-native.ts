@@ -337,6 +337,23 @@ export class NativeWebRTCConnection {
     }
   }
 
+  /**
+   * 이 상대에게 보내는 영상 화질 변경 (서버 media_layer) - 재협상 없이 인코딩 파라미터만 교체
+   */
+  async setLayer(scaleResolutionDownBy: number, maxBitrate: number): Promise<void> {
+    const sender = this.pc?.getSenders().find(s => s.track?.kind === 'video');
+    if (!sender) return;
+
+    const parameters = sender.getParameters();
+    if (!parameters.encodings || parameters.encodings.length === 0) {
+      parameters.encodings = [{}];
+    }
+    parameters.encodings[0].scaleResolutionDownBy = scaleResolutionDownBy;
+    parameters.encodings[0].maxBitrate = maxBitrate;
+    await sender.setParameters(parameters);
+    console.log(`[WebRTC] 화질 레이어 변경: 1/${scaleResolutionDownBy}, ${Math.round(maxBitrate / 1000)}kbps`);
+  }
+
   /**
    * 연결 종료
    */